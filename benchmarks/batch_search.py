@@ -0,0 +1,129 @@
+"""Benchmark: N related searches, N sequential tool calls vs one batched call.
+
+Agents often send a few phrasings of one question back to back.  "before"
+calls search_code / search_docs once per query: one embedding request and
+one ChromaDB query each.  "after" is search_code_batch /
+search_docs_batch: the queries are embedded in one request, ranked with
+one multi-vector query per collection and, for code, hydrated from
+DuckDB with one IN query.  The embedding server is simulated by a backend
+that sleeps --embed-ms per request plus --per-text-ms per text, so no
+Ollama is needed; the query cache is disabled so every repeat embeds.
+mode="vector", so the DuckDB fts extension is not needed either.
+
+Run as:
+    python -m benchmarks.batch_search
+    python -m benchmarks.batch_search --queries 6 --embed-ms 60
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from src import duckdb_pool, embed_backend, pooled_vectors
+from src.duckdb_bulk import insert_rows
+from src.embed_cache import QueryEmbeddingCache
+from src.mitgcm import tools
+from src.mitgcm.embedder.store import COLLECTION_NAME, DOCS_COLLECTION_NAME, POOLED_COLLECTION_NAME
+from src.mitgcm.indexer.schema import KEYS, connect
+
+_DIM = 768
+_PHRASINGS = ["non-hydrostatic pressure solve", "conjugate gradient 3d solver", "cg3d convergence",
+              "elliptic solver for pressure", "nonhydrostatic pressure correction", "solver tolerance",
+              "surface pressure inversion", "implicit free surface"]
+
+
+class _SlowBackend:
+    """Stands in for Ollama: fixed request latency plus a per-text cost, random unit vectors."""
+
+    name = "simulated"
+    model_id = "simulated"
+
+    def __init__(self, request_ms: float, per_text_ms: float):
+        self.request_ms = request_ms
+        self.per_text_ms = per_text_ms
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        time.sleep((self.request_ms + self.per_text_ms * len(texts)) / 1e3)
+        return [_vector(np.random.default_rng(zlib.crc32(t.encode()))).tolist() for t in texts]
+
+
+def _vector(rng: np.random.Generator, n: int | None = None) -> np.ndarray:
+    v = rng.standard_normal((n or 1, _DIM))
+    v /= np.linalg.norm(v, axis=1, keepdims=True)
+    return v if n else v[0]
+
+
+def _build(tmp: Path, n: int) -> tuple[Path, Path]:
+    rng = np.random.default_rng(0)
+    db_path = tmp / "index.duckdb"
+    con = connect(db_path)
+    insert_rows(
+        con, "subroutines", ["id", "name", "file", "package", "line_start", "line_end", "source_text"],
+        [(i, f"SUB_{i}", f"pkg/sub_{i}.F", "pkg", 1, 60, "") for i in range(1, n + 1)],
+        KEYS["subroutines"],
+    )
+    con.close()
+
+    chroma_path = tmp / "chroma"
+    client = chromadb.PersistentClient(path=str(chroma_path))
+    chunks = client.get_or_create_collection(COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+    docs = client.get_or_create_collection(DOCS_COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+    for start in range(1, n + 1, 5000):
+        ids = range(start, min(start + 5000, n + 1))
+        chunks.add(ids=[f"{i}_0" for i in ids], embeddings=_vector(rng, len(ids)).tolist(),
+                   metadatas=[{"db_id": i, "n_chunks": 1, "source_hash": "x"} for i in ids])
+        docs.add(ids=[f"doc_{i}" for i in ids], embeddings=_vector(rng, len(ids)).tolist(),
+                 metadatas=[{"file": f"doc/f{i % 100}.rst", "section": f"Section {i}"} for i in ids],
+                 documents=[f"[doc/f{i % 100}.rst] Section {i}\nText of section {i}." for i in ids])
+    pooled_vectors.sync(chunks, client.get_or_create_collection(
+        POOLED_COLLECTION_NAME, metadata={"hnsw:space": "cosine"}), [])
+    return db_path, chroma_path
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subroutines", type=int, default=3_000)
+    parser.add_argument("--queries", type=int, default=4, help="queries per batch (at most 8)")
+    parser.add_argument("--embed-ms", type=float, default=25.0, help="simulated latency of one embedding request")
+    parser.add_argument("--per-text-ms", type=float, default=2.0, help="simulated cost of each text in a request")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    embed_backend.set_backend(_SlowBackend(args.embed_ms, args.per_text_ms))
+    tools._QUERY_CACHE = QueryEmbeddingCache(None, "simulated", max_memory=0)
+    queries = _PHRASINGS[:args.queries]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, chroma_path = _build(Path(tmp), args.subroutines)
+        paths = {"mode": "vector", "_db_path": db_path, "_chroma_path": chroma_path}
+        pairs = {
+            "search_code": (tools.search_code, tools.search_code_batch),
+            "search_docs": (tools.search_docs, tools.search_docs_batch),
+        }
+        print(f"{args.subroutines} subroutines and doc sections, {len(queries)} queries, "
+              f"embedding {args.embed_ms:.0f} ms + {args.per_text_ms:.0f} ms/text")
+        print(f"{'tool':<14} {'before ms':>10} {'after ms':>9} {'speedup':>8}")
+        for name, (single, batch) in pairs.items():
+            assert batch(queries, **paths) == [single(q, **paths) for q in queries]
+            before = _median_ms(lambda: [single(q, **paths) for q in queries], args.repeat)
+            after = _median_ms(lambda: batch(queries, **paths), args.repeat)
+            print(f"{name:<14} {before:>10.1f} {after:>9.1f} {before / after:>7.1f}x")
+        duckdb_pool.close(db_path)
+
+
+if __name__ == "__main__":
+    main()
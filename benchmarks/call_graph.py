@@ -0,0 +1,123 @@
+"""Benchmark: transitive call queries, one get_callees hop per call vs in-memory graph.
+
+"before" walks the call tree the way an agent had to: one get_callees query
+per subroutine reached (each of which is an MCP round trip in practice, not
+counted here).  "after" is get_call_tree / find_call_path on the CSR graph
+that the server builds at startup (src/call_graph.py); the build time is
+reported separately.
+
+Run as:
+    python -m benchmarks.call_graph
+    python -m benchmarks.call_graph --subroutines 20000 --depth 4
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src import call_graph, duckdb_pool
+from src.duckdb_bulk import insert_rows
+from src.mitgcm.indexer.pipeline import resolve_calls
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.mitgcm.tools import find_call_path, get_call_tree, get_callees, load_call_graph
+
+
+def _synthetic_db(path: Path, n: int, fanout: int) -> None:
+    """n subroutines, each calling fanout others with a higher index (a DAG rooted at SUB_0)."""
+    rng = random.Random(0)
+    con = connect(path)
+    insert_rows(
+        con, "subroutines", ["id", "name", "file", "package", "line_start", "line_end"],
+        [(i, f"SUB_{i}", f"pkg_{i % 50}/sub_{i}.F", f"pkg_{i % 50}", 1, 100) for i in range(n)],
+        KEYS["subroutines"],
+    )
+    calls = [(i, f"SUB_{rng.randrange(i + 1, n)}") for i in range(n - 1) for _ in range(fanout)]
+    insert_rows(con, "calls", ["caller_id", "callee_name"], calls, KEYS["calls"])
+    resolve_calls(con)
+    con.close()
+
+
+def _hop_tree(name: str, depth: int, db_path: Path) -> int:
+    """Breadth-first callee walk with one get_callees call per node; returns the call count."""
+    seen, frontier, queries = {name}, [name], 0
+    for _ in range(depth):
+        nxt = []
+        for node in frontier:
+            queries += 1
+            for row in get_callees(node, _db_path=db_path):
+                if row["callee_name"] not in seen:
+                    seen.add(row["callee_name"])
+                    nxt.append(row["callee_name"])
+        frontier = nxt
+    return queries
+
+
+def _hop_path(source: str, target: str, db_path: Path) -> int:
+    """Shortest-path search by get_callees hops; returns the call count."""
+    seen, frontier, queries = {source}, [source], 0
+    while frontier:
+        nxt = []
+        for node in frontier:
+            queries += 1
+            for row in get_callees(node, _db_path=db_path):
+                callee = row["callee_name"]
+                if callee == target:
+                    return queries
+                if callee not in seen:
+                    seen.add(callee)
+                    nxt.append(callee)
+        frontier = nxt
+    return queries
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subroutines", type=int, default=5000)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "index.duckdb"
+        _synthetic_db(db_path, args.subroutines, args.fanout)
+        duckdb_pool.get_connection(db_path)
+
+        t0 = time.perf_counter()
+        graph = load_call_graph(db_path)
+        build = (time.perf_counter() - t0) * 1e3
+        print(f"graph: {len(graph)} nodes, {graph.edge_count} edges, built in {build:.1f} ms")
+
+        target = f"SUB_{args.subroutines - 1}"
+        tree_calls = _hop_tree("SUB_0", args.depth, db_path)
+        path_calls = _hop_path("SUB_0", target, db_path)
+        rows = [
+            (f"call tree, depth {args.depth}", tree_calls,
+             _median_ms(lambda: _hop_tree("SUB_0", args.depth, db_path), args.repeat),
+             _median_ms(lambda: get_call_tree("SUB_0", depth=args.depth, _db_path=db_path), args.repeat)),
+            (f"call path to {target}", path_calls,
+             _median_ms(lambda: _hop_path("SUB_0", target, db_path), args.repeat),
+             _median_ms(lambda: find_call_path("SUB_0", target, _db_path=db_path), args.repeat)),
+        ]
+        duckdb_pool.close(db_path)
+        call_graph.clear()
+
+    print(f"{'query':<28} {'hops':>6} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for label, hops, before, after in rows:
+        print(f"{label:<28} {hops:>6} {before:>10.1f} {after:>10.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
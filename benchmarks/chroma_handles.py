@@ -0,0 +1,110 @@
+"""Benchmark: search_code latency, a ChromaDB client per call vs shared handles.
+
+"before" is the old store.get_collection: every call opened a new
+PersistentClient and ran get_or_create_collection, and search_code makes
+two such calls (chunks and pooled vectors).  "after" goes through
+src/chroma_pool.py, which opens the client and resolves each collection
+once per process.  The query embedding is a fixed vector, so no Ollama is
+needed and the figures are the tool's own cost; mode="vector", so the
+DuckDB fts extension is not needed either.
+
+Run as:
+    python -m benchmarks.chroma_handles
+    python -m benchmarks.chroma_handles --subroutines 20000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from src import chroma_pool, duckdb_pool, pooled_vectors
+from src.duckdb_bulk import insert_rows
+from src.mitgcm import tools
+from src.mitgcm.embedder import store
+from src.mitgcm.embedder.store import COLLECTION_NAME, POOLED_COLLECTION_NAME
+from src.mitgcm.indexer.schema import KEYS, connect
+
+_DIM = 768
+_QUERIES = ["non-hydrostatic pressure solve", "open boundary conditions", "sea ice dynamics", "KPP mixing"]
+
+
+def _unit(rng: np.random.Generator, n: int) -> list[list[float]]:
+    v = rng.standard_normal((n, _DIM))
+    return (v / np.linalg.norm(v, axis=1, keepdims=True)).tolist()
+
+
+def _build(tmp: Path, n: int) -> tuple[Path, Path]:
+    rng = np.random.default_rng(0)
+    db_path = tmp / "index.duckdb"
+    con = connect(db_path)
+    insert_rows(
+        con, "subroutines", ["id", "name", "file", "package", "line_start", "line_end", "source_text"],
+        [(i, f"SUB_{i}", f"pkg/sub_{i}.F", "pkg", 1, 60, "") for i in range(1, n + 1)],
+        KEYS["subroutines"],
+    )
+    con.close()
+
+    chroma_path = tmp / "chroma"
+    client = chromadb.PersistentClient(path=str(chroma_path))
+    chunks = client.get_or_create_collection(COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+    for start in range(1, n + 1, 5000):
+        ids = range(start, min(start + 5000, n + 1))
+        chunks.add(ids=[f"{i}_0" for i in ids], embeddings=_unit(rng, len(ids)),
+                   metadatas=[{"db_id": i, "n_chunks": 1, "source_hash": "x"} for i in ids])
+    pooled_vectors.sync(chunks, client.get_or_create_collection(
+        POOLED_COLLECTION_NAME, metadata={"hnsw:space": "cosine"}), [])
+    return db_path, chroma_path
+
+
+def _reopen(name: str, path: Path) -> chromadb.Collection:
+    """store.get_collection before the registry."""
+    client = chromadb.PersistentClient(path=str(path))
+    return client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subroutines", type=int, default=3_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    vector = _unit(np.random.default_rng(1), 1)[0]
+    tools._embed = lambda query: vector
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, chroma_path = _build(Path(tmp), args.subroutines)
+        paths = {"mode": "vector", "_db_path": db_path, "_chroma_path": chroma_path}
+
+        def run():
+            for q in _QUERIES:
+                tools.search_code(q, top_k=10, **paths)
+
+        tools.get_collection = _reopen
+        before = _median_ms(run, args.repeat) / len(_QUERIES)
+        tools.get_collection = store.get_collection
+        after = _median_ms(run, args.repeat) / len(_QUERIES)
+
+        print(f"{args.subroutines} subroutines, search_code(mode='vector', top_k=10), fixed query vector")
+        print(f"{'variant':<30} {'ms/call':>8}")
+        print(f"{'before (client per call)':<30} {before:>8.2f}")
+        print(f"{'after (shared handles)':<30} {after:>8.2f}")
+        print(f"speedup: {before / after:.2f}x")
+        duckdb_pool.close(db_path)
+        chroma_pool.close(chroma_path)
+
+
+if __name__ == "__main__":
+    main()
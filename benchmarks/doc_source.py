@@ -0,0 +1,97 @@
+"""Benchmark: get_doc_source, ChromaDB chunk reassembly vs DuckDB doc_sections.
+
+"before" is the old lookup: fetch every chunk of the section from the docs
+collection with a metadata filter, sort, strip headers and undo the chunk
+overlap.  "after" reads one page from the ``doc_sections`` table
+(src/doc_sections.py) through the pooled read-only cursor.  Both run
+against synthetic MITgcm docs of growing size; embeddings are constant
+vectors, so no Ollama is needed.
+
+Run as:
+    python -m benchmarks.doc_source
+    python -m benchmarks.doc_source --sizes 500 5000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+
+from src import duckdb_pool
+from src.doc_sections import write_sections
+from src.embed_utils import MAX_CHARS, OVERLAP, _chunk_text
+from src.mitgcm.embedder.store import DOCS_COLLECTION_NAME
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.mitgcm.tools import get_doc_source
+
+_LINE = "The viscosity is set by viscAh and viscAr in data, PARM01.\n"
+
+
+def _synthetic_sections(n: int) -> list[tuple[str, str, str]]:
+    """n sections of 20 to 200 lines, ten per file."""
+    return [(f"pkg/doc_{i // 10}.rst", f"Section {i}", _LINE * (20 + i % 180)) for i in range(n)]
+
+
+def _build(tmp: Path, n: int) -> tuple[Path, Path]:
+    sections = _synthetic_sections(n)
+    db_path = tmp / f"index_{n}.duckdb"
+    con = connect(db_path)
+    write_sections(con, sections, KEYS["doc_sections"])
+    con.close()
+
+    chroma_path = tmp / f"chroma_{n}"
+    col = chromadb.PersistentClient(path=str(chroma_path)).get_or_create_collection(
+        DOCS_COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+    )
+    ids, docs, metas = [], [], []
+    for i, (file, section, text) in enumerate(sections):
+        chunks = _chunk_text(text, MAX_CHARS, OVERLAP)
+        for j, chunk in enumerate(chunks):
+            ids.append(f"doc_{i}_{j}")
+            docs.append(f"[{file}] {section}\n{chunk}")
+            metas.append({"file": file, "section": section, "chunk_index": j,
+                          "n_chunks": len(chunks), "section_id": f"doc_{i}"})
+    for start in range(0, len(ids), 5000):
+        end = start + 5000
+        col.add(ids=ids[start:end], documents=docs[start:end], metadatas=metas[start:end],
+                embeddings=[[0.1] * 768] * len(ids[start:end]))
+    return db_path, chroma_path
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"chunk overlap {OVERLAP} chars")
+    print(f"{'sections':>10} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            db_path, chroma_path = _build(Path(tmp), n)
+            file, section, _ = _synthetic_sections(n)[n - 1]
+            no_index = Path(tmp) / "missing.duckdb"
+            before = _median_ms(lambda: get_doc_source(file, section, offset=100, limit=50,
+                                                       _db_path=no_index, _chroma_path=chroma_path),
+                                args.repeat)
+            after = _median_ms(lambda: get_doc_source(file, section, offset=100, limit=50,
+                                                      _db_path=db_path, _chroma_path=chroma_path),
+                               args.repeat)
+            duckdb_pool.close(db_path)
+            print(f"{n:>10} {before:>10.3f} {after:>10.3f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
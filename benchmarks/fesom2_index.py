@@ -0,0 +1,124 @@
+"""Benchmark: full FESOM2 index build, two parse passes vs single-pass bulk load.
+
+"before" is the old pipeline: every file is hashed, parsed once for
+modules/subroutines/calls and again for namelist declarations, with one
+INSERT per row.  "after" is pipeline.run, which reads and parses each file
+once and bulk-inserts all rows in one transaction.
+
+Run as:
+    python -m benchmarks.fesom2_index                  # synthetic tree
+    python -m benchmarks.fesom2_index --fesom2 FESOM2  # real checkout
+"""
+
+import argparse
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from src import file_hashes
+from src.fesom2.indexer import pipeline
+from src.fesom2.indexer.extract import extract_file
+from src.fesom2.indexer.schema import connect
+
+_MODULE = """\
+module {name}
+  use o_param
+  use mod_mesh
+  implicit none
+  namelist /{name}_nml/ {name}_alpha, {name}_beta, {name}_gamma
+contains
+  subroutine {name}_init(mesh)
+    type(t_mesh), intent(in) :: mesh
+    call exchange_nod(mesh)
+{body}  end subroutine {name}_init
+
+  subroutine {name}_step(mesh)
+    type(t_mesh), intent(in) :: mesh
+    call {name}_init(mesh)
+    call par_ex(mesh)
+{body}  end subroutine {name}_step
+end module {name}
+"""
+
+
+def _synthetic_tree(root: Path, n_files: int = 400) -> None:
+    """Write n_files modules (two subroutines each) under root/src."""
+    src = root / "src"
+    src.mkdir(parents=True, exist_ok=True)
+    body = "    x = x + 1.0_WP\n" * 150
+    for i in range(n_files):
+        (src / f"mod_{i}.F90").write_text(_MODULE.format(name=f"mod_{i}", body=body))
+
+
+def _legacy_run(db_path: Path) -> None:
+    """The pre-single-pass pipeline: two parse passes, one INSERT per row."""
+    con = connect(db_path)
+    files = pipeline.source_files()
+    file_hashes.scan(files)
+    mod_id = sub_id = 1
+    for path in files:
+        mods, subs = extract_file(path)
+        for mod in mods:
+            con.execute("INSERT INTO modules (id, name, file, start_line, end_line) VALUES (?, ?, ?, ?, ?)",
+                        [mod_id, mod.name, mod.file, mod.start_line, mod.end_line])
+            for used in mod.uses:
+                con.execute("INSERT INTO uses (module_name, used_module) VALUES (?, ?)", [mod.name, used])
+            mod_id += 1
+        for sub in subs:
+            con.execute("INSERT INTO subroutines (id, name, module_name, file, start_line, end_line, source_text) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [sub_id, sub.name, sub.module_name, sub.file,
+                         sub.start_line, sub.end_line, sub.source_text])
+            for callee in sub.calls:
+                con.execute("INSERT INTO calls (caller_name, caller_module, callee_name) VALUES (?, ?, ?)",
+                            [sub.name, sub.module_name, callee])
+            sub_id += 1
+    for path in files:
+        mods, _ = extract_file(path)
+        for mod in mods:
+            for group, params, line in mod.namelist_groups:
+                for param in params:
+                    con.execute("INSERT INTO namelist_refs (param_name, namelist_group, file, module_name, line) "
+                                "VALUES (?, ?, ?, ?, ?)",
+                                [param, group, mod.file, mod.name, line])
+    con.close()
+
+
+def _time(fn) -> float:
+    t0 = time.perf_counter()
+    with redirect_stdout(StringIO()):
+        fn()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fesom2", type=Path, help="FESOM2 checkout (default: synthetic tree)")
+    parser.add_argument("--files", type=int, default=400, help="synthetic source files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        root = args.fesom2 or tmp / "FESOM2"
+        if not args.fesom2:
+            _synthetic_tree(root, args.files)
+            pipeline.parse_all_config_files = lambda: []
+        pipeline.FESOM2_ROOT = root
+        pipeline._F90_DIRS = [root / "src", root / "src" / "cvmix_driver",
+                              root / "src" / "icepack_drivers", root / "src" / "ifs_interface"]
+        pipeline._PF_DIRS = [root / "test" / "fortran", root / "test" / "fortran_parallel"]
+        pipeline._INT_RECOM_DIR = root / "src" / "int_recom"
+        print(f"{len(pipeline.source_files())} source files")
+
+        before = _time(lambda: _legacy_run(tmp / "before.duckdb"))
+        after = _time(lambda: pipeline.run(tmp / "after.duckdb"))
+
+        print(f"{'variant':<32} {'seconds':>8} {'speedup':>8}")
+        print(f"{'before (two passes, per-row)':<32} {before:>8.2f} {1:>7.1f}x")
+        print(f"{'after (one pass, bulk)':<32} {after:>8.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
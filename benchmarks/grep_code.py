@@ -0,0 +1,113 @@
+"""Benchmark: grep_code regex search, full scan vs trigram-filtered candidates.
+
+grep_code runs a regular expression over subroutine source.  "before"
+scans every subroutine: all of source_text is read from DuckDB and matched
+(an index without trigram postings takes this path).  "after" first
+intersects the trigram posting lists the pattern implies
+(src/code_search.py) and only fetches and matches the candidates.  Both
+columns call the same tool on copies of one synthetic index, with
+max_results high enough that every hit is returned.  The time to build the
+postings, paid once per indexer run, is reported too.
+
+Run as:
+    python -m benchmarks.grep_code
+    python -m benchmarks.grep_code --subroutines 20000
+"""
+
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src import duckdb_pool
+from src.code_search import write_postings
+from src.duckdb_bulk import insert_rows
+from src.mitgcm import tools
+from src.mitgcm.indexer.schema import KEYS, connect
+
+_WORDS = ["theta", "salt", "uVel", "vVel", "wVel", "etaN", "viscAh", "diffKhT", "bi", "bj", "myThid",
+          "Nr", "sNx", "sNy", "rhoConst", "gravity", "deltaT", "maskC", "hFacC", "recip_drF", "k", "i", "j"]
+# Each rare line appears in about one subroutine in --rare.
+_RARE = ["      IF ( cg3dMaxIters .GT. 0 ) cg3dNorm = 1. _d 0",
+         "      CALL EXCH_XYZ_RL( gU, gV, .TRUE., myThid )",
+         "#ifdef ALLOW_KPP",
+         "      IF ( useKPP ) CALL KPP_CALC( bi, bj, myTime, myIter, myThid )"]
+_PATTERNS = [
+    ("cg3dMaxIters", False),
+    (r"CALL EXCH_\w+_RL", False),
+    ("#ifdef allow_kpp", True),
+    (r"useKPP|useGMRedi", False),
+]
+
+
+def _source(rng: random.Random, n_lines: int, rare: int) -> str:
+    lines = []
+    for _ in range(n_lines):
+        if rng.randrange(rare * n_lines) < len(_RARE):
+            lines.append(rng.choice(_RARE))
+        else:
+            lines.append("      " + " = ".join(" + ".join(rng.choices(_WORDS, k=3)) for _ in range(2)))
+    return "\n".join(lines) + "\n"
+
+
+def _build(tmp: Path, n: int, rare: int) -> tuple[Path, Path, float]:
+    rng = random.Random(0)
+    indexed = tmp / "indexed.duckdb"
+    con = connect(indexed)
+    insert_rows(
+        con, "subroutines", ["id", "name", "file", "package", "line_start", "line_end", "source_text"],
+        [(i, f"SUB_{i}", f"pkg/p{i % 100}/sub_{i}.F", f"p{i % 100}", 1, 80, _source(rng, 80, rare))
+         for i in range(1, n + 1)],
+        KEYS["subroutines"],
+    )
+    con.close()
+    scan = tmp / "scan.duckdb"
+    shutil.copy(indexed, scan)
+
+    con = connect(indexed)
+    t0 = time.perf_counter()
+    write_postings(con, "subroutines", con.execute("SELECT id, source_text FROM subroutines").fetchall())
+    build_s = time.perf_counter() - t0
+    con.close()
+    return scan, indexed, build_s
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subroutines", type=int, default=10_000)
+    parser.add_argument("--rare", type=int, default=200, help="one subroutine in this many holds each rare line")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scan, indexed, build_s = _build(Path(tmp), args.subroutines, args.rare)
+        print(f"{args.subroutines} subroutines x 80 lines; trigram postings built in {build_s:.2f} s")
+        print(f"{'pattern':<22} {'hits':>5} {'before ms':>10} {'after ms':>9} {'speedup':>8}")
+        for pattern, ignore_case in _PATTERNS:
+            def grep(db_path: Path):
+                return lambda: tools.grep_code(pattern, ignore_case=ignore_case, max_results=1_000_000,
+                                               _db_path=db_path)
+
+            hits = grep(indexed)()
+            assert hits == grep(scan)()
+            before, after = _median_ms(grep(scan), args.repeat), _median_ms(grep(indexed), args.repeat)
+            label = pattern + (" (i)" if ignore_case else "")
+            print(f"{label:<22} {len(hits):>5} {before:>10.2f} {after:>9.2f} {before / after:>7.1f}x")
+        duckdb_pool.close(scan)
+        duckdb_pool.close(indexed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark: hybrid search latency, lexical and vector paths in sequence vs in parallel.
+
+search_code(mode="hybrid") ranks by BM25 over the DuckDB full-text index
+and by embedding similarity in ChromaDB, then fuses the two
+(src/full_text.py).  "before" runs the two paths one after the other
+(lexical, then vector), so a query pays for both; "after" is the hybrid
+mode, which runs the BM25 query on a worker thread while the query is
+embedded and ChromaDB is searched.  The Ollama round-trip is simulated
+with a sleep (--embed-ms) and a fixed vector, so no Ollama is needed;
+the DuckDB fts extension is.
+
+Run as:
+    python -m benchmarks.hybrid_search
+    python -m benchmarks.hybrid_search --subroutines 20000 --embed-ms 80
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+
+from src import duckdb_pool, full_text
+from src.duckdb_bulk import insert_rows
+from src.mitgcm import tools
+from src.mitgcm.embedder.store import COLLECTION_NAME
+from src.mitgcm.indexer.schema import KEYS, connect
+
+_WORDS = ["theta", "salt", "uVel", "vVel", "wVel", "etaN", "viscAh", "diffKhT", "cg3dMaxIters",
+          "DIAGNOSTICS_FILL", "EXCH_XYZ_RL", "bi", "bj", "myThid", "Nr", "sNx", "sNy", "rhoConst"]
+_QUERIES = ["cg3dMaxIters", "DIAGNOSTICS_FILL theta", "vertical viscosity viscAh", "exchange halo EXCH_XYZ_RL"]
+_DIM = 768
+
+
+def _build(tmp: Path, n: int) -> tuple[Path, Path]:
+    rng = random.Random(0)
+    db_path = tmp / "index.duckdb"
+    con = connect(db_path)
+    insert_rows(
+        con, "subroutines", ["id", "name", "file", "package", "line_start", "line_end", "source_text"],
+        [(i, f"SUB_{i}", f"pkg/sub_{i}.F", "pkg", 1, 60,
+          "\n".join("      " + " ".join(rng.choices(_WORDS, k=8)) for _ in range(60)))
+         for i in range(1, n + 1)],
+        KEYS["subroutines"],
+    )
+    built = full_text.build_index(con, "subroutines", "id", ["name", "source_text"])
+    con.close()
+    if not built:
+        raise SystemExit("DuckDB fts extension unavailable; cannot build the full-text index")
+
+    chroma_path = tmp / "chroma"
+    col = chromadb.PersistentClient(path=str(chroma_path)).get_or_create_collection(
+        COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+    )
+    for start in range(1, n + 1, 5000):
+        ids = range(start, min(start + 5000, n + 1))
+        col.add(ids=[f"sub_{i}" for i in ids], metadatas=[{"db_id": i} for i in ids],
+                embeddings=[[rng.random() for _ in range(_DIM)] for _ in ids])
+    return db_path, chroma_path
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subroutines", type=int, default=5_000)
+    parser.add_argument("--embed-ms", type=float, default=40.0, help="simulated Ollama embedding latency")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    vector = [0.5] * _DIM
+
+    def embed(query: str) -> list[float]:
+        time.sleep(args.embed_ms / 1e3)
+        return vector
+
+    tools._embed = embed
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, chroma_path = _build(Path(tmp), args.subroutines)
+
+        def search(mode: str):
+            return lambda: [tools.search_code(q, mode=mode, _db_path=db_path, _chroma_path=chroma_path)
+                            for q in _QUERIES]
+
+        lexical, vector_only = search("lexical"), search("vector")
+        variants = {
+            "lexical only": lexical,
+            "vector only": vector_only,
+            "before (sequential)": lambda: (lexical(), vector_only()),
+            "after (hybrid, parallel)": search("hybrid"),
+        }
+        print(f"{args.subroutines} subroutines, {len(_QUERIES)} queries, embedding {args.embed_ms:.0f} ms")
+        print(f"{'variant':<28} {'ms/query':>9}")
+        times = {name: _median_ms(fn, args.repeat) / len(_QUERIES) for name, fn in variants.items()}
+        for name, ms in times.items():
+            print(f"{name:<28} {ms:>9.2f}")
+        print(f"speedup: {times['before (sequential)'] / times['after (hybrid, parallel)']:.2f}x")
+        duckdb_pool.close(db_path)
+
+
+if __name__ == "__main__":
+    main()
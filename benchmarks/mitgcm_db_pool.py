@@ -0,0 +1,102 @@
+"""Benchmark: per-call latency of MITgcm tool queries, fresh connection vs pool.
+
+"before" opens a writable connection and runs the schema DDL on every call
+(the old ``_db()`` behaviour); "after" borrows a cursor from the shared
+read-only connection in src/duckdb_pool.py.
+
+Run as:
+    python -m benchmarks.mitgcm_db_pool                # synthetic index
+    python -m benchmarks.mitgcm_db_pool --db data/mitgcm/index.duckdb
+"""
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from src import duckdb_pool
+from src.mitgcm import tools
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.name_keys import refresh_keys
+
+
+def _synthetic_db(path: Path, n_subroutines: int = 5000) -> None:
+    """Write an index with n_subroutines rows and a few calls per routine."""
+    con = connect(path)
+    con.execute(
+        "INSERT INTO subroutines (id, name, file, package, line_start, line_end, source_text) "
+        "SELECT range, 'SUB_' || range, 'pkg_' || (range % 200) || '/sub.F', "
+        "'pkg_' || (range % 200), 1, 100, repeat('      x = x + 1\n', 100) "
+        "FROM range(?)",
+        [n_subroutines],
+    )
+    con.execute(
+        "INSERT INTO calls (caller_id, callee_name) SELECT range, 'SUB_' || ((range * 7 + k) % ?) "
+        "FROM range(?), range(3) AS r(k)",
+        [n_subroutines, n_subroutines],
+    )
+    con.execute(
+        "INSERT INTO namelist_refs (param_name, subroutine_id, namelist_group) SELECT 'param' || range, range, 'PARM01' FROM range(?)",
+        [n_subroutines],
+    )
+    refresh_keys(con, KEYS)
+    con.close()
+
+
+@contextmanager
+def _fresh_connection(db_path: Path):
+    con = connect(db_path)
+    try:
+        yield con
+    finally:
+        con.close()
+
+
+_CALLS = [
+    ("find_subroutines", lambda p: tools.find_subroutines("SUB_42", _db_path=p)),
+    ("get_subroutine", lambda p: tools.get_subroutine("SUB_42", _db_path=p)),
+    ("get_callers", lambda p: tools.get_callers("SUB_42", _db_path=p)),
+    ("get_callees", lambda p: tools.get_callees("SUB_42", _db_path=p)),
+    ("namelist_to_code", lambda p: tools.namelist_to_code("param42", _db_path=p)),
+]
+
+
+def _time(fn, db_path: Path, repeat: int) -> list[float]:
+    fn(db_path)  # warm caches / open the pooled connection
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(db_path)
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, help="existing index (copied before use)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "index.duckdb"
+        if args.db:
+            shutil.copy(args.db, db_path)
+        else:
+            _synthetic_db(db_path)
+
+        print(f"{'call':<18} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for label, fn in _CALLS:
+            tools._db = _fresh_connection
+            before = _time(fn, db_path, args.repeat)
+            tools._db = duckdb_pool.cursor
+            after = _time(fn, db_path, args.repeat)
+            duckdb_pool.close(db_path)
+            b, a = statistics.median(before), statistics.median(after)
+            print(f"{label:<18} {b:>10.3f} {a:>10.3f} {b / a:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: full MITgcm index build, per-row inserts vs parallel bulk load.
+
+"before" is the old pipeline: serial extract_file and one INSERT per row.
+"after" is pipeline.run with a process pool and column-wise bulk inserts in
+one transaction, once with --workers and once serially for reference.
+
+Run as:
+    python -m benchmarks.mitgcm_index                  # synthetic tree
+    python -m benchmarks.mitgcm_index --mitgcm MITgcm  # real checkout
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from src.mitgcm.indexer import pipeline
+from src.mitgcm.indexer.extract import extract_file
+from src.mitgcm.indexer.schema import connect
+
+_SOURCE = """\
+#include "PKG_OPTIONS.h"
+      SUBROUTINE {name}_A( myThid )
+      NAMELIST /{name}_PARM/ {name}_alpha, {name}_beta, {name}_gamma
+#ifdef ALLOW_{name}
+      CALL {name}_B( myThid )
+      CALL DIAGNOSTICS_FILL( fld, 'FLD     ', 0, 1, 0, 1, 1, myThid )
+#endif
+{body}      RETURN
+      END
+
+      SUBROUTINE {name}_B( myThid )
+      CALL EXCH_XY_RL( fld, myThid )
+      CALL GLOBAL_SUM_R8( fld, myThid )
+{body}      RETURN
+      END
+"""
+
+
+def _synthetic_tree(root: Path, n_files: int = 2500) -> None:
+    """Write n_files fixed-form sources (two subroutines each) under root/pkg."""
+    body = "      x = x + 1\n" * 150
+    for i in range(n_files):
+        d = root / "pkg" / f"pkg{i % 100:03d}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"file{i}.F").write_text(_SOURCE.format(name=f"S{i}", body=body))
+
+
+def _legacy_run(db_path: Path) -> None:
+    """The pre-parallel pipeline: serial parse, one INSERT per row."""
+    con = connect(db_path)
+    sub_id = 1
+    for path in pipeline.source_files():
+        for rec in extract_file(path):
+            con.execute(
+                "INSERT INTO subroutines (id, name, file, package, line_start, line_end, source_text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [sub_id, rec.name, rec.file, rec.package,
+                 rec.line_start, rec.line_end, rec.source_text],
+            )
+            for callee in rec.calls:
+                con.execute("INSERT INTO calls (caller_id, callee_name) VALUES (?, ?)", [sub_id, callee])
+            for param, group in rec.namelist_params:
+                con.execute("INSERT INTO namelist_refs (param_name, subroutine_id, namelist_group) VALUES (?, ?, ?)",
+                            [param, sub_id, group])
+            for field_name, array_name in rec.diag_fills:
+                con.execute("INSERT INTO diagnostics_fills (field_name, subroutine_id, array_name) VALUES (?, ?, ?)",
+                            [field_name, sub_id, array_name])
+            for flag in rec.cpp_guards:
+                con.execute("INSERT INTO cpp_guards VALUES (?, ?)", [sub_id, flag])
+            sub_id += 1
+    con.close()
+
+
+def _time(fn) -> float:
+    t0 = time.perf_counter()
+    with redirect_stdout(StringIO()):
+        fn()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mitgcm", type=Path, help="MITgcm checkout (default: synthetic tree)")
+    parser.add_argument("--files", type=int, default=2500, help="synthetic source files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        root = args.mitgcm or tmp / "MITgcm"
+        if not args.mitgcm:
+            _synthetic_tree(root, args.files)
+        pipeline.MITGCM_ROOT = root
+        pipeline.SOURCE_DIRS = [root / "model" / "src", root / "pkg", root / "eesupp" / "src"]
+        print(f"{len(pipeline.source_files())} source files")
+
+        before = _time(lambda: _legacy_run(tmp / "before.duckdb"))
+        serial = _time(lambda: pipeline.run(tmp / "serial.duckdb", workers=1))
+        after = _time(lambda: pipeline.run(tmp / "after.duckdb", workers=args.workers))
+
+        print(f"{'variant':<28} {'seconds':>8} {'speedup':>8}")
+        print(f"{'before (serial, per-row)':<28} {before:>8.2f} {1:>7.1f}x")
+        print(f"{'after, 1 worker':<28} {serial:>8.2f} {before / serial:>7.1f}x")
+        label = f"after, {args.workers} workers"
+        print(f"{label:<28} {after:>8.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark: name lookups by upper(name) scan vs indexed case-folded key.
+
+"before" is the old ``WHERE upper(name) = upper(?)`` filter, which scans
+every row; "after" is ``WHERE name_key = upper(?)`` on the ART-indexed key
+column (src/name_keys.py).  Both run through the pooled read-only cursor
+against synthetic MITgcm indexes of growing size.
+
+Run as:
+    python -m benchmarks.name_keys
+    python -m benchmarks.name_keys --sizes 10000 100000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src import duckdb_pool
+from src.duckdb_bulk import insert_rows
+from src.mitgcm.indexer.schema import KEYS, connect
+
+_QUERIES = {
+    "before": "SELECT id, name, file, package FROM subroutines WHERE upper(name) = upper(?)",
+    "after": "SELECT id, name, file, package FROM subroutines WHERE name_key = upper(?)",
+}
+
+
+def _synthetic_db(path: Path, n: int) -> None:
+    con = connect(path)
+    insert_rows(
+        con, "subroutines", ["id", "name", "file", "package", "line_start", "line_end"],
+        [(i, f"Sub_{i}", f"pkg_{i % 200}/sub_{i}.F", f"pkg_{i % 200}", 1, 100) for i in range(n)],
+        KEYS["subroutines"],
+    )
+    con.close()
+
+
+def _median_ms(db_path: Path, sql: str, name: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        with duckdb_pool.cursor(db_path) as cur:
+            t0 = time.perf_counter()
+            cur.execute(sql, [name]).fetchall()
+            samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5_000, 50_000, 500_000])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'subroutines':>12} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            db_path = Path(tmp) / f"index_{n}.duckdb"
+            _synthetic_db(db_path, n)
+            name = f"sub_{n // 2}"
+            before = _median_ms(db_path, _QUERIES["before"], name, args.repeat)
+            after = _median_ms(db_path, _QUERIES["after"], name, args.repeat)
+            duckdb_pool.close(db_path)
+            print(f"{n:>12} {before:>10.3f} {after:>10.3f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark: vector ranking in search_code, chunk over-fetch vs pooled subroutine vectors.
+
+"before" is the chunk path: ChromaDB is asked for top_k * 10 chunk hits,
+which are deduplicated by subroutine.  "after" asks the pooled collection
+(one mean vector per subroutine, src/pooled_vectors.py) for exactly top_k
+subroutines and merges in the top_k nearest chunks, so a routine scores its
+best chunk when that is closer; "pooled only" skips the chunk query.  "chunks x1" is the chunk path without the over-fetch,
+to show why it was there: long routines fill the list and fewer than top_k
+subroutines come back ("short").  Quality is the share of queries whose
+target subroutine is returned (hit@k) and its mean reciprocal rank.
+
+Chunk vectors are synthetic: subroutines are grouped around shared topics,
+each routine's chunks scatter around its own direction, and a tenth of the
+routines have 6-30 chunks; queries are noisy copies of one chunk.  The
+ChromaDB collections are queried directly, so the figures exclude the tool's
+DuckDB lookup.  No Ollama is needed.
+
+Run as:
+    python -m benchmarks.pooled_search
+    python -m benchmarks.pooled_search --subroutines 10000 --top-k 10
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from src import pooled_vectors
+from src.mitgcm.embedder.store import COLLECTION_NAME, POOLED_COLLECTION_NAME
+
+_DIM = 768
+
+
+def _unit(v: np.ndarray) -> np.ndarray:
+    return v / np.linalg.norm(v, axis=-1, keepdims=True)
+
+
+def _chunk_counts(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Mostly one chunk; a fifth with 2-5; a tenth with 6-30, like long Fortran routines."""
+    kind = rng.random(n)
+    return np.where(kind < 0.7, 1, np.where(kind < 0.9, rng.integers(2, 6, n), rng.integers(6, 31, n)))
+
+
+def _build(tmp: Path, n: int, rng: np.random.Generator) -> tuple:
+    centres = _unit(rng.standard_normal((max(n // 20, 1), _DIM)))
+    topics = _unit(centres[rng.integers(0, len(centres), n)] + 0.6 * _unit(rng.standard_normal((n, _DIM))))
+    counts = _chunk_counts(rng, n)
+    owner = np.repeat(np.arange(n), counts)
+    vectors = _unit(topics[owner] + 0.9 * _unit(rng.standard_normal((len(owner), _DIM))))
+    index = np.concatenate([np.arange(c) for c in counts])
+
+    client = chromadb.PersistentClient(path=str(tmp / "chroma"))
+    chunks = client.get_or_create_collection(COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+    for lo in range(0, len(owner), 5000):
+        hi = min(lo + 5000, len(owner))
+        chunks.add(
+            ids=[f"{owner[j]}_{index[j]}" for j in range(lo, hi)],
+            embeddings=vectors[lo:hi].tolist(),
+            metadatas=[{"db_id": int(owner[j]), "chunk_index": int(index[j]), "n_chunks": int(counts[owner[j]]),
+                        "source_hash": "x"} for j in range(lo, hi)],
+        )
+    pooled = client.get_or_create_collection(POOLED_COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+    t0 = time.perf_counter()
+    pooled_vectors.sync(chunks, pooled, [])
+    return chunks, pooled, vectors, owner, time.perf_counter() - t0
+
+
+def _by_chunks(chunks, embedding: list[float], k: int, n_results: int) -> list[int]:
+    """The pre-pooling path: best chunk per subroutine among n_results chunk hits."""
+    results = chunks.query(query_embeddings=[embedding], n_results=n_results, include=["metadatas", "distances"])
+    best: dict[int, float] = {}
+    for meta, dist in zip(results["metadatas"][0], results["distances"][0]):
+        db_id = int(meta["db_id"])
+        if db_id not in best or dist < best[db_id]:
+            best[db_id] = dist
+    return sorted(best, key=best.__getitem__)[:k]
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subroutines", type=int, default=3_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=1.5, help="query noise relative to a unit chunk vector")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    k = args.top_k
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks, pooled, vectors, owner, sync_s = _build(Path(tmp), args.subroutines, rng)
+        picks = rng.integers(0, len(owner), args.queries)
+        targets = owner[picks].tolist()
+        queries = _unit(vectors[picks] + args.noise * _unit(rng.standard_normal((args.queries, _DIM)))).tolist()
+        print(f"{args.subroutines} subroutines, {len(owner)} chunks (pooled in {sync_s:.1f} s), "
+              f"{args.queries} queries, top_k={k}")
+
+        variants = {
+            "before (chunks x10)": lambda q: _by_chunks(chunks, q, k, k * 10),
+            "chunks x1": lambda q: _by_chunks(chunks, q, k, k),
+            "pooled only": lambda q: list(pooled_vectors.search(pooled, chunks, q, k, refine=False)),
+            "after (pooled + refine)": lambda q: list(pooled_vectors.search(pooled, chunks, q, k)),
+        }
+        print(f"{'variant':<26} {'ms/query':>9} {'hit@k':>6} {'MRR':>6} {'short':>6}")
+        for name, search in variants.items():
+            results = [search(q) for q in queries]
+            hit = statistics.mean(t in r for r, t in zip(results, targets))
+            mrr = statistics.mean(1 / (r.index(t) + 1) if t in r else 0 for r, t in zip(results, targets))
+            short = sum(len(r) < k for r in results)
+            ms = _median_ms(lambda: [search(q) for q in queries], args.repeat) / args.queries
+            print(f"{name:<26} {ms:>9.2f} {hit:>6.2f} {mrr:>6.3f} {short:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Benchmark: one question over code, docs and verification, three tool calls vs search_all.
+
+"before" is what an agent does without search_all: search_code,
+search_docs and search_verification in turn, each embedding the query and
+querying its collection.  "search_all" embeds once and queries the
+collections concurrently (src/fan_out.py); "search_all, serial" runs the
+same fan-out on one worker thread, to separate the saved embeddings from
+the concurrency.  The embedding server is simulated by a sleep
+(--embed-ms) with the query cache disabled, and each ChromaDB query is
+given --collection-ms of simulated I/O wait (a remote or cold store), so no
+Ollama is needed; mode="vector" for the single tools, like search_all.
+
+Run as:
+    python -m benchmarks.search_all
+    python -m benchmarks.search_all --embed-ms 60 --collection-ms 0
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from src import duckdb_pool, fan_out, pooled_vectors
+from src.duckdb_bulk import insert_rows
+from src.embed_cache import QueryEmbeddingCache
+from src.mitgcm import tools
+from src.mitgcm.embedder.store import (
+    COLLECTION_NAME,
+    DOCS_COLLECTION_NAME,
+    POOLED_COLLECTION_NAME,
+    VERIFICATION_COLLECTION_NAME,
+)
+from src.mitgcm.indexer.schema import KEYS, connect
+
+_DIM = 768
+_QUERIES = ["non-hydrostatic pressure solve", "open boundary conditions", "sea ice dynamics", "KPP mixing"]
+
+
+class _Delayed:
+    """A ChromaDB collection whose queries also wait delay_s, as over a network or a cold disk."""
+
+    def __init__(self, collection, delay_s: float):
+        self.collection = collection
+        self.delay_s = delay_s
+
+    def query(self, **kwargs):
+        time.sleep(self.delay_s)
+        return self.collection.query(**kwargs)
+
+    def get(self, **kwargs):
+        return self.collection.get(**kwargs)
+
+
+def _unit(rng: np.random.Generator, n: int) -> list[list[float]]:
+    v = rng.standard_normal((n, _DIM))
+    return (v / np.linalg.norm(v, axis=1, keepdims=True)).tolist()
+
+
+def _build(tmp: Path, n: int) -> tuple[Path, dict]:
+    rng = np.random.default_rng(0)
+    db_path = tmp / "index.duckdb"
+    con = connect(db_path)
+    insert_rows(
+        con, "subroutines", ["id", "name", "file", "package", "line_start", "line_end", "source_text"],
+        [(i, f"SUB_{i}", f"pkg/sub_{i}.F", "pkg", 1, 60, "") for i in range(1, n + 1)],
+        KEYS["subroutines"],
+    )
+    con.close()
+
+    client = chromadb.PersistentClient(path=str(tmp / "chroma"))
+    names = [COLLECTION_NAME, POOLED_COLLECTION_NAME, DOCS_COLLECTION_NAME, VERIFICATION_COLLECTION_NAME]
+    cols = {name: client.get_or_create_collection(name, metadata={"hnsw:space": "cosine"}) for name in names}
+    for start in range(1, n + 1, 5000):
+        ids = range(start, min(start + 5000, n + 1))
+        cols[COLLECTION_NAME].add(ids=[f"{i}_0" for i in ids], embeddings=_unit(rng, len(ids)),
+                                  metadatas=[{"db_id": i, "n_chunks": 1, "source_hash": "x"} for i in ids])
+        cols[DOCS_COLLECTION_NAME].add(
+            ids=[f"doc_{i}" for i in ids], embeddings=_unit(rng, len(ids)),
+            metadatas=[{"file": f"doc/f{i % 100}.rst", "section": f"Section {i}"} for i in ids],
+            documents=[f"[doc/f{i % 100}.rst] Section {i}\nText." for i in ids])
+        cols[VERIFICATION_COLLECTION_NAME].add(
+            ids=[f"ver_{i}" for i in ids], embeddings=_unit(rng, len(ids)),
+            metadatas=[{"experiment": f"exp{i % 90}", "filename": f"data.{i}", "file": f"exp{i % 90}/input/data.{i}"}
+                       for i in ids],
+            documents=[f"[exp{i % 90}/input/data.{i}]\n &PARM01\n &" for i in ids])
+    pooled_vectors.sync(cols[COLLECTION_NAME], cols[POOLED_COLLECTION_NAME], [])
+    return db_path, cols
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subroutines", type=int, default=3_000, help="entries per collection")
+    parser.add_argument("--embed-ms", type=float, default=25.0, help="simulated embedding latency")
+    parser.add_argument("--collection-ms", type=float, default=10.0, help="simulated I/O wait per ChromaDB query")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+
+    def embed(query: str) -> list[float]:
+        time.sleep(args.embed_ms / 1e3)
+        return _unit(rng, 1)[0]
+
+    tools._embed = embed
+    tools._QUERY_CACHE = QueryEmbeddingCache(None, "simulated", max_memory=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, cols = _build(Path(tmp), args.subroutines)
+        delayed = {name: _Delayed(col, args.collection_ms / 1e3) for name, col in cols.items()}
+        tools.get_collection = lambda name, path: delayed[name]
+        paths = {"_db_path": db_path, "_chroma_path": Path(tmp) / "chroma"}
+
+        def before():
+            for q in _QUERIES:
+                tools.search_code(q, top_k=10, mode="vector", **paths)
+                tools.search_docs(q, top_k=10, mode="vector", **paths)
+                tools.search_verification(q, top_k=10, mode="vector", **paths)
+
+        def after():
+            for q in _QUERIES:
+                tools.search_all(q, top_k=10, **paths)
+
+        times = {"before (3 tool calls)": _median_ms(before, args.repeat)}
+        concurrent, fan_out._pool = fan_out._pool, ThreadPoolExecutor(max_workers=1)
+        times["search_all, serial"] = _median_ms(after, args.repeat)
+        fan_out._pool = concurrent
+        times["search_all"] = _median_ms(after, args.repeat)
+
+        print(f"{args.subroutines} entries per collection, {len(_QUERIES)} questions, "
+              f"embedding {args.embed_ms:.0f} ms, {args.collection_ms:.0f} ms wait per collection query")
+        print(f"{'variant':<24} {'ms/question':>12}")
+        for name, ms in times.items():
+            print(f"{name:<24} {ms / len(_QUERIES):>12.1f}")
+        print(f"speedup: {times['before (3 tool calls)'] / times['search_all']:.2f}x")
+        duckdb_pool.close(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark: paging through subroutine source, full text vs source_lines.
+
+"before" is the old get_source_tool: fetch the whole source_text and
+splitlines() it for every 100-line page, and get_subroutine_tool reading
+source_text only to drop it.  "after" is tools.get_source, which returns
+one page read by range from the source_lines table (src/source_lines.py), and
+get_subroutine(include_source=False).  Runs against a synthetic MITgcm
+index through the pooled read-only cursor.
+
+Run as:
+    python -m benchmarks.source_pages
+    python -m benchmarks.source_pages --lines 1000 10000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src import duckdb_pool
+from src.duckdb_bulk import insert_rows
+from src.mitgcm import tools
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.source_lines import sync_source_lines
+
+_PAGE = 100
+
+
+def _synthetic_db(path: Path, n_lines: int) -> None:
+    source = "      SUBROUTINE INI_PARMS\n" + "      viscAh = 0. _d 0\n" * (n_lines - 2) + "      END\n"
+    short = "      SUBROUTINE S\n      END\n"
+    con = connect(path)
+    insert_rows(
+        con, "subroutines",
+        ["id", "name", "file", "package", "line_start", "line_end", "source_text"],
+        [(i, f"SUB_{i}", f"pkg/sub_{i}.F", "pkg", 1, 3, short) for i in range(1, 1000)]
+        + [(1000, "INI_PARMS", "model/src/ini_parms.F", "model", 1, n_lines, source)]
+        + [(i, f"SUB_{i}", f"pkg/sub_{i}.F", "pkg", 1, 3, short) for i in range(1001, 2000)],
+        KEYS["subroutines"],
+    )
+    sync_source_lines(con)
+    con.close()
+
+
+def _before_pages(db_path: Path, n_lines: int) -> None:
+    for offset in range(0, n_lines, _PAGE):
+        result = tools.get_subroutine("INI_PARMS", _db_path=db_path)
+        result["source_text"].splitlines()[offset: offset + _PAGE]
+
+
+def _after_pages(db_path: Path, n_lines: int) -> None:
+    for offset in range(0, n_lines, _PAGE):
+        tools.get_source("INI_PARMS", offset=offset, limit=_PAGE, _db_path=db_path)
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=[1_000, 5_000, 20_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'lines':>7} {'query':<26} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.lines:
+            db_path = Path(tmp) / f"index_{n}.duckdb"
+            _synthetic_db(db_path, n)
+            rows = {
+                f"all {n // _PAGE} pages": (
+                    lambda: _before_pages(db_path, n), lambda: _after_pages(db_path, n)),
+                "get_subroutine metadata": (
+                    lambda: tools.get_subroutine("INI_PARMS", _db_path=db_path),
+                    lambda: tools.get_subroutine("INI_PARMS", include_source=False, _db_path=db_path)),
+            }
+            for name, (before_fn, after_fn) in rows.items():
+                before = _median_ms(before_fn, args.repeat)
+                after = _median_ms(after_fn, args.repeat)
+                print(f"{n:>7} {name:<26} {before:>10.2f} {after:>10.2f} {before / after:>7.1f}x")
+            duckdb_pool.close(db_path)
+
+
+if __name__ == "__main__":
+    main()
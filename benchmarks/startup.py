@@ -0,0 +1,141 @@
+"""Benchmark: MCP server cold start, import time and initialize handshake.
+
+Each server is imported in a fresh interpreter under ``python -X importtime``.
+The import time is reported whole and split into the ``mcp`` package and
+everything else ("own"). The benchmark also lists any import of a
+dependency that the servers load only on the first tool call that needs it
+(chromadb, pint, the embedding clients). "handshake" is the wall time from
+starting ``python -m src.<backend>.server`` to its reply to an MCP
+``initialize`` request on stdio, then the same up to the reply to a first
+tool call (``server_status_tool``) sent after ``notifications/initialized``,
+which is when the warm-up thread starts.  The servers run in a scratch
+directory holding a small ChromaDB store for each backend, so the warm-up
+has collections to page in and imports chromadb, as it does in a deployed
+container.
+
+The run fails (exit status 1) if a server's whole import time, ``mcp``
+included, as the median over --repeat interpreters, exceeds --budget-ms,
+or if a lazy dependency is imported at startup.  No index or Ollama is
+needed.
+
+Run as:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget-ms 1000 --repeat 9
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_SERVERS = ["src.mitgcm.server", "src.fesom2.server"]
+# Top-level packages that must not be imported before the first tool call.
+_LAZY = ["chromadb", "pint", "onnxruntime", "ollama", "tokenizers"]
+_INITIALIZE = {
+    "jsonrpc": "2.0", "id": 1, "method": "initialize",
+    "params": {"protocolVersion": "2024-11-05", "capabilities": {},
+               "clientInfo": {"name": "benchmark", "version": "0"}},
+}
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of each top-level package imported by `import module`."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    times: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            top = name.strip().split(".")[0]
+            # the first line for a package is its outermost import, so it holds the cumulative time
+            times[top] = max(times.get(top, 0), int(cumulative))
+            if name.strip() == module:
+                times[module] = int(cumulative)
+    return times
+
+
+def _scratch_dir(root: Path) -> None:
+    """Small ChromaDB stores where both servers look for them, relative to root."""
+    import chromadb
+
+    for backend in ("mitgcm", "fesom2"):
+        client = chromadb.PersistentClient(path=str(root / "data" / backend / "chroma"))
+        client.get_or_create_collection("warm_up", metadata={"hnsw:space": "cosine"}).add(
+            ids=[str(i) for i in range(100)], embeddings=[[float(i), 1.0] for i in range(100)])
+
+
+def _handshake_ms(module: str, cwd: Path) -> tuple[float, float]:
+    """Milliseconds from process start to the initialize response and to the first tool call's response."""
+    t0 = time.perf_counter()
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", module], cwd=cwd, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+
+    def send(message: dict) -> None:
+        proc.stdin.write(json.dumps(message) + "\n")
+        proc.stdin.flush()
+
+    try:
+        send(_INITIALIZE)
+        reply = json.loads(proc.stdout.readline())
+        initialized = (time.perf_counter() - t0) * 1e3
+        assert reply.get("id") == 1 and "result" in reply, reply
+        send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        send({"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+              "params": {"name": "server_status_tool", "arguments": {}}})
+        reply = json.loads(proc.stdout.readline())
+        first_call = (time.perf_counter() - t0) * 1e3
+        assert reply.get("id") == 2 and "result" in reply, reply
+        return initialized, first_call
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1200.0,
+                        help="maximum median import time of a server, the mcp package included")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    scratch = tempfile.TemporaryDirectory()
+    _scratch_dir(Path(scratch.name))
+    print(f"median of {args.repeat} fresh interpreters; import includes mcp, own = import minus mcp")
+    print(f"{'server':<20} {'import ms':>10} {'mcp ms':>8} {'own ms':>8} {'handshake ms':>13} "
+          f"{'first call ms':>14}  lazy imported")
+    for module in _SERVERS:
+        runs = [_import_times(module) for _ in range(args.repeat)]
+        total = statistics.median(r[module] for r in runs) / 1e3
+        mcp = statistics.median(r.get("mcp", 0) for r in runs) / 1e3
+        own = statistics.median(r[module] - r.get("mcp", 0) for r in runs) / 1e3
+        eager = sorted({name for r in runs for name in _LAZY if name in r})
+        timings = [_handshake_ms(module, Path(scratch.name)) for _ in range(args.repeat)]
+        handshake = statistics.median(t[0] for t in timings)
+        first_call = statistics.median(t[1] for t in timings)
+        print(f"{module:<20} {total:>10.0f} {mcp:>8.0f} {own:>8.0f} {handshake:>13.0f} {first_call:>14.0f}  "
+              f"{', '.join(eager) or '-'}")
+        if total > args.budget_ms:
+            failures.append(f"{module}: import time {total:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        if eager:
+            failures.append(f"{module}: imports {', '.join(eager)} at startup")
+    scratch.cleanup()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
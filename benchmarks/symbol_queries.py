@@ -0,0 +1,99 @@
+"""Benchmark: search_code on exact-symbol queries, semantic search vs the fast path.
+
+Queries that are one known identifier — a subroutine name, a namelist
+parameter, a CPP flag — used to go through query normalisation, the
+embedding call and a ChromaDB query like any other.  "before" is that path
+(mode="vector", which still takes it); "after" is the default mode, which
+answers them from the in-memory symbol table (src/symbols.py) and never
+embeds.  The Ollama
+round-trip is simulated with a sleep (--embed-ms; 0 stands for a query
+embedding cache hit), so no Ollama is needed.
+
+Run as:
+    python -m benchmarks.symbol_queries
+    python -m benchmarks.symbol_queries --subroutines 20000 --embed-ms 0
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+
+from src import duckdb_pool
+from src.duckdb_bulk import insert_rows
+from src.mitgcm import tools
+from src.mitgcm.embedder.store import COLLECTION_NAME
+from src.mitgcm.indexer.schema import KEYS, connect
+
+_DIM = 768
+_QUERIES = {"subroutine": "SUB_1234", "namelist_param": "param1234", "cpp_flag": "ALLOW_FLAG_34"}
+
+
+def _build(tmp: Path, n: int) -> tuple[Path, Path]:
+    rng = random.Random(0)
+    db_path = tmp / "index.duckdb"
+    con = connect(db_path)
+    insert_rows(con, "subroutines", ["id", "name", "file", "package", "line_start", "line_end"],
+                [(i, f"SUB_{i}", f"pkg{i % 50}/sub_{i}.F", f"pkg{i % 50}", 1, 60) for i in range(n)],
+                KEYS["subroutines"])
+    insert_rows(con, "namelist_refs", ["param_name", "subroutine_id", "namelist_group"],
+                [(f"param{i}", i, "PARM01") for i in range(n)], KEYS["namelist_refs"])
+    insert_rows(con, "cpp_guard_spans", ["subroutine_id", "cpp_flag", "line_from", "line_to", "negated"],
+                [(i, f"ALLOW_FLAG_{i % 100}", 2, 50, False) for i in range(n)], KEYS["cpp_guard_spans"])
+    con.close()
+
+    chroma_path = tmp / "chroma"
+    col = chromadb.PersistentClient(path=str(chroma_path)).get_or_create_collection(
+        COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+    )
+    for start in range(0, n, 5000):
+        ids = range(start, min(start + 5000, n))
+        col.add(ids=[f"sub_{i}" for i in ids], metadatas=[{"db_id": i} for i in ids],
+                embeddings=[[rng.random() for _ in range(_DIM)] for _ in ids])
+    return db_path, chroma_path
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subroutines", type=int, default=5_000)
+    parser.add_argument("--embed-ms", type=float, default=40.0, help="simulated Ollama embedding latency")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    vector = [0.5] * _DIM
+
+    def embed(query: str) -> list[float]:
+        time.sleep(args.embed_ms / 1e3)
+        return vector
+
+    tools._embed = embed
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, chroma_path = _build(Path(tmp), args.subroutines)
+        print(f"{args.subroutines} subroutines, embedding {args.embed_ms:.0f} ms")
+        print(f"{'query':<16} {'match':<16} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for kind, query in _QUERIES.items():
+            before = _median_ms(lambda: tools.search_code(
+                query, mode="vector", _db_path=db_path, _chroma_path=chroma_path), args.repeat)
+            after = _median_ms(lambda: tools.search_code(
+                query, _db_path=db_path, _chroma_path=chroma_path), args.repeat)
+            match = tools.search_code(query, _db_path=db_path, _chroma_path=chroma_path)[0]["match"]
+            assert match == kind, match
+            print(f"{query:<16} {match:<16} {before:>10.2f} {after:>10.3f} {before / after:>7.0f}x")
+        duckdb_pool.close(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark: reading a verification experiment, ChromaDB chunks vs DuckDB.
+
+"before" is the old path: one get_verification_source call per file, each
+fetching that file's chunks from the mitgcm_verification collection and
+undoing the chunk overlap.  "after" reads the same files from the
+``verification_files`` table, one lookup per file and then a single
+get_experiment_files call for the whole experiment.  Synthetic experiments
+use constant embeddings, so no Ollama is needed.
+
+Run as:
+    python -m benchmarks.verification_files
+    python -m benchmarks.verification_files --experiments 500
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+
+from src import duckdb_pool
+from src.embed_utils import MAX_CHARS, OVERLAP, _chunk_text
+from src.mitgcm.embedder.store import VERIFICATION_COLLECTION_NAME
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.mitgcm.tools import get_experiment_files, get_verification_source
+from src.mitgcm.verification_indexer.files import write_files
+
+# (filename, lines) of a typical experiment
+_FILES = [("data", 120), ("data.pkg", 15), ("data.diagnostics", 60), ("eedata", 12),
+          ("SIZE.h", 65), ("CPP_OPTIONS.h", 40), ("packages.conf", 8), ("DIAGNOSTICS_SIZE.h", 30)]
+_LINE = " viscAh=4.E2, viscAr=1.E-3, diffKhT=1.E2,\n"
+
+
+def _synthetic_files(n_experiments: int) -> list[tuple[str, str, str]]:
+    out = []
+    for i in range(n_experiments):
+        for name, n_lines in _FILES:
+            subdir = "code" if name.endswith((".h", ".conf")) else "input"
+            out.append((f"verification/exp_{i}/{subdir}/{name}", f"exp_{i}", _LINE * n_lines))
+    return out
+
+
+def _build(tmp: Path, n: int) -> tuple[Path, Path]:
+    files = _synthetic_files(n)
+    db_path = tmp / "index.duckdb"
+    con = connect(db_path)
+    write_files(con, files, KEYS["verification_files"])
+    con.close()
+
+    chroma_path = tmp / "chroma"
+    col = chromadb.PersistentClient(path=str(chroma_path)).get_or_create_collection(
+        VERIFICATION_COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+    )
+    ids, docs, metas = [], [], []
+    for file, experiment, text in files:
+        for j, chunk in enumerate(_chunk_text(text, MAX_CHARS, OVERLAP)):
+            ids.append(f"vrf_{file}_{j}")
+            docs.append(f"[{file}]\n{chunk}")
+            metas.append({"experiment": experiment, "file": file,
+                          "filename": Path(file).name, "chunk_index": j})
+    for start in range(0, len(ids), 5000):
+        end = start + 5000
+        col.add(ids=ids[start:end], documents=docs[start:end], metadatas=metas[start:end],
+                embeddings=[[0.1] * 768] * len(ids[start:end]))
+    return db_path, chroma_path
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--experiments", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_path, chroma_path = _build(tmp, args.experiments)
+        experiment = f"exp_{args.experiments // 2}"
+        files = [f for f, e, _ in _synthetic_files(args.experiments) if e == experiment]
+        no_index = tmp / "missing.duckdb"
+
+        variants = {
+            "before (chunks, per file)": lambda: [
+                get_verification_source(f, _db_path=no_index, _chroma_path=chroma_path) for f in files
+            ],
+            "after (DuckDB, per file)": lambda: [
+                get_verification_source(f, _db_path=db_path, _chroma_path=chroma_path) for f in files
+            ],
+            "after (get_experiment_files)": lambda: get_experiment_files(
+                experiment, _db_path=db_path, _chroma_path=chroma_path
+            ),
+        }
+        print(f"{args.experiments} experiments, {len(files)} files read from {experiment}")
+        print(f"{'variant':<32} {'ms':>8} {'speedup':>8}")
+        before = None
+        for name, fn in variants.items():
+            ms = _median_ms(fn, args.repeat)
+            before = before or ms
+            print(f"{name:<32} {ms:>8.2f} {before / ms:>7.1f}x")
+        duckdb_pool.close(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,12 @@ set -e
 
 # Start Ollama embedding server in the background.
 # The model weights are pre-baked into the image (no pull needed).
-# Ollama starts in parallel with the MCP server; it is only needed when
-# search_code_tool is called, by which time it will be ready.
-ollama serve >/dev/null 2>&1 &
+# Ollama starts in parallel with the MCP server, whose background warm-up
+# (src/warmup.py) waits for it and loads the model; see server_status_tool.
+# With OGCMCP_EMBED_BACKEND=onnx embeddings run in-process and Ollama is skipped.
+if [ "${OGCMCP_EMBED_BACKEND:-ollama}" = "ollama" ]; then
+    ollama serve >/dev/null 2>&1 &
+fi
 
 # Start the MCP server immediately (stdio transport).
 # exec replaces this shell so Docker signals reach the Python process.
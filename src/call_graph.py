@@ -0,0 +1,190 @@
+"""In-memory call graph for transitive call-tree and call-path queries.
+
+``get_callers`` / ``get_callees`` answer one hop per MCP round trip, so
+following a code path (THERMODYNAMICS -> CALC_GT -> GAD_CALC_RHS -> ...) costs
+an agent a dozen calls.  Each server instead loads the ``calls`` table once
+into a ``CallGraph``: subroutines become dense integer nodes and edges are
+stored as CSR arrays (``indptr``/``indices``, forward and reverse), so a
+bounded tree or a shortest path is a few array walks in one call.
+
+Calls point at the subroutine(s) the indexer resolved them to; a call
+without a resolution falls back to every subroutine of that case-folded
+name, and callees that are not indexed at all (MPI, NetCDF, intrinsics
+mis-parsed as calls) become external leaf nodes.
+"""
+
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+# Upper bounds on one tree query, to keep responses small.
+MAX_TREE_DEPTH = 10
+MAX_TREE_NODES = 500
+
+
+def _csr(n: int, src: np.ndarray, dst: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return (indptr, indices) for the edges src -> dst over n nodes."""
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order].astype(np.int32)
+
+
+class CallGraph:
+    """Immutable call graph over subroutines plus external callees.
+
+    nodes are (db_id, name, group) for each indexed subroutine, where group
+    is the backend's disambiguator (MITgcm package, FESOM2 module) and is
+    reported under the key group_field.  calls are (caller node index,
+    callee name, callee node indices); an empty index list resolves the
+    callee by name.
+    """
+
+    def __init__(
+        self,
+        nodes: list[tuple[int, str, str | None]],
+        calls: list[tuple[int, str, list[int]]],
+        group_field: str,
+    ) -> None:
+        self.group_field = group_field
+        self.ids: list[int | None] = [n[0] for n in nodes]
+        self.names: list[str] = [n[1] for n in nodes]
+        self.groups: list[str | None] = [n[2] for n in nodes]
+        self._by_key: dict[str, list[int]] = {}
+        for i, name in enumerate(self.names):
+            self._by_key.setdefault(name.upper(), []).append(i)
+
+        edges: set[tuple[int, int]] = set()
+        for caller, callee, targets in calls:
+            if not targets:
+                targets = self._by_key.get(callee.upper())
+            if not targets:
+                targets = self._by_key[callee.upper()] = [self._add_external(callee)]
+            edges.update((caller, t) for t in targets)
+
+        n = len(self.names)
+        pairs = np.array(sorted(edges), dtype=np.int64).reshape(-1, 2)
+        self._fwd = _csr(n, pairs[:, 0], pairs[:, 1])
+        self._rev = _csr(n, pairs[:, 1], pairs[:, 0])
+
+    def _add_external(self, name: str) -> int:
+        self.ids.append(None)
+        self.names.append(name)
+        self.groups.append(None)
+        return len(self.names) - 1
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._fwd[1])
+
+    def find(self, name: str, group: str | None = None) -> list[int]:
+        """Return node indices named name (case-insensitive), optionally in group."""
+        nodes = self._by_key.get(name.upper(), [])
+        if group is not None:
+            g = group.upper()
+            nodes = [i for i in nodes if (self.groups[i] or "").upper() == g]
+        return nodes
+
+    def neighbours(self, node: int, reverse: bool = False) -> np.ndarray:
+        """Callees of node (callers when reverse), as node indices."""
+        indptr, indices = self._rev if reverse else self._fwd
+        return indices[indptr[node]:indptr[node + 1]]
+
+    def describe(self, node: int) -> dict:
+        """Return {id, name, <group_field>} for node; external nodes have id None."""
+        return {"id": self.ids[node], "name": self.names[node], self.group_field: self.groups[node]}
+
+    def tree(self, root: int, depth: int, reverse: bool = False, max_nodes: int = MAX_TREE_NODES) -> dict:
+        """Return the call tree (caller tree when reverse) below root, depth levels deep.
+
+        Each node is describe(node) plus ``children``.  A subroutine already
+        expanded elsewhere in the tree is listed with ``seen: True`` and no
+        children (this also cuts cycles); a node with unexpanded neighbours,
+        because of depth or max_nodes, carries ``truncated: True`` — with
+        max_nodes a node may list only its first few children.  At most
+        max_nodes nodes are returned.  depth is clamped to [0, MAX_TREE_DEPTH].
+        """
+        depth = max(0, min(depth, MAX_TREE_DEPTH))
+        expanded: set[int] = set()
+        emitted = 0
+        out = self.describe(root)
+        queue = deque([(root, out, 0)])  # breadth first: max_nodes keeps the shallow levels
+        while queue:
+            node, entry, level = queue.popleft()
+            emitted += 1
+            nbrs = self.neighbours(node, reverse)
+            if node in expanded:
+                entry["seen"] = True
+                continue
+            expanded.add(node)
+            if len(nbrs) == 0:
+                continue
+            if level >= depth or emitted + len(queue) >= max_nodes:
+                entry["truncated"] = True
+                continue
+            entry["children"] = []
+            for nbr in nbrs:
+                if emitted + len(queue) >= max_nodes:  # hard cap: list only the first neighbours
+                    entry["truncated"] = True
+                    break
+                child = self.describe(int(nbr))
+                entry["children"].append(child)
+                queue.append((int(nbr), child, level + 1))
+        return out
+
+    def shortest_path(self, sources: list[int], targets: list[int], max_depth: int | None = None) -> list[int]:
+        """Return the shortest caller -> callee chain from any source to any target, or []."""
+        goal = set(targets)
+        parent: dict[int, int | None] = {s: None for s in sources}
+        frontier = list(sources)
+        level = 0
+        while frontier:
+            for node in frontier:
+                if node in goal:
+                    path = [node]
+                    while (node := parent[node]) is not None:
+                        path.append(node)
+                    return path[::-1]
+            if max_depth is not None and level >= max_depth:
+                break
+            level += 1
+            nxt = []
+            for node in frontier:
+                for nbr in self.neighbours(node):
+                    nbr = int(nbr)
+                    if nbr not in parent:
+                        parent[nbr] = node
+                        nxt.append(nbr)
+            frontier = nxt
+        return []
+
+
+_GRAPHS: dict[Path, CallGraph] = {}
+_LOCK = threading.Lock()
+
+
+def get_graph(db_path: Path, load: Callable[[Path], CallGraph]) -> CallGraph:
+    """Return the process-wide graph for db_path, calling load(db_path) on first use.
+
+    The servers call this at startup so the first traversal tool call does
+    not pay for the build; the graph lives until the process exits (the index
+    is rebuilt offline, and servers are restarted to pick it up).
+    """
+    key = Path(db_path).resolve()
+    with _LOCK:
+        graph = _GRAPHS.get(key)
+        if graph is None:
+            graph = _GRAPHS[key] = load(db_path)
+    return graph
+
+
+def clear() -> None:
+    """Drop all cached graphs (tests, or after re-indexing in-process)."""
+    with _LOCK:
+        _GRAPHS.clear()
@@ -0,0 +1,102 @@
+"""Process-wide registry of ChromaDB clients and collection handles.
+
+Opening a ``PersistentClient`` and resolving a collection by name costs
+several milliseconds — more than a query against a few thousand vectors —
+and the search tools used to pay it on every call, twice for search_code
+(chunks and pooled vectors).  The registry opens one client per Chroma
+directory and resolves each collection once, then hands the same handle to
+every caller; ChromaDB collections are safe to query from several threads.
+
+The server side only reads: ``get_collection`` opens an existing
+collection and returns None for one no pipeline has built yet (the tools
+then report no hits), so serving never writes to the index and works from
+a read-only mount.  Misses are not cached, so a collection a pipeline
+builds later is found on the next call.  Only the pipelines call
+``create_collection``, which creates a missing collection empty and with
+cosine distance.
+
+chromadb itself is imported on first use: it takes longer to import than
+the MCP server needs to start.
+"""
+
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import chromadb
+
+_lock = threading.Lock()
+_clients: dict[str, "chromadb.ClientAPI"] = {}
+_collections: dict[tuple[str, str], "chromadb.Collection"] = {}
+
+
+def _key(path: Path) -> str:
+    return str(Path(path).resolve())
+
+
+def get_client(path: Path) -> "chromadb.ClientAPI":
+    """Return the shared client for the Chroma directory path, opening it on first use."""
+    key = _key(path)
+    with _lock:
+        return _client(key)
+
+
+def _client(key: str) -> "chromadb.ClientAPI":
+    client = _clients.get(key)
+    if client is None:
+        import chromadb
+
+        client = chromadb.PersistentClient(path=key)
+        _clients[key] = client
+    return client
+
+
+def get_collection(path: Path, name: str) -> "chromadb.Collection | None":
+    """Return the shared handle on collection name under path, or None if it does not exist."""
+    key = _key(path)
+    with _lock:
+        collection = _collections.get((key, name))
+        if collection is None:
+            from chromadb.errors import NotFoundError
+
+            try:
+                collection = _client(key).get_collection(name)
+            except NotFoundError:
+                return None
+            _collections[(key, name)] = collection
+        return collection
+
+
+def create_collection(path: Path, name: str) -> "chromadb.Collection":
+    """Return the shared handle on collection name under path, creating it (cosine distance) if absent.
+
+    For the indexing pipelines; the server uses get_collection.
+    """
+    key = _key(path)
+    with _lock:
+        collection = _collections.get((key, name))
+        if collection is None:
+            collection = _client(key).get_or_create_collection(name, metadata={"hnsw:space": "cosine"})
+            _collections[(key, name)] = collection
+        return collection
+
+
+def close(path: Path) -> None:
+    """Forget the client and collection handles for path (no-op if not open).
+
+    Needed when the same process deletes or replaces the directory, e.g. a
+    test that rebuilds an index from scratch at a path it has queried.
+    """
+    key = _key(path)
+    with _lock:
+        _clients.pop(key, None)
+        for cached in [k for k in _collections if k[0] == key]:
+            del _collections[cached]
+
+
+def close_all() -> None:
+    """Forget every client and collection handle."""
+    with _lock:
+        _clients.clear()
+        _collections.clear()
@@ -0,0 +1,258 @@
+"""Trigram-indexed regular-expression search over indexed source (grep_code).
+
+Running a regex over every subroutine on each call means reading and
+scanning the whole source tree.  Following Russ Cox's codesearch, the
+indexing pipelines instead store a posting list per trigram: for every
+three-byte sequence of the lower-cased UTF-8 text, the ids of the
+documents (subroutines, headers) that contain it.  A query is compiled to a
+boolean trigram query — ``foo_bar(x|y)`` needs ``foo``, ``oo_``, ``o_b``,
+``_ba`` and ``bar`` — the posting lists are intersected and united
+accordingly, and only the surviving candidates are fetched and matched with
+the real regex, line by line.
+
+The index is case-insensitive, so one set of postings serves both case
+modes; a pattern yielding no trigrams (``.*``, ``[a-z]+_x``) falls back to
+scanning every document.  Postings live in the ``trigram_postings`` table of
+each backend's DuckDB index, one row per (source, trigram), the ids packed
+as little-endian uint32:
+
+    CREATE TABLE trigram_postings (source TEXT, trigram INTEGER, ids BLOB)
+
+Patterns are taken apart with the standard library's regex parser, which
+is private (``re._parser`` since Python 3.11, ``sre_parse`` before).  If it
+cannot be imported, or a pattern's parse tree does not look as expected,
+the pattern gets no trigram query and every document is scanned: slower,
+with the same results.  tests/code_search checks that the prefilter is
+active on the Python the project pins.
+"""
+
+import itertools
+import logging
+import re
+from typing import Iterable, Iterator, Sequence
+
+try:
+    from re import _constants as sre
+    from re import _parser as sre_parse
+except ImportError:
+    try:  # Python < 3.11
+        import sre_constants as sre
+        import sre_parse
+    except ImportError:
+        sre = sre_parse = None
+
+import duckdb
+import numpy as np
+
+from .duckdb_bulk import insert_rows
+
+log = logging.getLogger(__name__)
+
+# Bounds on the literal-set expansion of character classes and alternations.
+_MAX_CLASS = 8
+_MAX_STRINGS = 64
+
+# A query is a trigram, ("and", parts), ("or", parts), or None for "any document".
+Query = int | tuple | None
+
+_EMPTY = np.zeros(0, dtype="<u4")
+
+
+def trigrams(text: str) -> np.ndarray:
+    """Return the sorted distinct trigrams of text, lower-cased, as uint32."""
+    b = np.frombuffer(text.lower().encode("utf-8"), dtype=np.uint8).astype(np.uint32)
+    if len(b) < 3:
+        return _EMPTY
+    return np.unique((b[:-2] << 16) | (b[1:-1] << 8) | b[2:])
+
+
+def write_postings(con: duckdb.DuckDBPyConnection, source: str, docs: Iterable[tuple[int, str]]) -> int:
+    """Replace source's posting lists with those of (id, text) docs; return the trigram count."""
+    ids, grams = [], []
+    for doc_id, text in sorted(docs, key=lambda d: d[0]):
+        t = trigrams(text or "")
+        grams.append(t)
+        ids.append(np.full(len(t), doc_id, dtype="<u4"))
+    con.execute("DELETE FROM trigram_postings WHERE source = ?", [source])
+    if not grams:
+        return 0
+    gram, doc = np.concatenate(grams), np.concatenate(ids)
+    order = np.argsort(gram, kind="stable")  # ids stay ascending within a trigram
+    gram, doc = gram[order], doc[order]
+    keys, starts = np.unique(gram, return_index=True)
+    bounds = [*starts[1:], len(gram)]
+    return insert_rows(
+        con, "trigram_postings", ["source", "trigram", "ids"],
+        [(source, int(k), doc[lo:hi].tobytes()) for k, lo, hi in zip(keys, starts, bounds)],
+    )
+
+
+def _all(parts: Sequence[Query]) -> Query:
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+
+def _any(parts: Sequence[Query]) -> Query:
+    if not parts or any(p is None for p in parts):
+        return None
+    return parts[0] if len(parts) == 1 else ("or", parts)
+
+
+def _strings_query(strings: set[str]) -> Query:
+    """The query for a run that is exactly one of strings."""
+    return _any([_all(trigrams(s).tolist()) for s in {s.lower() for s in strings}])
+
+
+def _class_literals(items) -> list[str] | None:
+    """The characters of a class made only of literals (``[rz]``), else None."""
+    if len(items) > _MAX_CLASS or any(op is not sre.LITERAL for op, _ in items):
+        return None
+    return [chr(av) for _, av in items]
+
+
+def _query(parsed) -> Query:
+    """Trigram query that every string matching the parsed pattern satisfies."""
+    parts: list[Query] = []
+    run = {""}  # the literal strings the current stretch of pattern can be
+
+    def flush():
+        nonlocal run
+        parts.append(_strings_query(run))
+        run = {""}
+
+    for op, av in parsed:
+        chars = None
+        if op is sre.LITERAL:
+            chars = [chr(av)]
+        elif op is sre.IN:
+            chars = _class_literals(av)
+        if chars is not None:
+            if len(run) * len(chars) > _MAX_STRINGS:
+                flush()
+            run = {s + c for s, c in itertools.product(run, chars)}
+            continue
+        flush()
+        if op is sre.SUBPATTERN:
+            parts.append(_query(av[-1]))
+        elif op is sre.ATOMIC_GROUP:
+            parts.append(_query(av))
+        elif op in (sre.MAX_REPEAT, sre.MIN_REPEAT, sre.POSSESSIVE_REPEAT) and av[0] >= 1:
+            parts.append(_query(av[2]))
+        elif op is sre.BRANCH:
+            parts.append(_any([_query(alt) for alt in av[1]]))
+        # anything else (., \w, ranges, anchors, optional repeats) constrains nothing
+    flush()
+    return _all(parts)
+
+
+def _pattern_query(pattern: str, flags: int) -> Query:
+    """The trigram query for a valid pattern, or None (scan everything) without a usable regex parser."""
+    if sre_parse is None:
+        return None
+    try:
+        return _query(sre_parse.parse(pattern, flags))
+    except (AttributeError, TypeError, ValueError, IndexError) as exc:
+        log.warning(f"grep: no trigram prefilter for {pattern!r}, scanning every document: {exc!r}")
+        return None
+
+
+class Pattern:
+    """A compiled regex and the trigram query its matches must satisfy."""
+
+    def __init__(self, pattern: str, ignore_case: bool = False):
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        try:
+            self.regex = re.compile(pattern, flags)
+        except re.error as exc:
+            raise ValueError(f"invalid regular expression {pattern!r}: {exc}") from None
+        self.query = _pattern_query(pattern, flags)
+
+    def candidates(self, con: duckdb.DuckDBPyConnection, source: str) -> list[int] | None:
+        """Ids of source's documents that may match, ascending; None means all of them.
+
+        None also when source has no postings (an index built before them).
+        """
+        if self.query is None:
+            return None
+        wanted = _trigrams_of(self.query)
+        try:
+            indexed = con.execute(
+                "SELECT EXISTS (SELECT 1 FROM trigram_postings WHERE source = ?)", [source]
+            ).fetchone()[0]
+            if not indexed:
+                return None
+            rows = con.execute(
+                f"SELECT trigram, ids FROM trigram_postings WHERE source = ? AND trigram IN ({_ints(wanted)})",
+                [source],
+            ).fetchall()
+        except duckdb.CatalogException:  # index built before trigram_postings existed
+            return None
+        postings = {gram: np.frombuffer(ids, dtype="<u4") for gram, ids in rows}
+        return _evaluate(self.query, postings).tolist()
+
+    def lines(self, text: str) -> Iterator[tuple[int, str]]:
+        """Yield (0-based line index, line) for each line of text holding a match."""
+        pos, line_no, line_start = 0, 0, 0
+        while pos < len(text) and (m := self.regex.search(text, pos)):
+            start = text.rfind("\n", 0, m.start()) + 1
+            end = text.find("\n", m.start())
+            end = len(text) if end < 0 else end
+            line_no += text.count("\n", line_start, start)
+            line_start = start
+            yield line_no, text[start:end].rstrip("\r")
+            pos = end + 1
+
+
+def _ints(values: Iterable[int]) -> str:
+    """Integers as a SQL list; a literal IN list lets DuckDB prune by zonemap, a bound list does not."""
+    return ", ".join(str(int(v)) for v in sorted(values))
+
+
+def _trigrams_of(query: Query) -> set[int]:
+    if isinstance(query, int):
+        return {query}
+    return set().union(*(_trigrams_of(p) for p in query[1]))
+
+
+def _evaluate(query: Query, postings: dict[int, np.ndarray]) -> np.ndarray:
+    if isinstance(query, int):
+        return postings.get(query, _EMPTY)
+    op, parts = query
+    out, *rest = [_evaluate(p, postings) for p in parts]
+    for ids in rest:
+        out = np.intersect1d(out, ids, assume_unique=True) if op == "and" else np.union1d(out, ids)
+    return out
+
+
+def grep(
+    con: duckdb.DuckDBPyConnection, pattern: Pattern, source: str, sql: str, params: dict, limit: int
+) -> list[tuple]:
+    """Return (first line + index, line, *fields) for lines of the rows of sql matching pattern.
+
+    sql selects (first_line, text, *fields) of source's documents in result
+    order and holds a ``{candidates}`` condition on their ``id``, filled in
+    here from the trigram index.  Stops after limit matching lines; returns
+    [] when the index predates the tables sql reads.
+    """
+    if limit <= 0:
+        return []
+    ids = pattern.candidates(con, source)
+    if ids == []:
+        return []
+    try:
+        if ids is None:
+            cur = con.execute(sql.format(candidates="TRUE"), params)
+        else:
+            cur = con.execute(sql.format(candidates=f"id IN ({_ints(ids)})"), params)
+    except (duckdb.CatalogException, duckdb.BinderException):
+        return []
+    out = []
+    while rows := cur.fetchmany(256):
+        for first_line, text, *fields in rows:
+            for index, line in pattern.lines(text or ""):
+                out.append((first_line + index, line, *fields))
+                if len(out) >= limit:
+                    return out
+    return out
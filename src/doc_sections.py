@@ -0,0 +1,87 @@
+"""Documentation sections stored in DuckDB for paginated reads.
+
+``get_doc_source`` used to rebuild a section on every call: fetch all of its
+chunks from ChromaDB with a metadata filter, sort them, strip the headers
+and undo the chunk overlap.  The docs pipelines now also write each
+section's clean text, split into lines, to a ``doc_sections`` table in the
+backend's DuckDB index.  The tools then read a page with one indexed point
+lookup on ``section_key`` (see src/name_keys.py), slicing the line list in
+DuckDB so only the requested lines are returned.
+
+Each schema declares the table (id, file, section, lines TEXT[],
+section_key) and its key; ``id`` numbers the sections for the trigram index
+(src/code_search.py).  The text is stored once, as the line list, like
+verification_files (src/mitgcm/verification_indexer/files.py): the BM25
+index (src/full_text.py) is built over ``lines`` directly, and ``TEXT`` is
+the SQL for the whole section where a caller needs it:
+
+    KEYS["doc_sections"] = {"section_key": SECTION_KEY}
+
+Text is split on ``\n`` only (a trailing ``\r`` dropped), not with
+``str.splitlines``, which also breaks at form feeds and other Unicode line
+boundaries that old Fortran headers contain.  Line i of a stored header is
+then line i + 1 of the file, as grep_code and editors number it.
+"""
+
+from typing import Iterable
+
+import duckdb
+
+from .duckdb_bulk import insert_rows
+
+# file and section joined by the ASCII unit separator, which occurs in neither.
+SECTION_KEY = "file || chr(31) || section"
+
+# The whole section, as write_sections received it after line splitting.
+TEXT = "array_to_string(lines, chr(10))"
+
+
+def write_sections(
+    con: duckdb.DuckDBPyConnection, sections: Iterable[tuple[str, str, str]], keys: dict[str, str]
+) -> int:
+    """Replace the stored sections with (file, section, text) triples; return the count.
+
+    Texts of repeated (file, section) pairs (an RST heading used twice in
+    one file) are joined in order, as the chunk-based lookup merged them.
+    Sections are numbered from 1 in order of first appearance.
+    """
+    merged: dict[tuple[str, str], list[str]] = {}
+    for file, section, text in sections:
+        merged.setdefault((file, section), []).extend(_lines(text))
+    con.execute("DELETE FROM doc_sections")
+    return insert_rows(
+        con, "doc_sections", ["id", "file", "section", "lines"],
+        [(i, file, section, lines) for i, ((file, section), lines) in enumerate(merged.items(), 1)],
+        keys,
+    )
+
+
+def _lines(text: str) -> list[str]:
+    """text split at newlines like ``str.splitlines``, but only at ``\n``."""
+    lines = [line.removesuffix("\r") for line in text.split("\n")]
+    if lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def read_section(con: duckdb.DuckDBPyConnection, file: str, section: str, offset: int, limit: int) -> dict | None:
+    """Return {file, section, total_lines, offset, lines} for one page, or None if not stored."""
+    try:
+        row = con.execute(
+            "SELECT len(lines), lines[$lo:$hi] FROM doc_sections "
+            "WHERE section_key = $file || chr(31) || $section",
+            {"file": file, "section": section, "lo": max(offset, 0) + 1, "hi": max(offset, 0) + max(limit, 0)},
+        ).fetchone()
+    except duckdb.CatalogException:  # index built before doc_sections existed
+        return None
+    if row is None:
+        return None
+    return {"file": file, "section": section, "total_lines": row[0], "offset": offset, "lines": row[1]}
+
+
+def sections_stored(con: duckdb.DuckDBPyConnection) -> bool:
+    """True when the docs pipeline has filled doc_sections in this index."""
+    exists = con.execute(
+        "SELECT count(*) FROM duckdb_tables() WHERE table_name = 'doc_sections'"
+    ).fetchone()[0]
+    return bool(exists) and con.execute("SELECT EXISTS (SELECT 1 FROM doc_sections)").fetchone()[0]
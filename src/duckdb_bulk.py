@@ -0,0 +1,70 @@
+"""Column-wise bulk inserts into DuckDB for the indexing pipelines.
+
+One ``INSERT`` per row (or ``executemany``, which is the same thing under the
+hood) pays statement overhead for every row, which dominates a full index
+build.  ``insert_rows`` instead registers the rows as a dict of NumPy object
+arrays and copies them with a single ``INSERT ... SELECT``.
+
+When pandas is not installed, DuckDB's conversion of Python objects retries
+``import pandas`` for every value, which costs more than the insert itself;
+``insert_rows`` marks pandas as absent for the duration of the copy.
+"""
+
+import importlib.util
+import sys
+from contextlib import contextmanager
+from typing import Sequence
+
+import duckdb
+import numpy as np
+
+_HAVE_PANDAS = importlib.util.find_spec("pandas") is not None
+
+
+@contextmanager
+def _no_pandas_probe():
+    if _HAVE_PANDAS or "pandas" in sys.modules:
+        yield
+        return
+    sys.modules["pandas"] = None  # makes `import pandas` fail fast
+    try:
+        yield
+    finally:
+        sys.modules.pop("pandas", None)
+
+
+def insert_rows(
+    con: duckdb.DuckDBPyConnection,
+    table: str,
+    columns: Sequence[str],
+    rows: list[tuple],
+    keys: dict[str, str] | None = None,
+) -> int:
+    """Insert rows (tuples in the order of columns) into table; return the row count.
+
+    keys maps extra columns to SQL expressions over columns (see
+    src/name_keys.py); they are computed during the copy, and rows are
+    written in key order.
+    """
+    if not rows:
+        return 0
+    data = {}
+    for name, values in zip(columns, zip(*rows)):
+        col = np.empty(len(rows), dtype=object)
+        col[:] = values
+        data[name] = col
+    keys = keys or {}
+    targets = [*columns, *keys]
+    select = [*columns, *(f"{expr} AS {key}" for key, expr in keys.items())]
+    order = f" ORDER BY {', '.join(keys)}" if keys else ""
+    view = f"_bulk_{table}"
+    with _no_pandas_probe():
+        con.register(view, data)
+        try:
+            con.execute(
+                f"INSERT INTO {table} ({', '.join(targets)}) "
+                f"SELECT {', '.join(select)} FROM {view}{order}"
+            )
+        finally:
+            con.unregister(view)
+    return len(rows)
@@ -0,0 +1,67 @@
+"""Process-wide pool of read-only DuckDB connections for the MCP tool layers.
+
+One read-only connection is opened per database file, the first time it is
+needed (the servers open theirs at startup).  Every tool call then borrows a
+cursor from it: DuckDB cursors are independent connections to the same
+database instance, so concurrent tool calls on different threads can query in
+parallel without re-opening the file or re-running the schema DDL.
+"""
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import duckdb
+
+_lock = threading.Lock()
+_connections: dict[str, duckdb.DuckDBPyConnection] = {}
+
+
+def _key(path: Path) -> str:
+    return str(Path(path).resolve())
+
+
+def get_connection(path: Path) -> duckdb.DuckDBPyConnection:
+    """Return the shared read-only connection for path, opening it on first use.
+
+    Raises duckdb.IOException if the database file does not exist — a missing
+    index is a build error, and read-only mode never creates the file.
+    """
+    key = _key(path)
+    with _lock:
+        con = _connections.get(key)
+        if con is None:
+            con = duckdb.connect(key, read_only=True)
+            _connections[key] = con
+        return con
+
+
+@contextmanager
+def cursor(path: Path):
+    """Context manager yielding a thread-local cursor on the pooled connection."""
+    cur = get_connection(path).cursor()
+    try:
+        yield cur
+    finally:
+        cur.close()
+
+
+def close(path: Path) -> None:
+    """Close and forget the pooled connection for path (no-op if not open).
+
+    Needed before the same process re-opens the file read-write, e.g. when an
+    indexing pipeline rebuilds a database a test has already queried.
+    """
+    with _lock:
+        con = _connections.pop(_key(path), None)
+    if con is not None:
+        con.close()
+
+
+def close_all() -> None:
+    """Close every pooled connection."""
+    with _lock:
+        cons = list(_connections.values())
+        _connections.clear()
+    for con in cons:
+        con.close()
@@ -0,0 +1,213 @@
+"""Pluggable embedding backends for nomic-embed-text.
+
+Every embedding call — query-time ``_embed`` in both tools modules and all
+embedder pipelines — goes through ``embed_texts``, which dispatches to the
+backend selected by ``OGCMCP_EMBED_BACKEND``:
+
+``ollama`` (default)
+    HTTP calls to an Ollama server on localhost:11434.
+``onnx``
+    In-process CPU inference with onnxruntime (a chromadb dependency) on the
+    nomic-embed-text-v1.5 ONNX export.  No sidecar process, no HTTP/JSON
+    round-trip, and no wait for Ollama at container start.  Fetch the model
+    once with ``pixi run fetch-onnx-model``.
+
+Both backends return L2-normalised, mean-pooled 768-d vectors from the same
+weights, which is what lets an index built with one be queried with the
+other.  tests/embed_backend/test_backend.py holds the ONNX backend to that:
+its vectors must have cosine similarity >= 0.99 with reference vectors
+recorded from Ollama (``record_reference``).
+
+Run as:
+    python -m src.embed_backend fetch        # download the ONNX model
+    python -m src.embed_backend reference    # record Ollama reference vectors
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Protocol
+
+from src.embed_utils import EMBED_MODEL
+
+BACKEND_ENV = "OGCMCP_EMBED_BACKEND"
+ONNX_MODEL_DIR_ENV = "OGCMCP_ONNX_MODEL_DIR"
+
+ONNX_REPO = "nomic-ai/nomic-embed-text-v1.5"
+ONNX_MODEL_DIR = Path("data/models/nomic-embed-text-v1.5")
+ONNX_FILES = ("tokenizer.json", "onnx/model.onnx")
+# Ollama runs nomic-embed-text with a 2048-token context; truncate to match.
+ONNX_MAX_TOKENS = 2048
+
+REFERENCE_PATH = Path("tests/embed_backend/ollama_reference.json")
+# A query, prose and fixed- and free-form Fortran, as the tools embed them.
+REFERENCE_TEXTS = (
+    "non hydrostatic pressure solve",
+    "sea ice dynamics",
+    "The KPP scheme computes the vertical mixing coefficients from the boundary layer depth.",
+    "      SUBROUTINE CG3D( myThid )\n      IF ( cg3dMaxIters .GT. 0 ) THEN",
+    "subroutine ice_timestep(ice, mesh)\n  call exchange_nod(ice%uice, mesh)",
+)
+
+
+class EmbeddingBackend(Protocol):
+    name: str
+
+    @property
+    def model_id(self) -> str:
+        """Identifier used to key cached vectors (backend + model)."""
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Return one vector per input text, in order."""
+
+
+class OllamaBackend:
+    """nomic-embed-text served by a local Ollama server."""
+
+    name = "ollama"
+
+    def __init__(self, model: str = EMBED_MODEL) -> None:
+        self.model = model
+
+    @property
+    def model_id(self) -> str:
+        return f"ollama/{self.model}"
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        import ollama
+        return ollama.embed(model=self.model, input=texts)["embeddings"]
+
+
+class OnnxBackend:
+    """nomic-embed-text-v1.5 run in-process with onnxruntime on CPU.
+
+    Reproduces Ollama's pooling: mean over non-padding token states, then L2
+    normalisation.  The session is created on the first embed call.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_dir: Path | None = None, max_tokens: int = ONNX_MAX_TOKENS) -> None:
+        self.model_dir = Path(model_dir or os.environ.get(ONNX_MODEL_DIR_ENV, ONNX_MODEL_DIR))
+        self.max_tokens = max_tokens
+        self._session = None
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        return f"onnx/{self.model_dir.name}"
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                return
+            missing = [f for f in ONNX_FILES if not (self.model_dir / f).exists()]
+            if missing:
+                raise FileNotFoundError(
+                    f"ONNX embedding model incomplete in {self.model_dir} (missing {missing}); "
+                    "run `pixi run fetch-onnx-model`"
+                )
+            import onnxruntime
+            from tokenizers import Tokenizer
+
+            tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=self.max_tokens)
+            tokenizer.enable_padding()
+            self._tokenizer = tokenizer
+            self._session = onnxruntime.InferenceSession(
+                str(self.model_dir / "onnx" / "model.onnx"),
+                providers=["CPUExecutionProvider"],
+            )
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        import numpy as np
+
+        self._load()
+        encodings = self._tokenizer.encode_batch(list(texts))
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        wanted = {i.name for i in self._session.get_inputs()}
+        hidden = self._session.run(None, {k: v for k, v in feeds.items() if k in wanted})[0]
+        return _mean_pool_normalize(hidden, feeds["attention_mask"]).tolist()
+
+
+def _mean_pool_normalize(hidden, attention_mask):
+    """Mean-pool token states over the attention mask and L2-normalise each row."""
+    import numpy as np
+
+    mask = attention_mask[..., None].astype(hidden.dtype)
+    pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return pooled / np.clip(norms, 1e-12, None)
+
+
+_BACKENDS = {"ollama": OllamaBackend, "onnx": OnnxBackend}
+_backend: EmbeddingBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> EmbeddingBackend:
+    """Return the process-wide backend selected by OGCMCP_EMBED_BACKEND."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.environ.get(BACKEND_ENV, "ollama").lower()
+            if name not in _BACKENDS:
+                raise ValueError(
+                    f"{BACKEND_ENV}={name!r} is not a known embedding backend; "
+                    f"choose one of {sorted(_BACKENDS)}"
+                )
+            _backend = _BACKENDS[name]()
+        return _backend
+
+
+def set_backend(backend: EmbeddingBackend | None) -> None:
+    """Override the process-wide backend (None re-reads the environment)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Embed texts with the configured backend; one vector per text."""
+    return get_backend().embed(texts)
+
+
+def fetch_onnx_model(model_dir: Path = ONNX_MODEL_DIR) -> Path:
+    """Download the nomic-embed-text-v1.5 ONNX export and tokenizer into model_dir."""
+    from huggingface_hub import hf_hub_download
+
+    for filename in ONNX_FILES:
+        hf_hub_download(ONNX_REPO, filename, local_dir=str(model_dir))
+    return model_dir
+
+
+def record_reference(
+    path: Path = REFERENCE_PATH, backend: EmbeddingBackend | None = None, texts: tuple[str, ...] = REFERENCE_TEXTS
+) -> Path:
+    """Embed texts with backend (Ollama by default) and write them with their vectors to path as JSON."""
+    backend = backend or OllamaBackend()
+    vectors = backend.embed(list(texts))
+    record = {
+        "model": backend.model_id,
+        "texts": list(texts),
+        "vectors": [[round(float(x), 7) for x in v] for v in vectors],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(record, indent=1) + "\n")
+    return path
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["fetch"]:
+        print(f"Fetched {ONNX_REPO} into {fetch_onnx_model()}")
+    elif sys.argv[1:] == ["reference"]:
+        print(f"Recorded {len(REFERENCE_TEXTS)} Ollama vectors in {record_reference()}")
+    else:
+        sys.exit("usage: python -m src.embed_backend fetch|reference")
@@ -0,0 +1,354 @@
+"""Embedding caches backed by SQLite.
+
+``QueryEmbeddingCache``: two-tier cache for query embeddings, an in-memory
+LRU over a small SQLite table.  Used by ``_embed`` in both tools modules so
+that repeated search queries skip the embedding round-trip.  Keys are
+(model, normalised query text); the persistent tier lets the cache survive
+server restarts when its directory is kept (set ``OGCMCP_CACHE_DIR`` to a
+mounted volume inside Docker).
+
+``ChunkEmbeddingCache``: content-addressed cache for the embedder pipelines,
+keyed by (model, sha256 of chunk text).  ``embed_chunks`` is the drop-in for
+``embed_texts`` used by every pipeline, so re-running a pipeline only sends
+new or changed chunks to the model.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+from src.embed_backend import embed_texts, get_backend
+
+log = logging.getLogger(__name__)
+
+QUERY_CACHE_FILENAME = "query_cache.sqlite"
+CHUNK_CACHE_FILENAME = "embedding_cache.sqlite"
+
+
+def _cache_root() -> Path:
+    return Path(os.environ.get("OGCMCP_CACHE_DIR", "data"))
+
+
+def query_cache_path(backend: str) -> Path:
+    """Return the query-cache file for a backend ("mitgcm" or "fesom2").
+
+    Defaults to ``data/<backend>/``; ``OGCMCP_CACHE_DIR`` replaces ``data``
+    as the root for all backends.
+    """
+    return _cache_root() / backend / QUERY_CACHE_FILENAME
+
+
+def chunk_cache_path() -> Path:
+    """Return the chunk-embedding cache file, shared by all pipelines.
+
+    Defaults to ``data/embedding_cache.sqlite``; ``OGCMCP_CACHE_DIR`` replaces
+    ``data``.  Entries are keyed by model, so one file serves every backend.
+    """
+    return _cache_root() / CHUNK_CACHE_FILENAME
+
+
+def normalize_key(text: str) -> str:
+    """Collapse runs of whitespace and strip, so trivially different queries share a key."""
+    return " ".join(text.split())
+
+
+def _pack(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> list[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU of query vectors backed by a bounded SQLite table.
+
+    The SQLite file is opened lazily on first use, so constructing a cache
+    (e.g. at module import) never touches the filesystem.  If the file cannot
+    be opened the cache degrades to memory-only and logs a warning.  With
+    model None, entries are keyed by the configured backend's model_id,
+    looked up on first use: a bad OGCMCP_EMBED_BACKEND then fails the first
+    search that embeds, not the import of the tools module.
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        model: str | None = None,
+        max_memory: int = 256,
+        max_disk: int = 10_000,
+    ) -> None:
+        self.path = path
+        self._model = model
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._memory: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._con: sqlite3.Connection | None = None
+        self._disk_failed = path is None
+
+    @property
+    def model(self) -> str:
+        if self._model is None:
+            self._model = get_backend().model_id
+        return self._model
+
+    # ── persistent tier ──────────────────────────────────────────────────────
+
+    def _disk(self) -> sqlite3.Connection | None:
+        if self._con is None and not self._disk_failed:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                con = sqlite3.connect(str(self.path), check_same_thread=False)
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                    " model TEXT, query TEXT, vector BLOB, last_used REAL,"
+                    " PRIMARY KEY (model, query))"
+                )
+                con.execute(
+                    "CREATE INDEX IF NOT EXISTS query_embeddings_last_used "
+                    "ON query_embeddings (last_used)"
+                )
+                con.commit()
+                self._con = con
+            except (OSError, sqlite3.Error) as e:
+                log.warning(f"query cache at {self.path} unavailable ({e}); using memory only")
+                self._disk_failed = True
+        return self._con
+
+    def _disk_get(self, key: str) -> list[float] | None:
+        con = self._disk()
+        if con is None:
+            return None
+        row = con.execute(
+            "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?",
+            [self.model, key],
+        ).fetchone()
+        if row is None:
+            return None
+        con.execute(
+            "UPDATE query_embeddings SET last_used = ? WHERE model = ? AND query = ?",
+            [time.time(), self.model, key],
+        )
+        con.commit()
+        return _unpack(row[0])
+
+    def _disk_put(self, key: str, vector: list[float]) -> None:
+        con = self._disk()
+        if con is None:
+            return
+        con.execute(
+            "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?, ?)",
+            [self.model, key, _pack(vector), time.time()],
+        )
+        # Evict least-recently-used rows beyond the size bound.
+        con.execute(
+            "DELETE FROM query_embeddings WHERE rowid IN ("
+            " SELECT rowid FROM query_embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            [self.max_disk],
+        )
+        con.commit()
+
+    # ── public API ───────────────────────────────────────────────────────────
+
+    def get(self, text: str) -> list[float] | None:
+        """Return the cached vector for text, or None; counts a hit or a miss."""
+        key = normalize_key(text)
+        with self._lock:
+            vec = self._memory.get(key)
+            if vec is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vec
+            vec = self._disk_get(key)
+            if vec is not None:
+                self._remember(key, vec)
+                self.hits += 1
+                self.disk_hits += 1
+                return vec
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector: list[float]) -> None:
+        key = normalize_key(text)
+        with self._lock:
+            self._remember(key, list(vector))
+            self._disk_put(key, vector)
+
+    def get_or_embed(self, text: str, embed: Callable[[str], list[float]]) -> list[float]:
+        """Return the cached vector for text, calling embed(normalised text) on a miss."""
+        vec = self.get(text)
+        if vec is None:
+            vec = embed(normalize_key(text))
+            self.put(text, vec)
+        return vec
+
+    def get_or_embed_many(
+        self, texts: list[str], embed: Callable[[list[str]], list[list[float]]]
+    ) -> list[list[float]]:
+        """Return one vector per text, as get_or_embed, embedding all the misses in one embed call."""
+        vectors = [self.get(text) for text in texts]
+        missing = list(dict.fromkeys(normalize_key(t) for t, v in zip(texts, vectors) if v is None))
+        if not missing:
+            return vectors
+        new = dict(zip(missing, embed(missing)))
+        for key, vec in new.items():
+            self.put(key, vec)
+        return [new[normalize_key(t)] if v is None else v for t, v in zip(texts, vectors)]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current tier sizes."""
+        with self._lock:
+            con = self._con
+            disk_size = (
+                con.execute("SELECT count(*) FROM query_embeddings").fetchone()[0]
+                if con is not None else 0
+            )
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_size,
+            }
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+
+class ChunkEmbeddingCache:
+    """Persistent map (model, sha256(text)) -> vector for pipeline chunks.
+
+    Unbounded: the cache holds at most one vector per distinct chunk of the
+    indexed corpora.  Like QueryEmbeddingCache, the SQLite file is opened
+    lazily and the cache degrades to a pass-through if it cannot be opened.
+    """
+
+    def __init__(self, path: Path | None, model: str) -> None:
+        self.path = path
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._con: sqlite3.Connection | None = None
+        self._disk_failed = path is None
+
+    def _disk(self) -> sqlite3.Connection | None:
+        if self._con is None and not self._disk_failed:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                con = sqlite3.connect(str(self.path), check_same_thread=False)
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS chunk_embeddings ("
+                    " model TEXT, sha256 TEXT, vector BLOB,"
+                    " PRIMARY KEY (model, sha256))"
+                )
+                con.commit()
+                self._con = con
+            except (OSError, sqlite3.Error) as e:
+                log.warning(f"embedding cache at {self.path} unavailable ({e}); not caching")
+                self._disk_failed = True
+        return self._con
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def embed(
+        self, texts: list[str], embed: Callable[[list[str]], list[list[float]]]
+    ) -> list[list[float]]:
+        """Return one vector per text, calling embed only for uncached texts.
+
+        Each distinct uncached text is embedded once, in a single call.
+        Exceptions from embed propagate and nothing is cached for that call.
+        """
+        keys = [self.key(t) for t in texts]
+        with self._lock:
+            found = self._lookup(set(keys))
+        missing = {k: t for k, t in zip(keys, texts) if k not in found}
+        if missing:
+            new = dict(zip(missing, embed(list(missing.values()))))
+            with self._lock:
+                self._store(new)
+            found.update(new)
+        n_missed = sum(k in missing for k in keys)
+        with self._lock:
+            self.misses += n_missed
+            self.hits += len(keys) - n_missed
+        return [found[k] for k in keys]
+
+    def _lookup(self, keys: set[str]) -> dict[str, list[float]]:
+        con = self._disk()
+        if con is None or not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        rows = con.execute(
+            f"SELECT sha256, vector FROM chunk_embeddings "
+            f"WHERE model = ? AND sha256 IN ({placeholders})",
+            [self.model, *keys],
+        ).fetchall()
+        return {k: _unpack(v) for k, v in rows}
+
+    def _store(self, vectors: dict[str, list[float]]) -> None:
+        con = self._disk()
+        if con is None:
+            return
+        con.executemany(
+            "INSERT OR REPLACE INTO chunk_embeddings VALUES (?, ?, ?)",
+            [(self.model, k, _pack(v)) for k, v in vectors.items()],
+        )
+        con.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this process."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_chunk_caches: dict[str, ChunkEmbeddingCache] = {}
+_chunk_caches_lock = threading.Lock()
+
+
+def chunk_cache() -> ChunkEmbeddingCache:
+    """Return the process-wide chunk cache for the configured backend's model."""
+    model = get_backend().model_id
+    with _chunk_caches_lock:
+        if model not in _chunk_caches:
+            _chunk_caches[model] = ChunkEmbeddingCache(chunk_cache_path(), model)
+        return _chunk_caches[model]
+
+
+def embed_chunks(texts: list[str]) -> list[list[float]]:
+    """Embed pipeline chunks through the content-addressed cache."""
+    return chunk_cache().embed(texts, embed_texts)
+
+
+def log_chunk_cache_stats(logger: logging.Logger) -> None:
+    """Log the chunk cache hit rate, e.g. at the end of a pipeline run."""
+    s = chunk_cache().stats()
+    logger.info(
+        f"Embedding cache: {s['hits']} hit(s), {s['misses']} miss(es) "
+        f"({s['hit_rate']:.0%} hit rate)"
+    )
@@ -0,0 +1,67 @@
+"""Checkpoint journal of embedded chunks, so interrupted pipelines resume.
+
+While an embedder pipeline runs, every chunk upserted into ChromaDB is
+appended to a sidecar file inside the Chroma directory as
+``<chunk id>\\t<sha256 of document>``.  A restarted run loads the journal
+and skips chunks whose id and content are already recorded, however the
+chunk list is ordered this time.  The journal is deleted when a run
+completes, so the next run starts fresh (and ``rm -rf`` of the Chroma
+directory removes it together with the collection it describes).
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+def journal_path(chroma_path: Path, collection_name: str) -> Path:
+    """Return the journal file for a collection stored under chroma_path."""
+    return Path(chroma_path) / f"{collection_name}.journal"
+
+
+def _key(chunk_id: str, document: str) -> str:
+    return f"{chunk_id}\t{hashlib.sha256(document.encode()).hexdigest()}"
+
+
+class CheckpointJournal:
+    """Append-only record of (chunk id, document hash) pairs already upserted."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._done: set[str] = set()
+        if self.path.exists():
+            # A torn final line (pre-emption mid-write) lacks the newline; ignore it.
+            text = self.path.read_text()
+            lines = text.split("\n")
+            self._done = {line for line in lines[:-1] if line}
+        self._file = None
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def is_done(self, chunk_id: str, document: str) -> bool:
+        return _key(chunk_id, document) in self._done
+
+    def record(self, chunks: list[tuple[str, str, dict]]) -> None:
+        """Append chunks to the journal and flush them to disk."""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        keys = [_key(c[0], c[1]) for c in chunks]
+        self._file.write("".join(k + "\n" for k in keys))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._done.update(keys)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self) -> None:
+        """Close and delete the journal once the whole job has completed."""
+        self.close()
+        self.path.unlink(missing_ok=True)
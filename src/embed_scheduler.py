@@ -0,0 +1,221 @@
+"""Concurrent embedding of pipeline chunks with streaming ChromaDB upserts.
+
+Every embedder pipeline hands its (chroma_id, document, metadata) chunks to
+``embed_and_upsert``, which
+
+- packs chunks into batches by character budget (``BATCH_CHARS``) rather
+  than by item count, so many short namelist entries share one request while
+  large source chunks go a few at a time;
+- keeps at most ``max_in_flight`` embedding requests running at once (each
+  in a worker thread; the backends are blocking);
+- retries a failing batch with exponential backoff and full jitter, then
+  bisects it so one bad chunk cannot sink its neighbours;
+- splits a single chunk rejected for exceeding the context length into two
+  halves (ids suffixed ``_a``/``_b``), skipping a half that still fails;
+- skips, and reports at the end, a single chunk that keeps failing for any
+  other reason, instead of aborting the whole job;
+- upserts each batch into the collection as soon as it is embedded, while
+  later batches are still in flight;
+- given a checkpoint journal (src/embed_journal.py), skips chunks a previous,
+  interrupted run already upserted and records each chunk after its upsert
+  (a chunk skipped in whole or in part is not recorded, so it is retried).
+"""
+
+import asyncio
+import logging
+import random
+from pathlib import Path
+from typing import Callable, Iterable
+
+from src.embed_cache import embed_chunks
+from src.embed_journal import CheckpointJournal
+from src.embed_utils import BATCH_CHARS, MAX_IN_FLIGHT
+
+log = logging.getLogger(__name__)
+
+Chunk = tuple[str, str, dict]
+Embedded = tuple[list[str], list[list[float]], list[str], list[dict]]
+
+
+def pack_batches(chunks: Iterable[Chunk], max_chars: int = BATCH_CHARS) -> list[list[Chunk]]:
+    """Greedily pack chunks, in order, into batches of at most max_chars characters.
+
+    A chunk longer than max_chars forms a batch of its own.
+    """
+    batches: list[list[Chunk]] = []
+    batch: list[Chunk] = []
+    size = 0
+    for chunk in chunks:
+        n = len(chunk[1])
+        if batch and size + n > max_chars:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(chunk)
+        size += n
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _is_context_length_error(e: Exception) -> bool:
+    return "context length" in str(e)
+
+
+class EmbedScheduler:
+    """Bounded-concurrency embedder with backoff; see the module docstring."""
+
+    def __init__(
+        self,
+        embed: Callable[[list[str]], list[list[float]]] | None = None,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        max_batch_chars: int = BATCH_CHARS,
+        max_attempts: int = 4,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        self.embed = embed or embed_chunks
+        self.max_in_flight = max_in_flight
+        self.max_batch_chars = max_batch_chars
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failed: list[str] = []
+        self.last_error: Exception | None = None
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given 0-based attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _embed_once(self, docs: list[str]) -> list[list[float]]:
+        """Embed docs, retrying with backoff.
+
+        A context-length error for a single document is raised at once (the
+        caller splits it); for a batch it is retried like any other error,
+        since Ollama has been seen to return it spuriously under load.
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                return await asyncio.to_thread(self.embed, docs)
+            except Exception as e:
+                oversized = len(docs) == 1 and _is_context_length_error(e)
+                if oversized or attempt == self.max_attempts - 1:
+                    raise
+                delay = self._backoff(attempt)
+                log.warning(f"embedding {len(docs)} chunk(s) failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def _embed_batch(self, batch: list[Chunk]) -> tuple[Embedded, list[Chunk]]:
+        """Embed a batch, bisecting on persistent failure and splitting oversized chunks.
+
+        Returns the embedded rows and the chunks of batch that were embedded
+        whole (both halves of a split chunk).  A chunk that still fails on
+        its own is logged, added to self.failed and left out.
+        """
+        try:
+            embeddings = await self._embed_once([c[1] for c in batch])
+            return ([c[0] for c in batch], embeddings, [c[1] for c in batch], [c[2] for c in batch]), list(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                log.warning(f"batch of {len(batch)} still failing ({e}), bisecting")
+                mid = len(batch) // 2
+                left, left_whole = await self._embed_batch(batch[:mid])
+                right, right_whole = await self._embed_batch(batch[mid:])
+                return tuple(l + r for l, r in zip(left, right)), left_whole + right_whole
+            if not _is_context_length_error(e):
+                log.warning(f"skipping chunk {batch[0][0]}: {e}")
+                self.failed.append(batch[0][0])
+                self.last_error = e
+                return ([], [], [], []), []
+        chunk_id, doc, meta = batch[0]
+        mid = len(doc) // 2
+        log.warning(f"splitting chunk {chunk_id} ({len(doc)} chars) in two")
+        out: Embedded = ([], [], [], [])
+        for suffix, half in (("_a", doc[:mid]), ("_b", doc[mid:])):
+            try:
+                emb = (await self._embed_once([half]))[0]
+            except Exception as e:
+                log.warning(f"skipping {chunk_id}{suffix} after split")
+                self.last_error = e
+                continue
+            for col, value in zip(out, (chunk_id + suffix, emb, half, meta)):
+                col.append(value)
+        if len(out[0]) < 2:
+            self.failed.append(chunk_id)
+            return out, []
+        return out, [batch[0]]
+
+    async def run(
+        self,
+        chunks: list[Chunk],
+        upsert: Callable[[Embedded], None],
+        journal: CheckpointJournal | None = None,
+    ) -> int:
+        """Embed chunks and pass each embedded batch to upsert; return chunks processed.
+
+        Chunks already in journal are skipped; the chunks of each batch that
+        were embedded whole are recorded in it after its upsert returns, so
+        a resumed run retries the rest.  Chunks that could not be embedded
+        are skipped and their ids left in self.failed; if no chunk could be
+        embedded at all, the last error is raised.
+        """
+        self.failed = []
+        self.last_error = None
+        if journal is not None and len(journal):
+            total = len(chunks)
+            chunks = [c for c in chunks if not journal.is_done(c[0], c[1])]
+            log.info(f"Resuming: {total - len(chunks)} of {total} chunks already embedded")
+        batches = pack_batches(chunks, self.max_batch_chars)
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def bounded(batch: list[Chunk]) -> tuple[list[Chunk], tuple[Embedded, list[Chunk]]]:
+            async with semaphore:
+                return batch, await self._embed_batch(batch)
+
+        tasks = [asyncio.create_task(bounded(b)) for b in batches]
+        done = 0
+        next_report = 100
+        try:
+            for task in asyncio.as_completed(tasks):
+                batch, (embedded, whole) = await task
+                if embedded[0]:
+                    await asyncio.to_thread(upsert, embedded)
+                if journal is not None and whole:
+                    journal.record(whole)
+                done += len(batch)
+                if done >= next_report or done == len(chunks):
+                    log.info(f"  Embedded {done}/{len(chunks)}")
+                    next_report = (done // 100 + 1) * 100
+        finally:
+            for task in tasks:
+                task.cancel()
+        if self.failed:
+            if len(self.failed) == len(chunks):
+                raise self.last_error
+            shown = ", ".join(self.failed[:10]) + (", ..." if len(self.failed) > 10 else "")
+            log.error(f"{len(self.failed)} of {len(chunks)} chunks could not be embedded and were skipped: {shown}")
+        return done
+
+
+def embed_and_upsert(collection, chunks: list[Chunk], journal: Path | None = None, **kwargs) -> int:
+    """Embed (id, document, metadata) chunks and upsert them into collection.
+
+    journal is the checkpoint file for this job (see embed_journal.journal_path);
+    it is kept if the run fails or skips chunks, so that the next run retries
+    only those, and deleted once every chunk is embedded.  kwargs are passed
+    to EmbedScheduler.  Returns the number of chunks processed.
+    """
+    def upsert(embedded: Embedded) -> None:
+        ids, embeddings, docs, metadatas = embedded
+        collection.upsert(ids=ids, embeddings=embeddings, documents=docs, metadatas=metadatas)
+
+    checkpoint = CheckpointJournal(journal) if journal is not None else None
+    scheduler = EmbedScheduler(**kwargs)
+    try:
+        n = asyncio.run(scheduler.run(chunks, upsert, checkpoint))
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    if checkpoint is not None and not scheduler.failed:
+        checkpoint.finish()
+    return n
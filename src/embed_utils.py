@@ -3,11 +3,16 @@
 Used by both MITgcm and FESOM2 embedding pipelines.
 """
 
+import hashlib
+
 EMBED_MODEL = "nomic-embed-text"
-BATCH_SIZE = 10
 # nomic-embed-text context window is ~2000 tokens; ~4000 chars of Fortran code
 # fits safely within that budget.
 MAX_CHARS = 4000
+# Character budget per embedding request (about ten full-size chunks), and
+# the number of requests the pipelines keep in flight (src/embed_scheduler.py).
+BATCH_CHARS = 10 * MAX_CHARS
+MAX_IN_FLIGHT = 4
 # Overlap between consecutive chunks so that content near a boundary
 # appears in two chunks and is not lost to either.
 OVERLAP = 200
@@ -29,3 +34,24 @@ def _chunk_text(text: str, max_chars: int, overlap: int) -> list[str]:
         chunks.append(text[start : start + max_chars])
         start += step
     return chunks
+
+
+def source_hash(text: str) -> str:
+    """Short content hash stored in chunk metadata to detect changed sources."""
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def stale_db_ids(collection, current: dict[int, str]) -> tuple[list[int], list[int]]:
+    """Diff a subroutine collection against the current index.
+
+    current maps DuckDB id -> source_hash(source_text).  Returns (to_delete,
+    to_embed): ids whose chunks are absent from the index or were embedded
+    from different source (including chunks predating the source_hash field),
+    and ids that have no up-to-date chunks.
+    """
+    embedded: dict[int, str | None] = {}
+    for meta in collection.get(include=["metadatas"])["metadatas"]:
+        embedded[meta["db_id"]] = meta.get("source_hash")
+    to_delete = sorted(i for i, h in embedded.items() if current.get(i) != h)
+    to_embed = sorted(i for i, h in current.items() if embedded.get(i) != h)
+    return to_delete, to_embed
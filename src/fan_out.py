@@ -0,0 +1,64 @@
+"""Concurrent queries over several collections, merged on one score (search_all).
+
+``search_all`` answers a question from every collection of a backend —
+subroutines, documentation, verification files or namelist descriptions —
+instead of an agent calling each search tool in turn.  The query is
+embedded once; ``gather`` then runs one callable per collection on a
+thread pool (ChromaDB and DuckDB release the GIL), so the wall time is
+that of the slowest collection rather than the sum.
+
+Raw cosine distances do not compare across collections: short namelist
+descriptions all sit close to any query about their topic, long source
+files far from every query.  ``merge`` therefore calibrates each source's
+hits against that source's own candidates: a hit scores the number of
+standard deviations its similarity lies above the mean of its list, so
+what ranks first is the hit that stands out most within its collection.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Mapping, Sequence
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Hits are (cosine distance, record), closest first.
+Hits = Sequence[tuple[float, dict]]
+
+# Similarity spread below which a source's candidates count as equally good.
+_MIN_SPREAD = 0.02
+
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fan-out")
+
+
+def gather(calls: Mapping[str, Callable[[], Hits]]) -> dict[str, Hits]:
+    """Run every call concurrently; a call that raises contributes no hits (logged)."""
+    futures = {source: _pool.submit(call) for source, call in calls.items()}
+    out: dict[str, Hits] = {}
+    for source, future in futures.items():
+        try:
+            out[source] = future.result()
+        except Exception as exc:  # one unbuilt or broken collection must not sink the rest
+            log.warning(f"search_all: {source} skipped: {exc}")
+            out[source] = []
+    return out
+
+
+def calibrate(hits: Hits) -> list[float]:
+    """Scores of hits: similarity in standard deviations above the mean of the list."""
+    if not hits:
+        return []
+    sim = 1.0 - np.asarray([dist for dist, _ in hits], dtype=np.float64)
+    return ((sim - sim.mean()) / max(float(sim.std()), _MIN_SPREAD)).tolist()
+
+
+def merge(by_source: Mapping[str, Hits], top_k: int) -> list[dict]:
+    """Return the top_k hits over all sources by calibrated score, each with "source" and "score"."""
+    scored = [
+        (score, {"source": source, "score": round(score, 3), **record})
+        for source, hits in by_source.items()
+        for score, (_, record) in zip(calibrate(hits), hits)
+    ]
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [record for _, record in scored[:top_k]]
@@ -1,7 +1,12 @@
-"""Embedding pipeline: parse FESOM2 RST docs, embed via ollama, write to ChromaDB.
+"""Embedding pipeline: parse FESOM2 RST docs, embed, write to ChromaDB.
 
 Run as:
     pixi run fesom2-embed-docs
+
+The full text of every section and extra file is also written to the
+doc_sections table of the DuckDB index (data/fesom2/index.duckdb), which
+get_doc_source reads; the src headers and include files are added to the
+trigram index behind grep_code.
 """
 
 import itertools
@@ -17,9 +22,15 @@ log = logging.getLogger(__name__)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 
-from ...embed_utils import _chunk_text, BATCH_SIZE, MAX_CHARS, OVERLAP
+from ...code_search import write_postings
+from ...doc_sections import TEXT, write_sections
+from ...full_text import build_index
+from ...embed_utils import _chunk_text, MAX_CHARS, OVERLAP
 from ...rst_parser import iter_sections
-from .pipeline import _embed_with_retry
+from ...embed_cache import log_chunk_cache_stats
+from ...embed_journal import journal_path
+from ...embed_scheduler import embed_and_upsert
+from ..indexer.schema import DB_PATH, KEYS, connect
 from .store import CHROMA_PATH, get_docs_collection
 
 FESOM2_DOC_ROOT = Path("FESOM2/docs")
@@ -56,6 +67,8 @@ def _iter_extra_files(fesom2_root: Path) -> list[dict]:
       - visualization/*/README.md  — tool READMEs (pyfesom2, view, tripyview, spheRlab)
       - visualization/README.md    — top-level visualization overview
       - src/*.h, src/*.inc         — mesh association macros and gather templates
+
+    Leading blank lines are kept, so grep_code line numbers match the file.
     """
     results = []
     globs = [
@@ -66,14 +79,14 @@ def _iter_extra_files(fesom2_root: Path) -> list[dict]:
     ]
     for path in sorted(itertools.chain(*globs)):
         try:
-            text = path.read_text(encoding="utf-8", errors="replace").strip()
+            text = path.read_text(encoding="utf-8", errors="replace")
         except (PermissionError, OSError):
             continue
-        if not text:
+        if not text.strip():
             continue
         results.append({
             "file": path.relative_to(fesom2_root).as_posix(),
-            "text": text,
+            "text": text.rstrip(),
         })
     return results
 
@@ -105,6 +118,7 @@ def run(
     doc_root: Path = FESOM2_DOC_ROOT,
     fesom2_root: Path = FESOM2_ROOT,
     chroma_path: Path = CHROMA_PATH,
+    db_path: Path = DB_PATH,
 ) -> None:
     sections = iter_sections(doc_root)
     log.info(f"Parsed {len(sections)} sections from {doc_root}")
@@ -112,6 +126,21 @@ def run(
     extras = _iter_extra_files(fesom2_root)
     log.info(f"Found {len(extras)} extra files (visualization READMEs + src headers)")
 
+    con = connect(db_path)
+    try:
+        n = write_sections(
+            con,
+            [(sec["file"], sec["section"], sec["text"]) for sec in sections]
+            + [(ex["file"], Path(ex["file"]).name, ex["text"]) for ex in extras],
+            KEYS["doc_sections"],
+        )
+        indexed = build_index(con, "doc_sections", "section_key", ["file", "section", "lines"])
+        write_postings(con, "headers", con.execute(
+            f"SELECT id, {TEXT} FROM doc_sections WHERE file LIKE 'src/%'").fetchall())
+    finally:
+        con.close()
+    log.info(f"Stored {n} sections in {db_path}" + (" with a full-text index" if indexed else ""))
+
     collection = get_docs_collection(chroma_path)
 
     all_chunks = []
@@ -121,26 +150,9 @@ def run(
         all_chunks.extend(_file_chunks(f"extra_{idx}", ex["file"], ex["text"]))
     log.info(f"Generated {len(all_chunks)} chunks from {len(sections)} sections + {len(extras)} extra files")
 
-    total = 0
-    for i in range(0, len(all_chunks), BATCH_SIZE):
-        batch = all_chunks[i : i + BATCH_SIZE]
-        ids = [c[0] for c in batch]
-        docs = [c[1] for c in batch]
-        metadatas = [c[2] for c in batch]
-
-        ids, embeddings, docs, metadatas = _embed_with_retry(ids, docs, metadatas)
-        if ids:
-            collection.upsert(
-                ids=ids,
-                embeddings=embeddings,
-                documents=docs,
-                metadatas=metadatas,
-            )
-
-        total += len(batch)
-        if total % 100 == 0 or total == len(all_chunks):
-            log.info(f"  Embedded {total}/{len(all_chunks)}")
+    embed_and_upsert(collection, all_chunks, journal=journal_path(chroma_path, collection.name))
 
+    log_chunk_cache_stats(log)
     log.info(f"Done. {collection.count()} chunks ({len(sections)} sections).")
 
 
@@ -21,9 +21,10 @@ log = logging.getLogger(__name__)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 
-from ...embed_utils import BATCH_SIZE
+from ...embed_cache import log_chunk_cache_stats
+from ...embed_journal import journal_path
+from ...embed_scheduler import embed_and_upsert
 from ..indexer.schema import DB_PATH, connect as duckdb_connect
-from .pipeline import _embed_with_retry
 from .store import CHROMA_PATH, get_namelists_collection
 
 
@@ -60,26 +61,9 @@ def run(db_path: Path = DB_PATH, chroma_path: Path = CHROMA_PATH) -> None:
 
     all_entries = [_nml_doc(r[0], r[1], r[2], r[3]) for r in rows]
 
-    total = 0
-    for i in range(0, len(all_entries), BATCH_SIZE):
-        batch = all_entries[i : i + BATCH_SIZE]
-        ids = [e[0] for e in batch]
-        docs = [e[1] for e in batch]
-        metadatas = [e[2] for e in batch]
-
-        ids, embeddings, docs, metadatas = _embed_with_retry(ids, docs, metadatas)
-        if ids:
-            collection.upsert(
-                ids=ids,
-                embeddings=embeddings,
-                documents=docs,
-                metadatas=metadatas,
-            )
-
-        total += len(batch)
-        if total % 100 == 0 or total == len(all_entries):
-            log.info(f"  Embedded {total}/{len(all_entries)}")
+    embed_and_upsert(collection, all_entries, journal=journal_path(chroma_path, collection.name))
 
+    log_chunk_cache_stats(log)
     log.info(f"Done. {collection.count()} namelist parameter embeddings.")
 
 
@@ -1,31 +1,47 @@
 """ChromaDB client setup and FESOM2 collection access."""
 
-import chromadb
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ... import chroma_pool
+
+if TYPE_CHECKING:
+    import chromadb
 
 CHROMA_PATH = Path("data/fesom2/chroma")
 
 FESOM2_SUBROUTINES_COLLECTION = "fesom2_subroutines"
+# One mean vector per subroutine (src/pooled_vectors.py)
+FESOM2_POOLED_COLLECTION = "fesom2_subroutines_pooled"
 FESOM2_DOCS_COLLECTION = "fesom2_docs"
 FESOM2_NAMELISTS_COLLECTION = "fesom2_namelists"
 
 
-def get_collection(name: str, path: Path = CHROMA_PATH) -> chromadb.Collection:
-    """Return (or create) a named ChromaDB collection at the given path."""
-    client = chromadb.PersistentClient(path=str(path))
-    return client.get_or_create_collection(
-        name=name,
-        metadata={"hnsw:space": "cosine"},
-    )
+def get_collection(name: str, path: Path = CHROMA_PATH) -> "chromadb.Collection | None":
+    """Return a named ChromaDB collection at the given path, or None if no pipeline has built it.
+
+    Read-only, for the tools.  The handle is opened once per process and
+    shared (src/chroma_pool.py).
+    """
+    return chroma_pool.get_collection(path, name)
+
+
+def create_collection(name: str, path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    """Return a named ChromaDB collection at the given path, creating it if absent (pipelines only)."""
+    return chroma_pool.create_collection(path, name)
+
+
+def get_subroutine_collection(path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    return create_collection(FESOM2_SUBROUTINES_COLLECTION, path)
 
 
-def get_subroutine_collection(path: Path = CHROMA_PATH) -> chromadb.Collection:
-    return get_collection(FESOM2_SUBROUTINES_COLLECTION, path)
+def get_pooled_collection(path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    return create_collection(FESOM2_POOLED_COLLECTION, path)
 
 
-def get_docs_collection(path: Path = CHROMA_PATH) -> chromadb.Collection:
-    return get_collection(FESOM2_DOCS_COLLECTION, path)
+def get_docs_collection(path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    return create_collection(FESOM2_DOCS_COLLECTION, path)
 
 
-def get_namelists_collection(path: Path = CHROMA_PATH) -> chromadb.Collection:
-    return get_collection(FESOM2_NAMELISTS_COLLECTION, path)
+def get_namelists_collection(path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    return create_collection(FESOM2_NAMELISTS_COLLECTION, path)
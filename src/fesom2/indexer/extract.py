@@ -39,6 +39,8 @@ class SubroutineRecord:
     end_line: int
     source_text: str
     calls: list[str] = field(default_factory=list)
+    # callee -> 1-indexed file line of its first CALL in the subroutine
+    call_lines: dict[str, int] = field(default_factory=dict)
 
 
 # ---------------------------------------------------------------------------
@@ -128,15 +130,15 @@ def _find_end(lines: list[str], start: int) -> int:
     return len(lines) - 1
 
 
-def _extract_calls(lines: list[str], start: int, end: int, self_name: str) -> list[str]:
-    """Collect unique CALL targets within lines[start:end+1]."""
-    seen: dict[str, None] = {}
-    for l in lines[start:end + 1]:
-        for m in RE_CALL.finditer(l):
+def _extract_calls(lines: list[str], start: int, end: int, self_name: str) -> dict[str, int]:
+    """Map each unique CALL target within lines[start:end+1] to its first 1-indexed line."""
+    seen: dict[str, int] = {}
+    for i in range(start, min(end, len(lines) - 1) + 1):
+        for m in RE_CALL.finditer(lines[i]):
             name = m.group(1).upper()
             if name != self_name.upper():
-                seen[name] = None
-    return list(seen)
+                seen.setdefault(name, i + 1)
+    return seen
 
 
 def _parse_namelist_decl(lines: list[str], start: int) -> tuple[str, list[str], int]:
@@ -180,10 +182,15 @@ def _extract_uses(lines: list[str], start: int, end: int) -> list[str]:
 def extract_file(path: Path) -> tuple[list[ModuleRecord], list[SubroutineRecord]]:
     """Return (modules, subroutines) extracted from a FESOM2 F90 / .pf file."""
     try:
-        raw_lines = path.read_text(errors='replace').splitlines(keepends=True)
+        text = path.read_text(errors='replace')
     except OSError:
         return [], []
+    return extract_source(text, path)
+
 
+def extract_source(text: str, path: Path) -> tuple[list[ModuleRecord], list[SubroutineRecord]]:
+    """Like extract_file, for source text already read from path."""
+    raw_lines = text.splitlines(keepends=True)
     lines = _preprocess(raw_lines)
     rel = str(path)
 
@@ -253,7 +260,8 @@ def extract_file(path: Path) -> tuple[list[ModuleRecord], list[SubroutineRecord]
                         start_line=sub_start + 1,
                         end_line=sub_end + 1,
                         source_text=source,
-                        calls=calls,
+                        calls=list(calls),
+                        call_lines=calls,
                     ))
                     i = sub_end + 1
                     continue
@@ -275,7 +283,8 @@ def extract_file(path: Path) -> tuple[list[ModuleRecord], list[SubroutineRecord]
                 start_line=sub_start + 1,
                 end_line=sub_end + 1,
                 source_text=source,
-                calls=calls,
+                calls=list(calls),
+                call_lines=calls,
             ))
             i = sub_end + 1
             continue
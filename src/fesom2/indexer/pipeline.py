@@ -1,12 +1,19 @@
 """Indexing pipeline: walk FESOM2 source, extract, write to DuckDB."""
 
+import argparse
 import subprocess
 from datetime import datetime, timezone
 from pathlib import Path
 
-from .extract import extract_file
+from ... import file_hashes
+from ...code_search import write_postings
+from ...duckdb_bulk import insert_rows
+from ...full_text import build_index
+from ...name_keys import refresh_keys
+from ...source_lines import sync_source_lines
+from .extract import extract_source
 from .namelist_config import parse_all_config_files
-from .schema import connect
+from .schema import KEYS, connect
 
 FESOM2_ROOT = Path("FESOM2")
 
@@ -60,7 +67,111 @@ def source_files() -> list[Path]:
     return sorted(set(files))
 
 
-def run(db_path: Path | None = None) -> None:
+def _decode(data: bytes) -> str:
+    """Decode file bytes as Path.read_text(errors='replace') would."""
+    text = data.decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _expand_changed(con, paths: set[str]) -> set[str]:
+    """Grow paths by unchanged files that share a module or subroutine key.
+
+    ``uses`` and ``calls`` rows carry no file column and are deleted by
+    module name / (subroutine, module) key, which would also drop rows of
+    another file declaring the same key; such files are re-extracted too.
+    """
+    while True:
+        shared = {r[0] for r in con.execute(
+            """
+            SELECT m2.file FROM modules m1 JOIN modules m2 ON m1.name = m2.name
+            WHERE m1.file IN (SELECT unnest($paths))
+            UNION
+            SELECT s2.file FROM subroutines s1 JOIN subroutines s2
+              ON s1.name = s2.name AND s1.module_name = s2.module_name
+            WHERE s1.file IN (SELECT unnest($paths))
+            """,
+            {"paths": sorted(paths)},
+        ).fetchall()}
+        if shared <= paths:
+            return paths
+        paths |= shared
+
+
+def _delete_files(con, paths: list[str]) -> None:
+    """Remove every row extracted from the given source files."""
+    con.execute(
+        "DELETE FROM uses WHERE module_name IN "
+        "(SELECT name FROM modules WHERE file IN (SELECT unnest(?)))",
+        [paths],
+    )
+    con.execute(
+        "DELETE FROM calls WHERE EXISTS (SELECT 1 FROM subroutines s "
+        "WHERE s.file IN (SELECT unnest(?)) "
+        "AND s.name = calls.caller_name AND s.module_name = calls.caller_module)",
+        [paths],
+    )
+    for table in ("modules", "subroutines", "namelist_refs"):
+        con.execute(f"DELETE FROM {table} WHERE file IN (SELECT unnest(?))", [paths])
+
+
+def resolve_calls(con) -> tuple[int, int]:
+    """Point every call at the subroutine it reaches; return (resolved, ambiguous) counts.
+
+    Fills caller_id where missing, then resolves the callee name the way
+    Fortran scoping would: a unique name wins outright; otherwise the copy
+    contained in the caller's module, else the single copy in a module the
+    caller's module USEs.  Calls still matching several subroutines record
+    the narrowest such set in callee_candidates.  Runs over the whole table, so
+    incremental runs re-resolve calls into files that changed.
+    """
+    con.execute(
+        """
+        UPDATE calls SET caller_id = s.id FROM subroutines s
+        WHERE calls.caller_id IS NULL
+          AND s.name_key = calls.caller_key AND s.module_key = upper(calls.caller_module)
+        """
+    )
+    con.execute("UPDATE calls SET callee_id = NULL, callee_candidates = NULL")
+    con.execute(
+        """
+        UPDATE calls SET callee_id = CASE WHEN len(r.scope) = 1 THEN r.scope[1] END,
+                         callee_candidates = CASE WHEN len(r.scope) > 1 THEN r.scope END
+        FROM (
+            SELECT rid,
+                   CASE WHEN len(local) > 0 THEN local WHEN len(used) > 0 THEN used ELSE ids END AS scope
+            FROM (
+                SELECT c.rowid AS rid,
+                       list_sort(list_distinct(list(t.id))) AS ids,
+                       list_sort(list_distinct(coalesce(list(t.id) FILTER (
+                           WHERE t.module_key = upper(c.caller_module)), []))) AS local,
+                       list_sort(list_distinct(coalesce(list(t.id) FILTER (
+                           WHERE u.module_key IS NOT NULL), []))) AS used
+                FROM calls c
+                JOIN subroutines t ON t.name_key = c.callee_key
+                LEFT JOIN uses u ON u.module_key = upper(c.caller_module)
+                                AND upper(u.used_module) = t.module_key
+                GROUP BY c.rowid
+            )
+        ) r
+        WHERE calls.rowid = r.rid
+        """
+    )
+    return con.execute(
+        "SELECT count(callee_id), count(callee_candidates) FROM calls"
+    ).fetchone()
+
+
+def run(db_path: Path | None = None, incremental: bool = False) -> None:
+    """Build the index.
+
+    A full run clears every table first.  An incremental run re-extracts only
+    files whose content hash differs from the ``files`` table (plus files
+    sharing a module or subroutine name with them), replaces their rows, and
+    drops rows of deleted files.  Namelist descriptions are always rebuilt.
+
+    Each source file is read and parsed once; all rows are bulk-inserted in a
+    single transaction.
+    """
     con = connect(db_path) if db_path else connect()
 
     sha = fesom2_sha()
@@ -69,68 +180,97 @@ def run(db_path: Path | None = None) -> None:
     print(f"Indexing FESOM2 @ {sha[:12]}")
 
     files = source_files()
-    print(f"Found {len(files)} source files")
+    # Read each file once: the bytes are hashed here and parsed below.
+    contents = {str(p): p.read_bytes() for p in files}
+    current = file_hashes.scan(files, contents)
+    con.begin()
+    if incremental:
+        changed, removed = file_hashes.diff(con, current)
+        stale = _expand_changed(con, set(changed) | set(removed))
+        changed = [p for p in current if p in stale]
+        print(f"Found {len(files)} source files: {len(changed)} to re-index, {len(removed)} removed")
+        _delete_files(con, changed + removed)
+    else:
+        changed, removed = list(current), []
+        print(f"Found {len(files)} source files")
+        for table in ("modules", "subroutines", "uses", "calls", "namelist_refs", "files"):
+            con.execute(f"DELETE FROM {table}")
+    con.execute("DELETE FROM namelist_descriptions")
+    changed_set = set(changed)
+    files = [p for p in files if str(p) in changed_set]
 
-    mod_id = 1
-    sub_id = 1
+    mod_id, sub_id = con.execute(
+        "SELECT (SELECT coalesce(max(id), 0) + 1 FROM modules), "
+        "(SELECT coalesce(max(id), 0) + 1 FROM subroutines)"
+    ).fetchone()
+    first_mod_id, first_sub_id = mod_id, sub_id
+    module_rows, use_rows, sub_rows, call_rows, nml_ref_rows = [], [], [], [], []
     for path in files:
-        mods, subs = extract_file(path)
+        text = _decode(contents[str(path)])
+        mods, subs = extract_source(text, path)
 
         for mod in mods:
-            con.execute(
-                "INSERT INTO modules VALUES (?, ?, ?, ?, ?)",
-                [mod_id, mod.name, mod.file, mod.start_line, mod.end_line],
-            )
-            for used in mod.uses:
-                con.execute(
-                    "INSERT INTO uses VALUES (?, ?)",
-                    [mod.name, used],
-                )
+            module_rows.append((mod_id, mod.name, mod.file, mod.start_line, mod.end_line))
+            use_rows.extend((mod.name, used) for used in mod.uses)
+            for group, params, line in mod.namelist_groups:
+                nml_ref_rows.extend((param, group, mod.file, mod.name, line) for param in params)
             mod_id += 1
 
         for sub in subs:
-            con.execute(
-                "INSERT INTO subroutines VALUES (?, ?, ?, ?, ?, ?, ?)",
-                [sub_id, sub.name, sub.module_name, sub.file,
-                 sub.start_line, sub.end_line, sub.source_text],
-            )
-            for callee in sub.calls:
-                con.execute(
-                    "INSERT INTO calls VALUES (?, ?, ?)",
-                    [sub.name, sub.module_name, callee],
-                )
+            sub_rows.append((sub_id, sub.name, sub.module_name, sub.file,
+                             sub.start_line, sub.end_line, sub.source_text))
+            call_rows.extend((sub.name, sub.module_name, callee, sub_id, line)
+                             for callee, line in sub.call_lines.items())
             sub_id += 1
 
         if mods or subs:
             rel = path.relative_to(FESOM2_ROOT)
             print(f"  {rel}: {len(mods)} module(s), {len(subs)} subroutine(s)")
 
-    # --- Namelist refs: from source namelist /group/ declarations ---
-    nml_ref_count = 0
-    for path in files:
-        mods, _ = extract_file(path)
-        for mod in mods:
-            for group, params, line in mod.namelist_groups:
-                for param in params:
-                    con.execute(
-                        "INSERT INTO namelist_refs VALUES (?, ?, ?, ?, ?)",
-                        [param, group, mod.file, mod.name, line],
-                    )
-                    nml_ref_count += 1
-    print(f"Indexed {nml_ref_count} namelist parameter references from source")
+    insert_rows(con, "modules", ["id", "name", "file", "start_line", "end_line"],
+                module_rows, KEYS["modules"])
+    insert_rows(con, "uses", ["module_name", "used_module"], use_rows, KEYS["uses"])
+    insert_rows(
+        con, "subroutines",
+        ["id", "name", "module_name", "file", "start_line", "end_line", "source_text"],
+        sub_rows, KEYS["subroutines"],
+    )
+    insert_rows(con, "calls", ["caller_name", "caller_module", "callee_name", "caller_id", "line"],
+                call_rows, KEYS["calls"])
+    insert_rows(
+        con, "namelist_refs",
+        ["param_name", "namelist_group", "file", "module_name", "line"],
+        nml_ref_rows, KEYS["namelist_refs"],
+    )
+    print(f"Indexed {len(nml_ref_rows)} namelist parameter references from source")
 
     # --- Namelist descriptions: from config/namelist.* files ---
     desc_rows = parse_all_config_files()
-    for config_file, group, param, desc in desc_rows:
-        con.execute(
-            "INSERT INTO namelist_descriptions VALUES (?, ?, ?, ?)",
-            [param, group, config_file, desc],
-        )
+    insert_rows(
+        con, "namelist_descriptions",
+        ["param_name", "namelist_group", "config_file", "description"],
+        [(param, group, config_file, desc) for config_file, group, param, desc in desc_rows],
+        KEYS["namelist_descriptions"],
+    )
     print(f"Indexed {len(desc_rows)} namelist parameter descriptions from config files")
 
+    refresh_keys(con, KEYS)  # rows kept from an index built before the key columns
+    sync_source_lines(con)  # lines of new rows and of rows kept from older indexes
+    resolved, ambiguous = resolve_calls(con)
+    print(f"Resolved {resolved} calls to one subroutine, {ambiguous} to several candidates")
+    trigrams = write_postings(con, "subroutines", con.execute("SELECT id, source_text FROM subroutines").fetchall())
+    print(f"Rebuilt the trigram index over subroutine source ({trigrams} trigrams)")
+    file_hashes.record(con, current, changed, removed, sha)
+    con.commit()
+    if build_index(con, "subroutines", "id", ["name", "source_text"]):
+        print("Rebuilt the full-text index over subroutine source")
     con.close()
-    print(f"\nDone. Indexed {mod_id - 1} modules, {sub_id - 1} subroutines.")
+    print(f"\nDone. Indexed {mod_id - first_mod_id} modules, {sub_id - first_sub_id} subroutines.")
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-extract only files whose content hash changed")
+    args = parser.parse_args()
+    run(incremental=args.incremental)
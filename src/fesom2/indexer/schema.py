@@ -3,6 +3,9 @@
 import duckdb
 from pathlib import Path
 
+from ...doc_sections import SECTION_KEY
+from ...name_keys import key_ddl
+
 DB_PATH = Path("data/fesom2/index.duckdb")
 
 DDL = """
@@ -16,7 +19,8 @@ CREATE TABLE IF NOT EXISTS modules (
     name        TEXT,
     file        TEXT,
     start_line  INTEGER,
-    end_line    INTEGER
+    end_line    INTEGER,
+    name_key    TEXT
 );
 
 CREATE TABLE IF NOT EXISTS subroutines (
@@ -26,21 +30,47 @@ CREATE TABLE IF NOT EXISTS subroutines (
     file        TEXT,
     start_line  INTEGER,
     end_line    INTEGER,
-    source_text TEXT
+    source_text TEXT,
+    name_key    TEXT,
+    module_key  TEXT,
+    n_lines     INTEGER  -- see src/source_lines.py
+);
+ALTER TABLE subroutines ADD COLUMN IF NOT EXISTS n_lines INTEGER;
+
+-- Subroutine source, one row per line (line_no from 0), for paginated reads
+-- (src/source_lines.py)
+CREATE TABLE IF NOT EXISTS source_lines (
+    subroutine_id INTEGER,
+    line_no       INTEGER,
+    line          TEXT
 );
 
 -- USE statements at module level: which modules does each module depend on
 CREATE TABLE IF NOT EXISTS uses (
     module_name  TEXT,
-    used_module  TEXT
+    used_module  TEXT,
+    module_key   TEXT
 );
 
--- CALL statements within subroutines
+-- CALL statements within subroutines.  callee_id is filled by the
+-- pipeline's resolution pass when the callee name picks out one subroutine;
+-- otherwise callee_candidates lists every match (both NULL for callees
+-- outside the index).  line is the first CALL of callee_name in the file.
 CREATE TABLE IF NOT EXISTS calls (
-    caller_name   TEXT,
-    caller_module TEXT,
-    callee_name   TEXT
+    caller_name       TEXT,
+    caller_module     TEXT,
+    callee_name       TEXT,
+    caller_id         INTEGER,
+    line              INTEGER,
+    callee_id         INTEGER,
+    callee_candidates INTEGER[],
+    caller_key        TEXT,
+    callee_key        TEXT
 );
+ALTER TABLE calls ADD COLUMN IF NOT EXISTS caller_id INTEGER;
+ALTER TABLE calls ADD COLUMN IF NOT EXISTS line INTEGER;
+ALTER TABLE calls ADD COLUMN IF NOT EXISTS callee_id INTEGER;
+ALTER TABLE calls ADD COLUMN IF NOT EXISTS callee_candidates INTEGER[];
 
 -- Namelist declarations from source: which module declares each group/param
 CREATE TABLE IF NOT EXISTS namelist_refs (
@@ -48,7 +78,8 @@ CREATE TABLE IF NOT EXISTS namelist_refs (
     namelist_group TEXT,
     file           TEXT,
     module_name    TEXT,
-    line           INTEGER
+    line           INTEGER,
+    param_key      TEXT
 );
 
 -- Namelist parameter descriptions from config/namelist.* files
@@ -56,13 +87,53 @@ CREATE TABLE IF NOT EXISTS namelist_descriptions (
     param_name     TEXT,
     namelist_group TEXT,
     config_file    TEXT,
-    description    TEXT
+    description    TEXT,
+    param_key      TEXT
+);
+
+-- Documentation sections as clean lines, written by the docs pipeline
+CREATE TABLE IF NOT EXISTS doc_sections (
+    id          INTEGER,  -- document id in the trigram index (src/code_search.py)
+    file        TEXT,
+    section     TEXT,
+    lines       TEXT[],
+    section_key TEXT
+);
+ALTER TABLE doc_sections ADD COLUMN IF NOT EXISTS id INTEGER;
+
+-- Trigram posting lists over subroutine source and headers, for grep_code
+-- (src/code_search.py)
+CREATE TABLE IF NOT EXISTS trigram_postings (
+    source  TEXT,
+    trigram INTEGER,
+    ids     BLOB
+);
+
+-- One row per indexed source file; drives incremental re-indexing
+CREATE TABLE IF NOT EXISTS files (
+    path        TEXT PRIMARY KEY,
+    sha256      TEXT,
+    mtime       DOUBLE,
+    commit_sha  TEXT
 );
 """
 
 
+# Case-folded lookup keys (see src/name_keys.py); each gets an ART index.
+KEYS = {
+    "modules": {"name_key": "upper(name)"},
+    "subroutines": {"name_key": "upper(name)", "module_key": "upper(module_name)"},
+    "uses": {"module_key": "upper(module_name)"},
+    "calls": {"caller_key": "upper(caller_name)", "callee_key": "upper(callee_name)"},
+    "namelist_refs": {"param_key": "upper(param_name)"},
+    "namelist_descriptions": {"param_key": "upper(param_name)"},
+    "doc_sections": {"section_key": SECTION_KEY},
+}
+
+
 def connect(path: Path = DB_PATH) -> duckdb.DuckDBPyConnection:
     path.parent.mkdir(parents=True, exist_ok=True)
     con = duckdb.connect(str(path))
     con.execute(DDL)
+    con.execute(key_ddl(KEYS))
     return con
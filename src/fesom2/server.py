@@ -2,21 +2,34 @@
 
 from mcp.server.fastmcp import FastMCP
 
+from src import duckdb_pool, warmup
+from src.fesom2.embedder.store import CHROMA_PATH
+from src.fesom2.indexer.schema import DB_PATH
 from src.fesom2.tools import (
+    find_call_path,
     find_modules,
     find_subroutines,
+    get_call_tree,
     get_callers,
     get_callees,
+    get_caller_tree,
     get_doc_source,
     get_forcing_spec,
     get_module,
     get_module_uses,
+    get_source,
     get_subroutine,
+    grep_code,
     list_forcing_datasets,
     list_setups,
+    load_call_graph,
+    load_symbols,
     namelist_to_code,
+    search_all,
     search_code,
+    search_code_batch,
     search_docs,
+    search_docs_batch,
 )
 from src.fesom2.domain import (
     get_run_interface,
@@ -28,23 +41,78 @@ from src.fesom2.domain import (
 from src.shared import translate_lab_params, check_scales
 
 mcp = FastMCP("fesom2")
+_WARM_UP = warmup.WarmUp()
 
 
 # ── Code navigation ───────────────────────────────────────────────────────────
 
 
 @mcp.tool()
-def search_code_tool(query: str, top_k: int = 5) -> list[dict]:
-    """Semantic search over FESOM2 subroutines.
+def search_code_tool(query: str, top_k: int = 5, mode: str = "hybrid") -> list[dict]:
+    """Search over FESOM2 subroutines.
+
+    Returns up to ``top_k`` subroutines whose source best matches the query.
+    ``mode``: "hybrid" (default) fuses semantic and keyword (BM25) ranking,
+    so exact identifiers work as well as natural language; "vector" is
+    semantic only and "lexical" keyword only (no Ollama needed). Semantic
+    ranking requires Ollama and a populated ``fesom2_subroutines`` ChromaDB
+    collection.
+
+    Each result has: id, name, module_name, file, start_line, end_line, and
+    ``match`` — how it was found. A query that is exactly one subroutine,
+    module or namelist parameter name is answered directly from the index
+    (``match`` "subroutine", "module" or "namelist_param"; module results
+    have id, name, file, start_line, end_line and namelist results
+    param_name, namelist_group, file, module_name, line); otherwise
+    ``match`` is the search mode. ``mode="vector"`` skips the exact lookup.
+    Follow up with ``get_source_tool`` to read the subroutine source.
+    """
+    return search_code(query, top_k=top_k, mode=mode)
 
-    Returns up to ``top_k`` subroutines whose source most closely matches the
-    natural-language query. Requires Ollama and a populated
-    ``fesom2_subroutines`` ChromaDB collection.
 
-    Each result has: id, name, module_name, file, start_line, end_line.
-    Follow up with ``get_source_tool`` to read the subroutine source.
+@mcp.tool()
+def search_all_tool(query: str, top_k: int = 10) -> list[dict]:
+    """Search FESOM2 subroutines, RST docs and namelist descriptions in one call.
+
+    Use this for a first look at a question when it is not yet clear where
+    the answer lives. The query is embedded once and every collection is
+    searched concurrently; results are ranked together on a score
+    calibrated per collection. Each result has ``source`` ("code", "doc"
+    or "namelist"), ``score``, and that source's usual fields (as returned
+    by ``search_code_tool`` or ``search_docs_tool``). Semantic only: for
+    exact identifiers use ``search_code_tool`` or ``grep_code_tool``.
     """
-    return search_code(query, top_k=top_k)
+    return search_all(query, top_k=top_k)
+
+
+@mcp.tool()
+def search_code_batch_tool(queries: list[str], top_k: int = 5, mode: str = "hybrid") -> list[list[dict]]:
+    """Run ``search_code_tool`` for several queries at once; one result list per query, in order.
+
+    Use this instead of back-to-back ``search_code_tool`` calls when trying
+    a few phrasings of one question: the queries share a single embedding
+    request and a single ChromaDB query. ``top_k`` and ``mode`` apply to
+    every query; results are exactly those of ``search_code_tool``.
+    """
+    return search_code_batch(queries, top_k=top_k, mode=mode)
+
+
+@mcp.tool()
+def grep_code_tool(
+    pattern: str, ignore_case: bool = False, module: str | None = None, max_results: int = 100
+) -> list[dict]:
+    """Find lines of FESOM2 source matching a regular expression (Python syntax).
+
+    Searches every indexed subroutine and the ``src/*.h`` and ``src/*.inc``
+    files, like grep over the tree but answered from a trigram index in
+    milliseconds. Each hit has file, line (1-based line number in that
+    file), text, subroutine and module_name (both None in include files).
+    Use it for exact code patterns, e.g. ``'call exchange_nod\\w*'`` or
+    ``'#ifdef __icepack'``; use ``search_code_tool`` for questions in
+    natural language. ``module`` restricts hits to one module's subroutines;
+    returns at most ``max_results`` lines, ordered by file.
+    """
+    return grep_code(pattern, ignore_case=ignore_case, module=module, max_results=max_results)
 
 
 @mcp.tool()
@@ -96,17 +164,13 @@ def get_subroutine_tool(name: str, module: str | None = None) -> dict | None:
     erroring — safe to call in parallel with other tools.
     """
     try:
-        result = get_subroutine(name, module=module)
+        return get_subroutine(name, module=module, include_source=False)
     except ValueError as exc:
         return {
             "disambiguation_needed": True,
             "message": str(exc),
             "matches": find_subroutines(name),
         }
-    if result is None:
-        return None
-    result.pop("source_text", None)
-    return result
 
 
 @mcp.tool()
@@ -127,24 +191,13 @@ def get_source_tool(
     erroring — safe to call in parallel with other tools.
     """
     try:
-        result = get_subroutine(name, module=module)
+        return get_source(name, module=module, offset=offset, limit=limit)
     except ValueError as exc:
         return {
             "disambiguation_needed": True,
             "message": str(exc),
             "matches": find_subroutines(name),
         }
-    if result is None:
-        return None
-    all_lines = result["source_text"].splitlines()
-    total = len(all_lines)
-    return {
-        "name": result["name"],
-        "module_name": result["module_name"],
-        "total_lines": total,
-        "offset": offset,
-        "lines": all_lines[offset: offset + limit],
-    }
 
 
 @mcp.tool()
@@ -152,7 +205,9 @@ def get_callers_tool(name: str) -> list[dict]:
     """Return all subroutines that call the named subroutine.
 
     Name lookup is case-insensitive. Returns an empty list if none found.
-    Each result has: caller_name, caller_module.
+    Each result has: caller_name, caller_module, caller_id, line (the CALL
+    in the caller's file), and callee_id (the subroutine the call reaches,
+    None when several subroutines share the name and scope does not decide).
     """
     return get_callers(name)
 
@@ -162,10 +217,55 @@ def get_callees_tool(name: str) -> list[dict]:
     """Return all subroutines called by the named subroutine.
 
     Name lookup is case-insensitive. Returns an empty list if none found.
+    Each result has: callee_name, line (first CALL in the caller's file),
+    callee_id and module_name of the subroutine the call reaches, and
+    candidates (ids) when the name is ambiguous in the caller's scope.
     """
     return get_callees(name)
 
 
+@mcp.tool()
+def get_call_tree_tool(name: str, depth: int = 3, module: str | None = None) -> dict | None:
+    """Return everything a subroutine calls, transitively, as a nested tree.
+
+    Each node has id, name, module_name and children; depth (max 10) bounds
+    the levels expanded, and at most 500 nodes are returned. A node already
+    expanded elsewhere in the tree is marked seen; one whose callees were cut
+    off is marked truncated. Callees outside the index (MPI, NetCDF, ...)
+    have id None. Returns None if not found; pass module= when the name is
+    defined in several modules.
+    """
+    return get_call_tree(name, depth=depth, module=module)
+
+
+@mcp.tool()
+def get_caller_tree_tool(name: str, depth: int = 3, module: str | None = None) -> dict | None:
+    """Return everything that calls a subroutine, transitively, as a nested tree.
+
+    Same layout as get_call_tree_tool, with children being callers.
+    """
+    return get_caller_tree(name, depth=depth, module=module)
+
+
+@mcp.tool()
+def find_call_path_tool(
+    source: str,
+    target: str,
+    source_module: str | None = None,
+    target_module: str | None = None,
+    max_depth: int | None = None,
+) -> list[dict]:
+    """Return the shortest call chain from source down to target.
+
+    Lists id, name and module_name for each subroutine from source to target;
+    an empty list means target is not reachable (within max_depth calls, if
+    given). Names are case-insensitive.
+    """
+    return find_call_path(
+        source, target, source_module=source_module, target_module=target_module, max_depth=max_depth
+    )
+
+
 @mcp.tool()
 def get_module_uses_tool(module_name: str) -> list[str]:
     """Return the modules USEd by a FESOM2 module.
@@ -213,12 +313,14 @@ def namelist_to_code_tool(param: str) -> list[dict]:
 
 
 @mcp.tool()
-def search_docs_tool(query: str, top_k: int = 5) -> list[dict]:
-    """Semantic search over FESOM2 RST documentation and namelist descriptions.
+def search_docs_tool(query: str, top_k: int = 5, mode: str = "hybrid") -> list[dict]:
+    """Search over FESOM2 RST documentation and namelist descriptions.
 
     Searches both the ``fesom2_docs`` collection (RST pages) and the
     ``fesom2_namelists`` collection (inline parameter descriptions from config
-    files). Returns the ``top_k`` best matches across both.
+    files). Returns the ``top_k`` best matches across both. ``mode`` is
+    "hybrid" (default), "vector" or "lexical", as for ``search_code_tool``;
+    keyword ranking covers the RST pages only.
 
     Each result has: source ('doc' or 'namelist'), snippet (first 400 chars),
     and source-specific metadata:
@@ -229,7 +331,17 @@ def search_docs_tool(query: str, top_k: int = 5) -> list[dict]:
     'ALE vertical coordinate', 'EVP sea ice rheology'). For a specific
     parameter name, use ``namelist_to_code_tool`` instead.
     """
-    return search_docs(query, top_k=top_k)
+    return search_docs(query, top_k=top_k, mode=mode)
+
+
+@mcp.tool()
+def search_docs_batch_tool(queries: list[str], top_k: int = 5, mode: str = "hybrid") -> list[list[dict]]:
+    """Run ``search_docs_tool`` for several queries at once; one result list per query, in order.
+
+    The queries share a single embedding request and one query per ChromaDB
+    collection.
+    """
+    return search_docs_batch(queries, top_k=top_k, mode=mode)
 
 
 @mcp.tool()
@@ -589,5 +701,36 @@ def get_workflow_tool(task: str | None = None) -> dict:
     return get_workflow(task)
 
 
+@mcp.tool()
+def server_status_tool() -> dict:
+    """Report whether the server has finished warming up, with per-step timings.
+
+    Once the client has completed the MCP handshake the server opens the
+    DuckDB index, builds the call graph and symbol table, loads every
+    ChromaDB collection and embeds a probe text so the embedding model is
+    loaded, all in the background. "state" is "warming", "ready", or
+    "degraded" (a step failed; its "error" says why, e.g. Ollama not
+    running — lexical search still works). Searches made while warming
+    still work, they are just slower.
+    """
+    return _WARM_UP.status()
+
+
+def _warm_up_steps() -> dict:
+    """Startup loads, in order; each fills a cache the tools read."""
+    steps = {}
+    if DB_PATH.exists():
+        # The shared read-only DuckDB connection every tool borrows a cursor
+        # from, then the in-memory call graph and symbol table.
+        steps["duckdb"] = lambda: duckdb_pool.get_connection(DB_PATH)
+        steps["call_graph"] = lambda: load_call_graph(DB_PATH)
+        steps["symbols"] = lambda: load_symbols(DB_PATH)
+    steps["chroma"] = lambda: warmup.page_in(CHROMA_PATH)
+    steps["embed"] = warmup.embed_probe
+    return steps
+
+
 if __name__ == "__main__":
+    warmup.after_initialized(mcp, lambda: _WARM_UP.start(
+        _warm_up_steps(), lambda: warmup.embed_probe(timeout_s=0), warmup.keep_alive_interval()))
     mcp.run()
@@ -1,13 +1,19 @@
 """Plain Python callables over the FESOM2 DuckDB code graph and ChromaDB semantic index."""
 
 import re
-from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable
 
-from src.fesom2.indexer.schema import DB_PATH, connect
+from src import (
+    call_graph, code_search, doc_sections, duckdb_pool, fan_out, full_text, pooled_vectors, source_lines, symbols,
+)
+from src.embed_backend import embed_texts
+from src.embed_cache import QueryEmbeddingCache, query_cache_path
+from src.fesom2.indexer.schema import DB_PATH
 from src.fesom2.embedder.store import (
     CHROMA_PATH,
     FESOM2_SUBROUTINES_COLLECTION,
+    FESOM2_POOLED_COLLECTION,
     FESOM2_DOCS_COLLECTION,
     FESOM2_NAMELISTS_COLLECTION,
     get_collection,
@@ -23,19 +29,32 @@ def _normalize_query(query: str) -> str:
     return result.replace("_", " ")
 
 
-@contextmanager
 def _db(db_path: Path = DB_PATH):
-    con = connect(db_path)
-    try:
-        yield con
-    finally:
-        con.close()
+    """Context manager yielding a cursor on the pooled read-only connection.
+
+    As in the MITgcm tools, the connection for db_path is opened once per
+    process (see src/duckdb_pool.py) and the schema DDL is never re-run
+    here: the pipeline owns the file, and the hybrid-search and fan-out
+    worker threads each get their own cursor.
+    """
+    return duckdb_pool.cursor(db_path)
+
+
+_QUERY_CACHE = QueryEmbeddingCache(query_cache_path("fesom2"))
+
+
+def _embed_uncached(text: str) -> list[float]:
+    return embed_texts([text])[0]
 
 
 def _embed(query: str) -> list[float]:
-    import ollama
-    response = ollama.embed(model="nomic-embed-text", input=_normalize_query(query))
-    return response.embeddings[0]
+    """Embed a query via the configured backend, cached by normalised query text."""
+    return _QUERY_CACHE.get_or_embed(_normalize_query(query), _embed_uncached)
+
+
+def _embed_many(queries: list[str]) -> list[list[float]]:
+    """Embed several queries as _embed does, sending every uncached one in a single backend call."""
+    return _QUERY_CACHE.get_or_embed_many([_normalize_query(q) for q in queries], embed_texts)
 
 
 def _doc_snippet(doc: str) -> str:
@@ -50,63 +69,215 @@ def _doc_snippet(doc: str) -> str:
 # ── Code navigation ───────────────────────────────────────────────────────────
 
 
+# Kind -> (record fields, rows of key + fields), in priority order.
+_SYMBOL_SQL = {
+    "subroutine": (
+        ("id", "name", "module_name", "file", "start_line", "end_line"),
+        "SELECT name_key, id, name, module_name, file, start_line, end_line FROM subroutines "
+        "ORDER BY module_name, id",
+    ),
+    "module": (
+        ("id", "name", "file", "start_line", "end_line"),
+        "SELECT name_key, id, name, file, start_line, end_line FROM modules ORDER BY id",
+    ),
+    "namelist_param": (
+        ("param_name", "namelist_group", "file", "module_name", "line"),
+        "SELECT DISTINCT param_key, param_name, namelist_group, file, module_name, line FROM namelist_refs "
+        "ORDER BY module_name, line",
+    ),
+}
+
+
+def _build_symbols(db_path: Path) -> symbols.SymbolTable:
+    with _db(db_path) as con:
+        return symbols.SymbolTable({
+            kind: symbols.group(con.execute(sql).fetchall(), fields) for kind, (fields, sql) in _SYMBOL_SQL.items()
+        })
+
+
+def load_symbols(_db_path: Path = DB_PATH) -> symbols.SymbolTable:
+    """Return the in-memory symbol table for the index, building it on first use."""
+    return symbols.get_table(_db_path, _build_symbols)
+
+
 def search_code(
     query: str,
     top_k: int = 5,
+    mode: str = "hybrid",
     _db_path: Path = DB_PATH,
     _chroma_path: Path = CHROMA_PATH,
 ) -> list[dict]:
-    """Semantic search over FESOM2 subroutine embeddings."""
-    collection = get_collection(FESOM2_SUBROUTINES_COLLECTION, _chroma_path)
-    embedding = _embed(query)
+    """Search FESOM2 subroutines by embedding, BM25 or both fused (mode, see src/full_text.py).
 
-    results = collection.query(
-        query_embeddings=[embedding],
-        n_results=top_k * 10,
-        include=["metadatas", "distances"],
-    )
+    Embedding search queries one pooled vector per subroutine and merges in
+    the nearest chunks (src/pooled_vectors.py).
 
-    best: dict[int, tuple[float, dict]] = {}
-    for meta, dist in zip(results["metadatas"][0], results["distances"][0]):
-        db_id = int(meta["db_id"])
-        if db_id not in best or dist < best[db_id][0]:
-            best[db_id] = (dist, meta)
+    A query that is exactly a subroutine, module or namelist parameter name
+    is answered from the index without embedding, unless mode is "vector".
+    Each result's "match" records the route: "subroutine", "module" or
+    "namelist_param" for exact hits (module and namelist records carry
+    those tables' fields), else the mode.
+    """
+    full_text.check_mode(mode)
+    if mode != "vector" and _db_path.exists() and (exact := load_symbols(_db_path).lookup(query, top_k)):
+        return exact
+
+    def vector() -> dict[int, None]:
+        return dict.fromkeys(_code_by_vector([_embed(query)], top_k, _chroma_path)[0])
 
-    ranked = sorted(best.values(), key=lambda x: x[0])[:top_k]
-    db_ids = [int(m["db_id"]) for _, m in ranked]
+    def lexical() -> dict[int, None]:
+        if not _db_path.exists():
+            return {}
+        with _db(_db_path) as con:
+            return _code_by_bm25(con, query, top_k)
 
+    db_ids = list(full_text.ranked(mode, lexical, vector))[:top_k]
     if not db_ids:
         return []
-
     with _db(_db_path) as con:
-        placeholders = ", ".join("?" for _ in db_ids)
-        rows = con.execute(
-            f"SELECT id, name, module_name, file, start_line, end_line "
-            f"FROM subroutines WHERE id IN ({placeholders})",
-            db_ids,
-        ).fetchall()
+        records = _subroutines_by_id(con, db_ids)
+    return [{**records[db_id], "match": mode} for db_id in db_ids if db_id in records]
+
 
-    id_to_row = {r[0]: r for r in rows}
+def search_code_batch(
+    queries: list[str],
+    top_k: int = 5,
+    mode: str = "hybrid",
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
+) -> list[list[dict]]:
+    """Run search_code for each query; returns one result list per query, in order.
+
+    Exact-name queries are answered as in search_code; the rest share one
+    embedding call, one multi-vector ChromaDB query per collection and one
+    DuckDB read of the subroutines found.
+    """
+    full_text.check_mode(mode)
+    indexed = _db_path.exists()
+    exact = [load_symbols(_db_path).lookup(q, top_k) if mode != "vector" and indexed else [] for q in queries]
+    rest = [q for q, hits in zip(queries, exact) if not hits]
+    if not rest:
+        return exact
+
+    def vector() -> list[dict[int, None]]:
+        return [dict.fromkeys(r) for r in _code_by_vector(_embed_many(rest), top_k, _chroma_path)]
+
+    def lexical() -> list[dict[int, None]]:
+        if not indexed:
+            return [{} for _ in rest]
+        with _db(_db_path) as con:
+            return [_code_by_bm25(con, q, top_k) for q in rest]
+
+    rankings = iter([list(r)[:top_k] for r in full_text.ranked_many(mode, lexical, vector)])
+    ranked_ids = [[] if hits else next(rankings) for hits in exact]
+    wanted = {db_id for ids in ranked_ids for db_id in ids}
+    if not wanted:
+        return exact
+    with _db(_db_path) as con:
+        records = _subroutines_by_id(con, wanted)
     return [
-        {
-            "id": r[0],
-            "name": r[1],
-            "module_name": r[2],
-            "file": r[3],
-            "start_line": r[4],
-            "end_line": r[5],
-        }
-        for _, meta in ranked
-        if (r := id_to_row.get(int(meta["db_id"]))) is not None
+        hits or [{**records[db_id], "match": mode} for db_id in ids if db_id in records]
+        for hits, ids in zip(exact, ranked_ids)
     ]
 
 
+_SUBROUTINE_FIELDS = ("id", "name", "module_name", "file", "start_line", "end_line")
+
+
+def _code_by_vector(embeddings: list[list[float]], top_k: int, chroma_path: Path) -> list[dict[int, float]]:
+    """Per query vector, up to top_k db_id -> cosine distance, closest first."""
+    collection = get_collection(FESOM2_SUBROUTINES_COLLECTION, chroma_path)
+    if collection is None:
+        return [{} for _ in embeddings]
+    pooled = get_collection(FESOM2_POOLED_COLLECTION, chroma_path)
+    if pooled is not None:
+        found = pooled_vectors.search_many(pooled, collection, embeddings, top_k)
+        if any(found):
+            return found
+    # No pooled collection (an index embedded before it existed) or an empty
+    # one: over-fetch chunks and keep each subroutine's best
+    results = collection.query(
+        query_embeddings=embeddings,
+        n_results=top_k * 10,
+        include=["metadatas", "distances"],
+    )
+    return [_best_chunks(m, d) for m, d in zip(results["metadatas"], results["distances"])]
+
+
+def _best_chunks(metadatas: list[dict], distances: list[float]) -> dict[int, float]:
+    """db_id -> distance of its best (lowest distance) chunk among one query's hits, closest first."""
+    best: dict[int, float] = {}
+    for meta, dist in zip(metadatas, distances):
+        db_id = int(meta["db_id"])
+        if db_id not in best or dist < best[db_id]:
+            best[db_id] = dist
+    return dict(sorted(best.items(), key=lambda item: item[1]))
+
+
+def _code_by_bm25(con, query: str, top_k: int) -> dict[int, None]:
+    rows = full_text.search(con, "subroutines", "id", query, top_k * full_text.CANDIDATES)
+    return dict.fromkeys(r[0] for r in rows)
+
+
+def _subroutines_by_id(con, db_ids) -> dict[int, dict]:
+    """Subroutine records (_SUBROUTINE_FIELDS) of db_ids, read in one query."""
+    db_ids = list(db_ids)
+    placeholders = ", ".join("?" for _ in db_ids)
+    rows = con.execute(
+        f"SELECT id, name, module_name, file, start_line, end_line "
+        f"FROM subroutines WHERE id IN ({placeholders})",
+        db_ids,
+    ).fetchall()
+    return {r[0]: dict(zip(_SUBROUTINE_FIELDS, r)) for r in rows}
+
+
+# Trigram-index source -> rows of (first line, text, file, subroutine, module), in result order.
+_GREP_SQL = {
+    "subroutines": (
+        "SELECT start_line, source_text, file, name, module_name FROM subroutines "
+        "WHERE {candidates} AND ($module IS NULL OR module_key = upper($module)) ORDER BY file, start_line"
+    ),
+    "headers": (
+        f"SELECT 1, {doc_sections.TEXT}, file, NULL, NULL FROM doc_sections "
+        "WHERE {candidates} AND file LIKE 'src/%' AND $module IS NULL ORDER BY file"
+    ),
+}
+
+
+def grep_code(
+    pattern: str,
+    ignore_case: bool = False,
+    module: str | None = None,
+    max_results: int = 100,
+    _db_path: Path = DB_PATH,
+) -> list[dict]:
+    """Return FESOM2 source lines matching the regular expression pattern, as file:line hits.
+
+    Searches subroutine source, then the src/*.h and src/*.inc files stored
+    by the docs pipeline (skipped when module is given), filtering
+    candidates through the trigram index (see src/code_search.py) before
+    running the regex.  Each hit has file, line (1-based, in the file),
+    text, subroutine and module_name (both None in include files).
+    Raises ValueError for an invalid pattern.
+    """
+    compiled = code_search.Pattern(pattern, ignore_case)
+    if not _db_path.exists():
+        return []
+    out = []
+    with _db(_db_path) as con:
+        for source, sql in _GREP_SQL.items():
+            rows = code_search.grep(con, compiled, source, sql, {"module": module}, max_results - len(out))
+            out.extend({"file": file, "line": line, "text": text, "subroutine": name, "module_name": mod}
+                       for line, text, file, name, mod in rows)
+    return out
+
+
 def find_modules(name: str, _db_path: Path = DB_PATH) -> list[dict]:
     """Return all modules matching name (case-insensitive)."""
     with _db(_db_path) as con:
         rows = con.execute(
             "SELECT id, name, file, start_line, end_line FROM modules "
-            "WHERE upper(name) = upper(?)",
+            "WHERE name_key = upper(?)",
             [name],
         ).fetchall()
     return [
@@ -120,7 +291,7 @@ def get_module(name: str, _db_path: Path = DB_PATH) -> dict | None:
     with _db(_db_path) as con:
         mrows = con.execute(
             "SELECT id, name, file, start_line, end_line FROM modules "
-            "WHERE upper(name) = upper(?)",
+            "WHERE name_key = upper(?)",
             [name],
         ).fetchall()
         if not mrows:
@@ -128,7 +299,7 @@ def get_module(name: str, _db_path: Path = DB_PATH) -> dict | None:
         mod = mrows[0]
         srows = con.execute(
             "SELECT name, start_line, end_line FROM subroutines "
-            "WHERE upper(module_name) = upper(?) ORDER BY start_line",
+            "WHERE module_key = upper(?) ORDER BY start_line",
             [name],
         ).fetchall()
     return {
@@ -148,7 +319,7 @@ def find_subroutines(name: str, _db_path: Path = DB_PATH) -> list[dict]:
     with _db(_db_path) as con:
         rows = con.execute(
             "SELECT id, name, module_name, file, start_line, end_line FROM subroutines "
-            "WHERE upper(name) = upper(?)",
+            "WHERE name_key = upper(?)",
             [name],
         ).fetchall()
     return [
@@ -159,75 +330,193 @@ def find_subroutines(name: str, _db_path: Path = DB_PATH) -> list[dict]:
 
 
 def get_subroutine(
-    name: str, module: str | None = None, _db_path: Path = DB_PATH
+    name: str, module: str | None = None, include_source: bool = True, _db_path: Path = DB_PATH
 ) -> dict | None:
     """Return subroutine metadata and source text, or None if not found.
 
     When module is provided, restricts to that module. When None and multiple
-    subroutines share the same name, raises ValueError.
+    subroutines share the same name, raises ValueError.  With
+    include_source=False the source_text column is not read and the key is
+    omitted.
     """
+    columns = "id, name, module_name, file, start_line, end_line" + (", source_text" if include_source else "")
     with _db(_db_path) as con:
         if module is not None:
             rows = con.execute(
-                "SELECT id, name, module_name, file, start_line, end_line, source_text "
-                "FROM subroutines WHERE upper(name) = upper(?) AND upper(module_name) = upper(?)",
+                f"SELECT {columns} "
+                "FROM subroutines WHERE name_key = upper(?) AND module_key = upper(?)",
                 [name, module],
             ).fetchall()
         else:
             rows = con.execute(
-                "SELECT id, name, module_name, file, start_line, end_line, source_text "
-                "FROM subroutines WHERE upper(name) = upper(?)",
+                f"SELECT {columns} "
+                "FROM subroutines WHERE name_key = upper(?)",
                 [name],
             ).fetchall()
 
     if not rows:
         return None
+    _check_unique("get_subroutine", name, rows)
+    row = rows[0]
+    result = {
+        "id": row[0], "name": row[1], "module_name": row[2], "file": row[3],
+        "start_line": row[4], "end_line": row[5],
+    }
+    if include_source:
+        result["source_text"] = row[6]
+    return result
+
+
+def _check_unique(caller: str, name: str, rows: list[tuple]) -> None:
+    """Raise ValueError when rows (module in column 2) hold several subroutines."""
     if len(rows) > 1:
         modules = [r[2] for r in rows]
         raise ValueError(
-            f"get_subroutine: {len(rows)} subroutines named {name!r} found in "
+            f"{caller}: {len(rows)} subroutines named {name!r} found in "
             f"modules {modules}; pass module= to disambiguate"
         )
-    row = rows[0]
-    return {
-        "id": row[0], "name": row[1], "module_name": row[2], "file": row[3],
-        "start_line": row[4], "end_line": row[5], "source_text": row[6],
-    }
+
+
+def get_source(
+    name: str, module: str | None = None, offset: int = 0, limit: int = 100, _db_path: Path = DB_PATH
+) -> dict | None:
+    """Return lines [offset, offset + limit) of a subroutine's source, or None if not found.
+
+    Long routines read only the requested lines from the source_lines table;
+    short ones are split whole (see src/source_lines.py).  module and the ValueError on ambiguous names work
+    as in get_subroutine.
+    Returns {name, module_name, total_lines, offset, lines}.
+    """
+    sql = (f"SELECT id, name, module_name, n_lines, {source_lines.SOURCE_IF_SHORT} "
+           "FROM subroutines WHERE name_key = upper(?)")
+    params = [name]
+    if module is not None:
+        sql += " AND module_key = upper(?)"
+        params.append(module)
+    with _db(_db_path) as con:
+        rows = con.execute(sql, params).fetchall()
+        if not rows:
+            return None
+        _check_unique("get_source", name, rows)
+        row = rows[0]
+        total, lines = source_lines.page(con, row[0], row[3], row[4], offset, limit)
+    return {"name": row[1], "module_name": row[2], "total_lines": total, "offset": offset, "lines": lines}
 
 
 def get_callers(name: str, _db_path: Path = DB_PATH) -> list[dict]:
-    """Return subroutines that call the named subroutine."""
+    """Return subroutines that call the named subroutine.
+
+    Each result has the caller's name, module and id, the call-site line in
+    the caller's file, and the callee_id the call resolved to at index time
+    (None when it could reach several subroutines of that name).
+    """
     with _db(_db_path) as con:
         rows = con.execute(
             """
-            SELECT DISTINCT c.caller_name, c.caller_module
+            SELECT c.caller_name, c.caller_module, c.caller_id, min(c.line), c.callee_id
             FROM calls c
-            WHERE upper(c.callee_name) = upper(?)
+            WHERE c.callee_key = upper(?)
+            GROUP BY c.caller_name, c.caller_module, c.caller_id, c.callee_id
+            ORDER BY c.caller_id
             """,
             [name],
         ).fetchall()
-    return [{"caller_name": r[0], "caller_module": r[1]} for r in rows]
+    return [{"caller_name": r[0], "caller_module": r[1], "caller_id": r[2], "line": r[3], "callee_id": r[4]}
+            for r in rows]
 
 
 def get_callees(name: str, _db_path: Path = DB_PATH) -> list[dict]:
-    """Return subroutines called by the named subroutine."""
+    """Return subroutines called by the named subroutine.
+
+    Each result has the callee name, the first call-site line, and the
+    callee_id and module_name the call resolved to at index time; calls that
+    could reach several subroutines list their ids in candidates instead.
+    """
     with _db(_db_path) as con:
         rows = con.execute(
             """
-            SELECT DISTINCT c.callee_name
+            SELECT c.callee_name, min(c.line), c.callee_id, t.module_name, c.callee_candidates
             FROM calls c
-            WHERE upper(c.caller_name) = upper(?)
+            LEFT JOIN subroutines t ON t.id = c.callee_id
+            WHERE c.caller_key = upper(?)
+            GROUP BY c.callee_name, c.callee_id, t.module_name, c.callee_candidates
+            ORDER BY min(c.line), c.callee_name
             """,
             [name],
         ).fetchall()
-    return [{"callee_name": r[0]} for r in rows]
+    return [{"callee_name": r[0], "line": r[1], "callee_id": r[2], "module_name": r[3], "candidates": r[4]}
+            for r in rows]
+
+
+def _build_call_graph(db_path: Path) -> call_graph.CallGraph:
+    with _db(db_path) as con:
+        subs = con.execute("SELECT id, name, module_name FROM subroutines ORDER BY id").fetchall()
+        calls = con.execute(
+            "SELECT caller_id, callee_name, "
+            "CASE WHEN callee_id IS NULL THEN callee_candidates ELSE [callee_id] END FROM calls"
+        ).fetchall()
+    node = {row[0]: i for i, row in enumerate(subs)}
+    return call_graph.CallGraph(
+        subs, [(node[c], callee, [node[t] for t in targets or []]) for c, callee, targets in calls if c in node],
+        "module_name",
+    )
+
+
+def load_call_graph(_db_path: Path = DB_PATH) -> call_graph.CallGraph:
+    """Return the in-memory call graph for the index, building it on first use."""
+    return call_graph.get_graph(_db_path, _build_call_graph)
+
+
+def _graph_node(graph: call_graph.CallGraph, name: str, module: str | None, caller: str) -> int | None:
+    nodes = graph.find(name, module)
+    if len(nodes) > 1:
+        raise ValueError(
+            f"{caller}: {len(nodes)} subroutines named {name!r} found in "
+            f"modules {[graph.groups[i] for i in nodes]}; pass module= to disambiguate"
+        )
+    return nodes[0] if nodes else None
+
+
+def get_call_tree(
+    name: str, depth: int = 3, module: str | None = None, _db_path: Path = DB_PATH
+) -> dict | None:
+    """Return the transitive callees of a subroutine as a nested tree, or None if not found.
+
+    Raises ValueError when the name is ambiguous and module is None.
+    """
+    graph = load_call_graph(_db_path)
+    root = _graph_node(graph, name, module, "get_call_tree")
+    return None if root is None else graph.tree(root, depth)
+
+
+def get_caller_tree(
+    name: str, depth: int = 3, module: str | None = None, _db_path: Path = DB_PATH
+) -> dict | None:
+    """Return the transitive callers of a subroutine as a nested tree, or None if not found."""
+    graph = load_call_graph(_db_path)
+    root = _graph_node(graph, name, module, "get_caller_tree")
+    return None if root is None else graph.tree(root, depth, reverse=True)
+
+
+def find_call_path(
+    source: str,
+    target: str,
+    source_module: str | None = None,
+    target_module: str | None = None,
+    max_depth: int | None = None,
+    _db_path: Path = DB_PATH,
+) -> list[dict]:
+    """Return the shortest call chain from source to target, or [] if there is none."""
+    graph = load_call_graph(_db_path)
+    path = graph.shortest_path(graph.find(source, source_module), graph.find(target, target_module), max_depth)
+    return [graph.describe(i) for i in path]
 
 
 def get_module_uses(module_name: str, _db_path: Path = DB_PATH) -> list[str]:
     """Return modules USEd by the named module."""
     with _db(_db_path) as con:
         rows = con.execute(
-            "SELECT used_module FROM uses WHERE upper(module_name) = upper(?)",
+            "SELECT used_module FROM uses WHERE module_key = upper(?)",
             [module_name],
         ).fetchall()
     return [r[0] for r in rows]
@@ -240,7 +529,7 @@ def namelist_to_code(param: str, _db_path: Path = DB_PATH) -> list[dict]:
             """
             SELECT DISTINCT param_name, namelist_group, file, module_name, line
             FROM namelist_refs
-            WHERE upper(param_name) = upper(?)
+            WHERE param_key = upper(?)
             ORDER BY module_name
             """,
             [param],
@@ -249,7 +538,7 @@ def namelist_to_code(param: str, _db_path: Path = DB_PATH) -> list[dict]:
             """
             SELECT description, namelist_group, config_file
             FROM namelist_descriptions
-            WHERE upper(param_name) = upper(?)
+            WHERE param_key = upper(?)
             LIMIT 1
             """,
             [param],
@@ -277,62 +566,186 @@ def namelist_to_code(param: str, _db_path: Path = DB_PATH) -> list[dict]:
 
 
 def search_docs(
-    query: str, top_k: int = 5, _chroma_path: Path = CHROMA_PATH
+    query: str,
+    top_k: int = 5,
+    mode: str = "hybrid",
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
 ) -> list[dict]:
-    """Semantic search over FESOM2 RST docs and namelist descriptions.
+    """Search FESOM2 RST docs and namelist descriptions.
 
-    Searches both the ``fesom2_docs`` and ``fesom2_namelists`` collections
-    and returns the ``top_k`` best matches across both.
+    Vector ranking searches both the ``fesom2_docs`` and ``fesom2_namelists``
+    collections; BM25 ranking covers the doc sections.  ``mode`` picks
+    "hybrid" (default, both fused), "vector" or "lexical" (see
+    src/full_text.py).  Returns the ``top_k`` best matches.
     """
-    embedding = _embed(query)
+    def vector() -> dict[tuple, dict]:
+        return _docs_by_vector([_embed(query)], top_k, _chroma_path)[0]
 
-    results: list[tuple[float, dict]] = []
-
-    for coll_name, source_type in [
-        (FESOM2_DOCS_COLLECTION, "doc"),
-        (FESOM2_NAMELISTS_COLLECTION, "namelist"),
-    ]:
-        try:
-            coll = get_collection(coll_name, _chroma_path)
-            r = coll.query(
-                query_embeddings=[embedding],
-                n_results=top_k * 3,
-                include=["metadatas", "distances", "documents"],
-            )
-            for meta, dist, doc in zip(
-                r["metadatas"][0], r["distances"][0], r["documents"][0]
-            ):
-                results.append((dist, {**meta, "_doc": doc, "_source": source_type}))
-        except Exception:
-            pass
-
-    results.sort(key=lambda x: x[0])
-    out = []
-    for dist, meta in results[:top_k]:
-        record: dict = {"source": meta["_source"]}
+    def lexical() -> dict[tuple, dict]:
+        if not _db_path.exists():
+            return {}
+        with _db(_db_path) as con:
+            return _sections_by_bm25(con, query, top_k)
+
+    return list(full_text.ranked(mode, lexical, vector).values())[:top_k]
+
+
+def search_docs_batch(
+    queries: list[str],
+    top_k: int = 5,
+    mode: str = "hybrid",
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
+) -> list[list[dict]]:
+    """Run search_docs for each query, with one embedding call and one query per collection for all."""
+    full_text.check_mode(mode)
+    if not queries:
+        return []
+
+    def vector() -> list[dict[tuple, dict]]:
+        return _docs_by_vector(_embed_many(queries), top_k, _chroma_path)
+
+    def lexical() -> list[dict[tuple, dict]]:
+        if not _db_path.exists():
+            return [{} for _ in queries]
+        with _db(_db_path) as con:
+            return [_sections_by_bm25(con, q, top_k) for q in queries]
+
+    return [list(r.values())[:top_k] for r in full_text.ranked_many(mode, lexical, vector)]
+
+
+# ChromaDB collection searched by search_docs -> the "source" of its results.
+_DOC_COLLECTIONS = {FESOM2_DOCS_COLLECTION: "doc", FESOM2_NAMELISTS_COLLECTION: "namelist"}
+
+
+def _docs_by_vector(embeddings: list[list[float]], top_k: int, chroma_path: Path) -> list[dict[tuple, dict]]:
+    """Per query vector, the best chunk per doc section or namelist parameter, closest first.
+
+    The two collections are queried concurrently (src/fan_out.py).
+    """
+    by_source = fan_out.gather({
+        source: lambda name=name, source=source: _collection_hits(name, source, embeddings, top_k * 3, chroma_path)
+        for name, source in _DOC_COLLECTIONS.items()
+    })
+    rankings = []
+    for i in range(len(embeddings)):
+        hits = sorted(
+            (hit for per_query in by_source.values() if per_query for hit in per_query[i]), key=lambda x: x[0]
+        )
+        rankings.append({key: record for key, (_, record) in _dedupe_doc_hits(hits).items()})
+    return rankings
+
+
+def _collection_hits(
+    name: str, source: str, embeddings: list[list[float]], n: int, chroma_path: Path
+) -> list[list[tuple[float, dict]]]:
+    """Per query vector, (distance, chunk record) of the n nearest chunks of one docs collection.
+
+    No hits when no pipeline has built the collection.
+    """
+    collection = get_collection(name, chroma_path)
+    if collection is None:
+        return [[] for _ in embeddings]
+    r = collection.query(
+        query_embeddings=embeddings,
+        n_results=n,
+        include=["metadatas", "distances", "documents"],
+    )
+    return [
+        [(dist, {**meta, "_doc": doc, "_source": source}) for meta, dist, doc in zip(metas, dists, docs)]
+        for metas, dists, docs in zip(r["metadatas"], r["distances"], r["documents"])
+    ]
+
+
+def _dedupe_doc_hits(hits: list[tuple[float, dict]]) -> dict[tuple, tuple[float, dict]]:
+    """Closest-first hits -> the first (distance, record) per doc section or namelist parameter."""
+    out: dict[tuple, tuple[float, dict]] = {}
+    for dist, meta in hits:
         if meta["_source"] == "doc":
-            record["file"] = meta.get("file", "")
-            record["section"] = meta.get("section", "")
+            fields = {"file": meta.get("file", ""), "section": meta.get("section", "")}
         else:
-            record["param_name"] = meta.get("param_name", "")
-            record["namelist_group"] = meta.get("namelist_group", "")
-            record["config_file"] = meta.get("config_file", "")
-        record["snippet"] = _doc_snippet(meta["_doc"])
-        out.append(record)
+            fields = {
+                "param_name": meta.get("param_name", ""),
+                "namelist_group": meta.get("namelist_group", ""),
+                "config_file": meta.get("config_file", ""),
+            }
+        key = (meta["_source"], *fields.values())
+        if key not in out:
+            out[key] = (dist, {"source": meta["_source"], **fields, "snippet": _doc_snippet(meta["_doc"])})
     return out
 
 
+def _sections_by_bm25(con, query: str, top_k: int) -> dict[tuple, dict]:
+    rows = full_text.search(
+        con, "doc_sections", "section_key", query, top_k * full_text.CANDIDATES,
+        ["file", "section", doc_sections.TEXT],
+    )
+    return {
+        ("doc", file, section): {"source": "doc", "file": file, "section": section, "snippet": text[:400]}
+        for _, file, section, text in rows
+    }
+
+
+def search_all(query: str, top_k: int = 10, _db_path: Path = DB_PATH, _chroma_path: Path = CHROMA_PATH) -> list[dict]:
+    """Search subroutines, RST docs and namelist descriptions at once; the top_k best overall.
+
+    The query is embedded once and the collections are queried
+    concurrently (src/fan_out.py); hits are merged on a score calibrated
+    within each collection.  Each result has "source" ("code", "doc" or
+    "namelist"), "score", and the fields search_code or search_docs
+    returns for it.
+    """
+    embedding = _embed(query)
+    n = top_k * 3
+
+    def code() -> list[tuple[float, dict]]:
+        distances = _code_by_vector([embedding], n, _chroma_path)[0]
+        if not distances or not _db_path.exists():
+            return []
+        with _db(_db_path) as con:
+            records = _subroutines_by_id(con, list(distances))
+        return [(dist, records[db_id]) for db_id, dist in distances.items() if db_id in records]
+
+    def docs(name: str, source: str) -> Callable[[], list[tuple[float, dict]]]:
+        def run() -> list[tuple[float, dict]]:
+            hits = _collection_hits(name, source, [embedding], n * 3, _chroma_path)[0]
+            return list(_dedupe_doc_hits(hits).values())[:n]
+        return run
+
+    return fan_out.merge(fan_out.gather({
+        "code": code,
+        **{source: docs(name, source) for name, source in _DOC_COLLECTIONS.items()},
+    }), top_k)
+
+
 def get_doc_source(
     file: str,
     section: str,
     offset: int = 0,
     limit: int = 200,
+    _db_path: Path = DB_PATH,
     _chroma_path: Path = CHROMA_PATH,
 ) -> dict | None:
-    """Return paginated text of a FESOM2 documentation section."""
+    """Return paginated text of a FESOM2 documentation section.
+
+    One indexed lookup in doc_sections; falls back to reassembling the
+    ChromaDB chunks for indexes embedded before that table existed.
+    """
+    if _db_path.exists():
+        with _db(_db_path) as con:
+            page = doc_sections.read_section(con, file, section, offset, limit)
+            if page is not None or doc_sections.sections_stored(con):
+                return page
+    return _doc_source_from_chunks(file, section, offset, limit, _chroma_path)
+
+
+def _doc_source_from_chunks(file: str, section: str, offset: int, limit: int, chroma_path: Path) -> dict | None:
     from src.embed_utils import OVERLAP
 
-    collection = get_collection(FESOM2_DOCS_COLLECTION, _chroma_path)
+    collection = get_collection(FESOM2_DOCS_COLLECTION, chroma_path)
+    if collection is None:
+        return None
     results = collection.get(
         where={"$and": [{"file": {"$eq": file}}, {"section": {"$eq": section}}]},
         include=["metadatas", "documents"],
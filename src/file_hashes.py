@@ -0,0 +1,67 @@
+"""Content hashes of indexed source files, for incremental re-indexing.
+
+Both indexing pipelines record one row per source file in their ``files``
+table (path, sha256, mtime, upstream commit SHA).  On an incremental run the
+current tree is hashed and compared against that table; only new or changed
+files are re-extracted, and rows belonging to changed or deleted files are
+replaced.
+"""
+
+import hashlib
+from pathlib import Path
+
+import duckdb
+
+from .duckdb_bulk import insert_rows
+
+
+def hash_file(path: Path) -> str:
+    """Return the hex SHA-256 of the file's bytes."""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def scan(
+    files: list[Path], contents: dict[str, bytes] | None = None
+) -> dict[str, tuple[str, float]]:
+    """Return {str(path): (sha256, mtime)} for each file, in input order.
+
+    Pass contents ({str(path): bytes}) to hash files the caller has already
+    read instead of reading them again.
+    """
+    if contents is None:
+        return {str(p): (hash_file(p), p.stat().st_mtime) for p in files}
+    return {
+        str(p): (hashlib.sha256(contents[str(p)]).hexdigest(), p.stat().st_mtime)
+        for p in files
+    }
+
+
+def diff(
+    con: duckdb.DuckDBPyConnection, current: dict[str, tuple[str, float]]
+) -> tuple[list[str], list[str]]:
+    """Compare current hashes with the files table.
+
+    Returns (changed, removed): paths that are new or whose hash differs, in
+    the order of current, and indexed paths no longer present.
+    """
+    known = dict(con.execute("SELECT path, sha256 FROM files").fetchall())
+    changed = [p for p, (h, _) in current.items() if known.get(p) != h]
+    removed = sorted(set(known) - set(current))
+    return changed, removed
+
+
+def record(
+    con: duckdb.DuckDBPyConnection,
+    current: dict[str, tuple[str, float]],
+    paths: list[str],
+    removed: list[str],
+    commit_sha: str,
+) -> None:
+    """Upsert files rows for paths and drop rows for removed paths."""
+    stale = list(paths) + list(removed)
+    if stale:
+        con.execute("DELETE FROM files WHERE path IN (SELECT unnest(?))", [stale])
+    insert_rows(
+        con, "files", ["path", "sha256", "mtime", "commit_sha"],
+        [(p, *current[p], commit_sha) for p in paths],
+    )
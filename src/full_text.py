@@ -0,0 +1,162 @@
+"""BM25 full-text indexes in DuckDB and hybrid lexical + vector ranking.
+
+Embedding search is weak on exact identifiers (``cg3dMaxIters``,
+``DIAGNOSTICS_FILL``) and strong on prose; BM25 is the reverse.  The
+pipelines build a DuckDB FTS index over each searchable table
+(``build_index``) and the search tools rank both ways, fusing the two
+rankings with reciprocal-rank fusion (``rrf``).  ``ranked`` runs the
+lexical query on a worker thread while the caller embeds the query and
+queries ChromaDB, so a hybrid search costs the slower of the two paths
+rather than their sum (DuckDB, the embedding HTTP call and ChromaDB all
+release the GIL).  If the vector path fails in hybrid mode (the embedding
+server is down, a collection is missing) the error is logged and the
+lexical ranking is returned alone; it is raised only when lexical found
+nothing either, so an outage is not reported as "no results".
+
+The tokenizer keeps letters, digits and underscores together and does not
+stem, so Fortran and namelist identifiers stay whole terms; matching is
+case-insensitive.  DuckDB's fts extension is loaded on demand: when it
+cannot be installed or loaded, index builds are skipped and ``search``
+returns no hits, leaving the tools on vector ranking alone.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Mapping, Sequence, TypeVar
+
+import duckdb
+
+log = logging.getLogger(__name__)
+
+MODES = ("hybrid", "vector", "lexical")
+
+# Each path contributes this many candidates per requested result to the fusion.
+CANDIDATES = 3
+
+# The usual RRF constant: damps the weight of the very top ranks.
+RRF_K = 60
+
+_IGNORE = r"(\.|[^a-z0-9_])+"
+
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="full-text")
+
+# Set once the fts extension has failed to install or load, so later builds
+# and searches do not pay for another download attempt.
+_unavailable = False
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def build_index(con: duckdb.DuckDBPyConnection, table: str, key: str, columns: Sequence[str]) -> bool:
+    """(Re)build the BM25 index of table over columns; False if fts is unavailable."""
+    global _unavailable
+    if _unavailable:
+        return False
+    try:
+        con.execute("INSTALL fts")
+        con.execute("LOAD fts")
+    except duckdb.Error as exc:
+        _unavailable = True
+        log.warning(f"Full-text indexes skipped: {exc}")
+        return False
+    cols = ", ".join(f"'{c}'" for c in columns)
+    con.execute(
+        f"PRAGMA create_fts_index('{table}', '{key}', {cols}, "
+        f"stemmer = 'none', ignore = '{_IGNORE}', overwrite = 1)"
+    )
+    return True
+
+
+def search(
+    con: duckdb.DuckDBPyConnection, table: str, key: str, query: str, limit: int, columns: Sequence[str] = ()
+) -> list[tuple]:
+    """Return (key, *columns) of the limit best BM25 matches for query, best first.
+
+    Returns [] when table has no full-text index or fts cannot be loaded;
+    any other query error (a bad column, say) is raised.
+    """
+    global _unavailable
+    if _unavailable:
+        return []
+    select = ", ".join([key, *columns])
+    try:
+        return con.execute(
+            f"SELECT {select} FROM (SELECT *, fts_main_{table}.match_bm25({key}, ?) AS _score FROM {table}) "
+            "WHERE _score IS NOT NULL ORDER BY _score DESC LIMIT ?",
+            [query, limit],
+        ).fetchall()
+    except duckdb.CatalogException:  # no index: pipeline predates it or ran without fts
+        return []
+    except duckdb.Error as exc:
+        if not _is_extension_error(exc):
+            raise
+        _unavailable = True  # index present but the extension cannot be loaded
+        log.warning(f"Full-text search disabled: {exc}")
+        return []
+
+
+def _is_extension_error(exc: duckdb.Error) -> bool:
+    """True if exc reports that an extension could not be installed or loaded.
+
+    An explicit LOAD raises IOException; autoloading the extension behind
+    ``match_bm25`` raises a bare duckdb.Error naming the extension.
+    """
+    return isinstance(exc, duckdb.IOException) or (type(exc) is duckdb.Error and "extension" in str(exc))
+
+
+def rrf(rankings: Sequence[Mapping[K, V]], k: int = RRF_K) -> dict[K, V]:
+    """Fuse rankings (best first) by reciprocal rank; the earliest ranking's value wins per key."""
+    scores: dict[K, float] = {}
+    values: dict[K, V] = {}
+    for ranking in rankings:
+        for rank, (item, value) in enumerate(ranking.items(), 1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+            values.setdefault(item, value)
+    return {item: values[item] for item in sorted(scores, key=scores.__getitem__, reverse=True)}
+
+
+def check_mode(mode: str) -> None:
+    """Raise ValueError unless mode is one of MODES."""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}, got {mode!r}")
+
+
+def ranked(mode: str, lexical: Callable[[], Mapping[K, V]], vector: Callable[[], Mapping[K, V]]) -> dict[K, V]:
+    """Return the ranking for mode, running lexical concurrently with vector in hybrid mode."""
+    check_mode(mode)
+    if mode == "lexical":
+        return dict(lexical())
+    if mode == "vector":
+        return dict(vector())
+    pending = _pool.submit(lexical)
+    try:
+        by_vector = vector()
+    except Exception as exc:
+        return _lexical_alone(exc, [pending.result()])[0]
+    return rrf([by_vector, pending.result()])
+
+
+def ranked_many(
+    mode: str, lexical: Callable[[], Sequence[Mapping[K, V]]], vector: Callable[[], Sequence[Mapping[K, V]]]
+) -> list[dict[K, V]]:
+    """ranked for a batch of queries: lexical and vector each return one ranking per query."""
+    check_mode(mode)
+    if mode == "lexical":
+        return [dict(r) for r in lexical()]
+    if mode == "vector":
+        return [dict(r) for r in vector()]
+    pending = _pool.submit(lexical)
+    try:
+        by_vector = vector()
+    except Exception as exc:
+        return _lexical_alone(exc, pending.result())
+    return [rrf([v, lex]) for v, lex in zip(by_vector, pending.result())]
+
+
+def _lexical_alone(exc: Exception, by_lexical: Sequence[Mapping[K, V]]) -> list[dict[K, V]]:
+    """Return the lexical rankings after the vector path raised exc, or re-raise it if they are all empty."""
+    if not any(by_lexical):
+        raise exc
+    log.warning(f"Vector search failed, returning the lexical ranking alone: {exc!r}")
+    return [dict(r) for r in by_lexical]
@@ -1,18 +1,18 @@
-"""Embedding pipeline: parse MITgcm RST docs, embed via ollama, write to ChromaDB.
+"""Embedding pipeline: parse MITgcm RST docs, embed, write to ChromaDB.
 
 Run as:
     pixi run embed-docs
 
 The collection 'mitgcm_docs' is created in the same ChromaDB path as the
-subroutines collection (data/mitgcm/chroma).
+subroutines collection (data/mitgcm/chroma).  The full text of every section
+and header is also written to the doc_sections table of the DuckDB index
+(data/mitgcm/index.duckdb), which get_doc_source reads; the headers are
+added to the trigram index behind grep_code.
 """
 
 import logging
-import time
 from pathlib import Path
 
-import ollama
-
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(message)s",
@@ -22,8 +22,15 @@ log = logging.getLogger(__name__)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 
-from ...embed_utils import _chunk_text, EMBED_MODEL, BATCH_SIZE, MAX_CHARS, OVERLAP
+from ...code_search import write_postings
+from ...embed_cache import log_chunk_cache_stats
+from ...embed_journal import journal_path
+from ...embed_scheduler import embed_and_upsert
+from ...doc_sections import TEXT, write_sections
+from ...full_text import build_index
+from ...embed_utils import _chunk_text, MAX_CHARS, OVERLAP
 from ..embedder.store import CHROMA_PATH, get_docs_collection
+from ..indexer.schema import DB_PATH, KEYS, connect
 from ...rst_parser import iter_sections
 from .parse import iter_headers
 
@@ -58,6 +65,7 @@ def run(
     doc_root: Path = DOC_ROOT,
     mitgcm_root: Path = MITGCM_ROOT,
     chroma_path: Path = CHROMA_PATH,
+    db_path: Path = DB_PATH,
 ) -> None:
     sections = iter_sections(doc_root)
     log.info(f"Parsed {len(sections)} sections from {doc_root}")
@@ -65,6 +73,18 @@ def run(
     headers = iter_headers(mitgcm_root)
     log.info(f"Found {len(headers)} .h files under {mitgcm_root}")
 
+    con = connect(db_path)
+    try:
+        n = write_sections(
+            con, [(d["file"], d["section"], d["text"]) for d in [*sections, *headers]], KEYS["doc_sections"]
+        )
+        indexed = build_index(con, "doc_sections", "section_key", ["file", "section", "lines"])
+        write_postings(con, "headers", con.execute(
+            f"SELECT id, {TEXT} FROM doc_sections WHERE file LIKE '%.h'").fetchall())
+    finally:
+        con.close()
+    log.info(f"Stored {n} sections in {db_path}" + (" with a full-text index" if indexed else ""))
+
     collection = get_docs_collection(chroma_path)
 
     all_chunks = []
@@ -74,58 +94,9 @@ def run(
         all_chunks.extend(_doc_chunks(f"hdr_{idx}", hdr["file"], hdr["section"], hdr["text"]))
     log.info(f"Generated {len(all_chunks)} chunks from {len(sections)} sections and {len(headers)} headers")
 
-    total = 0
-    for i in range(0, len(all_chunks), BATCH_SIZE):
-        batch = all_chunks[i : i + BATCH_SIZE]
-        ids = [c[0] for c in batch]
-        docs = [c[1] for c in batch]
-        metadatas = [c[2] for c in batch]
-
-        try:
-            embeddings = ollama.embed(model=EMBED_MODEL, input=docs)["embeddings"]
-        except Exception as e:
-            log.warning(f"batch {i // BATCH_SIZE} failed ({e}), retrying in 10s")
-            time.sleep(10)
-            try:
-                embeddings = ollama.embed(model=EMBED_MODEL, input=docs)["embeddings"]
-            except Exception as e2:
-                log.warning(f"batch still failing ({e2}), falling back to one-at-a-time")
-                keep = []
-                for chunk_id, d, meta in zip(ids, docs, metadatas):
-                    for attempt in range(3):
-                        try:
-                            emb = ollama.embed(model=EMBED_MODEL, input=[d])["embeddings"][0]
-                            keep.append((chunk_id, emb, d, meta))
-                            break
-                        except Exception as e3:
-                            if "context length" in str(e3):
-                                mid = len(d) // 2
-                                log.warning(f"splitting {chunk_id} ({len(d)} chars) in two")
-                                for suffix, half in (("_a", d[:mid]), ("_b", d[mid:])):
-                                    try:
-                                        emb = ollama.embed(model=EMBED_MODEL, input=[half])["embeddings"][0]
-                                        keep.append((chunk_id + suffix, emb, half, meta))
-                                    except Exception:
-                                        log.warning(f"skipping {chunk_id}{suffix} after split")
-                                break
-                            if attempt == 2:
-                                raise
-                            time.sleep(10)
-                ids, embeddings, docs, metadatas = zip(*keep) if keep else ([], [], [], [])
-                ids, embeddings, docs, metadatas = list(ids), list(embeddings), list(docs), list(metadatas)
-
-        if ids:
-            collection.upsert(
-                ids=ids,
-                embeddings=embeddings,
-                documents=docs,
-                metadatas=metadatas,
-            )
-
-        total += len(batch)
-        if total % 100 == 0 or total == len(all_chunks):
-            log.info(f"  Embedded {total}/{len(all_chunks)}")
+    embed_and_upsert(collection, all_chunks, journal=journal_path(chroma_path, collection.name))
 
+    log_chunk_cache_stats(log)
     log.info(f"Done. {collection.count()} chunks ({len(sections)} sections).")
 
 
@@ -1,12 +1,9 @@
-"""Embedding pipeline: read subroutines from DuckDB, embed via ollama, write to ChromaDB."""
+"""Embedding pipeline: read subroutines from DuckDB, embed, write to ChromaDB."""
 
 import argparse
 import logging
-import time
 from pathlib import Path
 
-import ollama
-
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(message)s",
@@ -16,9 +13,14 @@ log = logging.getLogger(__name__)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 
-from ...embed_utils import _chunk_text, EMBED_MODEL, BATCH_SIZE, MAX_CHARS, OVERLAP
+from ...embed_backend import get_backend
+from ...embed_cache import log_chunk_cache_stats
+from ...embed_journal import journal_path
+from ...embed_scheduler import embed_and_upsert
+from ...embed_utils import _chunk_text, MAX_CHARS, OVERLAP, source_hash, stale_db_ids
+from ...pooled_vectors import sync as sync_pooled
 from ..indexer.schema import DB_PATH, connect as duckdb_connect
-from .store import CHROMA_PATH, get_subroutine_collection
+from .store import CHROMA_PATH, get_pooled_collection, get_subroutine_collection
 
 
 def _doc_chunks(
@@ -33,6 +35,7 @@ def _doc_chunks(
     header = f"SUBROUTINE {name} [{package}]\n"
     chunks = _chunk_text(source_text, MAX_CHARS, OVERLAP)
     n = len(chunks)
+    digest = source_hash(source_text)
     return [
         (
             f"{db_id}_{i}",
@@ -44,16 +47,28 @@ def _doc_chunks(
                 "db_id": db_id,
                 "chunk_index": i,
                 "n_chunks": n,
+                "source_hash": digest,
             },
         )
         for i, chunk in enumerate(chunks)
     ]
 
 
-def run(db_path: Path = DB_PATH, chroma_path: Path = CHROMA_PATH, start_chunk: int = 0) -> None:
-    model_info = ollama.show(EMBED_MODEL)
-    num_ctx = (model_info.modelinfo or {}).get("nomic-bert.context_length", "unknown")
-    log.info(f"{EMBED_MODEL} context_length={num_ctx}")
+def run(
+    db_path: Path = DB_PATH,
+    chroma_path: Path = CHROMA_PATH,
+    incremental: bool = False,
+) -> None:
+    """Embed subroutines into ChromaDB.
+
+    With incremental=True only subroutines whose source differs from what was
+    embedded (new IDs from an incremental re-index, or changed source under an
+    existing ID) are embedded, and chunks of subroutines that are gone or
+    changed are deleted first.  The pooled per-subroutine collection is then
+    brought up to date (src/pooled_vectors.py).  An interrupted run resumes
+    from its checkpoint journal (src/embed_journal.py) when restarted.
+    """
+    log.info(f"Embedding backend: {get_backend().model_id}")
 
     con = duckdb_connect(db_path)
     rows = con.execute(
@@ -64,75 +79,31 @@ def run(db_path: Path = DB_PATH, chroma_path: Path = CHROMA_PATH, start_chunk: i
 
     collection = get_subroutine_collection(chroma_path)
 
+    if incremental:
+        current = {r[0]: source_hash(r[4]) for r in rows}
+        to_delete, to_embed = stale_db_ids(collection, current)
+        for i in range(0, len(to_delete), 500):
+            collection.delete(where={"db_id": {"$in": to_delete[i : i + 500]}})
+        wanted = set(to_embed)
+        rows = [r for r in rows if r[0] in wanted]
+        log.info(f"Incremental: {len(to_delete)} stale subroutine(s) removed, {len(rows)} to embed")
+
     all_chunks = []
     for r in rows:
         all_chunks.extend(_doc_chunks(r[0], r[1], r[2], r[3], r[4]))
     log.info(f"Generated {len(all_chunks)} chunks from {len(rows)} subroutines")
 
-    if start_chunk:
-        log.info(f"Skipping to chunk {start_chunk}")
-
-    total = start_chunk
-    for i in range(start_chunk, len(all_chunks), BATCH_SIZE):
-        batch = all_chunks[i : i + BATCH_SIZE]
-        ids = [c[0] for c in batch]
-        docs = [c[1] for c in batch]
-        metadatas = [c[2] for c in batch]
-
-        try:
-            embeddings = ollama.embed(model=EMBED_MODEL, input=docs)["embeddings"]
-        except Exception as e:
-            # Retry after a pause — 400s observed under server load (contention
-            # with concurrent MCP calls), not genuine content-length overflows.
-            log.warning(f"batch {i//BATCH_SIZE} failed ({e}), retrying in 10s")
-            time.sleep(10)
-            try:
-                embeddings = ollama.embed(model=EMBED_MODEL, input=docs)["embeddings"]
-            except Exception as e2:
-                # Fall back to one doc at a time, each with its own retry.
-                log.warning(f"batch {i//BATCH_SIZE} still failing ({e2}), falling back to one-at-a-time")
-                keep = []  # (id, embedding, doc, metadata) for successful items
-                for chunk_id, d, meta in zip(ids, docs, metadatas):
-                    for attempt in range(3):
-                        try:
-                            emb = ollama.embed(model=EMBED_MODEL, input=[d])["embeddings"][0]
-                            keep.append((chunk_id, emb, d, meta))
-                            break
-                        except Exception as e3:
-                            if "context length" in str(e3):
-                                mid = len(d) // 2
-                                log.warning(f"splitting chunk {chunk_id} ({len(d)} chars) in two")
-                                for suffix, half in (("_a", d[:mid]), ("_b", d[mid:])):
-                                    try:
-                                        emb = ollama.embed(model=EMBED_MODEL, input=[half])["embeddings"][0]
-                                        keep.append((chunk_id + suffix, emb, half, meta))
-                                    except Exception:
-                                        log.warning(f"skipping {chunk_id}{suffix} after split")
-                                break
-                            if attempt == 2:
-                                raise
-                            log.warning(f"fallback retry {attempt+1} failed ({e3}), waiting 10s")
-                            time.sleep(10)
-                ids, embeddings, docs, metadatas = zip(*keep) if keep else ([], [], [], [])
-                ids, embeddings, docs, metadatas = list(ids), list(embeddings), list(docs), list(metadatas)
-
-        if ids:
-            collection.upsert(
-                ids=ids,
-                embeddings=embeddings,
-                documents=docs,
-                metadatas=metadatas,
-            )
-
-        total += len(batch)
-        if total % 100 == 0 or total == len(all_chunks):
-            log.info(f"  Embedded {total}/{len(all_chunks)}")
+    embed_and_upsert(collection, all_chunks, journal=journal_path(chroma_path, collection.name))
+    pooled = sync_pooled(collection, get_pooled_collection(chroma_path), ("name", "file", "package"))
+    log.info(f"Pooled the chunk vectors of {pooled} subroutine(s)")
 
+    log_chunk_cache_stats(log)
     log.info(f"Done. {collection.count()} chunks ({len(rows)} subroutines).")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--start-chunk", type=int, default=0, help="Skip to this chunk index")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Embed only subroutines whose source changed since the last run")
     args = parser.parse_args()
-    run(start_chunk=args.start_chunk)
+    run(incremental=args.incremental)
@@ -1,30 +1,46 @@
 """ChromaDB client setup and collection access."""
 
-import chromadb
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ... import chroma_pool
+
+if TYPE_CHECKING:
+    import chromadb
 
 CHROMA_PATH = Path("data/mitgcm/chroma")
 COLLECTION_NAME = "subroutines"
+# One mean vector per subroutine (src/pooled_vectors.py)
+POOLED_COLLECTION_NAME = "subroutines_pooled"
 DOCS_COLLECTION_NAME = "mitgcm_docs"
 VERIFICATION_COLLECTION_NAME = "mitgcm_verification"
 
 
-def get_collection(name: str, path: Path = CHROMA_PATH) -> chromadb.Collection:
-    """Return (or create) a named ChromaDB collection at the given path."""
-    client = chromadb.PersistentClient(path=str(path))
-    return client.get_or_create_collection(
-        name=name,
-        metadata={"hnsw:space": "cosine"},
-    )
+def get_collection(name: str, path: Path = CHROMA_PATH) -> "chromadb.Collection | None":
+    """Return a named ChromaDB collection at the given path, or None if no pipeline has built it.
+
+    Read-only, for the tools.  The handle is opened once per process and
+    shared (src/chroma_pool.py).
+    """
+    return chroma_pool.get_collection(path, name)
+
+
+def create_collection(name: str, path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    """Return a named ChromaDB collection at the given path, creating it if absent (pipelines only)."""
+    return chroma_pool.create_collection(path, name)
+
+
+def get_subroutine_collection(path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    return create_collection(COLLECTION_NAME, path)
 
 
-def get_subroutine_collection(path: Path = CHROMA_PATH) -> chromadb.Collection:
-    return get_collection(COLLECTION_NAME, path)
+def get_pooled_collection(path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    return create_collection(POOLED_COLLECTION_NAME, path)
 
 
-def get_docs_collection(path: Path = CHROMA_PATH) -> chromadb.Collection:
-    return get_collection(DOCS_COLLECTION_NAME, path)
+def get_docs_collection(path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    return create_collection(DOCS_COLLECTION_NAME, path)
 
 
-def get_verification_collection(path: Path = CHROMA_PATH) -> chromadb.Collection:
-    return get_collection(VERIFICATION_COLLECTION_NAME, path)
+def get_verification_collection(path: Path = CHROMA_PATH) -> "chromadb.Collection":
+    return create_collection(VERIFICATION_COLLECTION_NAME, path)
@@ -20,9 +20,14 @@ class SubroutineRecord:
     line_end: int
     source_text: str
     calls: list[str] = field(default_factory=list)
+    # callee -> 1-indexed file line of its first CALL in the subroutine
+    call_lines: dict[str, int] = field(default_factory=dict)
     namelist_params: list[tuple[str, str]] = field(default_factory=list)
     diag_fills: list[tuple[str, str]] = field(default_factory=list)
     cpp_guards: list[str] = field(default_factory=list)
+    # (flag, line_from, line_to, negated): 1-indexed body lines of each
+    # #ifdef/#ifndef/#else branch, clipped to the subroutine
+    cpp_spans: list[tuple[str, int, int, bool]] = field(default_factory=list)
 
 
 # ---------------------------------------------------------------------------
@@ -53,6 +58,9 @@ RE_DIAG_FILL = re.compile(
 RE_IFDEF  = re.compile(r'^#ifdef\s+(\w+)',  re.IGNORECASE)
 RE_IFNDEF = re.compile(r'^#ifndef\s+(\w+)', re.IGNORECASE)
 RE_ENDIF  = re.compile(r'^#endif\b',        re.IGNORECASE)
+RE_IF     = re.compile(r'^#if\b',           re.IGNORECASE)
+RE_ELSE   = re.compile(r'^#else\b',         re.IGNORECASE)
+RE_ELIF   = re.compile(r'^#elif\b',         re.IGNORECASE)
 
 # Fixed-form: comment if C/*/! in column 1
 RE_COMMENT_FIXED = re.compile(r'^[Cc*!]')
@@ -169,6 +177,50 @@ def extract_package_options(path: Path) -> list[tuple[str, str, str]]:
     return results
 
 
+def _guard_spans(lines: list[str]) -> list[tuple[str, int, int, bool]]:
+    """Return (flag, start, end, negated) for every #ifdef/#ifndef branch.
+
+    start and end are 0-based indices of the first and last line between the
+    directive and the matching #else/#endif (the directives themselves are
+    not included; empty branches are dropped).  An #else branch yields a span
+    of the same flag with negated flipped.  #if/#elif conditions are not
+    evaluated, but are tracked so their #endif closes the right block.
+    Sorted by start.
+    """
+    spans: list[tuple[str, int, int, bool]] = []
+    stack: list[tuple[str, bool, int] | None] = []  # None = untracked #if
+
+    def close(i: int) -> None:
+        top = stack[-1]
+        if top is not None and top[2] <= i - 1:
+            spans.append((top[0], top[2], i - 1, top[1]))
+
+    for i, line in enumerate(lines):
+        if m := RE_IFDEF.match(line):
+            stack.append((m.group(1), False, i + 1))
+        elif m := RE_IFNDEF.match(line):
+            stack.append((m.group(1), True, i + 1))
+        elif RE_IF.match(line):
+            stack.append(None)
+        elif not stack:
+            continue
+        elif RE_ELSE.match(line):
+            close(i)
+            if (top := stack[-1]) is not None:
+                stack[-1] = (top[0], not top[1], i + 1)
+        elif RE_ELIF.match(line):
+            close(i)
+            stack[-1] = None
+        elif RE_ENDIF.match(line):
+            close(i)
+            stack.pop()
+    while stack:  # unterminated blocks run to end of file
+        close(len(lines))
+        stack.pop()
+    spans.sort(key=lambda s: s[1])
+    return spans
+
+
 def extract_file(path: Path) -> list[SubroutineRecord]:
     """Extract all subroutine records from a Fortran source file."""
     fixed_form = path.suffix == '.F'
@@ -182,19 +234,8 @@ def extract_file(path: Path) -> list[SubroutineRecord]:
 
     lines = text.splitlines(keepends=True)
 
-    # --- Pass 1: collect #ifdef guard context per line ---
-    # guard_stack[i] = set of active CPP flags at line i
-    active_guards: list[str] = []       # stack of currently open flags
-    line_guards: list[frozenset] = []   # active guard set at each line
-    for line in lines:
-        if m := RE_IFDEF.match(line):
-            active_guards.append(m.group(1))
-        elif m := RE_IFNDEF.match(line):
-            active_guards.append('!' + m.group(1))  # '!' prefix = ifndef
-        elif RE_ENDIF.match(line):
-            if active_guards:
-                active_guards.pop()
-        line_guards.append(frozenset(active_guards))
+    # --- Pass 1: collect #ifdef guard spans ---
+    spans = _guard_spans(lines)
 
     # --- Pass 2: find subroutine boundaries and extract contents ---
     records: list[SubroutineRecord] = []
@@ -214,7 +255,6 @@ def extract_file(path: Path) -> list[SubroutineRecord]:
 
         sub_name = m.group(1)
         sub_start = i
-        sub_guards = set(line_guards[i])
 
         # Find the matching END
         depth = 0
@@ -238,13 +278,15 @@ def extract_file(path: Path) -> list[SubroutineRecord]:
         source_lines = lines[sub_start:sub_end + 1]
         source_text = ''.join(source_lines)
 
-        # Collect CPP guards active anywhere in this subroutine's range
-        all_guards: set[str] = set()
-        for gi in range(sub_start, min(sub_end + 1, len(line_guards))):
-            all_guards.update(line_guards[gi])
+        # CPP guard spans overlapping this subroutine, clipped to its range
+        sub_spans = [
+            (flag, max(start, sub_start) + 1, min(end, sub_end) + 1, negated)
+            for flag, start, end, negated in spans
+            if start <= sub_end and end >= sub_start
+        ]
 
         # Extract calls, namelist refs, diagnostics_fills from subroutine body
-        calls: list[str] = []
+        calls: dict[str, int] = {}  # callee -> first call line, in call order
         namelist_params: list[tuple[str, str]] = []
         diag_fills: list[tuple[str, str]] = []
 
@@ -261,13 +303,13 @@ def extract_file(path: Path) -> list[SubroutineRecord]:
             if cm := RE_CALL.match(l):
                 callee = cm.group(1).upper()
                 if callee != sub_name.upper():  # skip self-calls from misparse
-                    calls.append(callee)
+                    calls.setdefault(callee, k + 1)
             else:
                 # B2 fix: catch inline "IF (cond) CALL FOO(...)" patterns
                 for cm in RE_CALL_INLINE.finditer(l):
                     callee = cm.group(1).upper()
                     if callee != sub_name.upper():
-                        calls.append(callee)
+                        calls.setdefault(callee, k + 1)
 
             # NAMELIST declarations
             if RE_NAMELIST_START.search(l):
@@ -316,10 +358,12 @@ def extract_file(path: Path) -> list[SubroutineRecord]:
             line_start=sub_start + 1,  # 1-indexed
             line_end=sub_end + 1,
             source_text=source_text,
-            calls=list(dict.fromkeys(calls)),  # deduplicate, preserve order
+            calls=list(calls),
+            call_lines=calls,
             namelist_params=namelist_params,
             diag_fills=diag_fills,
-            cpp_guards=[g for g in all_guards if not g.startswith('!')],
+            cpp_guards=list(dict.fromkeys(f for f, _, _, neg in sub_spans if not neg)),
+            cpp_spans=sub_spans,
         ))
 
         i = sub_end + 1
@@ -1,11 +1,21 @@
 """Indexing pipeline: walk MITgcm source, extract, write to DuckDB."""
 
+import argparse
+import os
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterator
 
-from .extract import extract_file, extract_package_options
-from .schema import connect
+from ... import file_hashes
+from ...code_search import write_postings
+from ...duckdb_bulk import insert_rows
+from ...full_text import build_index
+from ...name_keys import refresh_keys
+from ...source_lines import sync_source_lines
+from .extract import SubroutineRecord, extract_file, extract_package_options
+from .schema import KEYS, connect
 
 MITGCM_ROOT = Path("MITgcm")
 SOURCE_DIRS = [
@@ -35,7 +45,78 @@ def options_files() -> list[Path]:
     return sorted(MITGCM_ROOT.rglob("pkg/*/*_OPTIONS.h"))
 
 
-def run(db_path: Path | None = None) -> None:
+def extract_all(files: list[Path], workers: int = 1) -> Iterator[list[SubroutineRecord]]:
+    """Yield extract_file(path) for each path, in input order.
+
+    With workers > 1 the files are parsed in a process pool; results still
+    come back in input order, so subroutine IDs match a serial run.
+    """
+    if workers <= 1:
+        yield from map(extract_file, files)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(extract_file, files, chunksize=16)
+
+
+# Tables holding rows derived from source files, keyed by subroutine id.
+_SUBROUTINE_TABLES = {
+    "calls": "caller_id",
+    "namelist_refs": "subroutine_id",
+    "diagnostics_fills": "subroutine_id",
+    "cpp_guards": "subroutine_id",
+    "cpp_guard_spans": "subroutine_id",
+}
+
+
+def _delete_files(con, paths: list[str]) -> None:
+    """Remove every row extracted from the given source files."""
+    ids = "SELECT id FROM subroutines WHERE file IN (SELECT unnest(?))"
+    for table, key in _SUBROUTINE_TABLES.items():
+        con.execute(f"DELETE FROM {table} WHERE {key} IN ({ids})", [paths])
+    con.execute("DELETE FROM subroutines WHERE file IN (SELECT unnest(?))", [paths])
+
+
+def resolve_calls(con) -> tuple[int, int]:
+    """Point every call at the subroutine it reaches; return (resolved, ambiguous) counts.
+
+    A callee name matching one subroutine resolves to it.  For a name shared
+    by several copies, the copies in the caller's package are preferred: one
+    such copy resolves the call, otherwise every remaining copy is recorded
+    in callee_candidates.
+    Runs over the whole table, so incremental runs re-resolve calls into
+    files that changed.
+    """
+    con.execute("UPDATE calls SET callee_id = NULL, callee_candidates = NULL")
+    con.execute(
+        """
+        UPDATE calls SET callee_id = CASE WHEN len(r.scope) = 1 THEN r.scope[1] END,
+                         callee_candidates = CASE WHEN len(r.scope) > 1 THEN r.scope END
+        FROM (
+            SELECT c.rowid AS rid,
+                   coalesce(list(t.id ORDER BY t.id) FILTER (WHERE t.package_key = s.package_key),
+                            list(t.id ORDER BY t.id)) AS scope
+            FROM calls c
+            JOIN subroutines s ON s.id = c.caller_id
+            JOIN subroutines t ON t.name_key = c.callee_key
+            GROUP BY c.rowid
+        ) r
+        WHERE calls.rowid = r.rid
+        """
+    )
+    return con.execute(
+        "SELECT count(callee_id), count(callee_candidates) FROM calls"
+    ).fetchone()
+
+
+def run(db_path: Path | None = None, workers: int | None = None, incremental: bool = False) -> None:
+    """Build the index.  workers defaults to the number of CPUs; 1 runs serially.
+
+    A full run clears every table first.  An incremental run re-extracts only
+    files whose content hash differs from the ``files`` table, replaces their
+    rows, and drops rows of deleted files; subroutines of unchanged files keep
+    their IDs, and re-extracted ones get new IDs above the current maximum.
+    """
+    workers = workers or os.cpu_count() or 1
     con = connect(db_path) if db_path else connect()
 
     # Record MITgcm version
@@ -45,43 +126,81 @@ def run(db_path: Path | None = None) -> None:
     print(f"Indexing MITgcm @ {sha[:12]}")
 
     files = source_files()
-    print(f"Found {len(files)} source files")
-
-    sub_id = 1
-    for path in files:
-        records = extract_file(path)
+    current = file_hashes.scan(files)
+    if incremental:
+        changed, removed = file_hashes.diff(con, current)
+        print(f"Found {len(files)} source files: {len(changed)} new or changed, "
+              f"{len(removed)} removed ({workers} worker(s))")
+    else:
+        changed, removed = list(current), []
+        print(f"Found {len(files)} source files ({workers} worker(s))")
+    changed_set = set(changed)
+    to_extract = [p for p in files if str(p) in changed_set]
+
+    con.begin()
+    if incremental:
+        _delete_files(con, changed + removed)
+    else:
+        for table in ["subroutines", "files", *_SUBROUTINE_TABLES]:
+            con.execute(f"DELETE FROM {table}")
+    con.execute("DELETE FROM package_options")
+
+    subroutines, calls, namelist_refs, diag_fills, cpp_guards, cpp_spans = [], [], [], [], [], []
+    sub_id = con.execute("SELECT coalesce(max(id), 0) + 1 FROM subroutines").fetchone()[0]
+    first_id = sub_id
+    for path, records in zip(to_extract, extract_all(to_extract, workers)):
         for rec in records:
-            con.execute(
-                "INSERT INTO subroutines VALUES (?, ?, ?, ?, ?, ?, ?)",
-                [sub_id, rec.name, rec.file, rec.package,
-                 rec.line_start, rec.line_end, rec.source_text],
-            )
-            for callee in rec.calls:
-                con.execute("INSERT INTO calls VALUES (?, ?)", [sub_id, callee])
-            for param, group in rec.namelist_params:
-                con.execute("INSERT INTO namelist_refs VALUES (?, ?, ?)", [param, sub_id, group])
-            for field_name, array_name in rec.diag_fills:
-                con.execute("INSERT INTO diagnostics_fills VALUES (?, ?, ?)", [field_name, sub_id, array_name])
-            for flag in rec.cpp_guards:
-                con.execute("INSERT INTO cpp_guards VALUES (?, ?)", [sub_id, flag])
+            subroutines.append((sub_id, rec.name, rec.file, rec.package,
+                                rec.line_start, rec.line_end, rec.source_text))
+            calls.extend((sub_id, callee, line) for callee, line in rec.call_lines.items())
+            namelist_refs.extend((param, sub_id, group) for param, group in rec.namelist_params)
+            diag_fills.extend((field_name, sub_id, array_name) for field_name, array_name in rec.diag_fills)
+            cpp_guards.extend((sub_id, flag) for flag in rec.cpp_guards)
+            cpp_spans.extend((sub_id, *span) for span in rec.cpp_spans)
             sub_id += 1
 
         if records:
             print(f"  {path.relative_to(MITGCM_ROOT)}: {len(records)} subroutine(s)")
 
     opts = options_files()
-    n_flags = 0
-    for path in opts:
-        for pkg, flag, desc in extract_package_options(path):
-            con.execute(
-                "INSERT INTO package_options VALUES (?, ?, ?)", [pkg, flag, desc]
-            )
-            n_flags += 1
-    print(f"Indexed {n_flags} package option flags from {len(opts)} OPTIONS.h files")
-
+    package_options = [opt for path in opts for opt in extract_package_options(path)]
+
+    insert_rows(con, "subroutines",
+                ["id", "name", "file", "package", "line_start", "line_end", "source_text"],
+                subroutines, KEYS["subroutines"])
+    insert_rows(con, "calls", ["caller_id", "callee_name", "line"], calls, KEYS["calls"])
+    insert_rows(con, "namelist_refs", ["param_name", "subroutine_id", "namelist_group"],
+                namelist_refs, KEYS["namelist_refs"])
+    insert_rows(con, "diagnostics_fills", ["field_name", "subroutine_id", "array_name"],
+                diag_fills, KEYS["diagnostics_fills"])
+    insert_rows(con, "cpp_guards", ["subroutine_id", "cpp_flag"], cpp_guards)
+    insert_rows(con, "cpp_guard_spans",
+                ["subroutine_id", "cpp_flag", "line_from", "line_to", "negated"],
+                cpp_spans, KEYS["cpp_guard_spans"])
+    insert_rows(con, "package_options", ["package_name", "cpp_flag", "description"],
+                package_options, KEYS["package_options"])
+    refresh_keys(con, KEYS)  # rows kept from an index built before the key columns
+    sync_source_lines(con)  # lines of new rows and of rows kept from older indexes
+    resolved, ambiguous = resolve_calls(con)
+    trigrams = write_postings(con, "subroutines", con.execute("SELECT id, source_text FROM subroutines").fetchall())
+    file_hashes.record(con, current, changed, removed, sha)
+    con.commit()
+    print(f"Indexed {len(package_options)} package option flags from {len(opts)} OPTIONS.h files")
+    print(f"Resolved {resolved} calls to one subroutine, {ambiguous} to several candidates")
+    print(f"Rebuilt the trigram index over subroutine source ({trigrams} trigrams)")
+    if build_index(con, "subroutines", "id", ["name", "source_text"]):
+        print("Rebuilt the full-text index over subroutine source")
+
+    total = con.execute("SELECT count(*) FROM subroutines").fetchone()[0]
     con.close()
-    print(f"\nDone. Indexed {sub_id - 1} subroutines.")
+    print(f"\nDone. Indexed {sub_id - first_id} subroutines ({total} in index).")
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Parser processes (default: CPU count; 1 = serial)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-extract only files whose content hash changed")
+    args = parser.parse_args()
+    run(workers=args.workers, incremental=args.incremental)
@@ -3,6 +3,9 @@
 import duckdb
 from pathlib import Path
 
+from ...doc_sections import SECTION_KEY
+from ...name_keys import key_ddl
+
 DB_PATH = Path("data/mitgcm/index.duckdb")
 
 DDL = """
@@ -18,24 +21,49 @@ CREATE TABLE IF NOT EXISTS subroutines (
     package     TEXT,
     line_start  INTEGER,
     line_end    INTEGER,
-    source_text TEXT
+    source_text TEXT,
+    name_key    TEXT,
+    package_key TEXT,
+    n_lines     INTEGER  -- see src/source_lines.py
+);
+ALTER TABLE subroutines ADD COLUMN IF NOT EXISTS n_lines INTEGER;
+
+-- Subroutine source, one row per line (line_no from 0), for paginated reads
+-- (src/source_lines.py)
+CREATE TABLE IF NOT EXISTS source_lines (
+    subroutine_id INTEGER,
+    line_no       INTEGER,
+    line          TEXT
 );
 
+-- callee_id is filled by the pipeline's resolution pass when the callee
+-- name picks out one subroutine; otherwise callee_candidates lists every
+-- match (both NULL for callees outside the index).  line is the first
+-- CALL of callee_name in the caller's file.
 CREATE TABLE IF NOT EXISTS calls (
-    caller_id   INTEGER,
-    callee_name TEXT
+    caller_id         INTEGER,
+    callee_name       TEXT,
+    line              INTEGER,
+    callee_id         INTEGER,
+    callee_candidates INTEGER[],
+    callee_key        TEXT
 );
+ALTER TABLE calls ADD COLUMN IF NOT EXISTS line INTEGER;
+ALTER TABLE calls ADD COLUMN IF NOT EXISTS callee_id INTEGER;
+ALTER TABLE calls ADD COLUMN IF NOT EXISTS callee_candidates INTEGER[];
 
 CREATE TABLE IF NOT EXISTS namelist_refs (
     param_name      TEXT,
     subroutine_id   INTEGER,
-    namelist_group  TEXT
+    namelist_group  TEXT,
+    param_key       TEXT
 );
 
 CREATE TABLE IF NOT EXISTS diagnostics_fills (
     field_name      TEXT,
     subroutine_id   INTEGER,
-    array_name      TEXT
+    array_name      TEXT,
+    field_key       TEXT
 );
 
 CREATE TABLE IF NOT EXISTS cpp_guards (
@@ -43,15 +71,77 @@ CREATE TABLE IF NOT EXISTS cpp_guards (
     cpp_flag        TEXT
 );
 
+CREATE TABLE IF NOT EXISTS cpp_guard_spans (
+    subroutine_id   INTEGER,
+    cpp_flag        TEXT,
+    line_from       INTEGER,
+    line_to         INTEGER,
+    negated         BOOLEAN,
+    flag_key        TEXT
+);
+CREATE INDEX IF NOT EXISTS cpp_guard_spans_subroutine ON cpp_guard_spans (subroutine_id);
+
 CREATE TABLE IF NOT EXISTS package_options (
     package_name    TEXT,
     cpp_flag        TEXT,
-    description     TEXT
+    description     TEXT,
+    package_key     TEXT
+);
+
+-- Documentation sections as clean lines, written by the docs pipeline
+CREATE TABLE IF NOT EXISTS doc_sections (
+    id          INTEGER,  -- document id in the trigram index (src/code_search.py)
+    file        TEXT,
+    section     TEXT,
+    lines       TEXT[],
+    section_key TEXT
+);
+ALTER TABLE doc_sections ADD COLUMN IF NOT EXISTS id INTEGER;
+
+-- Trigram posting lists over subroutine source and headers, for grep_code
+-- (src/code_search.py)
+CREATE TABLE IF NOT EXISTS trigram_postings (
+    source  TEXT,
+    trigram INTEGER,
+    ids     BLOB
+);
+
+-- Verification experiment config files as raw lines, written by the
+-- verification pipeline
+CREATE TABLE IF NOT EXISTS verification_files (
+    file           TEXT,
+    experiment     TEXT,
+    filename       TEXT,
+    lines          TEXT[],  -- also what the full-text index covers
+    experiment_key TEXT,
+    file_key       TEXT
+);
+
+CREATE TABLE IF NOT EXISTS files (
+    path        TEXT PRIMARY KEY,
+    sha256      TEXT,
+    mtime       DOUBLE,
+    commit_sha  TEXT
 );
 """
 
 
+# Case-folded lookup keys (see src/name_keys.py); each gets an ART index.
+KEYS = {
+    "subroutines": {"name_key": "upper(name)", "package_key": "upper(package)"},
+    "calls": {"callee_key": "upper(callee_name)"},
+    "namelist_refs": {"param_key": "upper(param_name)"},
+    "diagnostics_fills": {"field_key": "upper(trim(field_name))"},
+    "cpp_guard_spans": {"flag_key": "upper(cpp_flag)"},
+    "package_options": {"package_key": "upper(package_name)"},
+    "doc_sections": {"section_key": SECTION_KEY},
+    # experiment first: rows are written in key order, grouping each experiment
+    "verification_files": {"experiment_key": "lower(experiment)", "file_key": "file"},
+}
+
+
 def connect(path: Path = DB_PATH) -> duckdb.DuckDBPyConnection:
     con = duckdb.connect(str(path))
     con.execute(DDL)
+    con.execute(key_ddl(KEYS))
     return con
@@ -2,23 +2,40 @@
 
 from mcp.server.fastmcp import FastMCP
 
+from src import duckdb_pool, warmup
+from src.mitgcm.embedder.store import CHROMA_PATH
+from src.mitgcm.indexer.schema import DB_PATH
 from src.mitgcm.tools import (
     diagnostics_fill_to_source,
     find_packages,
     find_subroutines,
+    get_active_cpp_flags,
+    find_call_path,
+    get_call_tree,
     get_callees,
+    get_caller_tree,
     get_callers,
     get_cpp_requirements,
+    get_dead_lines,
     get_doc_source,
+    get_experiment_files,
     get_package,
     get_package_flags,
+    get_source,
     get_subroutine,
     get_verification_source,
+    grep_code,
     list_verification_experiments,
+    load_call_graph,
+    load_symbols,
     namelist_to_code,
+    search_all,
     search_code,
+    search_code_batch,
     search_docs,
+    search_docs_batch,
     search_verification,
+    search_verification_batch,
 )
 from src.shared import translate_lab_params, check_scales
 from src.mitgcm.domain import (
@@ -29,16 +46,74 @@ from src.mitgcm.domain import (
 )
 
 mcp = FastMCP("mitgcm")
+_WARM_UP = warmup.WarmUp()
 
 
 @mcp.tool()
-def search_code_tool(query: str, top_k: int = 5) -> list[dict]:
-    """Semantic search over MITgcm subroutines.
+def search_code_tool(query: str, top_k: int = 5, mode: str = "hybrid") -> list[dict]:
+    """Search over MITgcm subroutines.
+
+    Returns up to top_k subroutines whose source best matches the query.
+    mode: "hybrid" (default) fuses semantic and keyword (BM25) ranking, so
+    both natural-language queries and exact identifiers (e.g.
+    'cg3dMaxIters') work; "vector" is semantic only and "lexical" is keyword
+    only (no Ollama needed). Semantic ranking requires Ollama and a
+    populated ChromaDB index.
+
+    A query that is exactly one subroutine name, namelist parameter or CPP
+    flag (e.g. 'GAD_CALC_RHS', 'useKPP', 'ALLOW_KPP') is answered directly
+    from the index: the subroutine, the subroutines that declare the
+    parameter, or those guarded by the flag. mode="vector" skips this.
+    Each result's "match" says how it was found: "subroutine",
+    "namelist_param", "cpp_flag", or the search mode.
+    """
+    return search_code(query, top_k=top_k, mode=mode)
+
+
+@mcp.tool()
+def search_all_tool(query: str, top_k: int = 10) -> list[dict]:
+    """Search subroutines, documentation and verification experiments in one call.
+
+    Use this for a first look at a question when it is not yet clear where
+    the answer lives. The query is embedded once and every collection is
+    searched concurrently; results are ranked together on a score
+    calibrated per collection. Each result has "source" ("code", "doc" or
+    "verification"), "score", and that source's usual fields (as returned
+    by search_code_tool, search_docs_tool or search_verification_tool).
+    Semantic only: for exact identifiers use search_code_tool or
+    grep_code_tool.
+    """
+    return search_all(query, top_k=top_k)
+
+
+@mcp.tool()
+def search_code_batch_tool(queries: list[str], top_k: int = 5, mode: str = "hybrid") -> list[list[dict]]:
+    """Run search_code_tool for several queries at once; one result list per query, in order.
 
-    Returns up to top_k subroutines whose source most closely matches the
-    natural-language query. Requires Ollama and a populated ChromaDB index.
+    Use this instead of back-to-back search_code_tool calls when trying a
+    few phrasings of one question: the queries share a single embedding
+    request and a single ChromaDB query. top_k and mode apply to every
+    query; results are exactly those of search_code_tool.
     """
-    return search_code(query, top_k=top_k)
+    return search_code_batch(queries, top_k=top_k, mode=mode)
+
+
+@mcp.tool()
+def grep_code_tool(
+    pattern: str, ignore_case: bool = False, package: str | None = None, max_results: int = 100
+) -> list[dict]:
+    """Find lines of MITgcm source matching a regular expression (Python syntax).
+
+    Searches every indexed subroutine and the .h headers (model/inc,
+    eesupp/inc, pkg/*, verification/*/code), like grep over the tree but
+    answered from a trigram index in milliseconds. Each hit has file, line
+    (1-based line number in that file), text, subroutine (None in headers)
+    and package. Use it for exact code patterns, e.g. 'CALL EXCH_\\w+_RL',
+    '#ifdef ALLOW_KPP' or 'cg3dMaxIters *='; use search_code_tool for
+    questions in natural language. package restricts hits to one package;
+    returns at most max_results lines, ordered by file.
+    """
+    return grep_code(pattern, ignore_case=ignore_case, package=package, max_results=max_results)
 
 
 @mcp.tool()
@@ -65,11 +140,7 @@ def get_subroutine_tool(name: str, package: str | None = None) -> dict | None:
     package= to disambiguate; without it a ValueError is raised. Use
     find_subroutines_tool to discover which packages contain the name.
     """
-    result = get_subroutine(name, package=package)
-    if result is None:
-        return None
-    result.pop("source_text", None)
-    return result
+    return get_subroutine(name, package=package, include_source=False)
 
 
 @mcp.tool()
@@ -85,13 +156,7 @@ def get_source_tool(name: str, package: str | None = None, offset: int = 0, limi
     Pass package= when multiple subroutines share the same name to select the
     correct copy; without it a ValueError is raised if the name is ambiguous.
     """
-    result = get_subroutine(name, package=package)
-    if result is None:
-        return None
-    all_lines = result["source_text"].splitlines()
-    total = len(all_lines)
-    page = all_lines[offset : offset + limit]
-    return {"name": result["name"], "total_lines": total, "offset": offset, "lines": page}
+    return get_source(name, package=package, offset=offset, limit=limit)
 
 
 @mcp.tool()
@@ -100,6 +165,9 @@ def get_callers_tool(name: str, package: str | None = None) -> list[dict]:
 
     Name lookup is case-insensitive. Returns an empty list if none found.
     Pass package= to restrict the result to callers within a specific package.
+    Each result includes line, the file line of the CALL in the caller, and
+    callee_id, the copy of the subroutine the call reaches (None when the
+    name is shared and the call could reach several copies).
     """
     return get_callers(name, package=package)
 
@@ -110,12 +178,61 @@ def get_callees_tool(name: str, package: str | None = None) -> list[dict]:
 
     Name lookup is case-insensitive. Returns an empty list if none found.
     Callees not present in the subroutines table are still returned by name.
+    Each result has callee_name, line (first CALL in the caller's file), and
+    callee_id and package of the copy the call reaches; when several copies
+    could be meant, callee_id is None and candidates lists their ids.
     Pass package= to scope the lookup to a specific package copy of the
     subroutine when the name is shared across packages.
     """
     return get_callees(name, package=package)
 
 
+@mcp.tool()
+def get_call_tree_tool(name: str, depth: int = 3, package: str | None = None) -> dict | None:
+    """Return everything a subroutine calls, transitively, as a nested tree.
+
+    Each node has id, name, package and children; depth (max 10) bounds the
+    levels expanded, and at most 500 nodes are returned. A node already
+    expanded elsewhere in the tree is marked seen (this also stops
+    recursion); one whose callees were cut off is marked truncated.
+    External callees (MPI, NetCDF, ...) have id and package None. Returns
+    None if the subroutine is not found. Pass package= when the name is
+    shared across packages. One call replaces repeated get_callees_tool calls.
+    """
+    return get_call_tree(name, depth=depth, package=package)
+
+
+@mcp.tool()
+def get_caller_tree_tool(name: str, depth: int = 3, package: str | None = None) -> dict | None:
+    """Return everything that calls a subroutine, transitively, as a nested tree.
+
+    Same layout as get_call_tree_tool, with children being callers. Use it to
+    see every route from the main loop down to a routine.
+    """
+    return get_caller_tree(name, depth=depth, package=package)
+
+
+@mcp.tool()
+def find_call_path_tool(
+    source: str,
+    target: str,
+    source_package: str | None = None,
+    target_package: str | None = None,
+    max_depth: int | None = None,
+) -> list[dict]:
+    """Return the shortest call chain from source down to target.
+
+    The result lists id, name and package for each subroutine on the path,
+    starting with source and ending with target; an empty list means target
+    is not reachable from source (within max_depth calls, if given). Names
+    are case-insensitive; shared names match every copy unless the
+    corresponding package= is given.
+    """
+    return find_call_path(
+        source, target, source_package=source_package, target_package=target_package, max_depth=max_depth
+    )
+
+
 @mcp.tool()
 def namelist_to_code_tool(param: str) -> list[dict]:
     """Return subroutines that reference a namelist parameter.
@@ -170,6 +287,37 @@ def get_cpp_requirements_tool(subroutine_name: str) -> list[str]:
     return get_cpp_requirements(subroutine_name)
 
 
+@mcp.tool()
+def get_active_cpp_flags_tool(subroutine_name: str, line: int, package: str | None = None) -> list[dict]:
+    """Return the CPP guards (#ifdef/#ifndef/#else) enclosing one line of a subroutine.
+
+    line is the line number in the source file, between the subroutine's
+    line_start and line_end (see get_subroutine_tool). Each result has
+    cpp_flag, negated, line_from, line_to, outermost first; negated=True
+    means the line is compiled only when the flag is NOT defined (#ifndef,
+    or the #else branch of an #ifdef). #if/#elif expressions are not
+    evaluated. Name lookup is case-insensitive; returns an empty list if
+    the subroutine is not found. Pass package= when the name is ambiguous.
+    """
+    return get_active_cpp_flags(subroutine_name, line, package=package)
+
+
+@mcp.tool()
+def get_dead_lines_tool(
+    cpp_flag: str, subroutine_name: str | None = None, package: str | None = None
+) -> list[dict]:
+    """Return source line ranges compiled out when a CPP flag is undefined.
+
+    These are the bodies of ``#ifdef cpp_flag`` blocks and the ``#else``
+    branches of ``#ifndef cpp_flag`` blocks. Each result has id, name, file,
+    package, line_from, line_to (file line numbers, overlapping ranges
+    merged). Restrict to one subroutine with subroutine_name (and package=
+    when the name is ambiguous); otherwise all subroutines are searched.
+    Flag lookup is case-insensitive.
+    """
+    return get_dead_lines(cpp_flag, subroutine_name=subroutine_name, package=package)
+
+
 @mcp.tool()
 def get_package_flags_tool(package_name: str) -> list[dict]:
     """Return CPP flags defined by a MITgcm package.
@@ -466,11 +614,12 @@ def list_verification_experiments_tool() -> list[dict]:
 
 
 @mcp.tool()
-def search_verification_tool(query: str, top_k: int = 5) -> list[dict]:
-    """Semantic search over MITgcm verification experiment configuration files.
+def search_verification_tool(query: str, top_k: int = 5, mode: str = "hybrid") -> list[dict]:
+    """Search over MITgcm verification experiment configuration files.
 
     Searches input/data*, eedata, code/*.h, and packages.conf from all
-    verification experiments.  Returns up to top_k results.
+    verification experiments.  Returns up to top_k results.  mode is
+    "hybrid" (default), "vector" or "lexical", as for search_code_tool.
 
     Each result has: experiment, file, filename, snippet (first 400 chars).
     Use get_verification_source_tool with the returned file path to read the
@@ -478,7 +627,16 @@ def search_verification_tool(query: str, top_k: int = 5) -> list[dict]:
 
     Requires Ollama and pixi run embed-verification to have been run.
     """
-    return search_verification(query, top_k=top_k)
+    return search_verification(query, top_k=top_k, mode=mode)
+
+
+@mcp.tool()
+def search_verification_batch_tool(queries: list[str], top_k: int = 5, mode: str = "hybrid") -> list[list[dict]]:
+    """Run search_verification_tool for several queries at once; one result list per query, in order.
+
+    The queries share a single embedding request and a single ChromaDB query.
+    """
+    return search_verification_batch(queries, top_k=top_k, mode=mode)
 
 
 @mcp.tool()
@@ -502,6 +660,24 @@ def get_verification_source_tool(
     return get_verification_source(file, offset=offset, limit=limit)
 
 
+@mcp.tool()
+def get_experiment_files_tool(experiment: str, limit: int = 200) -> dict | None:
+    """Return all configuration files of a verification experiment in one call.
+
+    experiment : experiment directory name, as listed by
+                 list_verification_experiments_tool (e.g. "rotating_tank")
+    limit      : max lines returned per file; default 200
+
+    Returns {experiment, files} or null if the experiment is not indexed.
+    Each file has {file, filename, total_lines, lines}: input/data*, eedata,
+    code/*.h, packages.conf and any code/*.F overrides.  Where total_lines
+    exceeds limit, page through the rest with get_verification_source_tool.
+    Use this instead of one get_verification_source_tool call per file when
+    comparing experiments.
+    """
+    return get_experiment_files(experiment, limit=limit)
+
+
 @mcp.tool()
 def get_doc_source_tool(file: str, section: str, offset: int = 0, limit: int = 200) -> dict | None:
     """Return paginated text of a documentation section or header file.
@@ -520,20 +696,21 @@ def get_doc_source_tool(file: str, section: str, offset: int = 0, limit: int = 2
 
 
 @mcp.tool()
-def search_docs_tool(query: str, top_k: int = 5) -> list[dict]:
-    """Semantic search over MITgcm documentation sections.
+def search_docs_tool(query: str, top_k: int = 5, mode: str = "hybrid") -> list[dict]:
+    """Search over MITgcm documentation sections.
 
-    Returns up to top_k doc sections whose prose most closely matches the
-    natural-language query. Requires Ollama and a populated mitgcm_docs
-    ChromaDB collection.
+    Returns up to top_k doc sections whose prose best matches the query.
+    mode is "hybrid" (default), "vector" or "lexical", as for
+    search_code_tool. Semantic ranking requires Ollama and a populated
+    mitgcm_docs ChromaDB collection.
 
     Each result has: file (RST path relative to MITgcm/doc/), section
     (heading text), snippet (first 400 chars of cleaned section text).
 
     Use natural-language queries (e.g. 'surface wind forcing file',
     'open boundary conditions'). For a specific namelist parameter name
-    (e.g. 'zonalWindFile', 'tauRelaxT'), use namelist_to_code_tool instead
-    — semantic search on exact camelCase identifiers gives poor results.
+    (e.g. 'zonalWindFile', 'tauRelaxT'), use namelist_to_code_tool, or
+    mode="lexical" to find the sections that mention it verbatim.
 
     Results may include .h header files (e.g. model/inc/SIZE.h,
     eesupp/inc/EXCH.h, verification/*/code/SIZE.h). For these, the snippet
@@ -545,8 +722,48 @@ def search_docs_tool(query: str, top_k: int = 5) -> list[dict]:
     you need CD scheme documentation, search for 'cd_code' or use
     search_code_tool('CD_CODE_SCHEME') to read the source directly.
     """
-    return search_docs(query, top_k=top_k)
+    return search_docs(query, top_k=top_k, mode=mode)
+
+
+@mcp.tool()
+def search_docs_batch_tool(queries: list[str], top_k: int = 5, mode: str = "hybrid") -> list[list[dict]]:
+    """Run search_docs_tool for several queries at once; one result list per query, in order.
+
+    The queries share a single embedding request and a single ChromaDB query.
+    """
+    return search_docs_batch(queries, top_k=top_k, mode=mode)
+
+
+@mcp.tool()
+def server_status_tool() -> dict:
+    """Report whether the server has finished warming up, with per-step timings.
+
+    Once the client has completed the MCP handshake the server opens the
+    DuckDB index, builds the call graph and symbol table, loads every
+    ChromaDB collection and embeds a probe text so the embedding model is
+    loaded, all in the background.  "state" is
+    "warming", "ready", or "degraded" (a step failed; its "error" says why,
+    e.g. Ollama not running — lexical search still works). Searches made
+    while warming still work, they are just slower.
+    """
+    return _WARM_UP.status()
+
+
+def _warm_up_steps() -> dict:
+    """Startup loads, in order; each fills a cache the tools read."""
+    steps = {}
+    if DB_PATH.exists():
+        # The shared read-only DuckDB connection every tool borrows a cursor
+        # from, then the in-memory call graph and symbol table.
+        steps["duckdb"] = lambda: duckdb_pool.get_connection(DB_PATH)
+        steps["call_graph"] = lambda: load_call_graph(DB_PATH)
+        steps["symbols"] = lambda: load_symbols(DB_PATH)
+    steps["chroma"] = lambda: warmup.page_in(CHROMA_PATH)
+    steps["embed"] = warmup.embed_probe
+    return steps
 
 
 if __name__ == "__main__":
+    warmup.after_initialized(mcp, lambda: _WARM_UP.start(
+        _warm_up_steps(), lambda: warmup.embed_probe(timeout_s=0), warmup.keep_alive_interval()))
     mcp.run()
@@ -1,17 +1,24 @@
 """Plain Python callables over the DuckDB code graph and ChromaDB semantic index."""
 
 import re
-from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable
 
-from src.mitgcm.indexer.schema import DB_PATH, connect
+from src import (
+    call_graph, code_search, doc_sections, duckdb_pool, fan_out, full_text, pooled_vectors, source_lines, symbols,
+)
+from src.embed_backend import embed_texts
+from src.embed_cache import QueryEmbeddingCache, query_cache_path
+from src.mitgcm.indexer.schema import DB_PATH
 from src.mitgcm.embedder.store import (
     CHROMA_PATH,
     COLLECTION_NAME,
     DOCS_COLLECTION_NAME,
+    POOLED_COLLECTION_NAME,
     VERIFICATION_COLLECTION_NAME,
     get_collection,
 )
+from src.mitgcm.verification_indexer import files as verification_files
 
 
 _HARDWARE_PLATFORM_FLAGS = frozenset({
@@ -37,8 +44,13 @@ def _doc_snippet(doc: str) -> str:
         nl = doc.find("\n")
         if nl >= 0:
             doc = doc[nl + 1:]
+    return _text_snippet(doc)
+
+
+def _text_snippet(text: str) -> str:
+    """First 400 chars of text, from its first line that is not a Fortran C-comment."""
     # Skip leading Fortran C-comment lines (column-1 'C' or 'c')
-    lines = doc.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
     start = 0
     for i, line in enumerate(lines):
         stripped = line.lstrip()
@@ -66,63 +78,243 @@ def _normalize_query(query: str) -> str:
     return result
 
 
-@contextmanager
 def _db(db_path: Path):
-    """Context manager that opens a DuckDB connection and ensures it is closed."""
-    con = connect(db_path)
-    try:
-        yield con
-    finally:
-        con.close()
+    """Context manager yielding a cursor on the pooled read-only connection.
+
+    The connection for db_path is opened once per process (see
+    src/duckdb_pool.py); each call gets its own cursor so concurrent tool
+    calls do not serialise on a single connection.
+    """
+    return duckdb_pool.cursor(db_path)
+
+
+_QUERY_CACHE = QueryEmbeddingCache(query_cache_path("mitgcm"))
+
+
+def _embed_uncached(text: str) -> list[float]:
+    return embed_texts([text])[0]
 
 
 def _embed(query: str) -> list[float]:
-    """Embed a query string using the nomic-embed-text model via Ollama."""
-    import ollama
-    response = ollama.embed(model="nomic-embed-text", input=_normalize_query(query))
-    return response.embeddings[0]
+    """Embed a query string with nomic-embed-text via the configured backend.
 
+    Vectors are cached by normalised query text (see src/embed_cache.py), so
+    a repeated query skips the Ollama round-trip.
+    """
+    return _QUERY_CACHE.get_or_embed(_normalize_query(query), _embed_uncached)
 
-def search_code(query: str, top_k: int = 5, _db_path: Path = DB_PATH, _chroma_path: Path = CHROMA_PATH) -> list[dict]:
-    """Semantic search over subroutine embeddings; returns top_k subroutines with DuckDB metadata."""
-    collection = get_collection(COLLECTION_NAME, _chroma_path)
-    embedding = _embed(query)
 
+def _embed_many(queries: list[str]) -> list[list[float]]:
+    """Embed several queries as _embed does, sending every uncached one in a single backend call."""
+    return _QUERY_CACHE.get_or_embed_many([_normalize_query(q) for q in queries], embed_texts)
+
+
+def _query(name: str, chroma_path: Path, embeddings: list[list[float]], n_results: int, include: list[str]) -> dict:
+    """Query the named collection; no hits for any query when no pipeline has built it."""
+    collection = get_collection(name, chroma_path)
+    if collection is None:
+        return {field: [[] for _ in embeddings] for field in ["ids", *include]}
+    return collection.query(query_embeddings=embeddings, n_results=n_results, include=include)
+
+
+_SUBROUTINE_FIELDS = ("id", "name", "file", "package", "line_start", "line_end")
+
+# Kind -> (record fields, rows of key + fields), in priority order.
+_SYMBOL_SQL = {
+    "subroutine": (
+        _SUBROUTINE_FIELDS,
+        "SELECT name_key, id, name, file, package, line_start, line_end FROM subroutines ORDER BY id",
+    ),
+    "namelist_param": (
+        _SUBROUTINE_FIELDS + ("namelist_group",),
+        "SELECT DISTINCT nr.param_key, s.id, s.name, s.file, s.package, s.line_start, s.line_end, "
+        "nr.namelist_group FROM namelist_refs nr JOIN subroutines s ON s.id = nr.subroutine_id "
+        "ORDER BY s.name, s.id",
+    ),
+    "cpp_flag": (
+        _SUBROUTINE_FIELDS,
+        "SELECT DISTINCT g.flag_key, s.id, s.name, s.file, s.package, s.line_start, s.line_end "
+        "FROM cpp_guard_spans g JOIN subroutines s ON s.id = g.subroutine_id ORDER BY s.name, s.id",
+    ),
+}
+
+
+def _build_symbols(db_path: Path) -> symbols.SymbolTable:
+    with _db(db_path) as con:
+        return symbols.SymbolTable({
+            kind: symbols.group(con.execute(sql).fetchall(), fields) for kind, (fields, sql) in _SYMBOL_SQL.items()
+        })
+
+
+def load_symbols(_db_path: Path = DB_PATH) -> symbols.SymbolTable:
+    """Return the in-memory symbol table for the index, building it on first use."""
+    return symbols.get_table(_db_path, _build_symbols)
+
+
+def search_code(
+    query: str,
+    top_k: int = 5,
+    mode: str = "hybrid",
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
+) -> list[dict]:
+    """Search subroutines; returns top_k subroutines with DuckDB metadata.
+
+    A query that is exactly a subroutine name, namelist parameter or CPP
+    flag is answered from the index without embedding: the subroutine, the
+    subroutines that declare the parameter, or those guarded by the flag.
+    Otherwise mode "vector" ranks by embedding similarity (one pooled
+    vector per subroutine merged with the nearest chunks, see
+    src/pooled_vectors.py), "lexical" by BM25 over name and source text
+    (no embedding), and "hybrid" runs both concurrently and fuses the
+    rankings (see src/full_text.py); "vector" also skips the exact-symbol
+    lookup.
+
+    Each result's "match" records the route: "subroutine",
+    "namelist_param" or "cpp_flag" for exact hits, else the mode.
+    """
+    full_text.check_mode(mode)
+    if mode != "vector" and (exact := load_symbols(_db_path).lookup(query, top_k)):
+        return exact
+
+    def vector() -> dict[int, None]:
+        return dict.fromkeys(_code_by_vector([_embed(query)], top_k, _chroma_path)[0])
+
+    def lexical() -> dict[int, None]:
+        with _db(_db_path) as con:
+            return _code_by_bm25(con, query, top_k)
+
+    db_ids = list(full_text.ranked(mode, lexical, vector))[:top_k]
+    if not db_ids:
+        return []
+    with _db(_db_path) as con:
+        records = _subroutines_by_id(con, db_ids)
+    return [{**records[db_id], "match": mode} for db_id in db_ids if db_id in records]
+
+
+def search_code_batch(
+    queries: list[str],
+    top_k: int = 5,
+    mode: str = "hybrid",
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
+) -> list[list[dict]]:
+    """Run search_code for each query; returns one result list per query, in order.
+
+    Exact-symbol queries are answered as in search_code.  The rest are
+    embedded in one backend call, ranked with one multi-vector ChromaDB
+    query per collection, and their subroutines read from DuckDB in one
+    query, so a batch of related phrasings costs about one search.
+    """
+    full_text.check_mode(mode)
+    exact = [load_symbols(_db_path).lookup(q, top_k) if mode != "vector" else [] for q in queries]
+    rest = [q for q, hits in zip(queries, exact) if not hits]
+    if not rest:
+        return exact
+
+    def vector() -> list[dict[int, None]]:
+        return [dict.fromkeys(r) for r in _code_by_vector(_embed_many(rest), top_k, _chroma_path)]
+
+    def lexical() -> list[dict[int, None]]:
+        with _db(_db_path) as con:
+            return [_code_by_bm25(con, q, top_k) for q in rest]
+
+    rankings = iter([list(r)[:top_k] for r in full_text.ranked_many(mode, lexical, vector)])
+    ranked_ids = [[] if hits else next(rankings) for hits in exact]
+    with _db(_db_path) as con:
+        records = _subroutines_by_id(con, {db_id for ids in ranked_ids for db_id in ids})
+    return [
+        hits or [{**records[db_id], "match": mode} for db_id in ids if db_id in records]
+        for hits, ids in zip(exact, ranked_ids)
+    ]
+
+
+def _code_by_vector(embeddings: list[list[float]], top_k: int, chroma_path: Path) -> list[dict[int, float]]:
+    """Per query vector, up to top_k db_id -> cosine distance, closest first."""
+    collection = get_collection(COLLECTION_NAME, chroma_path)
+    if collection is None:
+        return [{} for _ in embeddings]
+    pooled = get_collection(POOLED_COLLECTION_NAME, chroma_path)
+    if pooled is not None:
+        found = pooled_vectors.search_many(pooled, collection, embeddings, top_k)
+        if any(found):
+            return found
+    # No pooled collection (an index embedded before it existed) or an empty
+    # one: over-fetch chunks and keep each subroutine's best
     results = collection.query(
-        query_embeddings=[embedding],
+        query_embeddings=embeddings,
         n_results=top_k * 10,
         include=["metadatas", "distances"],
     )
+    return [_best_chunks(m, d) for m, d in zip(results["metadatas"], results["distances"])]
+
 
-    # Deduplicate: keep best (lowest distance) chunk per db_id
-    best: dict[int, tuple[float, dict]] = {}
-    for meta, dist in zip(results["metadatas"][0], results["distances"][0]):
+def _best_chunks(metadatas: list[dict], distances: list[float]) -> dict[int, float]:
+    """db_id -> distance of its best (lowest distance) chunk among one query's hits, closest first."""
+    best: dict[int, float] = {}
+    for meta, dist in zip(metadatas, distances):
         db_id = int(meta["db_id"])
-        if db_id not in best or dist < best[db_id][0]:
-            best[db_id] = (dist, meta)
+        if db_id not in best or dist < best[db_id]:
+            best[db_id] = dist
+    return dict(sorted(best.items(), key=lambda item: item[1]))
 
-    # Sort by distance, take top_k
-    ranked = sorted(best.values(), key=lambda x: x[0])[:top_k]
-    db_ids = [int(m["db_id"]) for _, m in ranked]
 
-    if not db_ids:
-        return []
+def _code_by_bm25(con, query: str, top_k: int) -> dict[int, None]:
+    rows = full_text.search(con, "subroutines", "id", query, top_k * full_text.CANDIDATES)
+    return dict.fromkeys(r[0] for r in rows)
 
-    with _db(_db_path) as con:
-        placeholders = ", ".join("?" for _ in db_ids)
-        rows = con.execute(
-            f"SELECT id, name, file, package, line_start, line_end FROM subroutines WHERE id IN ({placeholders})",
-            db_ids,
-        ).fetchall()
 
-    id_to_row = {r[0]: r for r in rows}
+def _subroutines_by_id(con, db_ids) -> dict[int, dict]:
+    """Subroutine records (_SUBROUTINE_FIELDS) of db_ids, read in one query."""
+    if not db_ids:
+        return {}
+    db_ids = list(db_ids)
+    placeholders = ", ".join("?" for _ in db_ids)
+    rows = con.execute(
+        f"SELECT id, name, file, package, line_start, line_end FROM subroutines WHERE id IN ({placeholders})",
+        db_ids,
+    ).fetchall()
+    return {r[0]: dict(zip(_SUBROUTINE_FIELDS, r)) for r in rows}
+
+
+# Trigram-index source -> rows of (first line, text, file, subroutine, package), in result order.
+_GREP_SQL = {
+    "subroutines": (
+        "SELECT line_start, source_text, file, name, package FROM subroutines "
+        "WHERE {candidates} AND ($package IS NULL OR package_key = upper($package)) ORDER BY file, line_start"
+    ),
+    "headers": (
+        "SELECT 1, text, file, NULL, package FROM ("
+        f"  SELECT id, {doc_sections.TEXT} AS text, file, CASE WHEN file LIKE 'pkg/%' THEN split_part(file, '/', 2)"
+        "  WHEN file LIKE 'model/%' THEN 'model' WHEN file LIKE 'eesupp/%' THEN 'eesupp' END AS package"
+        "  FROM doc_sections WHERE file LIKE '%.h') "
+        "WHERE {candidates} AND ($package IS NULL OR upper(package) = upper($package)) ORDER BY file"
+    ),
+}
+
+
+def grep_code(
+    pattern: str,
+    ignore_case: bool = False,
+    package: str | None = None,
+    max_results: int = 100,
+    _db_path: Path = DB_PATH,
+) -> list[dict]:
+    """Return source lines matching the regular expression pattern, as file:line hits.
+
+    Searches subroutine source, then the headers stored by the docs
+    pipeline, filtering candidates through the trigram index (see
+    src/code_search.py) before running the regex.  Each hit has file, line
+    (1-based, in the file), text, subroutine (None in headers) and package.
+    Raises ValueError for an invalid pattern.
+    """
+    compiled = code_search.Pattern(pattern, ignore_case)
     out = []
-    for _, meta in ranked:
-        db_id = int(meta["db_id"])
-        if db_id not in id_to_row:
-            continue
-        r = id_to_row[db_id]
-        out.append({"id": r[0], "name": r[1], "file": r[2], "package": r[3], "line_start": r[4], "line_end": r[5]})
+    with _db(_db_path) as con:
+        for source, sql in _GREP_SQL.items():
+            rows = code_search.grep(con, compiled, source, sql, {"package": package}, max_results - len(out))
+            out.extend({"file": file, "line": line, "text": text, "subroutine": name, "package": pkg}
+                       for line, text, file, name, pkg in rows)
     return out
 
 
@@ -136,44 +328,82 @@ def find_subroutines(name: str, _db_path: Path = DB_PATH) -> list[dict]:
     """
     with _db(_db_path) as con:
         rows = con.execute(
-            "SELECT id, name, file, package, line_start, line_end FROM subroutines WHERE upper(name) = upper(?)",
+            "SELECT id, name, file, package, line_start, line_end FROM subroutines WHERE name_key = upper(?)",
             [name],
         ).fetchall()
 
     return [{"id": r[0], "name": r[1], "file": r[2], "package": r[3], "line_start": r[4], "line_end": r[5]} for r in rows]
 
 
-def get_subroutine(name: str, package: str | None = None, _db_path: Path = DB_PATH) -> dict | None:
+def get_subroutine(
+    name: str, package: str | None = None, include_source: bool = True, _db_path: Path = DB_PATH
+) -> dict | None:
     """Return subroutine metadata and source text, or None if not found.
 
     When package is provided, restricts the lookup to that package.  When
     package is None and exactly one subroutine matches, returns it.  When
     package is None and multiple subroutines share the same name, raises
     ValueError listing the packages; call find_subroutines() first to discover
-    which packages contain the name.
+    which packages contain the name.  With include_source=False the
+    source_text column is not read and the key is omitted.
     """
+    columns = "id, name, file, package, line_start, line_end" + (", source_text" if include_source else "")
     with _db(_db_path) as con:
         if package is not None:
             rows = con.execute(
-                "SELECT id, name, file, package, line_start, line_end, source_text FROM subroutines WHERE upper(name) = upper(?) AND upper(package) = upper(?)",
+                f"SELECT {columns} FROM subroutines WHERE name_key = upper(?) AND package_key = upper(?)",
                 [name, package],
             ).fetchall()
         else:
             rows = con.execute(
-                "SELECT id, name, file, package, line_start, line_end, source_text FROM subroutines WHERE upper(name) = upper(?)",
+                f"SELECT {columns} FROM subroutines WHERE name_key = upper(?)",
                 [name],
             ).fetchall()
 
     if not rows:
         return None
+    _check_unique("get_subroutine", name, rows)
+    row = rows[0]
+    result = {"id": row[0], "name": row[1], "file": row[2], "package": row[3], "line_start": row[4], "line_end": row[5]}
+    if include_source:
+        result["source_text"] = row[6]
+    return result
+
+
+def _check_unique(caller: str, name: str, rows: list[tuple]) -> None:
+    """Raise ValueError when rows (package in column 3) hold several subroutines."""
     if len(rows) > 1:
         packages = [r[3] for r in rows]
         raise ValueError(
-            f"get_subroutine: {len(rows)} subroutines named {name!r} found in packages {packages}; "
+            f"{caller}: {len(rows)} subroutines named {name!r} found in packages {packages}; "
             "pass package= to disambiguate, or use find_subroutines() to list all copies"
         )
-    row = rows[0]
-    return {"id": row[0], "name": row[1], "file": row[2], "package": row[3], "line_start": row[4], "line_end": row[5], "source_text": row[6]}
+
+
+def get_source(
+    name: str, package: str | None = None, offset: int = 0, limit: int = 100, _db_path: Path = DB_PATH
+) -> dict | None:
+    """Return lines [offset, offset + limit) of a subroutine's source, or None if not found.
+
+    Long routines read only the requested lines from the source_lines table;
+    short ones are split whole (see src/source_lines.py).  package and the ValueError on ambiguous names work
+    as in get_subroutine.
+    Returns {name, total_lines, offset, lines}.
+    """
+    sql = (f"SELECT id, name, file, package, n_lines, {source_lines.SOURCE_IF_SHORT} "
+           "FROM subroutines WHERE name_key = upper(?)")
+    params = [name]
+    if package is not None:
+        sql += " AND package_key = upper(?)"
+        params.append(package)
+    with _db(_db_path) as con:
+        rows = con.execute(sql, params).fetchall()
+        if not rows:
+            return None
+        _check_unique("get_source", name, rows)
+        row = rows[0]
+        total, lines = source_lines.page(con, row[0], row[4], row[5], offset, limit)
+    return {"name": row[1], "total_lines": total, "offset": offset, "lines": lines}
 
 
 def get_callers(name: str, package: str | None = None, _db_path: Path = DB_PATH) -> list[dict]:
@@ -181,64 +411,120 @@ def get_callers(name: str, package: str | None = None, _db_path: Path = DB_PATH)
 
     When package is provided, restricts the lookup to callers that belong to
     that package (i.e. subroutines within the package that call the named
-    subroutine).
+    subroutine).  Each result carries the call-site line in the caller's
+    file and the callee_id the call resolved to at index time (None when
+    the name is shared and the call could reach several copies).
+    """
+    sql = """
+        SELECT s.id, s.name, s.file, s.package, s.line_start, s.line_end, c.line, c.callee_id
+        FROM subroutines s
+        JOIN calls c ON c.caller_id = s.id
+        WHERE c.callee_key = upper(?)
     """
+    params = [name]
+    if package is not None:
+        sql += " AND s.package_key = upper(?)"
+        params.append(package)
     with _db(_db_path) as con:
-        if package is not None:
-            rows = con.execute(
-                """
-                SELECT s.id, s.name, s.file, s.package, s.line_start, s.line_end
-                FROM subroutines s
-                JOIN calls c ON c.caller_id = s.id
-                WHERE upper(c.callee_name) = upper(?)
-                  AND upper(s.package) = upper(?)
-                """,
-                [name, package],
-            ).fetchall()
-        else:
-            rows = con.execute(
-                """
-                SELECT s.id, s.name, s.file, s.package, s.line_start, s.line_end
-                FROM subroutines s
-                JOIN calls c ON c.caller_id = s.id
-                WHERE upper(c.callee_name) = upper(?)
-                """,
-                [name],
-            ).fetchall()
+        rows = con.execute(sql + " ORDER BY s.id, c.line", params).fetchall()
 
-    return [{"id": r[0], "name": r[1], "file": r[2], "package": r[3], "line_start": r[4], "line_end": r[5]} for r in rows]
+    return [{"id": r[0], "name": r[1], "file": r[2], "package": r[3], "line_start": r[4], "line_end": r[5],
+             "line": r[6], "callee_id": r[7]} for r in rows]
 
 
 def get_callees(name: str, package: str | None = None, _db_path: Path = DB_PATH) -> list[dict]:
     """Return subroutines called by the named subroutine.
 
     When package is provided, restricts the lookup to the copy of the
-    subroutine in that package, returning only its callees.
+    subroutine in that package, returning only its callees.  Each result has
+    the callee name, the first call-site line, and the callee_id and package
+    the call resolved to at index time; calls that could reach several
+    copies list their ids in candidates instead, and callees outside the
+    index have neither.
+    """
+    sql = """
+        SELECT c.callee_name, min(c.line), c.callee_id, t.package, c.callee_candidates
+        FROM calls c
+        JOIN subroutines s ON s.id = c.caller_id
+        LEFT JOIN subroutines t ON t.id = c.callee_id
+        WHERE s.name_key = upper(?)
     """
+    params = [name]
+    if package is not None:
+        sql += " AND s.package_key = upper(?)"
+        params.append(package)
+    sql += " GROUP BY c.callee_name, c.callee_id, t.package, c.callee_candidates ORDER BY min(c.line), c.callee_name"
     with _db(_db_path) as con:
-        if package is not None:
-            rows = con.execute(
-                """
-                SELECT DISTINCT c.callee_name
-                FROM calls c
-                JOIN subroutines s ON s.id = c.caller_id
-                WHERE upper(s.name) = upper(?)
-                  AND upper(s.package) = upper(?)
-                """,
-                [name, package],
-            ).fetchall()
-        else:
-            rows = con.execute(
-                """
-                SELECT DISTINCT c.callee_name
-                FROM calls c
-                JOIN subroutines s ON s.id = c.caller_id
-                WHERE upper(s.name) = upper(?)
-                """,
-                [name],
-            ).fetchall()
+        rows = con.execute(sql, params).fetchall()
+
+    return [{"callee_name": r[0], "line": r[1], "callee_id": r[2], "package": r[3], "candidates": r[4]}
+            for r in rows]
+
+
+def _build_call_graph(db_path: Path) -> call_graph.CallGraph:
+    with _db(db_path) as con:
+        subs = con.execute("SELECT id, name, package FROM subroutines ORDER BY id").fetchall()
+        calls = con.execute(
+            "SELECT caller_id, callee_name, "
+            "CASE WHEN callee_id IS NULL THEN callee_candidates ELSE [callee_id] END FROM calls"
+        ).fetchall()
+    node = {row[0]: i for i, row in enumerate(subs)}
+    return call_graph.CallGraph(
+        subs, [(node[c], callee, [node[t] for t in targets or []]) for c, callee, targets in calls if c in node],
+        "package",
+    )
+
+
+def load_call_graph(_db_path: Path = DB_PATH) -> call_graph.CallGraph:
+    """Return the in-memory call graph for the index, building it on first use."""
+    return call_graph.get_graph(_db_path, _build_call_graph)
+
+
+def _graph_node(graph: call_graph.CallGraph, name: str, package: str | None, caller: str) -> int | None:
+    nodes = graph.find(name, package)
+    if len(nodes) > 1:
+        raise ValueError(
+            f"{caller}: {len(nodes)} subroutines named {name!r} found in packages "
+            f"{[graph.groups[i] for i in nodes]}; pass package= to disambiguate"
+        )
+    return nodes[0] if nodes else None
 
-    return [{"callee_name": r[0]} for r in rows]
+
+def get_call_tree(name: str, depth: int = 3, package: str | None = None, _db_path: Path = DB_PATH) -> dict | None:
+    """Return the transitive callees of a subroutine as a nested tree, or None if not found.
+
+    See CallGraph.tree for the node layout; raises ValueError like
+    get_subroutine when the name is ambiguous.
+    """
+    graph = load_call_graph(_db_path)
+    root = _graph_node(graph, name, package, "get_call_tree")
+    return None if root is None else graph.tree(root, depth)
+
+
+def get_caller_tree(name: str, depth: int = 3, package: str | None = None, _db_path: Path = DB_PATH) -> dict | None:
+    """Return the transitive callers of a subroutine as a nested tree, or None if not found."""
+    graph = load_call_graph(_db_path)
+    root = _graph_node(graph, name, package, "get_caller_tree")
+    return None if root is None else graph.tree(root, depth, reverse=True)
+
+
+def find_call_path(
+    source: str,
+    target: str,
+    source_package: str | None = None,
+    target_package: str | None = None,
+    max_depth: int | None = None,
+    _db_path: Path = DB_PATH,
+) -> list[dict]:
+    """Return the shortest call chain from source to target, or [] if there is none.
+
+    Every subroutine named source (in source_package, if given) is a start
+    and every subroutine named target a goal, so shared names need no
+    disambiguation.
+    """
+    graph = load_call_graph(_db_path)
+    path = graph.shortest_path(graph.find(source, source_package), graph.find(target, target_package), max_depth)
+    return [graph.describe(i) for i in path]
 
 
 def namelist_to_code(param: str, _db_path: Path = DB_PATH) -> list[dict]:
@@ -249,7 +535,7 @@ def namelist_to_code(param: str, _db_path: Path = DB_PATH) -> list[dict]:
             SELECT s.id, s.name, s.file, s.package, nr.namelist_group
             FROM namelist_refs nr
             JOIN subroutines s ON s.id = nr.subroutine_id
-            WHERE upper(nr.param_name) = upper(?)
+            WHERE nr.param_key = upper(?)
             """,
             [param],
         ).fetchall()
@@ -265,7 +551,7 @@ def diagnostics_fill_to_source(field_name: str, _db_path: Path = DB_PATH) -> lis
             SELECT s.id, s.name, s.file, s.package, df.array_name
             FROM diagnostics_fills df
             JOIN subroutines s ON s.id = df.subroutine_id
-            WHERE upper(trim(df.field_name)) = upper(trim(?))
+            WHERE df.field_key = upper(trim(?))
             """,
             [field_name],
         ).fetchall()
@@ -286,7 +572,7 @@ def get_cpp_requirements(subroutine_name: str, _db_path: Path = DB_PATH) -> list
             SELECT cg.cpp_flag
             FROM cpp_guards cg
             JOIN subroutines s ON s.id = cg.subroutine_id
-            WHERE upper(s.name) = upper(?)
+            WHERE s.name_key = upper(?)
             """,
             [subroutine_name],
         ).fetchall()
@@ -294,11 +580,118 @@ def get_cpp_requirements(subroutine_name: str, _db_path: Path = DB_PATH) -> list
     return [r[0] for r in rows if r[0] not in _HARDWARE_PLATFORM_FLAGS]
 
 
+def _resolve_subroutine(con, name: str, package: str | None, caller: str) -> int | None:
+    """Return the id of the named subroutine, or None.
+
+    Raises ValueError when package is None and several subroutines share the
+    name, like get_subroutine.
+    """
+    sql = "SELECT id, package FROM subroutines WHERE name_key = upper(?)"
+    params = [name]
+    if package is not None:
+        sql += " AND package_key = upper(?)"
+        params.append(package)
+    rows = con.execute(sql, params).fetchall()
+    if len(rows) > 1:
+        raise ValueError(
+            f"{caller}: {len(rows)} subroutines named {name!r} found in packages "
+            f"{[r[1] for r in rows]}; pass package= to disambiguate"
+        )
+    return rows[0][0] if rows else None
+
+
+def get_active_cpp_flags(
+    subroutine_name: str, line: int, package: str | None = None, _db_path: Path = DB_PATH
+) -> list[dict]:
+    """Return the CPP guards enclosing a source line of a subroutine.
+
+    line is a line number in the subroutine's file (between its line_start
+    and line_end).  Each result has cpp_flag, negated, line_from, line_to;
+    negated is True for an #ifndef or the #else branch of an #ifdef, i.e.
+    the line is compiled only when the flag is undefined.  Outermost guard
+    first.  Returns an empty list if the subroutine is not found.
+    """
+    # One round trip: the subroutine row(s), each joined to the spans
+    # containing line (an index lookup on cpp_guard_spans.subroutine_id).
+    sql = """
+        SELECT s.id, s.package, s.line_start, s.line_end,
+               g.cpp_flag, g.negated, g.line_from, g.line_to
+        FROM subroutines s
+        LEFT JOIN cpp_guard_spans g
+          ON g.subroutine_id = s.id AND g.line_from <= $line AND g.line_to >= $line
+        WHERE s.name_key = upper($name)
+    """
+    params: dict = {"name": subroutine_name, "line": line}
+    if package is not None:
+        sql += " AND s.package_key = upper($package)"
+        params["package"] = package
+    with _db(_db_path) as con:
+        rows = con.execute(sql + " ORDER BY g.line_from, g.line_to DESC", params).fetchall()
+
+    if not rows:
+        return []
+    packages = {r[0]: r[1] for r in rows}
+    if len(packages) > 1:
+        raise ValueError(
+            f"get_active_cpp_flags: {len(packages)} subroutines named {subroutine_name!r} found in "
+            f"packages {list(packages.values())}; pass package= to disambiguate"
+        )
+    line_start, line_end = rows[0][2], rows[0][3]
+    if not line_start <= line <= line_end:
+        raise ValueError(
+            f"get_active_cpp_flags: line {line} is outside {subroutine_name} "
+            f"(lines {line_start}-{line_end})"
+        )
+    return [{"cpp_flag": r[4], "negated": r[5], "line_from": r[6], "line_to": r[7]}
+            for r in rows if r[4] is not None]
+
+
+def get_dead_lines(
+    cpp_flag: str,
+    subroutine_name: str | None = None,
+    package: str | None = None,
+    _db_path: Path = DB_PATH,
+) -> list[dict]:
+    """Return the line ranges compiled out when cpp_flag is undefined.
+
+    These are the bodies of ``#ifdef cpp_flag`` blocks (and ``#else``
+    branches of ``#ifndef cpp_flag``), merged where they overlap.  Each
+    result has id, name, file, package, line_from, line_to.  When
+    subroutine_name is given only that subroutine is searched (package
+    disambiguates as in get_subroutine); otherwise all subroutines are.
+    """
+    with _db(_db_path) as con:
+        sql = """
+            SELECT s.id, s.name, s.file, s.package, g.line_from, g.line_to
+            FROM cpp_guard_spans g
+            JOIN subroutines s ON s.id = g.subroutine_id
+            WHERE g.flag_key = upper(?) AND NOT g.negated
+        """
+        params: list = [cpp_flag]
+        if subroutine_name is not None:
+            sub_id = _resolve_subroutine(con, subroutine_name, package, "get_dead_lines")
+            if sub_id is None:
+                return []
+            sql += " AND g.subroutine_id = ?"
+            params.append(sub_id)
+        rows = con.execute(sql + " ORDER BY s.id, g.line_from", params).fetchall()
+
+    merged: list[dict] = []
+    for sub_id, name, file, pkg, line_from, line_to in rows:
+        last = merged[-1] if merged else None
+        if last and last["id"] == sub_id and line_from <= last["line_to"] + 1:
+            last["line_to"] = max(last["line_to"], line_to)
+            continue
+        merged.append({"id": sub_id, "name": name, "file": file, "package": pkg,
+                       "line_from": line_from, "line_to": line_to})
+    return merged
+
+
 def get_package_flags(package_name: str, _db_path: Path = DB_PATH) -> list[dict]:
     """Return CPP flags defined by a package."""
     with _db(_db_path) as con:
         rows = con.execute(
-            "SELECT cpp_flag, description FROM package_options WHERE upper(package_name) = upper(?)",
+            "SELECT cpp_flag, description FROM package_options WHERE package_key = upper(?)",
             [package_name],
         ).fetchall()
 
@@ -329,7 +722,7 @@ def get_package(package_name: str, _db_path: Path = DB_PATH) -> dict | None:
     with _db(_db_path) as con:
         rows = con.execute(
             "SELECT id, name, file, line_start, line_end FROM subroutines "
-            "WHERE upper(package) = upper(?) ORDER BY file, line_start",
+            "WHERE package_key = upper(?) ORDER BY file, line_start",
             [package_name],
         ).fetchall()
 
@@ -337,7 +730,7 @@ def get_package(package_name: str, _db_path: Path = DB_PATH) -> dict | None:
             return None
 
         flags = con.execute(
-            "SELECT cpp_flag, description FROM package_options WHERE upper(package_name) = upper(?)",
+            "SELECT cpp_flag, description FROM package_options WHERE package_key = upper(?)",
             [package_name],
         ).fetchall()
 
@@ -359,19 +752,33 @@ def get_doc_source(
     section: str,
     offset: int = 0,
     limit: int = 200,
+    _db_path: Path = DB_PATH,
     _chroma_path: Path = CHROMA_PATH,
 ) -> dict | None:
     """Return paginated text of a documentation section or header file.
 
-    Retrieves all stored chunks for (file, section), reassembles them in
-    chunk order (respecting overlap), and returns paginated lines.
+    Reads the requested lines from the doc_sections table with one indexed
+    lookup (see src/doc_sections.py).  Indexes whose docs were embedded
+    before that table existed fall back to reassembling the ChromaDB chunks.
 
     Use search_docs to discover file and section values.
     Returns {file, section, total_lines, offset, lines} or None if not found.
     """
+    if _db_path.exists():
+        with _db(_db_path) as con:
+            page = doc_sections.read_section(con, file, section, offset, limit)
+            if page is not None or doc_sections.sections_stored(con):
+                return page
+    return _doc_source_from_chunks(file, section, offset, limit, _chroma_path)
+
+
+def _doc_source_from_chunks(file: str, section: str, offset: int, limit: int, chroma_path: Path) -> dict | None:
+    """Reassemble a section from its ChromaDB chunks (pre-doc_sections indexes)."""
     from src.embed_utils import OVERLAP
 
-    collection = get_collection(DOCS_COLLECTION_NAME, _chroma_path)
+    collection = get_collection(DOCS_COLLECTION_NAME, chroma_path)
+    if collection is None:
+        return None
     results = collection.get(
         where={"$and": [{"file": {"$eq": file}}, {"section": {"$eq": section}}]},
         include=["metadatas", "documents"],
@@ -411,50 +818,91 @@ def get_verification_source(
     file: str,
     offset: int = 0,
     limit: int = 200,
+    _db_path: Path = DB_PATH,
     _chroma_path: Path = CHROMA_PATH,
 ) -> dict | None:
     """Return paginated full text of a verification experiment file.
 
-    Retrieves all stored chunks for the given file path, reassembles them in
-    chunk order (respecting overlap), and returns paginated lines.
+    Reads the requested lines from the verification_files table with one
+    indexed lookup (see src/mitgcm/verification_indexer/files.py).  Indexes
+    built before that table existed fall back to reassembling the ChromaDB
+    chunks.
 
     Use search_verification to discover file paths.
     Returns {file, total_lines, offset, lines} or None if not found.
     """
-    from src.embed_utils import OVERLAP
+    if _db_path.exists():
+        with _db(_db_path) as con:
+            page = verification_files.read_file(con, file, offset, limit)
+            if page is not None or verification_files.files_stored(con):
+                return page
+    lines = _verification_files_from_chunks({"file": {"$eq": file}}, _chroma_path).get(file)
+    if lines is None:
+        return None
+    return {
+        "file": file,
+        "total_lines": len(lines),
+        "offset": offset,
+        "lines": lines[offset: offset + limit],
+    }
 
-    collection = get_collection(VERIFICATION_COLLECTION_NAME, _chroma_path)
-    results = collection.get(
-        where={"file": {"$eq": file}},
-        include=["metadatas", "documents"],
-    )
 
-    if not results["ids"]:
-        return None
+def get_experiment_files(
+    experiment: str,
+    limit: int = 200,
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
+) -> dict | None:
+    """Return every configuration file of one verification experiment.
 
-    chunks = sorted(
-        zip(results["metadatas"], results["documents"]),
-        key=lambda x: x[0]["chunk_index"],
-    )
+    Covers the files search_verification indexes: input/data*, eedata,
+    code/*.h, packages.conf and code/*.F.  Each file is cut to its first
+    limit lines; total_lines tells whether get_verification_source is needed
+    for the rest.  The experiment name is matched case-insensitively (exactly
+    on indexes built before the verification_files table).
 
-    # Strip the prepended "[file]\n" header from each chunk
-    header = f"[{file}]\n"
-    header_len = len(header)
-    raw_chunks = [doc[header_len:] for _, doc in chunks]
+    Returns {experiment, files: [{file, filename, total_lines, lines}]},
+    files sorted by path, or None if the experiment has no indexed files.
+    """
+    if _db_path.exists():
+        with _db(_db_path) as con:
+            found = verification_files.read_experiment(con, experiment, limit)
+            if found is not None or verification_files.files_stored(con):
+                return found
+    by_file = _verification_files_from_chunks({"experiment": {"$eq": experiment}}, _chroma_path)
+    if not by_file:
+        return None
+    return {"experiment": experiment, "files": [
+        {"file": f, "filename": f.rsplit("/", 1)[-1], "total_lines": len(lines), "lines": lines[:limit]}
+        for f, lines in sorted(by_file.items())
+    ]}
 
-    # Reassemble: chunk 0 in full; each subsequent chunk skips the OVERLAP prefix
-    text = raw_chunks[0]
-    for raw in raw_chunks[1:]:
-        text += raw[OVERLAP:]
 
-    all_lines = text.splitlines()
-    total = len(all_lines)
-    return {
-        "file": file,
-        "total_lines": total,
-        "offset": offset,
-        "lines": all_lines[offset: offset + limit],
-    }
+def _verification_files_from_chunks(where: dict, chroma_path: Path) -> dict[str, list[str]]:
+    """Reassemble the verification files matching where from their ChromaDB chunks, as lines."""
+    from src.embed_utils import OVERLAP
+
+    collection = get_collection(VERIFICATION_COLLECTION_NAME, chroma_path)
+    if collection is None:
+        return {}
+    results = collection.get(where=where, include=["metadatas", "documents"])
+
+    by_file: dict[str, list[tuple[int, str]]] = {}
+    for meta, doc in zip(results["metadatas"], results["documents"]):
+        by_file.setdefault(meta["file"], []).append((meta["chunk_index"], doc))
+
+    out = {}
+    for file, chunks in by_file.items():
+        # Strip the prepended "[file]\n" header from each chunk
+        header_len = len(f"[{file}]\n")
+        raw_chunks = [doc[header_len:] for _, doc in sorted(chunks)]
+
+        # Reassemble: chunk 0 in full; each subsequent chunk skips the OVERLAP prefix
+        text = raw_chunks[0]
+        for raw in raw_chunks[1:]:
+            text += raw[OVERLAP:]
+        out[file] = text.splitlines()
+    return out
 
 
 _CATALOGUE_PATH = Path("data/mitgcm/verification_catalogue.json")
@@ -477,82 +925,226 @@ def list_verification_experiments() -> list[dict]:
     return build_catalogue()
 
 
-def search_verification(query: str, top_k: int = 5, _chroma_path: Path = CHROMA_PATH) -> list[dict]:
-    """Semantic search over MITgcm verification experiment configuration files.
+def search_verification(
+    query: str,
+    top_k: int = 5,
+    mode: str = "hybrid",
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
+) -> list[dict]:
+    """Search MITgcm verification experiment configuration files.
 
     Searches input/data*, eedata, code/*.h, and packages.conf from all
     verification experiments.  Returns up to top_k results, deduplicated
-    per (experiment, filename).
+    per (experiment, filename).  mode is "hybrid" (default), "vector" or
+    "lexical", as for search_code; BM25 runs over verification_files.
 
     Each result has: experiment, file, filename, snippet (first 400 chars
     of content after stripping the header and leading Fortran C-comments).
-    Requires Ollama and a populated mitgcm_verification ChromaDB collection
-    (pixi run embed-verification).
+    Vector ranking requires Ollama and a populated mitgcm_verification
+    ChromaDB collection (pixi run embed-verification).
     """
-    collection = get_collection(VERIFICATION_COLLECTION_NAME, _chroma_path)
-    embedding = _embed(query)
+    def vector() -> dict[tuple[str, str], dict]:
+        results = _query(
+            VERIFICATION_COLLECTION_NAME, _chroma_path, [_embed(query)], top_k * 5, ["metadatas", "distances", "documents"]
+        )
+        return _best_files(results["metadatas"][0], results["distances"][0], results["documents"][0])
+
+    def lexical() -> dict[tuple[str, str], dict]:
+        if not _db_path.exists():
+            return {}
+        with _db(_db_path) as con:
+            return _files_by_bm25(con, query, top_k)
+
+    return list(full_text.ranked(mode, lexical, vector).values())[:top_k]
+
+
+def search_verification_batch(
+    queries: list[str],
+    top_k: int = 5,
+    mode: str = "hybrid",
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
+) -> list[list[dict]]:
+    """Run search_verification for each query, with one embedding call and one ChromaDB query for all."""
+    full_text.check_mode(mode)
+    if not queries:
+        return []
+
+    def vector() -> list[dict[tuple[str, str], dict]]:
+        results = _query(
+            VERIFICATION_COLLECTION_NAME, _chroma_path, _embed_many(queries), top_k * 5, ["metadatas", "distances", "documents"]
+        )
+        return [_best_files(*r) for r in zip(results["metadatas"], results["distances"], results["documents"])]
+
+    def lexical() -> list[dict[tuple[str, str], dict]]:
+        if not _db_path.exists():
+            return [{} for _ in queries]
+        with _db(_db_path) as con:
+            return [_files_by_bm25(con, q, top_k) for q in queries]
+
+    return [list(r.values())[:top_k] for r in full_text.ranked_many(mode, lexical, vector)]
 
-    results = collection.query(
-        query_embeddings=[embedding],
-        n_results=top_k * 5,
-        include=["metadatas", "distances", "documents"],
-    )
 
-    # Deduplicate: keep best chunk per (experiment, filename)
+def _best_files(metadatas: list[dict], distances: list[float], documents: list[str]) -> dict[tuple[str, str], dict]:
+    """One query's verification hits, best chunk per (experiment, filename), closest first."""
+    return {key: record for key, (_, record) in _files_by_distance(metadatas, distances, documents).items()}
+
+
+def _files_by_distance(
+    metadatas: list[dict], distances: list[float], documents: list[str]
+) -> dict[tuple[str, str], tuple[float, dict]]:
     best: dict[tuple[str, str], tuple[float, dict, str]] = {}
-    for meta, dist, doc in zip(
-        results["metadatas"][0], results["distances"][0], results["documents"][0]
-    ):
+    for meta, dist, doc in zip(metadatas, distances, documents):
         key = (meta["experiment"], meta["filename"])
         if key not in best or dist < best[key][0]:
             best[key] = (dist, meta, doc)
-
-    ranked = sorted(best.values(), key=lambda x: x[0])[:top_k]
-    return [
-        {
+    return {
+        key: (dist, {
             "experiment": meta["experiment"],
             "file": meta["file"],
             "filename": meta["filename"],
             "snippet": _doc_snippet(doc),
+        })
+        for key, (dist, meta, doc) in sorted(best.items(), key=lambda kv: kv[1][0])
+    }
+
+
+def _files_by_bm25(con, query: str, top_k: int) -> dict[tuple[str, str], dict]:
+    rows = full_text.search(
+        con, "verification_files", "file_key", query, top_k * full_text.CANDIDATES,
+        ["experiment", "filename", verification_files.TEXT],
+    )
+    return {
+        (experiment, filename): {
+            "experiment": experiment,
+            "file": file,
+            "filename": filename,
+            "snippet": _text_snippet(text),
         }
-        for _, meta, doc in ranked
-    ]
+        for file, experiment, filename, text in rows
+    }
 
 
-def search_docs(query: str, top_k: int = 5, _chroma_path: Path = CHROMA_PATH) -> list[dict]:
-    """Semantic search over MITgcm documentation sections.
+def search_docs(
+    query: str,
+    top_k: int = 5,
+    mode: str = "hybrid",
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
+) -> list[dict]:
+    """Search MITgcm documentation sections.
 
-    Returns up to top_k doc sections whose text most closely matches the
-    natural-language query.  Requires a running Ollama server and a populated
-    mitgcm_docs ChromaDB collection (pixi run embed-docs).
+    Returns up to top_k doc sections matching the query.  mode is "hybrid"
+    (default), "vector" or "lexical", as for search_code; BM25 runs over
+    doc_sections.  Vector ranking requires a running Ollama server and a
+    populated mitgcm_docs ChromaDB collection (pixi run embed-docs).
 
     Each result has keys: file, section, snippet (first 400 chars of content
     after stripping the header and leading Fortran C-comments).
     """
-    collection = get_collection(DOCS_COLLECTION_NAME, _chroma_path)
-    embedding = _embed(query)
+    def vector() -> dict[tuple[str, str], dict]:
+        results = _query(
+            DOCS_COLLECTION_NAME, _chroma_path, [_embed(query)], top_k * 5, ["metadatas", "distances", "documents"]
+        )
+        return _best_sections(results["metadatas"][0], results["distances"][0], results["documents"][0])
 
-    results = collection.query(
-        query_embeddings=[embedding],
-        n_results=top_k * 5,
-        include=["metadatas", "distances", "documents"],
-    )
+    def lexical() -> dict[tuple[str, str], dict]:
+        if not _db_path.exists():
+            return {}
+        with _db(_db_path) as con:
+            return _sections_by_bm25(con, query, top_k)
 
-    # Deduplicate: keep best (lowest distance) chunk per (file, section)
+    return list(full_text.ranked(mode, lexical, vector).values())[:top_k]
+
+
+def search_docs_batch(
+    queries: list[str],
+    top_k: int = 5,
+    mode: str = "hybrid",
+    _db_path: Path = DB_PATH,
+    _chroma_path: Path = CHROMA_PATH,
+) -> list[list[dict]]:
+    """Run search_docs for each query, with one embedding call and one ChromaDB query for all."""
+    full_text.check_mode(mode)
+    if not queries:
+        return []
+
+    def vector() -> list[dict[tuple[str, str], dict]]:
+        results = _query(
+            DOCS_COLLECTION_NAME, _chroma_path, _embed_many(queries), top_k * 5, ["metadatas", "distances", "documents"]
+        )
+        return [_best_sections(*r) for r in zip(results["metadatas"], results["distances"], results["documents"])]
+
+    def lexical() -> list[dict[tuple[str, str], dict]]:
+        if not _db_path.exists():
+            return [{} for _ in queries]
+        with _db(_db_path) as con:
+            return [_sections_by_bm25(con, q, top_k) for q in queries]
+
+    return [list(r.values())[:top_k] for r in full_text.ranked_many(mode, lexical, vector)]
+
+
+def _best_sections(
+    metadatas: list[dict], distances: list[float], documents: list[str]
+) -> dict[tuple[str, str], dict]:
+    """One query's doc hits, best (lowest distance) chunk per (file, section), closest first."""
+    return {key: record for key, (_, record) in _sections_by_distance(metadatas, distances, documents).items()}
+
+
+def _sections_by_distance(
+    metadatas: list[dict], distances: list[float], documents: list[str]
+) -> dict[tuple[str, str], tuple[float, dict]]:
     best: dict[tuple[str, str], tuple[float, dict, str]] = {}
-    for meta, dist, doc in zip(
-        results["metadatas"][0], results["distances"][0], results["documents"][0]
-    ):
+    for meta, dist, doc in zip(metadatas, distances, documents):
         key = (meta["file"], meta["section"])
         if key not in best or dist < best[key][0]:
             best[key] = (dist, meta, doc)
+    return {
+        key: (dist, {"file": meta["file"], "section": meta["section"], "snippet": _doc_snippet(doc)})
+        for key, (dist, meta, doc) in sorted(best.items(), key=lambda kv: kv[1][0])
+    }
 
-    ranked = sorted(best.values(), key=lambda x: x[0])[:top_k]
-    return [
-        {
-            "file": meta["file"],
-            "section": meta["section"],
-            "snippet": _doc_snippet(doc),
-        }
-        for _, meta, doc in ranked
-    ]
+
+def _sections_by_bm25(con, query: str, top_k: int) -> dict[tuple[str, str], dict]:
+    rows = full_text.search(
+        con, "doc_sections", "section_key", query, top_k * full_text.CANDIDATES,
+        ["file", "section", doc_sections.TEXT],
+    )
+    return {
+        (file, section): {"file": file, "section": section, "snippet": _text_snippet(text)}
+        for _, file, section, text in rows
+    }
+
+
+def search_all(query: str, top_k: int = 10, _db_path: Path = DB_PATH, _chroma_path: Path = CHROMA_PATH) -> list[dict]:
+    """Search subroutines, documentation and verification files at once; the top_k best overall.
+
+    The query is embedded once and the three collections are queried
+    concurrently (src/fan_out.py); hits are merged on a score calibrated
+    within each collection.  Each result has "source" ("code", "doc" or
+    "verification"), "score", and the fields that source's search tool
+    returns (subroutine metadata, file/section/snippet, or
+    experiment/file/filename/snippet).
+    """
+    embedding = _embed(query)
+    n = top_k * 3
+
+    def code() -> list[tuple[float, dict]]:
+        distances = _code_by_vector([embedding], n, _chroma_path)[0]
+        with _db(_db_path) as con:
+            records = _subroutines_by_id(con, list(distances))
+        return [(dist, records[db_id]) for db_id, dist in distances.items() if db_id in records]
+
+    def chunks(name: str, dedupe) -> Callable[[], list[tuple[float, dict]]]:
+        def run() -> list[tuple[float, dict]]:
+            results = _query(name, _chroma_path, [embedding], n * 3, ["metadatas", "distances", "documents"])
+            hits = dedupe(results["metadatas"][0], results["distances"][0], results["documents"][0])
+            return list(hits.values())[:n]
+        return run
+
+    return fan_out.merge(fan_out.gather({
+        "code": code,
+        "doc": chunks(DOCS_COLLECTION_NAME, _sections_by_distance),
+        "verification": chunks(VERIFICATION_COLLECTION_NAME, _files_by_distance),
+    }), top_k)
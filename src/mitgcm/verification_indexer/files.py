@@ -0,0 +1,78 @@
+"""Verification experiment files stored in DuckDB for direct reads.
+
+``get_verification_source`` used to rebuild a file by fetching all of its
+chunks from the mitgcm_verification ChromaDB collection and undoing the
+chunk overlap.  The verification pipeline now also writes each file's raw
+text, split into lines, to the ``verification_files`` table of the MITgcm
+DuckDB index, with the experiment it belongs to in its own column.  A file
+is then one indexed lookup on ``file_key``, and all files of an experiment
+are one lookup on ``experiment_key`` (rows are written in experiment order,
+so they share row groups).
+
+The text is stored once, as ``lines TEXT[]``.  DuckDB compresses the short
+line strings with FSST, which it does not do for whole files: on 22 MB of
+synthetic namelist text the list column took 8.7 MiB on disk, a single
+``TEXT`` column 22.7 MiB.  The BM25 index (src/full_text.py) is built over
+the list column directly, and ``TEXT`` gives the SQL for the whole text
+where a caller needs it.
+"""
+
+from typing import Iterable
+
+import duckdb
+
+from ...duckdb_bulk import insert_rows
+
+# The stored file as one string (lines joined by newlines).
+TEXT = "array_to_string(lines, chr(10))"
+
+
+def write_files(
+    con: duckdb.DuckDBPyConnection, files: Iterable[tuple[str, str, str]], keys: dict[str, str]
+) -> int:
+    """Replace the stored files with (file, experiment, text) triples; return the count."""
+    rows = [(file, experiment, file.rsplit("/", 1)[-1], text.splitlines()) for file, experiment, text in files]
+    con.execute("DELETE FROM verification_files")
+    return insert_rows(con, "verification_files", ["file", "experiment", "filename", "lines"], rows, keys)
+
+
+def read_file(con: duckdb.DuckDBPyConnection, file: str, offset: int, limit: int) -> dict | None:
+    """Return {file, total_lines, offset, lines} for one page, or None if not stored."""
+    try:
+        row = con.execute(
+            "SELECT len(lines), lines[$lo:$hi] FROM verification_files WHERE file_key = $file",
+            {"file": file, "lo": max(offset, 0) + 1, "hi": max(offset, 0) + max(limit, 0)},
+        ).fetchone()
+    except duckdb.CatalogException:  # index built before verification_files existed
+        return None
+    if row is None:
+        return None
+    return {"file": file, "total_lines": row[0], "offset": offset, "lines": row[1]}
+
+
+def read_experiment(con: duckdb.DuckDBPyConnection, experiment: str, limit: int) -> dict | None:
+    """Return {experiment, files: [{file, filename, total_lines, lines}]}, first limit lines of each file.
+
+    experiment is matched case-insensitively and reported as stored; None if
+    it has no stored files.
+    """
+    try:
+        rows = con.execute(
+            "SELECT experiment, file, filename, len(lines), lines[1:$limit] FROM verification_files "
+            "WHERE experiment_key = lower($experiment) ORDER BY file",
+            {"experiment": experiment, "limit": max(limit, 0)},
+        ).fetchall()
+    except duckdb.CatalogException:
+        return None
+    if not rows:
+        return None
+    files = [{"file": f, "filename": name, "total_lines": n, "lines": lines} for _, f, name, n, lines in rows]
+    return {"experiment": rows[0][0], "files": files}
+
+
+def files_stored(con: duckdb.DuckDBPyConnection) -> bool:
+    """True when the verification pipeline has filled verification_files in this index."""
+    exists = con.execute(
+        "SELECT count(*) FROM duckdb_tables() WHERE table_name = 'verification_files'"
+    ).fetchone()[0]
+    return bool(exists) and con.execute("SELECT EXISTS (SELECT 1 FROM verification_files)").fetchone()[0]
@@ -2,16 +2,15 @@
 
 Indexes input/data*, input/eedata, code/*.h, and code/packages.conf from all
 experiments under MITgcm/verification/ into the mitgcm_verification ChromaDB
-collection.
+collection.  The raw text of every file is also written to the
+verification_files table of the DuckDB index (data/mitgcm/index.duckdb),
+which get_verification_source and get_experiment_files read.
 """
 
 import json
 import logging
-import time
 from pathlib import Path
 
-import ollama
-
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(message)s",
@@ -21,9 +20,15 @@ log = logging.getLogger(__name__)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 
-from src.embed_utils import BATCH_SIZE, EMBED_MODEL, MAX_CHARS, OVERLAP, _chunk_text
+from src.embed_cache import log_chunk_cache_stats
+from src.embed_journal import journal_path
+from src.embed_scheduler import embed_and_upsert
+from src.embed_utils import MAX_CHARS, OVERLAP, _chunk_text
+from src.full_text import build_index
 from src.mitgcm.embedder.store import CHROMA_PATH, get_verification_collection
+from src.mitgcm.indexer.schema import DB_PATH, KEYS, connect
 from src.mitgcm.verification_indexer.catalogue import build_catalogue
+from src.mitgcm.verification_indexer.files import write_files
 
 CATALOGUE_PATH = Path("data/mitgcm/verification_catalogue.json")
 
@@ -74,10 +79,11 @@ def _experiment_files(exp_dir: Path):
             yield f"verification/{exp_name}/code/{p.name}", text
 
 
-def run(chroma_path: Path = CHROMA_PATH) -> None:
+def run(chroma_path: Path = CHROMA_PATH, db_path: Path = DB_PATH) -> None:
     collection = get_verification_collection(chroma_path)
 
     all_chunks: list[tuple[str, str, dict]] = []
+    all_files: list[tuple[str, str, str]] = []
 
     for base_dir in EXPERIMENT_DIRS:
         if not base_dir.exists():
@@ -88,6 +94,7 @@ def run(chroma_path: Path = CHROMA_PATH) -> None:
                 continue
             exp_name = exp_dir.name
             for label, text in _experiment_files(exp_dir):
+                all_files.append((label, exp_name, text))
                 header = f"[{label}]\n"
                 for i, chunk in enumerate(_chunk_text(text, MAX_CHARS, OVERLAP)):
                     chunk_id = f"vrf_{exp_name}_{Path(label).name}_{i}"
@@ -102,55 +109,20 @@ def run(chroma_path: Path = CHROMA_PATH) -> None:
                         },
                     ))
 
+    con = connect(db_path)
+    try:
+        n = write_files(con, all_files, KEYS["verification_files"])
+        indexed = build_index(con, "verification_files", "file_key", ["file", "lines"])
+    finally:
+        con.close()
+    log.info(f"Stored {n} files in {db_path}" + (" with a full-text index" if indexed else ""))
+
     total = len(all_chunks)
     log.info(f"Embedding {total} chunks from verification experiments...")
 
-    for i in range(0, total, BATCH_SIZE):
-        batch = all_chunks[i : i + BATCH_SIZE]
-        ids = [c[0] for c in batch]
-        docs = [c[1] for c in batch]
-        metas = [c[2] for c in batch]
-
-        try:
-            embeddings = ollama.embed(model=EMBED_MODEL, input=docs)["embeddings"]
-        except Exception as e:
-            log.warning(f"batch {i // BATCH_SIZE} failed ({e}), retrying in 10s")
-            time.sleep(10)
-            try:
-                embeddings = ollama.embed(model=EMBED_MODEL, input=docs)["embeddings"]
-            except Exception as e2:
-                log.warning(f"batch still failing ({e2}), falling back to one-at-a-time")
-                keep: list[tuple] = []
-                for chunk_id, d, meta in zip(ids, docs, metas):
-                    for attempt in range(3):
-                        try:
-                            emb = ollama.embed(model=EMBED_MODEL, input=[d])["embeddings"][0]
-                            keep.append((chunk_id, emb, d, meta))
-                            break
-                        except Exception as e3:
-                            if "context length" in str(e3):
-                                mid = len(d) // 2
-                                log.warning(f"splitting {chunk_id} ({len(d)} chars) in two")
-                                for suffix, half in (("_a", d[:mid]), ("_b", d[mid:])):
-                                    try:
-                                        emb = ollama.embed(model=EMBED_MODEL, input=[half])["embeddings"][0]
-                                        keep.append((chunk_id + suffix, emb, half, meta))
-                                    except Exception:
-                                        log.warning(f"skipping {chunk_id}{suffix} after split")
-                                break
-                            if attempt == 2:
-                                raise
-                            time.sleep(10)
-                if not keep:
-                    continue
-                ids, embeddings, docs, metas = zip(*keep)
-                ids, embeddings, docs, metas = list(ids), list(embeddings), list(docs), list(metas)
-
-        collection.upsert(ids=ids, embeddings=embeddings, documents=docs, metadatas=metas)
-        done = min(i + BATCH_SIZE, total)
-        if done % 100 == 0 or done == total:
-            log.info(f"  Embedded {done}/{total}")
+    embed_and_upsert(collection, all_chunks, journal=journal_path(chroma_path, collection.name))
 
+    log_chunk_cache_stats(log)
     log.info(f"Done. {collection.count()} chunks in mitgcm_verification collection.")
 
     # Save pre-built catalogue so list_verification_experiments_tool works
@@ -0,0 +1,39 @@
+"""Case-folded lookup keys for the code-graph tables.
+
+Fortran names are case-insensitive, so the tools used to match with
+``upper(name) = upper(?)``.  An expression on the column defeats every index
+and scans the table on each call.  Instead, each schema declares stored key
+columns (``name_key``, ``package_key``, ...) as SQL expressions over the row:
+
+    KEYS = {"subroutines": {"name_key": "upper(name)", ...}, ...}
+
+The indexing pipelines fill them at insert time (``insert_rows(..., keys=)``,
+which also writes rows in key order so equal keys share row groups), each key
+gets an ART index, and the tools compare ``name_key = upper(?)``.
+
+DuckDB only indexes stored columns (not generated ones), so rows written
+without keys (older databases, hand-built test fixtures) are filled in by
+``refresh_keys``.
+"""
+
+import duckdb
+
+Keys = dict[str, dict[str, str]]
+
+
+def key_ddl(keys: Keys) -> str:
+    """Return DDL adding every key column (if missing) and its index."""
+    stmts = []
+    for table, columns in keys.items():
+        for column in columns:
+            stmts.append(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} TEXT;")
+            stmts.append(f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column});")
+    return "\n".join(stmts)
+
+
+def refresh_keys(con: duckdb.DuckDBPyConnection, keys: Keys) -> None:
+    """Compute key columns for rows that do not have them yet."""
+    for table, columns in keys.items():
+        assignments = ", ".join(f"{column} = {expr}" for column, expr in columns.items())
+        missing = " OR ".join(f"{column} IS NULL" for column in columns)
+        con.execute(f"UPDATE {table} SET {assignments} WHERE {missing}")
@@ -0,0 +1,105 @@
+"""One pooled vector per subroutine, beside the per-chunk collection.
+
+A subroutine longer than one chunk has several vectors in the chunk
+collection, so ``search_code`` used to ask ChromaDB for ``top_k * 10`` chunk
+hits and deduplicate them by ``db_id`` — HNSW work spent on duplicates, and
+still fewer than ``top_k`` subroutines when one long routine's chunks filled
+the list.  The embedding pipelines now also keep a collection holding the
+normalised mean of each subroutine's chunk vectors (``sync``), so a query
+for n subroutines is one HNSW query for n items.  ``search`` merges in the
+n nearest chunks as well, since a routine that is mostly unrelated can
+still hold the one chunk the query is about; two queries of n are cheaper
+than one of 10n.  Until a pipeline has filled the
+pooled collection, ``search`` returns nothing and the tools fall back to the
+chunk query; on an index embedded before the pooled collection existed the
+tools get None for it (src/chroma_pool.py) and skip straight to that query.
+
+Pooled entries carry the chunks' ``source_hash``, so ``sync`` re-pools only
+subroutines whose chunks changed and drops those whose chunks are gone.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+from .embed_utils import stale_db_ids
+
+_BATCH = 500
+
+
+def mean_vector(vectors: Sequence[Sequence[float]]) -> list[float]:
+    """Return the mean of the unit-normalised vectors, normalised to unit length."""
+    v = np.asarray(vectors, dtype=np.float32)
+    v = v / np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+    mean = v.mean(axis=0)
+    return (mean / max(float(np.linalg.norm(mean)), 1e-12)).tolist()
+
+
+def sync(chunks, pooled, fields: Sequence[str]) -> int:
+    """Bring the pooled collection in line with the chunk collection; return the count re-pooled.
+
+    Each pooled entry has id ``sub_{db_id}`` and metadata db_id, n_chunks,
+    source_hash and the chunk metadata fields named in fields.
+    """
+    # "" for chunks predating source_hash, so that they are pooled too
+    current = {m["db_id"]: m.get("source_hash") or "" for m in chunks.get(include=["metadatas"])["metadatas"]}
+    to_delete, to_pool = stale_db_ids(pooled, current)
+    for i in range(0, len(to_delete), _BATCH):
+        pooled.delete(where={"db_id": {"$in": to_delete[i: i + _BATCH]}})
+    for i in range(0, len(to_pool), _BATCH):
+        got = chunks.get(where={"db_id": {"$in": to_pool[i: i + _BATCH]}}, include=["embeddings", "metadatas"])
+        vectors: dict[int, list] = {}
+        metas: dict[int, dict] = {}
+        for vec, meta in zip(got["embeddings"], got["metadatas"]):
+            vectors.setdefault(meta["db_id"], []).append(vec)
+            metas[meta["db_id"]] = meta
+        ids = list(vectors)
+        pooled.upsert(
+            ids=[f"sub_{db_id}" for db_id in ids],
+            embeddings=[mean_vector(vectors[db_id]) for db_id in ids],
+            metadatas=[_metadata(db_id, metas[db_id], fields) for db_id in ids],
+        )
+    return len(to_pool)
+
+
+def _metadata(db_id: int, chunk: dict, fields: Sequence[str]) -> dict:
+    """Pooled metadata from one of the subroutine's chunks."""
+    meta = {"db_id": db_id, "n_chunks": chunk.get("n_chunks", 1), "source_hash": chunk.get("source_hash") or ""}
+    meta.update({f: chunk[f] for f in fields if chunk.get(f) is not None})
+    return meta
+
+
+def search(pooled, chunks, embedding: Sequence[float], n: int, refine: bool = True) -> dict[int, float]:
+    """Return up to n db_id -> cosine distance, best first; {} when nothing is pooled.
+
+    With refine, the n nearest chunks are merged in: a subroutine scores the
+    smaller of its pooled and best-chunk distance.
+    """
+    return search_many(pooled, chunks, [embedding], n, refine)[0]
+
+
+def search_many(
+    pooled, chunks, embeddings: Sequence[Sequence[float]], n: int, refine: bool = True
+) -> list[dict[int, float]]:
+    """search for each of several query vectors, with one query per collection."""
+    if n <= 0 or not embeddings:
+        return [{} for _ in embeddings]
+    found = _nearest(pooled, embeddings, n)
+    if not refine or not any(found):
+        return found
+    for best, near in zip(found, _nearest(chunks, embeddings, n)):
+        for db_id, dist in near.items():
+            best[db_id] = min(best.get(db_id, dist), dist)
+    return [dict(sorted(best.items(), key=lambda item: item[1])[:n]) for best in found]
+
+
+def _nearest(collection, embeddings: Sequence[Sequence[float]], n: int) -> list[dict[int, float]]:
+    """Per query vector, db_id -> distance of its closest entry among collection's n nearest."""
+    results = collection.query(query_embeddings=list(embeddings), n_results=n, include=["metadatas", "distances"])
+    out = []
+    for metas, dists in zip(results["metadatas"], results["distances"]):
+        nearest: dict[int, float] = {}
+        for meta, dist in zip(metas, dists):
+            nearest.setdefault(int(meta["db_id"]), dist)
+        out.append(nearest)
+    return out
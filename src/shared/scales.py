@@ -18,9 +18,7 @@ Dimensionless numbers computed:
 
 import math
 
-import pint
-
-ureg = pint.UnitRegistry()
+from .units import registry
 
 _GRAVITY = 9.81  # m/s^2
 
@@ -77,6 +75,8 @@ def check_scales(
                       Always present: f0, aspect_ratio, Ek_v (None when Omega=0).
         - "flags"   : list of {"level": "warning"|"info", "message": str}.
     """
+    ureg = registry()
+
     # Attach pint units to inputs.
     _Lx = Lx * ureg.meter
     _Ly = Ly * ureg.meter
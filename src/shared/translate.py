@@ -10,9 +10,7 @@ before populating the returned dict (MCP/JSON boundary accepts plain floats only
 
 import math
 
-import pint
-
-ureg = pint.UnitRegistry()
+from .units import registry
 
 
 def translate_lab_params(
@@ -69,6 +67,8 @@ def translate_lab_params(
                          aspect_ratio, dx, dy, dz).
         - "notes"      : list of advisory strings.
     """
+    ureg = registry()
+
     # Attach pint units to inputs.
     _Lx = Lx * ureg.meter
     _Ly = Ly * ureg.meter
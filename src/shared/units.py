@@ -0,0 +1,23 @@
+"""The pint unit registry shared by translate_lab_params and check_scales.
+
+Building a ``pint.UnitRegistry`` parses pint's unit definitions, which
+takes a few hundred milliseconds, and quantities from two registries
+cannot be combined.  So the registry is built once, on the first physics
+tool call rather than at server import, and every module uses that one.
+"""
+
+import threading
+
+_lock = threading.Lock()
+_registry = None
+
+
+def registry():
+    """Return the process-wide pint.UnitRegistry, building it on first use."""
+    global _registry
+    with _lock:
+        if _registry is None:
+            import pint
+
+            _registry = pint.UnitRegistry()
+        return _registry
@@ -0,0 +1,86 @@
+"""Subroutine source stored line by line for paginated reads.
+
+``get_source_tool`` used to fetch a subroutine's ``source_text`` and
+``splitlines()`` all of it on every call to return one page, so paging
+through a routine like INI_PARMS cost O(n²) overall.  The indexing
+pipelines now also write every source line to the ``source_lines`` table,
+keyed by (subroutine_id, line_no), and the line count to
+``subroutines.n_lines``.  A page is one range query on that key, which
+reads only the requested lines, so its cost does not grow with the routine.
+
+Rows are written in subroutine id order and incremental runs only append
+higher ids, so DuckDB's min/max zone maps skip everything but the row group
+holding the subroutine; an ART index on subroutine_id did not measure faster.
+The range query plus the subroutine lookup cost more than fetching and
+splitting a short routine whole, so callers select ``SOURCE_IF_SHORT``
+alongside ``n_lines``: it yields ``source_text`` only below ``SHORT_LINES``
+lines (about where the two measured even in benchmarks/source_pages.py),
+and ``page`` slices that instead of querying again.
+Lines follow ``str.splitlines`` (every Unicode line boundary, ``\\r\\n`` as
+one), so pages are identical to slicing ``source_text.splitlines()``.
+Subroutines with ``n_lines`` NULL (older indexes, hand-built fixtures) get
+their lines from ``sync_source_lines``; until then they are paged whole.
+"""
+
+import duckdb
+import numpy as np
+
+from .duckdb_bulk import insert_rows
+
+SHORT_LINES = 10_000
+SOURCE_IF_SHORT = f"CASE WHEN n_lines IS NULL OR n_lines < {SHORT_LINES} THEN source_text END"
+
+
+def sync_source_lines(con: duckdb.DuckDBPyConnection) -> int:
+    """Write source_lines for subroutines whose n_lines is NULL and drop stale lines; return the count.
+
+    Lines of deleted subroutines go too, as do any left under the id of a
+    row that is being (re)filled, since a full run reuses ids.
+    """
+    con.execute(
+        "DELETE FROM source_lines WHERE subroutine_id NOT IN "
+        "(SELECT id FROM subroutines WHERE n_lines IS NOT NULL)"
+    )
+    rows = con.execute(
+        "SELECT id, coalesce(source_text, '') FROM subroutines WHERE n_lines IS NULL ORDER BY id"
+    ).fetchall()
+    if not rows:
+        return 0
+    split = [(i, text.splitlines()) for i, text in rows]
+    ids = np.repeat([i for i, _ in split], [len(lines) for _, lines in split])
+    line_no = np.concatenate([np.arange(len(lines)) for _, lines in split])
+    insert_rows(
+        con, "source_lines", ["subroutine_id", "line_no", "line"],
+        list(zip(ids.tolist(), line_no.tolist(), (line for _, lines in split for line in lines))),
+    )
+    con.execute("CREATE TEMP TABLE _n_lines (id INTEGER, n_lines INTEGER)")
+    try:
+        insert_rows(con, "_n_lines", ["id", "n_lines"], [(i, len(lines)) for i, lines in split])
+        con.execute("UPDATE subroutines SET n_lines = n.n_lines FROM _n_lines n WHERE subroutines.id = n.id")
+    finally:
+        con.execute("DROP TABLE _n_lines")
+    return len(rows)
+
+
+def page(
+    con: duckdb.DuckDBPyConnection, subroutine_id: int, n_lines: int | None, source_text: str | None,
+    offset: int, limit: int,
+) -> tuple[int, list[str]]:
+    """Return (total_lines, lines [offset, offset + limit)) of a subroutine's source.
+
+    n_lines and source_text are the row's ``n_lines`` and ``SOURCE_IF_SHORT``.
+    """
+    lo = max(offset, 0)
+    hi = lo + max(limit, 0)
+    if source_text is not None or n_lines is None:
+        lines = (source_text or "").splitlines()
+        return len(lines), lines[lo:hi]
+    if lo >= min(hi, n_lines):
+        return n_lines, []
+    # Integers only, so they are written into the SQL: each bound parameter
+    # costs DuckDB a Python-object conversion that takes longer than the scan.
+    rows = con.execute(
+        f"SELECT line FROM source_lines WHERE subroutine_id = {int(subroutine_id)} "
+        f"AND line_no >= {int(lo)} AND line_no < {int(hi)} ORDER BY line_no"
+    ).fetchall()
+    return n_lines, [r[0] for r in rows]
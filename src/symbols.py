@@ -0,0 +1,66 @@
+"""In-memory symbol table behind the exact-identifier fast path of search_code.
+
+Many searches are symbol lookups ("GAD_CALC_RHS", "useKPP") that gain
+nothing from an embedding round-trip.  Each server loads its known symbols
+once — subroutine names, namelist parameters, CPP flags, FESOM2 module
+names — into a ``SymbolTable``: per kind, the case-folded key mapped to the
+result records for that symbol.  ``lookup`` is then a dictionary probe per
+kind, so a symbol query is answered in microseconds and any other query
+pays next to nothing before falling through to search.
+
+Like the call graph, a table lives until the process exits: the index is
+rebuilt offline and servers are restarted to pick it up.
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+# A query that is one Fortran identifier may name a known symbol.
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def group(rows: Iterable[tuple], fields: Sequence[str]) -> dict[str, list[dict]]:
+    """Map each row's first column (a case-folded key) to records of the remaining columns, in row order."""
+    out: dict[str, list[dict]] = {}
+    for key, *values in rows:
+        if key is not None:
+            out.setdefault(key, []).append(dict(zip(fields, values)))
+    return out
+
+
+class SymbolTable:
+    """Records per upper-cased symbol key, per kind; kinds in priority order."""
+
+    def __init__(self, kinds: dict[str, dict[str, list[dict]]]):
+        self.kinds = kinds
+
+    def lookup(self, query: str, limit: int) -> list[dict]:
+        """Return up to limit records query names exactly, each with its "match" kind; [] if none."""
+        symbol = query.strip()
+        if not IDENTIFIER.fullmatch(symbol):
+            return []
+        key = symbol.upper()
+        out = [{**record, "match": kind} for kind, records in self.kinds.items() for record in records.get(key, ())]
+        return out[:limit]
+
+
+_TABLES: dict[Path, SymbolTable] = {}
+_LOCK = threading.Lock()
+
+
+def get_table(db_path: Path, load: Callable[[Path], SymbolTable]) -> SymbolTable:
+    """Return the process-wide symbol table for db_path, calling load(db_path) on first use."""
+    key = Path(db_path).resolve()
+    with _LOCK:
+        table = _TABLES.get(key)
+        if table is None:
+            table = _TABLES[key] = load(db_path)
+    return table
+
+
+def clear() -> None:
+    """Drop all cached tables (tests, or after re-indexing in-process)."""
+    with _LOCK:
+        _TABLES.clear()
@@ -0,0 +1,197 @@
+"""Background warm-up of an MCP server's indices and embedding model.
+
+A server used to answer its first search with everything cold: the DuckDB
+file, the call graph and symbol table, each ChromaDB collection's HNSW
+segment and, behind Ollama, the embedding model itself — several seconds
+in a container.  ``WarmUp.start`` runs those loads on a daemon thread.
+``after_initialized`` starts it once the client has finished the MCP
+handshake (its ``notifications/initialized``): started alongside
+``mcp.run()``, the thread imported chromadb while the server was answering
+``initialize``, and the two competed for the GIL.  The
+steps fill the process-wide caches the tools read (``duckdb_pool``,
+``call_graph.get_graph``, ``symbols.get_table``, ``chroma_pool``), so a
+tool call that arrives mid-warm-up waits for the load in progress rather
+than starting a second one.
+
+Ollama unloads an idle model after five minutes (``OLLAMA_KEEP_ALIVE``),
+so after the warm-up the thread embeds a short text every
+``OGCMCP_KEEP_ALIVE_S`` seconds (default 240; 0 turns it off).
+``status()`` reports readiness and the timing of every step for the
+servers' ``server_status_tool``.
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Mapping
+
+from . import chroma_pool
+from .embed_backend import embed_texts, get_backend
+
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
+
+log = logging.getLogger(__name__)
+
+KEEP_ALIVE_ENV = "OGCMCP_KEEP_ALIVE_S"
+KEEP_ALIVE_S = 240.0
+# How long the warm-up waits for the embedding server (started alongside) to answer.
+EMBED_TIMEOUT_S = 120.0
+_RETRY_S = 1.0
+_PROBE_TEXT = "warm-up"
+
+
+def keep_alive_interval() -> float:
+    """Seconds between keep-alive embeds, from OGCMCP_KEEP_ALIVE_S (0 disables)."""
+    return float(os.environ.get(KEEP_ALIVE_ENV, KEEP_ALIVE_S))
+
+
+def page_in(chroma_path: Path) -> list[str]:
+    """Open every existing collection under chroma_path and run one query on each; return their names.
+
+    The query loads the collection's HNSW segment, which ChromaDB otherwise
+    reads on the first search.  It uses the collection's own first vector,
+    so no embedding is needed.  Collections are never created here.
+    """
+    if not Path(chroma_path).exists():
+        return []
+    names = [c.name for c in chroma_pool.get_client(chroma_path).list_collections()]
+    for name in names:
+        collection = chroma_pool.get_collection(chroma_path, name)
+        first = collection.get(limit=1, include=["embeddings"])
+        if len(first["ids"]):
+            collection.query(query_embeddings=[list(first["embeddings"][0])], n_results=1, include=[])
+    return names
+
+
+def embed_probe(timeout_s: float = EMBED_TIMEOUT_S) -> None:
+    """Embed a short text, retrying every second for up to timeout_s while the backend is not up.
+
+    With timeout_s=0 it tries once, as the keep-alive does.
+    """
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            embed_texts([_PROBE_TEXT])
+            return
+        except Exception:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(_RETRY_S)
+
+
+def after_initialized(server: "FastMCP", start: Callable[[], object]) -> None:
+    """Call start when the client sends notifications/initialized, i.e. right after the handshake."""
+    from mcp import types
+
+    async def on_initialized(_notification: types.InitializedNotification) -> None:
+        start()
+
+    # FastMCP has no public hook for client notifications; its low-level
+    # server dispatches them through this table.
+    server._mcp_server.notification_handlers[types.InitializedNotification] = on_initialized
+
+
+class WarmUp:
+    """Runs named warm-up steps in order on a daemon thread and records how each went."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._steps: dict[str, dict] = {}
+        self._started: float | None = None
+        self._finished: float | None = None
+        self._last_ping: float | None = None
+        self._ping_error: str | None = None
+        self._interval = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(
+        self,
+        steps: Mapping[str, Callable[[], object]],
+        keep_alive: Callable[[], object] | None = None,
+        interval_s: float = 0.0,
+    ) -> threading.Thread:
+        """Start running steps; afterwards call keep_alive every interval_s seconds (if both are set).
+
+        Only the first call starts anything; later ones return the running thread.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return self._thread
+            self._steps = {name: {"name": name, "state": "pending"} for name in steps}
+            self._started = time.perf_counter()
+            self._interval = interval_s if keep_alive is not None else 0.0
+            self._thread = threading.Thread(
+                target=self._run, args=(dict(steps), keep_alive), name="warm-up", daemon=True
+            )
+            self._thread.start()
+            return self._thread
+
+    def stop(self) -> None:
+        """End the keep-alive loop (the steps themselves are not interrupted)."""
+        self._stop.set()
+
+    def _run(self, steps: dict[str, Callable[[], object]], keep_alive: Callable[[], object] | None) -> None:
+        for name, step in steps.items():
+            self._update(name, state="running")
+            t0 = time.perf_counter()
+            try:
+                step()
+            except Exception as exc:  # a missing index or embedding server must not stop the others
+                log.warning(f"warm-up: {name} failed: {exc}")
+                self._update(name, state="failed", ms=_ms_since(t0), error=str(exc))
+            else:
+                self._update(name, state="done", ms=_ms_since(t0))
+        with self._lock:
+            self._finished = time.perf_counter()
+        if keep_alive is None or self._interval <= 0:
+            return
+        while not self._stop.wait(self._interval):
+            try:
+                keep_alive()
+                error = None
+            except Exception as exc:
+                log.warning(f"warm-up: keep-alive failed: {exc}")
+                error = str(exc)
+            with self._lock:
+                self._last_ping = time.perf_counter()
+                self._ping_error = error
+
+    def _update(self, name: str, **fields) -> None:
+        with self._lock:
+            self._steps[name].update(fields)
+
+    def status(self) -> dict:
+        """Readiness, per-step state and timings, and the keep-alive state."""
+        try:
+            backend = get_backend().name
+        except ValueError as exc:  # bad OGCMCP_EMBED_BACKEND: the embed step reports it too
+            backend = f"invalid: {exc}"
+        with self._lock:
+            steps = [dict(s) for s in self._steps.values()]
+            now = time.perf_counter()
+            if self._started is None:
+                state = "not started"
+            elif self._finished is None:
+                state = "warming"
+            else:
+                state = "degraded" if any(s["state"] == "failed" for s in steps) else "ready"
+            status = {
+                "state": state,
+                "ready": state == "ready",
+                "elapsed_ms": _ms_since(self._started, self._finished or now) if self._started else None,
+                "steps": steps,
+                "embed_backend": backend,
+                "keep_alive_s": self._interval or None,
+            }
+            if self._last_ping is not None:
+                status["last_keep_alive_s_ago"] = round(now - self._last_ping, 1)
+                status["keep_alive_error"] = self._ping_error
+        return status
+
+
+def _ms_since(t0: float, t1: float | None = None) -> float:
+    return round(((t1 if t1 is not None else time.perf_counter()) - t0) * 1e3, 1)
@@ -0,0 +1,109 @@
+"""Tests for src/call_graph.py."""
+
+import pytest
+
+from src import call_graph
+from src.call_graph import CallGraph
+
+# MAIN -> A -> B (two copies), A -> C, pkg1 B -> C, pkg1 B -> MPI_SEND (external), C -> A (cycle)
+NODES = [(1, "MAIN", "model"), (2, "A", "model"), (3, "B", "pkg1"), (4, "B", "pkg2"), (5, "C", "model")]
+CALLS = [(0, "a", []), (1, "B", []), (1, "C", []), (1, "C", [4]), (2, "C", []), (2, "MPI_SEND", []), (4, "A", [])]
+
+
+@pytest.fixture
+def graph():
+    return CallGraph(NODES, CALLS, "package")
+
+
+def _names(tree):
+    return [(c["name"], c["package"]) for c in tree.get("children", [])]
+
+
+def test_edges_resolve_by_key_and_deduplicate(graph):
+    assert len(graph) == 6  # five subroutines + MPI_SEND
+    assert graph.edge_count == 7
+    assert graph.find("b") == [2, 3]
+    assert graph.find("B", "PKG2") == [3]
+    assert graph.describe(graph.find("mpi_send")[0]) == {"id": None, "name": "MPI_SEND", "package": None}
+    assert sorted(graph.neighbours(4, reverse=True).tolist()) == [1, 2]
+
+
+def test_resolved_targets_override_name_lookup():
+    graph = CallGraph(NODES, [(1, "B", [3]), (0, "B", [])], "package")
+    assert graph.neighbours(1).tolist() == [3]
+    assert graph.neighbours(0).tolist() == [2, 3]
+
+
+def test_tree_marks_seen_and_truncated(graph):
+    tree = graph.tree(0, depth=2)
+    assert tree["name"] == "MAIN"
+    a = tree["children"][0]
+    assert _names(a) == [("B", "pkg1"), ("B", "pkg2"), ("C", "model")]
+    assert a["children"][0]["truncated"] is True
+    assert a["children"][1] == {"id": 4, "name": "B", "package": "pkg2"}  # leaf
+    assert "children" not in a["children"][2] and a["children"][2]["truncated"]
+
+    deep = graph.tree(0, depth=5)
+    c = deep["children"][0]["children"][2]
+    assert _names(c) == [("A", "model")]
+    assert c["children"][0]["seen"] is True  # cycle back to A
+
+
+def test_tree_depth_zero_and_max_nodes(graph):
+    assert graph.tree(0, depth=0) == {"id": 1, "name": "MAIN", "package": "model", "truncated": True}
+    small = graph.tree(1, depth=5, max_nodes=2)
+    assert _names(small) == [("B", "pkg1")]  # A's other callees are cut off
+    assert small["truncated"] is True
+    assert "children" not in small["children"][0]
+
+
+def _count(tree):
+    return 1 + sum(_count(c) for c in tree.get("children", []))
+
+
+def test_max_nodes_is_a_hard_cap_on_wide_graphs():
+    # ROOT -> 40 children -> 40 grandchildren each
+    nodes = [(1, "ROOT", "p")] + [(i, f"S{i}", "p") for i in range(2, 1642)]
+    calls = [(0, f"S{c}", []) for c in range(2, 42)]
+    calls += [(c - 1, f"S{42 + (c - 2) * 40 + g}", []) for c in range(2, 42) for g in range(40)]
+    graph = CallGraph(nodes, calls, "package")
+    for max_nodes in (1, 2, 41, 45, 500, 1000):
+        tree = graph.tree(0, depth=5, max_nodes=max_nodes)
+        assert _count(tree) == min(max_nodes, 1641)
+    tree = graph.tree(0, depth=5, max_nodes=500)
+    assert len(tree["children"]) == 40
+    partial = [c for c in tree["children"] if "children" in c][-1]
+    assert partial["truncated"] is True and len(partial["children"]) < 40
+
+
+def test_reverse_tree(graph):
+    tree = graph.tree(graph.find("C")[0], depth=1, reverse=True)
+    assert _names(tree) == [("A", "model"), ("B", "pkg1")]
+
+
+def test_shortest_path(graph):
+    path = graph.shortest_path(graph.find("MAIN"), graph.find("MPI_SEND"))
+    assert [graph.names[i] for i in path] == ["MAIN", "A", "B", "MPI_SEND"]
+    assert graph.shortest_path(graph.find("MAIN"), graph.find("MPI_SEND"), max_depth=2) == []
+    assert graph.shortest_path(graph.find("C"), graph.find("MAIN")) == []
+    assert graph.shortest_path(graph.find("C"), graph.find("C")) == [4]
+
+
+def test_empty_graph():
+    graph = CallGraph([], [], "package")
+    assert len(graph) == 0 and graph.edge_count == 0
+    assert graph.shortest_path([], []) == []
+
+
+def test_get_graph_builds_once(tmp_path):
+    built = []
+
+    def load(path):
+        built.append(path)
+        return CallGraph(NODES, CALLS, "package")
+
+    call_graph.clear()
+    first = call_graph.get_graph(tmp_path / "x.duckdb", load)
+    assert call_graph.get_graph(tmp_path / "x.duckdb", load) is first
+    assert len(built) == 1
+    call_graph.clear()
@@ -0,0 +1,70 @@
+"""Tests for the shared ChromaDB client and collection registry in src/chroma_pool.py."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import chromadb
+import pytest
+
+from src import chroma_pool
+
+
+@pytest.fixture()
+def chroma_dir(tmp_path):
+    path = tmp_path / "chroma"
+    collection = chromadb.PersistentClient(path=str(path)).get_or_create_collection(
+        "built", metadata={"hnsw:space": "cosine"}
+    )
+    collection.add(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]], metadatas=[{"n": 1}, {"n": 2}])
+    yield path
+    chroma_pool.close(path)
+
+
+def test_client_is_reused(chroma_dir):
+    assert chroma_pool.get_client(chroma_dir) is chroma_pool.get_client(chroma_dir)
+
+
+def test_collection_handle_is_reused(chroma_dir):
+    assert chroma_pool.get_collection(chroma_dir, "built") is chroma_pool.get_collection(chroma_dir, "built")
+
+
+def test_equivalent_paths_share_a_handle(chroma_dir):
+    other = chroma_dir.parent / "x" / ".." / "chroma"
+    assert chroma_pool.get_collection(other, "built") is chroma_pool.get_collection(chroma_dir, "built")
+
+
+def test_existing_collection_is_opened_not_recreated(chroma_dir):
+    collection = chroma_pool.get_collection(chroma_dir, "built")
+    assert collection.count() == 2
+    assert collection.metadata["hnsw:space"] == "cosine"
+    result = collection.query(query_embeddings=[[1.0, 0.1]], n_results=1, include=["metadatas"])
+    assert result["metadatas"][0] == [{"n": 1}]
+
+
+def test_missing_collection_is_none_and_not_created(chroma_dir):
+    assert chroma_pool.get_collection(chroma_dir, "unbuilt") is None
+    names = [c.name for c in chromadb.PersistentClient(path=str(chroma_dir)).list_collections()]
+    assert names == ["built"]
+
+
+def test_collection_created_later_is_found(chroma_dir):
+    assert chroma_pool.get_collection(chroma_dir, "later") is None
+    created = chroma_pool.create_collection(chroma_dir, "later")
+    assert created.count() == 0
+    assert created.metadata["hnsw:space"] == "cosine"
+    assert chroma_pool.get_collection(chroma_dir, "later") is created
+
+
+def test_create_opens_an_existing_collection(chroma_dir):
+    assert chroma_pool.create_collection(chroma_dir, "built").count() == 2
+
+
+def test_concurrent_callers_share_one_handle(chroma_dir):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        handles = list(pool.map(lambda _: chroma_pool.get_collection(chroma_dir, "built"), range(32)))
+    assert all(h is handles[0] for h in handles)
+
+
+def test_close_forgets_handles(chroma_dir):
+    first = chroma_pool.get_collection(chroma_dir, "built")
+    chroma_pool.close(chroma_dir)
+    assert chroma_pool.get_collection(chroma_dir, "built") is not first
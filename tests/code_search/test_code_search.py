@@ -0,0 +1,116 @@
+"""Tests for src/code_search.py — trigram postings, pattern queries and grep."""
+
+import duckdb
+import pytest
+
+from src import code_search
+
+DOCS = [
+    (1, "      SUBROUTINE CG3D\n      DO it = 1, cg3dMaxIters\n      ENDDO\n"),
+    (2, "      NAMELIST /PARM02/ cg2dMaxIters, cg3dMaxIters\n"),
+    (3, "      CALL EXCH_XYZ_RL( theta, myThid )\n      CALL EXCH_XY_RS( etaN, myThid )\n"),
+    (4, "C     nothing to see\n"),
+]
+
+SQL = "SELECT 10, text, name FROM docs WHERE {candidates} ORDER BY id"
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE trigram_postings (source TEXT, trigram INTEGER, ids BLOB)")
+    con.execute("CREATE TABLE docs (id INTEGER, name TEXT, text TEXT)")
+    con.executemany("INSERT INTO docs VALUES (?, ?, ?)", [(i, f"DOC{i}", t) for i, t in DOCS])
+    code_search.write_postings(con, "docs", DOCS)
+    yield con
+    con.close()
+
+
+def _gram(s: str) -> int:
+    return int(code_search.trigrams(s)[0])
+
+
+def test_trigrams_are_case_insensitive_and_distinct():
+    assert code_search.trigrams("ABCabc").tolist() == sorted({_gram("abc"), _gram("bca"), _gram("cab")})
+    assert len(code_search.trigrams("ab")) == 0
+
+
+def test_write_postings_replaces_source(con):
+    assert con.execute("SELECT count(DISTINCT source) FROM trigram_postings").fetchone()[0] == 1
+    code_search.write_postings(con, "docs", [(9, "xyz")])
+    assert con.execute("SELECT trigram FROM trigram_postings WHERE source = 'docs'").fetchall() == [(_gram("xyz"),)]
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("cg3dMaxIters", [1, 2]),
+    ("cg[23]dMaxIters", [1, 2]),
+    ("EXCH_XYZ_RL|SUBROUTINE", [1, 3]),
+    (r"CALL EXCH_\w+_R[LS]", [3]),
+    ("(nothing)+ to", [4]),
+    ("no_such_text", []),
+])
+def test_candidates(con, pattern, expected):
+    assert code_search.Pattern(pattern).candidates(con, "docs") == expected
+
+
+@pytest.mark.parametrize("pattern", [".*", "a?b?c?", r"[a-z]+_\d", "ab|x.z"])
+def test_patterns_without_trigrams_scan_everything(con, pattern):
+    assert code_search.Pattern(pattern).candidates(con, "docs") is None
+
+
+def test_source_without_postings_is_scanned(con):
+    assert code_search.Pattern("cg3dMaxIters").candidates(con, "headers") is None
+
+
+def test_prefilter_is_active_on_this_python():
+    """The private regex parser grep relies on is importable and parses as expected."""
+    assert code_search.sre_parse is not None
+    assert code_search.Pattern("cg3dMaxIters").query is not None
+
+
+def test_without_the_regex_parser_everything_is_scanned(con, monkeypatch):
+    monkeypatch.setattr(code_search, "sre_parse", None)
+    compiled = code_search.Pattern("cg3dMaxIters")
+    assert compiled.query is None
+    assert [hit[2] for hit in code_search.grep(con, compiled, "docs", SQL, {}, 10)] == ["DOC1", "DOC2"]
+
+
+def test_unexpected_parse_tree_scans_everything(monkeypatch):
+    def parse(pattern, flags):
+        raise AttributeError("module 're._constants' has no attribute 'LITERAL'")
+
+    monkeypatch.setattr(code_search.sre_parse, "parse", parse)
+    assert code_search.Pattern("cg3dMaxIters").query is None
+
+
+def test_invalid_pattern():
+    with pytest.raises(ValueError, match="invalid regular expression"):
+        code_search.Pattern("CALL (")
+
+
+def test_lines_reports_each_matching_line_once():
+    text = "a = 1\nb = a + a\n\nc = 2"
+    assert list(code_search.Pattern("a").lines(text)) == [(0, "a = 1"), (1, "b = a + a")]
+    assert list(code_search.Pattern("^c").lines(text)) == [(3, "c = 2")]
+    assert list(code_search.Pattern("^$").lines(text)) == [(2, "")]
+
+
+def test_grep_file_lines_and_case(con):
+    assert code_search.grep(con, code_search.Pattern("cg3dmaxiters"), "docs", SQL, {}, 10) == []
+    hits = code_search.grep(con, code_search.Pattern("cg3dmaxiters", ignore_case=True), "docs", SQL, {}, 10)
+    assert hits == [(11, "      DO it = 1, cg3dMaxIters", "DOC1"),
+                    (10, "      NAMELIST /PARM02/ cg2dMaxIters, cg3dMaxIters", "DOC2")]
+
+
+def test_grep_limit(con):
+    hits = code_search.grep(con, code_search.Pattern("myThid"), "docs", SQL, {}, 1)
+    assert hits == [(10, "      CALL EXCH_XYZ_RL( theta, myThid )", "DOC3")]
+    assert code_search.grep(con, code_search.Pattern("myThid"), "docs", SQL, {}, 0) == []
+
+
+def test_grep_matches_scan(con):
+    """The trigram filter never drops a line a full scan would find."""
+    for pattern in ["cg.dMax", "EXCH_(XYZ|XY)_R", "(?i)subroutine", "ENDDO|NAMELIST", "it = 1"]:
+        compiled = code_search.Pattern(pattern)
+        scan = [(10 + i, line, f"DOC{d}") for d, text in DOCS for i, line in compiled.lines(text)]
+        assert code_search.grep(con, compiled, "docs", SQL, {}, 100) == scan
@@ -0,0 +1,61 @@
+"""Tests for src/doc_sections.py against both backend schemas."""
+
+import pytest
+
+from src.doc_sections import SECTION_KEY, read_section, sections_stored, write_sections
+from src.fesom2.indexer import schema as fesom2_schema
+from src.mitgcm.indexer import schema as mitgcm_schema
+
+
+@pytest.fixture(params=[mitgcm_schema, fesom2_schema], ids=["mitgcm", "fesom2"])
+def con(request, tmp_path):
+    con = request.param.connect(tmp_path / "index.duckdb")
+    yield con
+    con.close()
+
+
+def _write(con, sections):
+    return write_sections(con, sections, {"section_key": SECTION_KEY})
+
+
+def test_empty_table_is_not_stored(con):
+    assert not sections_stored(con)
+    assert read_section(con, "a.rst", "Intro", 0, 10) is None
+
+
+def test_read_pages_lines(con):
+    _write(con, [("a.rst", "Intro", "one\ntwo\nthree\nfour\n"), ("b.rst", "Intro", "other")])
+    assert sections_stored(con)
+    assert read_section(con, "a.rst", "Intro", 1, 2) == {
+        "file": "a.rst", "section": "Intro", "total_lines": 4, "offset": 1, "lines": ["two", "three"]}
+    assert read_section(con, "a.rst", "Intro", 3, 100)["lines"] == ["four"]
+    assert read_section(con, "a.rst", "Intro", 10, 5)["lines"] == []
+    assert read_section(con, "a.rst", "Intro", 0, 0)["lines"] == []
+    assert read_section(con, "a.rst", "Missing", 0, 5) is None
+
+
+def test_repeated_sections_merge_and_rewrite_replaces(con):
+    assert _write(con, [("a.rst", "Notes", "x\ny"), ("a.rst", "Notes", "z")]) == 1
+    assert read_section(con, "a.rst", "Notes", 0, 10)["lines"] == ["x", "y", "z"]
+    _write(con, [("c.rst", "", "only")])
+    assert read_section(con, "a.rst", "Notes", 0, 10) is None
+    assert read_section(con, "c.rst", "", 0, 10)["lines"] == ["only"]
+
+
+def test_key_separates_file_and_section(con):
+    _write(con, [("a", "b c", "first"), ("a b", "c", "second")])
+    assert read_section(con, "a", "b c", 0, 1)["lines"] == ["first"]
+    assert read_section(con, "a b", "c", 0, 1)["lines"] == ["second"]
+
+
+def test_lookup_uses_index(con):
+    _write(con, [(f"f{i}.rst", "S", "line\n" * 20) for i in range(5000)])
+    plan = con.execute(
+        "EXPLAIN ANALYZE SELECT lines FROM doc_sections WHERE section_key = ? || chr(31) || ?", ["f42.rst", "S"]
+    ).fetchall()[0][1]
+    assert "Index Scan" in plan
+
+
+def test_sections_are_numbered(con):
+    _write(con, [("a.rst", "Intro", "one"), ("b.rst", "Intro", "two"), ("a.rst", "Intro", "three")])
+    assert con.execute("SELECT id, file FROM doc_sections ORDER BY id").fetchall() == [(1, "a.rst"), (2, "b.rst")]
@@ -0,0 +1,39 @@
+"""Tests for src/duckdb_bulk.py."""
+
+import duckdb
+import pytest
+
+from src.duckdb_bulk import insert_rows
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT, n INTEGER)")
+    yield con
+    con.close()
+
+
+def test_inserts_rows_in_order(con):
+    assert insert_rows(con, "t", ["id", "name", "n"], [(1, "a", 10), (2, "b", 20)]) == 2
+    assert con.execute("SELECT * FROM t ORDER BY id").fetchall() == [(1, "a", 10), (2, "b", 20)]
+
+
+def test_column_subset_and_order(con):
+    insert_rows(con, "t", ["name", "id"], [("x", 7)])
+    assert con.execute("SELECT * FROM t").fetchall() == [(7, "x", None)]
+
+
+def test_nulls_preserved(con):
+    insert_rows(con, "t", ["id", "name", "n"], [(1, None, None), (2, "b", 3)])
+    assert con.execute("SELECT * FROM t ORDER BY id").fetchall() == [(1, None, None), (2, "b", 3)]
+
+
+def test_empty_rows_is_noop(con):
+    assert insert_rows(con, "t", ["id", "name", "n"], []) == 0
+    assert con.execute("SELECT count(*) FROM t").fetchone()[0] == 0
+
+
+def test_constraint_violation_raises(con):
+    with pytest.raises(duckdb.ConstraintException):
+        insert_rows(con, "t", ["id", "name", "n"], [(1, "a", 1), (1, "b", 2)])
@@ -0,0 +1,57 @@
+"""Tests for the read-only DuckDB connection pool in src/duckdb_pool.py."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+import pytest
+
+from src import duckdb_pool
+
+
+@pytest.fixture()
+def db_file(tmp_path):
+    path = tmp_path / "pool.duckdb"
+    con = duckdb.connect(str(path))
+    con.execute("CREATE TABLE t (id INTEGER, name TEXT)")
+    con.execute("INSERT INTO t SELECT range, 'n' || range FROM range(100)")
+    con.close()
+    yield path
+    duckdb_pool.close(path)
+
+
+def test_connection_is_reused(db_file):
+    assert duckdb_pool.get_connection(db_file) is duckdb_pool.get_connection(db_file)
+
+
+def test_cursor_reads_rows(db_file):
+    with duckdb_pool.cursor(db_file) as cur:
+        assert cur.execute("SELECT count(*) FROM t").fetchone()[0] == 100
+
+
+def test_connection_is_read_only(db_file):
+    with duckdb_pool.cursor(db_file) as cur:
+        with pytest.raises(duckdb.Error):
+            cur.execute("INSERT INTO t VALUES (1000, 'x')")
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(duckdb.IOException):
+        duckdb_pool.get_connection(tmp_path / "absent.duckdb")
+
+
+def test_concurrent_cursors(db_file):
+    def query(i: int) -> str:
+        with duckdb_pool.cursor(db_file) as cur:
+            return cur.execute("SELECT name FROM t WHERE id = ?", [i]).fetchone()[0]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        names = list(pool.map(query, range(100)))
+    assert names == [f"n{i}" for i in range(100)]
+
+
+def test_close_allows_writable_reopen(db_file):
+    duckdb_pool.get_connection(db_file)
+    duckdb_pool.close(db_file)
+    con = duckdb.connect(str(db_file))
+    con.execute("INSERT INTO t VALUES (1000, 'x')")
+    con.close()
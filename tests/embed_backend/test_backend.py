@@ -0,0 +1,186 @@
+"""Tests for the embedding backends in src/embed_backend.py.
+
+The ONNX backend is exercised with a fake tokenizer and session.  The
+equivalence check compares it with Ollama vectors recorded in
+ollama_reference.json, so it needs the ONNX model but not Ollama; with
+OGCMCP_REQUIRE_EMBED_REFERENCE set (``pixi run test-embed-reference``) a
+missing model or reference fails the check instead of skipping it.
+"""
+
+import json
+import math
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src import embed_backend
+from src.embed_backend import (
+    OllamaBackend,
+    OnnxBackend,
+    _mean_pool_normalize,
+    get_backend,
+    set_backend,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_backend():
+    set_backend(None)
+    yield
+    set_backend(None)
+
+
+# ── backend selection ─────────────────────────────────────────────────────────
+
+
+def test_default_backend_is_ollama(monkeypatch):
+    monkeypatch.delenv("OGCMCP_EMBED_BACKEND", raising=False)
+    assert isinstance(get_backend(), OllamaBackend)
+
+
+def test_env_selects_onnx(monkeypatch):
+    monkeypatch.setenv("OGCMCP_EMBED_BACKEND", "onnx")
+    assert isinstance(get_backend(), OnnxBackend)
+
+
+def test_unknown_backend_raises(monkeypatch):
+    monkeypatch.setenv("OGCMCP_EMBED_BACKEND", "word2vec")
+    with pytest.raises(ValueError, match="word2vec"):
+        get_backend()
+
+
+def test_model_ids_differ_between_backends():
+    assert OllamaBackend().model_id != OnnxBackend().model_id
+
+
+def test_embed_texts_dispatches_to_backend():
+    class Fake:
+        name = "fake"
+        model_id = "fake/model"
+
+        def embed(self, texts):
+            return [[float(len(t))] for t in texts]
+
+    set_backend(Fake())
+    assert embed_backend.embed_texts(["ab", "abc"]) == [[2.0], [3.0]]
+
+
+# ── pooling ───────────────────────────────────────────────────────────────────
+
+
+def test_mean_pool_ignores_padding():
+    hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]])
+    mask = np.array([[1, 1, 0]])
+    pooled = _mean_pool_normalize(hidden, mask)
+    assert np.allclose(pooled, [[1.0, 0.0]])
+
+
+def test_mean_pool_rows_are_unit_length():
+    rng = np.random.default_rng(0)
+    pooled = _mean_pool_normalize(rng.normal(size=(4, 7, 16)), np.ones((4, 7), dtype=np.int64))
+    assert np.allclose(np.linalg.norm(pooled, axis=1), 1.0)
+
+
+# ── OnnxBackend ───────────────────────────────────────────────────────────────
+
+
+def test_onnx_missing_model_raises(tmp_path):
+    with pytest.raises(FileNotFoundError, match="fetch-onnx-model"):
+        OnnxBackend(model_dir=tmp_path).embed(["x"])
+
+
+def test_onnx_embed_with_fake_session(tmp_path):
+    class FakeTokenizer:
+        def encode_batch(self, texts):
+            # pad every text to 3 tokens; real tokens = len(text) capped at 3
+            out = []
+            for t in texts:
+                n = min(len(t), 3)
+                out.append(SimpleNamespace(
+                    ids=[1] * n + [0] * (3 - n),
+                    attention_mask=[1] * n + [0] * (3 - n),
+                    type_ids=[0] * 3,
+                ))
+            return out
+
+    class FakeSession:
+        def get_inputs(self):
+            return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+        def run(self, _outputs, feeds):
+            assert set(feeds) == {"input_ids", "attention_mask"}
+            batch = feeds["input_ids"].shape[0]
+            hidden = np.zeros((batch, 3, 2))
+            hidden[:, 0, 0] = 3.0
+            hidden[:, 1:, 1] = 4.0
+            return [hidden]
+
+    backend = OnnxBackend(model_dir=tmp_path)
+    backend._tokenizer = FakeTokenizer()
+    backend._session = FakeSession()
+    one_token, two_tokens = backend.embed(["a", "ab"])
+    assert np.allclose(one_token, [1.0, 0.0])
+    assert np.allclose(two_tokens, [0.6, 0.8])
+
+
+# ── equivalence ───────────────────────────────────────────────────────────────
+
+
+def _cosine(a, b) -> float:
+    return sum(x * y for x, y in zip(a, b)) / (math.hypot(*a) * math.hypot(*b))
+
+
+def _require(condition: bool, reason: str) -> None:
+    if condition:
+        return
+    if os.environ.get("OGCMCP_REQUIRE_EMBED_REFERENCE"):
+        pytest.fail(reason)
+    pytest.skip(reason)
+
+
+def test_record_reference_writes_texts_and_vectors(tmp_path):
+    class _Fixed:
+        model_id = "fixed/test"
+
+        def embed(self, texts):
+            return [[0.6, 0.8] for _ in texts]
+
+    path = embed_backend.record_reference(tmp_path / "ref.json", _Fixed(), ("a", "b"))
+    assert json.loads(path.read_text()) == {
+        "model": "fixed/test", "texts": ["a", "b"], "vectors": [[0.6, 0.8], [0.6, 0.8]]}
+
+
+def test_onnx_matches_recorded_ollama_vectors():
+    reference = embed_backend.REFERENCE_PATH
+    _require(reference.exists(), f"{reference} not recorded; run `python -m src.embed_backend reference`")
+    _require(
+        all((embed_backend.ONNX_MODEL_DIR / f).exists() for f in embed_backend.ONNX_FILES),
+        "ONNX model not fetched; run `pixi run fetch-onnx-model`",
+    )
+    record = json.loads(reference.read_text())
+    assert record["model"] == f"ollama/{embed_backend.EMBED_MODEL}"
+    onnx = OnnxBackend().embed(record["texts"])
+    for text, a, b in zip(record["texts"], record["vectors"], onnx):
+        assert _cosine(a, b) >= 0.99, text
+
+
+def _ollama_available() -> bool:
+    try:
+        OllamaBackend().embed(["ping"])
+        return True
+    except Exception:
+        return False
+
+
+@pytest.mark.skipif(
+    not all((embed_backend.ONNX_MODEL_DIR / f).exists() for f in embed_backend.ONNX_FILES),
+    reason="ONNX model not fetched",
+)
+def test_onnx_matches_ollama():
+    if not _ollama_available():
+        pytest.skip("Ollama not reachable")
+    texts = list(embed_backend.REFERENCE_TEXTS)
+    for a, b in zip(OllamaBackend().embed(texts), OnnxBackend().embed(texts)):
+        assert _cosine(a, b) >= 0.99
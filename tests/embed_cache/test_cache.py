@@ -0,0 +1,137 @@
+"""Tests for QueryEmbeddingCache in src/embed_cache.py.
+
+Uses a temporary SQLite file; no Ollama required.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src import embed_backend
+from src.embed_cache import QueryEmbeddingCache, normalize_key, query_cache_path
+
+
+def _counting_embed(calls: list):
+    def embed(text: str) -> list[float]:
+        calls.append(text)
+        return [float(len(text)), 0.5, -1.0]
+    return embed
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    return QueryEmbeddingCache(tmp_path / "q.sqlite", "test-model", max_memory=2, max_disk=3)
+
+
+def test_normalize_key_collapses_whitespace():
+    assert normalize_key("  zonal   Wind\tFile \n") == "zonal Wind File"
+
+
+def test_miss_then_hit(cache):
+    calls = []
+    cache.get_or_embed("wind stress", _counting_embed(calls))
+    cache.get_or_embed("wind stress", _counting_embed(calls))
+    assert calls == ["wind stress"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_whitespace_variants_share_entry(cache):
+    calls = []
+    cache.get_or_embed("wind stress", _counting_embed(calls))
+    cache.get_or_embed("  wind   stress ", _counting_embed(calls))
+    assert len(calls) == 1
+
+
+def test_embed_receives_normalized_text(cache):
+    calls = []
+    cache.get_or_embed(" wind \n stress", _counting_embed(calls))
+    assert calls == ["wind stress"]
+
+
+def test_memory_tier_is_bounded(cache):
+    for q in ("a", "b", "c"):
+        cache.put(q, [1.0])
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_tier_is_bounded(cache):
+    for q in ("a", "b", "c", "d", "e"):
+        cache.put(q, [1.0])
+    assert cache.stats()["disk_entries"] == 3
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = tmp_path / "q.sqlite"
+    QueryEmbeddingCache(path, "m").put("query", [0.25, 0.5])
+    fresh = QueryEmbeddingCache(path, "m")
+    assert fresh.get("query") == [0.25, 0.5]
+    assert fresh.disk_hits == 1
+
+
+def test_disk_tier_keyed_by_model(tmp_path):
+    path = tmp_path / "q.sqlite"
+    QueryEmbeddingCache(path, "model-a").put("query", [1.0])
+    assert QueryEmbeddingCache(path, "model-b").get("query") is None
+
+
+def test_unwritable_path_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a directory")
+    cache = QueryEmbeddingCache(blocker / "q.sqlite", "m")
+    cache.put("query", [1.0])
+    assert cache.get("query") == [1.0]
+
+
+def test_hit_rate(cache):
+    cache.put("q", [1.0])
+    cache.get("q")
+    cache.get("other")
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_query_cache_path_default(monkeypatch):
+    monkeypatch.delenv("OGCMCP_CACHE_DIR", raising=False)
+    assert query_cache_path("mitgcm").as_posix() == "data/mitgcm/query_cache.sqlite"
+
+
+def test_query_cache_path_env_override(monkeypatch, tmp_path):
+    monkeypatch.setenv("OGCMCP_CACHE_DIR", str(tmp_path))
+    assert query_cache_path("fesom2") == tmp_path / "fesom2" / "query_cache.sqlite"
+
+
+def test_get_or_embed_many_embeds_distinct_misses_once(cache):
+    calls = []
+
+    def embed(texts):
+        calls.append(texts)
+        return [[float(len(t))] for t in texts]
+
+    cache.put("tide", [9.0])
+    vectors = cache.get_or_embed_many(["wind  stress", "tide", "wind stress", "eddy"], embed)
+    assert calls == [["wind stress", "eddy"]]
+    assert vectors == [[11.0], [9.0], [11.0], [4.0]]
+    assert cache.get_or_embed_many(["eddy"], embed) == [[4.0]]
+    assert len(calls) == 1
+
+
+class _NamedBackend:
+    name = "named"
+    model_id = "named/model"
+
+
+def test_model_defaults_to_backend_on_first_use(tmp_path):
+    cache = QueryEmbeddingCache(tmp_path / "q.sqlite")
+    embed_backend.set_backend(_NamedBackend())
+    try:
+        cache.put("query", [1.0])
+        assert cache.model == "named/model"
+    finally:
+        embed_backend.set_backend(None)
+    assert QueryEmbeddingCache(tmp_path / "q.sqlite", "named/model").get("query") == [1.0]
+
+
+def test_bad_backend_does_not_break_tools_import():
+    env = {**os.environ, embed_backend.BACKEND_ENV: "no-such-backend"}
+    subprocess.run([sys.executable, "-c", "import src.mitgcm.tools, src.fesom2.tools"], env=env, check=True)
@@ -0,0 +1,113 @@
+"""Tests for ChunkEmbeddingCache and embed_chunks in src/embed_cache.py.
+
+Uses a temporary SQLite file and a stub backend; no Ollama required.
+"""
+
+import logging
+
+import pytest
+
+from src import embed_cache
+from src.embed_backend import set_backend
+from src.embed_cache import ChunkEmbeddingCache
+
+
+class _CountingEmbed:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(t)), 0.5, -1.0] for t in texts]
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    return ChunkEmbeddingCache(tmp_path / "chunks.sqlite", "test-model")
+
+
+def test_only_misses_are_embedded(cache):
+    embed = _CountingEmbed()
+    cache.embed(["a", "bb"], embed)
+    vecs = cache.embed(["bb", "ccc", "a"], embed)
+    assert embed.calls == [["a", "bb"], ["ccc"]]
+    assert [v[0] for v in vecs] == [2.0, 3.0, 1.0]
+    assert cache.stats() == {"hits": 2, "misses": 3, "hit_rate": 0.4}
+
+
+def test_duplicate_texts_embedded_once(cache):
+    embed = _CountingEmbed()
+    vecs = cache.embed(["x", "x", "y"], embed)
+    assert embed.calls == [["x", "y"]]
+    assert vecs[0] == vecs[1]
+
+
+def test_full_hit_skips_embed(cache):
+    embed = _CountingEmbed()
+    cache.embed(["a"], embed)
+    cache.embed(["a"], embed)
+    assert len(embed.calls) == 1
+
+
+def test_persists_across_instances(tmp_path):
+    embed = _CountingEmbed()
+    ChunkEmbeddingCache(tmp_path / "c.sqlite", "m").embed(["chunk"], embed)
+    vec = ChunkEmbeddingCache(tmp_path / "c.sqlite", "m").embed(["chunk"], embed)
+    assert len(embed.calls) == 1
+    assert vec == [[5.0, 0.5, -1.0]]
+
+
+def test_keyed_by_model(tmp_path):
+    embed = _CountingEmbed()
+    ChunkEmbeddingCache(tmp_path / "c.sqlite", "model-a").embed(["chunk"], embed)
+    ChunkEmbeddingCache(tmp_path / "c.sqlite", "model-b").embed(["chunk"], embed)
+    assert len(embed.calls) == 2
+
+
+def test_failed_embed_caches_nothing(cache):
+    def boom(texts):
+        raise RuntimeError("server busy")
+
+    with pytest.raises(RuntimeError):
+        cache.embed(["a"], boom)
+    embed = _CountingEmbed()
+    cache.embed(["a"], embed)
+    assert embed.calls == [["a"]]
+
+
+def test_unwritable_path_passes_through(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = ChunkEmbeddingCache(blocker / "sub" / "c.sqlite", "m")
+    embed = _CountingEmbed()
+    cache.embed(["a"], embed)
+    cache.embed(["a"], embed)
+    assert len(embed.calls) == 2
+
+
+def test_embed_chunks_uses_backend_and_logs(tmp_path, monkeypatch, caplog):
+    class Backend:
+        name = "stub"
+        model_id = "stub/model"
+
+        def __init__(self):
+            self.calls = []
+
+        def embed(self, texts):
+            self.calls.append(list(texts))
+            return [[1.0, 0.0] for _ in texts]
+
+    backend = Backend()
+    monkeypatch.setenv("OGCMCP_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(embed_cache, "_chunk_caches", {})
+    set_backend(backend)
+    try:
+        embed_cache.embed_chunks(["p", "q"])
+        embed_cache.embed_chunks(["q", "r"])
+        with caplog.at_level(logging.INFO):
+            embed_cache.log_chunk_cache_stats(logging.getLogger("test"))
+    finally:
+        set_backend(None)
+    assert backend.calls == [["p", "q"], ["r"]]
+    assert (tmp_path / "embedding_cache.sqlite").exists()
+    assert "1 hit(s), 3 miss(es) (25% hit rate)" in caplog.text
@@ -0,0 +1,116 @@
+"""Tests for src/embed_journal.py and resuming via embed_and_upsert.
+
+Embedding is stubbed; no Ollama or ChromaDB required.
+"""
+
+import random
+
+import pytest
+
+from src.embed_journal import CheckpointJournal, journal_path
+from src.embed_scheduler import embed_and_upsert
+
+
+def _chunks(n):
+    return [(f"c{i}", f"document {i}", {"i": i}) for i in range(n)]
+
+
+class _Collection:
+    def __init__(self):
+        self.ids = []
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.ids.extend(ids)
+
+
+def test_journal_path_inside_chroma_dir(tmp_path):
+    assert journal_path(tmp_path / "chroma", "subroutines") == tmp_path / "chroma" / "subroutines.journal"
+
+
+def test_record_and_reload(tmp_path):
+    j = CheckpointJournal(tmp_path / "x.journal")
+    j.record(_chunks(3))
+    j.close()
+    reloaded = CheckpointJournal(tmp_path / "x.journal")
+    assert len(reloaded) == 3
+    assert reloaded.is_done("c1", "document 1")
+
+
+def test_changed_document_not_done(tmp_path):
+    j = CheckpointJournal(tmp_path / "x.journal")
+    j.record(_chunks(1))
+    assert not j.is_done("c0", "document 0, edited")
+
+
+def test_torn_last_line_ignored(tmp_path):
+    path = tmp_path / "x.journal"
+    j = CheckpointJournal(path)
+    j.record(_chunks(2))
+    j.close()
+    with open(path, "a") as f:
+        f.write("c2\tdeadbeef")           # pre-empted mid-write
+    assert len(CheckpointJournal(path)) == 2
+
+
+def test_finish_removes_file(tmp_path):
+    j = CheckpointJournal(tmp_path / "x.journal")
+    j.record(_chunks(1))
+    j.finish()
+    assert not (tmp_path / "x.journal").exists()
+
+
+def test_interrupted_run_resumes_in_any_order(tmp_path):
+    journal = tmp_path / "chroma" / "c.journal"
+    chunks = _chunks(30)
+    embedded = []
+
+    class _FailingAfter10(_Collection):
+        def upsert(self, ids, embeddings, documents, metadatas):
+            if len(embedded) >= 10:
+                raise RuntimeError("pre-empted")
+            embedded.extend(documents)
+
+    with pytest.raises(RuntimeError, match="pre-empted"):
+        embed_and_upsert(_FailingAfter10(), chunks, journal=journal, embed=lambda docs: [[1.0] for _ in docs],
+                         max_in_flight=1, max_batch_chars=20, max_attempts=1)
+    assert journal.exists()
+    first_pass = set(embedded)
+
+    shuffled = chunks[:]
+    random.Random(0).shuffle(shuffled)
+    second = []
+
+    def embed(docs):
+        second.extend(docs)
+        return [[1.0] for _ in docs]
+
+    coll = _Collection()
+    embed_and_upsert(coll, shuffled, journal=journal, embed=embed)
+    assert first_pass.isdisjoint(second)
+    assert first_pass | set(second) == {c[1] for c in chunks}
+    assert not journal.exists()
+
+
+def test_skipped_chunks_are_not_journaled(tmp_path):
+    journal = tmp_path / "chroma" / "c.journal"
+    chunks = _chunks(6)
+
+    def embed(docs):
+        if "document 3" in docs:
+            raise RuntimeError("500 internal error")
+        return [[1.0] for _ in docs]
+
+    coll = _Collection()
+    embed_and_upsert(coll, chunks, journal=journal, embed=embed, max_attempts=1)
+    assert sorted(coll.ids) == ["c0", "c1", "c2", "c4", "c5"]
+    assert journal.exists()  # kept so that the next run retries c3
+
+    retried = []
+
+    def embed_again(docs):
+        retried.extend(docs)
+        return [[1.0] for _ in docs]
+
+    embed_and_upsert(_Collection(), chunks, journal=journal, embed=embed_again)
+    assert retried == ["document 3"]
+    assert not journal.exists()
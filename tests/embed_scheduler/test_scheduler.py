@@ -0,0 +1,191 @@
+"""Tests for src/embed_scheduler.py.
+
+Embedding is stubbed; no Ollama or ChromaDB required.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.embed_scheduler import EmbedScheduler, embed_and_upsert, pack_batches
+
+
+def _chunks(sizes):
+    return [(f"c{i}", "x" * n, {"i": i}) for i, n in enumerate(sizes)]
+
+
+def _vec(text):
+    return [float(len(text)), 1.0]
+
+
+def _run(scheduler, chunks):
+    batches = []
+    done = asyncio.run(scheduler.run(chunks, batches.append))
+    return done, batches
+
+
+# ---------------------------------------------------------------------------
+# pack_batches
+# ---------------------------------------------------------------------------
+
+def test_pack_batches_by_character_budget():
+    batches = pack_batches(_chunks([40, 40, 40, 10, 100, 5]), max_chars=100)
+    assert [[c[0] for c in b] for b in batches] == [["c0", "c1"], ["c2", "c3"], ["c4"], ["c5"]]
+
+
+def test_pack_batches_oversized_chunk_alone():
+    batches = pack_batches(_chunks([10, 500, 10]), max_chars=100)
+    assert [len(b) for b in batches] == [1, 1, 1]
+
+
+def test_many_small_chunks_share_a_batch():
+    assert len(pack_batches(_chunks([50] * 100), max_chars=40_000)) == 1
+
+
+# ---------------------------------------------------------------------------
+# EmbedScheduler
+# ---------------------------------------------------------------------------
+
+def test_every_chunk_upserted_once():
+    chunks = _chunks([30] * 25)
+    s = EmbedScheduler(embed=lambda docs: [_vec(d) for d in docs], max_batch_chars=100)
+    done, batches = _run(s, chunks)
+    ids = [i for b in batches for i in b[0]]
+    assert done == 25
+    assert sorted(ids) == sorted(c[0] for c in chunks)
+    for ids_, embs, docs, metas in batches:
+        assert len(ids_) == len(embs) == len(docs) == len(metas)
+
+
+def test_in_flight_requests_are_bounded():
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def embed(docs):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.02)
+        with lock:
+            state["now"] -= 1
+        return [_vec(d) for d in docs]
+
+    s = EmbedScheduler(embed=embed, max_in_flight=3, max_batch_chars=10)
+    _run(s, _chunks([10] * 12))
+    assert 1 < state["peak"] <= 3
+
+
+def test_upserts_stream_while_embedding():
+    first_upsert = threading.Event()
+    seen_before_last = []
+
+    def embed(docs):
+        if docs[0] == "x" * 11:          # last batch waits for an earlier upsert
+            seen_before_last.append(first_upsert.wait(timeout=5))
+        return [_vec(d) for d in docs]
+
+    def upsert(_batch):
+        first_upsert.set()
+
+    s = EmbedScheduler(embed=embed, max_in_flight=2, max_batch_chars=10)
+    asyncio.run(s.run(_chunks([10, 10, 10, 11]), upsert))
+    assert seen_before_last == [True]
+
+
+def test_transient_failures_are_retried():
+    attempts = []
+
+    def flaky(docs):
+        attempts.append(len(docs))
+        if len(attempts) < 3:
+            raise ConnectionError("server busy")
+        return [_vec(d) for d in docs]
+
+    s = EmbedScheduler(embed=flaky, base_delay=0.0)
+    done, batches = _run(s, _chunks([10, 10]))
+    assert done == 2 and len(attempts) == 3
+    assert batches[0][0] == ["c0", "c1"]
+
+
+def test_backoff_is_jittered_and_capped():
+    s = EmbedScheduler(base_delay=1.0, max_delay=5.0)
+    delays = [s._backoff(a) for a in range(10) for _ in range(20)]
+    assert all(0 <= d <= 5.0 for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_bad_chunk_isolated_by_bisection():
+    def embed(docs):
+        if any("!" in d for d in docs) and len(docs) > 1:
+            raise RuntimeError("500 internal error")
+        return [_vec(d) for d in docs]
+
+    chunks = _chunks([10] * 4) + [("bad", "!" * 10, {})]
+    s = EmbedScheduler(embed=embed, base_delay=0.0, max_attempts=2, max_batch_chars=1000)
+    done, batches = _run(s, chunks)
+    ids = sorted(i for b in batches for i in b[0])
+    assert done == 5 and ids == ["bad", "c0", "c1", "c2", "c3"]
+
+
+def test_chunk_that_keeps_failing_is_skipped():
+    def embed(docs):
+        if any("!" in d for d in docs):
+            raise RuntimeError("500 internal error")
+        return [_vec(d) for d in docs]
+
+    chunks = _chunks([10] * 3) + [("bad", "!" * 10, {})]
+    s = EmbedScheduler(embed=embed, base_delay=0.0, max_attempts=2, max_batch_chars=1000)
+    done, batches = _run(s, chunks)
+    assert done == 4
+    assert sorted(i for b in batches for i in b[0]) == ["c0", "c1", "c2"]
+    assert s.failed == ["bad"]
+
+
+def test_split_chunk_with_a_skipped_half_counts_as_failed():
+    def embed(docs):
+        if any(len(d) > 50 or "z" in d for d in docs):
+            raise ValueError("input length exceeds context length")
+        return [_vec(d) for d in docs]
+
+    s = EmbedScheduler(embed=embed, base_delay=0.0, max_attempts=2)
+    done, batches = _run(s, [("big", "y" * 40 + "z" * 40, {}), ("ok", "y" * 10, {})])
+    assert sorted(i for b in batches for i in b[0]) == ["big_a", "ok"]
+    assert s.failed == ["big"]
+
+
+def test_persistent_failure_of_every_chunk_raises():
+    def embed(docs):
+        raise RuntimeError("model not found")
+
+    s = EmbedScheduler(embed=embed, base_delay=0.0, max_attempts=2)
+    with pytest.raises(RuntimeError, match="model not found"):
+        _run(s, _chunks([10]))
+
+
+def test_oversized_chunk_split_in_halves():
+    def embed(docs):
+        if any(len(d) > 50 for d in docs):
+            raise ValueError("input length exceeds context length")
+        return [_vec(d) for d in docs]
+
+    s = EmbedScheduler(embed=embed, base_delay=0.0, max_attempts=2)
+    done, batches = _run(s, [("big", "y" * 80, {"k": 1})])
+    ids, embs, docs, metas = batches[0]
+    assert ids == ["big_a", "big_b"]
+    assert [len(d) for d in docs] == [40, 40]
+    assert metas == [{"k": 1}, {"k": 1}]
+
+
+def test_embed_and_upsert_writes_to_collection():
+    class Collection:
+        def __init__(self):
+            self.ids = []
+
+        def upsert(self, ids, embeddings, documents, metadatas):
+            self.ids.extend(ids)
+
+    coll = Collection()
+    n = embed_and_upsert(coll, _chunks([5, 5, 5]), embed=lambda docs: [_vec(d) for d in docs])
+    assert n == 3 and sorted(coll.ids) == ["c0", "c1", "c2"]
@@ -1,9 +1,9 @@
-"""Tests for _chunk_text in src/embed_utils.py.
+"""Tests for _chunk_text and the incremental-embedding helpers in src/embed_utils.py.
 
 All tests use synthetic strings — no DuckDB or ollama required.
 """
 
-from src.embed_utils import OVERLAP, MAX_CHARS, _chunk_text
+from src.embed_utils import OVERLAP, MAX_CHARS, _chunk_text, source_hash, stale_db_ids
 
 
 def test_short_text_returns_single_chunk():
@@ -65,3 +65,39 @@ def test_all_positions_covered():
                 covered[pos + j] = True
         pos += step
     assert all(covered)
+
+
+# ---------------------------------------------------------------------------
+# source_hash / stale_db_ids
+# ---------------------------------------------------------------------------
+
+class _FakeCollection:
+    def __init__(self, metadatas):
+        self.metadatas = metadatas
+
+    def get(self, include):
+        return {"metadatas": self.metadatas}
+
+
+def test_source_hash_is_stable_and_content_sensitive():
+    assert source_hash("abc") == source_hash("abc")
+    assert source_hash("abc") != source_hash("abd")
+
+
+def test_stale_db_ids():
+    coll = _FakeCollection([
+        {"db_id": 1, "source_hash": source_hash("one")},
+        {"db_id": 1, "source_hash": source_hash("one")},   # second chunk
+        {"db_id": 2, "source_hash": source_hash("two")},
+        {"db_id": 3, "source_hash": source_hash("three")},
+        {"db_id": 4},                                       # predates source_hash
+    ])
+    current = {
+        1: source_hash("one"),
+        2: source_hash("two, edited"),
+        4: source_hash("four"),
+        5: source_hash("five"),
+    }
+    to_delete, to_embed = stale_db_ids(coll, current)
+    assert to_delete == [2, 3, 4]
+    assert to_embed == [2, 4, 5]
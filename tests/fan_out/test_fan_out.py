@@ -0,0 +1,54 @@
+"""Tests for src/fan_out.py: concurrent collection queries and calibrated merging."""
+
+import threading
+import time
+
+import pytest
+
+from src import fan_out
+
+
+def test_gather_runs_calls_concurrently():
+    threads = set()
+
+    def slow(record):
+        def call():
+            threads.add(threading.current_thread())
+            time.sleep(0.2)
+            return [(0.1, record)]
+        return call
+
+    t0 = time.perf_counter()
+    out = fan_out.gather({"a": slow({"x": 1}), "b": slow({"x": 2}), "c": slow({"x": 3})})
+    assert time.perf_counter() - t0 < 0.45
+    assert len(threads) == 3
+    assert out == {"a": [(0.1, {"x": 1})], "b": [(0.1, {"x": 2})], "c": [(0.1, {"x": 3})]}
+
+
+def test_gather_drops_failing_source(caplog):
+    def broken():
+        raise RuntimeError("collection missing")
+
+    assert fan_out.gather({"ok": lambda: [(0.2, {})], "bad": broken}) == {"ok": [(0.2, {})], "bad": []}
+    assert "bad skipped" in caplog.text
+
+
+def test_calibrate_is_relative_to_the_source():
+    assert fan_out.calibrate([]) == []
+    assert fan_out.calibrate([(0.3, {})]) == [0.0]
+    scores = fan_out.calibrate([(0.1, {}), (0.3, {}), (0.5, {})])
+    assert scores == pytest.approx([1.2247, 0.0, -1.2247], abs=1e-3)
+    # an equally spread list further from the query scores the same
+    assert fan_out.calibrate([(0.5, {}), (0.7, {}), (0.9, {})]) == pytest.approx(scores)
+
+
+def test_merge_prefers_hit_that_stands_out_in_its_collection():
+    by_source = {
+        # namelist descriptions: all close to the query, none stands out
+        "namelist": [(0.20, {"param_name": "a"}), (0.21, {"param_name": "b"}), (0.22, {"param_name": "c"})],
+        # source code: far from every query, one routine well ahead of the rest
+        "code": [(0.40, {"name": "X"}), (0.60, {"name": "Y"}), (0.62, {"name": "Z"})],
+    }
+    merged = fan_out.merge(by_source, 2)
+    assert [(r["source"], r.get("name") or r.get("param_name")) for r in merged] == [("code", "X"), ("namelist", "a")]
+    assert merged[0]["score"] > merged[1]["score"]
@@ -89,6 +89,13 @@ def test_iter_extra_files_skips_empty(tmp_path):
     assert "src/empty.h" not in files
 
 
+def test_iter_extra_files_keeps_leading_lines(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "foo.inc").write_text("\n\n  x = 1\n\n")
+    assert _iter_extra_files(tmp_path)[0]["text"] == "\n\n  x = 1"
+
+
 def test_iter_extra_files_text_field(tmp_path):
     src = tmp_path / "src"
     src.mkdir()
@@ -149,6 +149,7 @@ END MODULE foo
 """
     _, subs = extract_file(_write(src))
     assert subs[0].calls.count("BAZ") == 1
+    assert subs[0].call_lines == {"BAZ": 4}
 
 
 # ---------------------------------------------------------------------------
@@ -202,6 +203,7 @@ def test_cross_subroutine_call():
     _, subs = extract_file(_write(MULTI_SUB))
     beta = next(s for s in subs if s.name == "beta")
     assert "ALPHA" in beta.calls
+    assert beta.call_lines["ALPHA"] == 7
 
 
 # ---------------------------------------------------------------------------
@@ -181,17 +181,17 @@ def _make_db(f90_content: str, nml_content: str) -> object:
     mods, _ = extract_file(f90_path)
     sub_id = 1
     for mod in mods:
-        con.execute("INSERT INTO modules VALUES (?, ?, ?, ?, ?)",
+        con.execute("INSERT INTO modules (id, name, file, start_line, end_line) VALUES (?, ?, ?, ?, ?)",
                     [sub_id, mod.name, mod.file, mod.start_line, mod.end_line])
         for group, params, line in mod.namelist_groups:
             for param in params:
-                con.execute("INSERT INTO namelist_refs VALUES (?, ?, ?, ?, ?)",
+                con.execute("INSERT INTO namelist_refs (param_name, namelist_group, file, module_name, line) VALUES (?, ?, ?, ?, ?)",
                             [param, group, mod.file, mod.name, line])
         sub_id += 1
 
     nml_path = _write_nml(nml_content)
     for config_file, group, param, desc in parse_config_file(nml_path):
-        con.execute("INSERT INTO namelist_descriptions VALUES (?, ?, ?, ?)",
+        con.execute("INSERT INTO namelist_descriptions (param_name, namelist_group, config_file, description) VALUES (?, ?, ?, ?)",
                     [param, group, config_file, desc])
     return con
 
@@ -0,0 +1,353 @@
+"""Tests for src/fesom2/indexer/pipeline.py.
+
+Builds a small synthetic FESOM2 tree and checks full and incremental runs.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from src import duckdb_pool
+from src.fesom2.indexer import pipeline
+from src.fesom2.indexer.schema import connect
+
+MODULE = """\
+module {name}
+  use o_param
+  implicit none
+  namelist /{name}_nml/ alpha, beta
+contains
+  subroutine {name}_step(mesh)
+    call {callee}(mesh)
+  end subroutine {name}_step
+end module {name}
+"""
+
+
+@pytest.fixture
+def fesom2_tree(tmp_path, monkeypatch):
+    root = tmp_path / "FESOM2"
+    src = root / "src"
+    src.mkdir(parents=True)
+    for i in range(4):
+        (src / f"mod_{i}.F90").write_text(MODULE.format(name=f"mod_{i}", callee="exchange"))
+    monkeypatch.setattr(pipeline, "FESOM2_ROOT", root)
+    monkeypatch.setattr(pipeline, "_F90_DIRS", [src])
+    monkeypatch.setattr(pipeline, "_PF_DIRS", [])
+    monkeypatch.setattr(pipeline, "_INT_RECOM_DIR", src / "int_recom")
+    monkeypatch.setattr(pipeline, "fesom2_sha", lambda: "f" * 40)
+    monkeypatch.setattr(pipeline, "parse_all_config_files",
+                        lambda: [("namelist.oce", "oce_nml", "alpha", "A coefficient")])
+    return src
+
+
+def _content(db_path: Path) -> dict[str, list[tuple]]:
+    """Table contents without surrogate IDs."""
+    con = connect(db_path)
+    try:
+        return {
+            "modules": con.execute("SELECT name, file, start_line, end_line FROM modules ORDER BY ALL").fetchall(),
+            "subroutines": con.execute(
+                "SELECT name, module_name, file, start_line, source_text, n_lines FROM subroutines ORDER BY ALL").fetchall(),
+            "source_lines": con.execute(
+                "SELECT s.name, s.module_name, l.line_no, l.line FROM source_lines l "
+                "JOIN subroutines s ON s.id = l.subroutine_id ORDER BY ALL").fetchall(),
+            "uses": con.execute("SELECT module_name, used_module FROM uses ORDER BY ALL").fetchall(),
+            "calls": con.execute("SELECT caller_name, caller_module, callee_name FROM calls ORDER BY ALL").fetchall(),
+            "namelist_refs": con.execute(
+                "SELECT param_name, namelist_group, file, module_name, line FROM namelist_refs ORDER BY ALL").fetchall(),
+            "namelist_descriptions": con.execute(
+                "SELECT param_name, namelist_group, config_file, description FROM namelist_descriptions ORDER BY ALL"
+            ).fetchall(),
+        }
+    finally:
+        con.close()
+
+
+def _sub_ids(db_path: Path) -> dict[str, int]:
+    con = connect(db_path)
+    try:
+        return dict(con.execute("SELECT name, id FROM subroutines").fetchall())
+    finally:
+        con.close()
+
+
+def test_full_rerun_does_not_duplicate(fesom2_tree, tmp_path):
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    first = _content(db)
+    assert len(first["subroutines"]) == 4
+    pipeline.run(db)
+    assert _content(db) == first
+
+
+def test_each_file_parsed_once(fesom2_tree, tmp_path, monkeypatch):
+    parsed = []
+    extract = pipeline.extract_source
+
+    def counting(text, path):
+        parsed.append(path.name)
+        return extract(text, path)
+
+    monkeypatch.setattr(pipeline, "extract_source", counting)
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    assert sorted(parsed) == [f"mod_{i}.F90" for i in range(4)]
+    content = _content(db)
+    assert ("mod_0", "o_param") in content["uses"]
+    assert ("mod_0_step", "mod_0", "EXCHANGE") in content["calls"]
+    assert {r[:2] for r in content["namelist_refs"] if r[3] == "mod_0"} == {
+        ("alpha", "mod_0_nml"), ("beta", "mod_0_nml")}
+    assert content["namelist_descriptions"] == [("alpha", "oce_nml", "namelist.oce", "A coefficient")]
+
+
+def test_incremental_replaces_only_changed_file(fesom2_tree, tmp_path):
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    ids_before = _sub_ids(db)
+
+    (fesom2_tree / "mod_2.F90").write_text(MODULE.format(name="mod_2", callee="halo_update"))
+    pipeline.run(db, incremental=True)
+
+    ids_after = _sub_ids(db)
+    assert ids_after["mod_2_step"] > max(ids_before.values())
+    assert {k: v for k, v in ids_after.items() if k != "mod_2_step"} == \
+        {k: v for k, v in ids_before.items() if k != "mod_2_step"}
+
+    fresh = tmp_path / "fresh.duckdb"
+    pipeline.run(fresh)
+    assert _content(db) == _content(fresh)
+
+
+def test_incremental_handles_deleted_and_duplicate_module_names(fesom2_tree, tmp_path):
+    db = tmp_path / "index.duckdb"
+    # A second file declaring mod_1: its uses/calls rows share mod_1's keys.
+    (fesom2_tree / "mod_1_copy.F90").write_text(MODULE.format(name="mod_1", callee="exchange"))
+    pipeline.run(db)
+
+    (fesom2_tree / "mod_1.F90").write_text(MODULE.format(name="mod_1", callee="halo_update"))
+    (fesom2_tree / "mod_3.F90").unlink()
+    pipeline.run(db, incremental=True)
+
+    fresh = tmp_path / "fresh.duckdb"
+    pipeline.run(fresh)
+    assert _content(db) == _content(fresh)
+
+
+def test_tools_match_case_folded_keys(fesom2_tree, tmp_path):
+    from src.fesom2 import tools
+
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    assert [r["name"] for r in tools.find_subroutines("MOD_1_STEP", _db_path=db)] == ["mod_1_step"]
+    assert tools.get_module_uses("Mod_2", _db_path=db) == ["o_param"]
+    assert {r["caller_module"] for r in tools.get_callers("exchange", _db_path=db)} == {
+        f"mod_{i}" for i in range(4)}
+    assert [r["module_name"] for r in tools.namelist_to_code("ALPHA", _db_path=db)] == [
+        f"mod_{i}" for i in range(4)]
+
+
+def test_source_pages_from_source_lines(fesom2_tree, tmp_path):
+    from src.fesom2 import tools
+
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    con = connect(db)
+    try:
+        assert con.execute("SELECT count(*) FROM subroutines WHERE n_lines IS NULL").fetchone()[0] == 0
+    finally:
+        con.close()
+    source = tools.get_subroutine("mod_1_step", _db_path=db)["source_text"].splitlines()
+    page = tools.get_source("MOD_1_STEP", offset=1, limit=1, _db_path=db)
+    assert page == {"name": "mod_1_step", "module_name": "mod_1", "total_lines": len(source),
+                    "offset": 1, "lines": source[1:2]}
+    assert "source_text" not in tools.get_subroutine("mod_1_step", include_source=False, _db_path=db)
+
+
+def test_lexical_search_follows_incremental_run(fesom2_tree, tmp_path):
+    from src.fesom2 import tools
+
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    con = connect(db)
+    try:
+        indexed = con.execute(
+            "SELECT count(*) FROM duckdb_tables() WHERE schema_name = 'fts_main_subroutines'"
+        ).fetchone()[0]
+    finally:
+        con.close()
+    if not indexed:
+        pytest.skip("DuckDB fts extension unavailable")
+    assert tools.search_code("halo_update", mode="lexical", _db_path=db) == []
+
+    (fesom2_tree / "mod_2.F90").write_text(MODULE.format(name="mod_2", callee="halo_update"))
+    duckdb_pool.close(db)
+    pipeline.run(db, incremental=True)
+    assert [r["name"] for r in tools.search_code("HALO_UPDATE", mode="lexical", _db_path=db)] == ["mod_2_step"]
+
+
+def test_search_code_answers_exact_symbols(fesom2_tree, tmp_path, monkeypatch):
+    from src.fesom2 import tools
+
+    def fail(*args):
+        raise AssertionError("exact symbol queries must not reach semantic search")
+
+    monkeypatch.setattr(tools, "_embed", fail)
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    assert [(r["name"], r["module_name"], r["match"]) for r in tools.search_code("MOD_1_STEP", _db_path=db)] == [
+        ("mod_1_step", "mod_1", "subroutine")]
+    assert [(r["name"], r["match"]) for r in tools.search_code("Mod_2", _db_path=db)] == [("mod_2", "module")]
+    params = tools.search_code("alpha", top_k=3, _db_path=db)
+    assert [(r["module_name"], r["namelist_group"], r["match"]) for r in params] == [
+        (f"mod_{i}", f"mod_{i}_nml", "namelist_param") for i in range(3)]
+
+
+def test_search_code_batch_embeds_once(fesom2_tree, tmp_path, monkeypatch):
+    from src.embed_cache import QueryEmbeddingCache
+    from src.fesom2 import tools
+
+    class _ById:
+        def query(self, query_embeddings, n_results, include):
+            return {"metadatas": [[{"db_id": int(e[0])}] for e in query_embeddings],
+                    "distances": [[0.1]] * len(query_embeddings)}
+
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    ids = _sub_ids(db)
+    calls = []
+
+    def embed_texts(texts):
+        calls.append(texts)
+        return [[float(ids["mod_2_step" if "ocean" in t else "mod_0_step"])] for t in texts]
+
+    monkeypatch.setattr(tools, "embed_texts", embed_texts)
+    monkeypatch.setattr(tools, "_QUERY_CACHE", QueryEmbeddingCache(None, "test"))
+    monkeypatch.setattr(tools, "get_collection", lambda name, path: _ById())
+    batch = tools.search_code_batch(["ocean step", "MOD_1_STEP", "ice step"], mode="hybrid", _db_path=db)
+    assert calls == [["ocean step", "ice step"]]
+    assert [[(r["name"], r["match"]) for r in results] for results in batch] == [
+        [("mod_2_step", "hybrid")], [("mod_1_step", "subroutine")], [("mod_0_step", "hybrid")]]
+
+
+def test_search_code_without_pooled_collection_over_fetches_chunks(fesom2_tree, tmp_path, monkeypatch):
+    from src.embed_cache import QueryEmbeddingCache
+    from src.fesom2 import tools
+    from src.fesom2.embedder.store import FESOM2_POOLED_COLLECTION
+
+    class _Chunks:
+        def __init__(self):
+            self.n_results = []
+
+        def query(self, query_embeddings, n_results, include):
+            self.n_results.append(n_results)
+            return {"metadatas": [[{"db_id": ids["mod_1_step"]}, {"db_id": ids["mod_1_step"]}]],
+                    "distances": [[0.1, 0.2]]}
+
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    ids = _sub_ids(db)
+    chunks = _Chunks()
+    monkeypatch.setattr(tools, "embed_texts", lambda texts: [[0.0] for _ in texts])
+    monkeypatch.setattr(tools, "_QUERY_CACHE", QueryEmbeddingCache(None, "test"))
+    monkeypatch.setattr(
+        tools, "get_collection", lambda name, path: None if name == FESOM2_POOLED_COLLECTION else chunks)
+    results = tools.search_code("ocean step", top_k=3, mode="vector", _db_path=db)
+    assert [r["name"] for r in results] == ["mod_1_step"]
+    assert chunks.n_results == [30]
+
+
+def test_search_all_merges_code_docs_and_namelists(fesom2_tree, tmp_path, monkeypatch):
+    from src.fesom2 import tools
+    from src.fesom2.embedder.store import FESOM2_DOCS_COLLECTION, FESOM2_NAMELISTS_COLLECTION
+
+    class _Fixed:
+        def __init__(self, metadatas, distances):
+            self.metadatas, self.distances = metadatas, distances
+
+        def query(self, query_embeddings, n_results, include):
+            return {"metadatas": [self.metadatas], "distances": [self.distances],
+                    "documents": [["text"] * len(self.metadatas)]}
+
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    ids = _sub_ids(db)
+    collections = {
+        FESOM2_DOCS_COLLECTION: _Fixed([{"file": "ale.rst", "section": "ALE"}], [0.3]),
+        FESOM2_NAMELISTS_COLLECTION: _Fixed(
+            [{"param_name": "alpha", "namelist_group": "g", "config_file": "namelist.oce"},
+             {"param_name": "beta", "namelist_group": "g", "config_file": "namelist.oce"}], [0.2, 0.4]),
+    }
+    code = _Fixed([{"db_id": ids[f"mod_{i}_step"]} for i in (1, 0, 2)], [0.5, 0.9, 0.9])
+    monkeypatch.setattr(tools, "_embed", lambda q: [0.0])
+    monkeypatch.setattr(tools, "get_collection", lambda name, path: collections.get(name, code))
+    results = tools.search_all("vertical coordinate", top_k=3, _db_path=db)
+    assert [(r["source"], r.get("name") or r.get("param_name") or r.get("section")) for r in results] == [
+        ("code", "mod_1_step"), ("namelist", "alpha"), ("doc", "ALE")]
+    assert results[0]["module_name"] == "mod_1"
+
+
+def test_grep_code_follows_incremental_run(fesom2_tree, tmp_path):
+    from src.fesom2 import tools
+
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    hits = tools.grep_code(r"call \w+\(mesh\)", module="MOD_1", _db_path=db)
+    assert [(Path(h["file"]).name, h["line"], h["text"], h["subroutine"], h["module_name"]) for h in hits] == [
+        ("mod_1.F90", 7, "    call exchange(mesh)", "mod_1_step", "mod_1")]
+    (fesom2_tree / "mod_2.F90").write_text(MODULE.format(name="mod_2", callee="halo_update"))
+    duckdb_pool.close(db)  # the pipeline reopens the file read-write
+    pipeline.run(db, incremental=True)
+    assert [Path(h["file"]).name for h in tools.grep_code("halo_update", _db_path=db)] == ["mod_2.F90"]
+    assert len(tools.grep_code("CALL EXCHANGE", ignore_case=True, _db_path=db)) == 3
+
+
+def test_call_graph_tools(fesom2_tree, tmp_path):
+    from src.fesom2 import tools
+
+    (fesom2_tree / "mod_0.F90").write_text(MODULE.format(name="mod_0", callee="mod_1_step"))
+    (fesom2_tree / "mod_1.F90").write_text(MODULE.format(name="mod_1", callee="mod_2_step"))
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    path = tools.find_call_path("MOD_0_STEP", "exchange", _db_path=db)
+    assert [(p["name"], p["module_name"]) for p in path] == [
+        ("mod_0_step", "mod_0"), ("mod_1_step", "mod_1"), ("mod_2_step", "mod_2"), ("EXCHANGE", None)]
+    tree = tools.get_call_tree("mod_0_step", depth=1, _db_path=db)
+    assert [c["name"] for c in tree["children"]] == ["mod_1_step"]
+    assert tree["children"][0]["truncated"] is True
+    callers = tools.get_caller_tree("exchange", _db_path=db, module=None)
+    assert sorted(c["name"] for c in callers["children"]) == ["mod_2_step", "mod_3_step"]
+
+
+def test_calls_resolved_by_module_scope(fesom2_tree, tmp_path):
+    # mod_0 and mod_1 both define "shared"; mod_2 USEs mod_1, mod_3 uses neither
+    for i in (0, 1):
+        (fesom2_tree / f"mod_{i}.F90").write_text(
+            MODULE.format(name=f"mod_{i}", callee="shared").replace(
+                "contains\n", "contains\n  subroutine shared()\n  end subroutine shared\n"))
+    (fesom2_tree / "mod_2.F90").write_text(
+        MODULE.format(name="mod_2", callee="shared").replace("use o_param", "use mod_1"))
+    (fesom2_tree / "mod_3.F90").write_text(MODULE.format(name="mod_3", callee="shared"))
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db)
+    con = connect(db)
+    rows = {r[0]: r[1:] for r in con.execute(
+        """
+        SELECT c.caller_module, c.line, t.module_name, c.callee_candidates
+        FROM calls c JOIN subroutines s ON s.id = c.caller_id
+        LEFT JOIN subroutines t ON t.id = c.callee_id
+        WHERE c.callee_key = 'SHARED'
+        """).fetchall()}
+    shared_ids = [r[0] for r in con.execute(
+        "SELECT id FROM subroutines WHERE name = 'shared' ORDER BY id").fetchall()]
+    con.close()
+    assert rows["mod_0"] == (9, "mod_0", None)  # contained in the caller's module
+    assert rows["mod_2"] == (7, "mod_1", None)  # USE-associated
+    assert rows["mod_3"] == (7, None, shared_ids)
+
+    from src.fesom2 import tools
+
+    assert tools.get_callees("mod_2_step", _db_path=db) == [
+        {"callee_name": "SHARED", "line": 7, "callee_id": shared_ids[1], "module_name": "mod_1", "candidates": None}]
+    assert [(r["caller_module"], r["line"], r["callee_id"]) for r in tools.get_callers("shared", _db_path=db)] == [
+        ("mod_0", 9, shared_ids[0]), ("mod_1", 9, shared_ids[1]), ("mod_2", 7, shared_ids[1]), ("mod_3", 7, None)]
@@ -1,10 +1,16 @@
 """Tests for src/fesom2/server.py — tool registration and names."""
 
+import subprocess
+import sys
+
 from src.fesom2.server import mcp, list_setups_tool, get_run_interface_tool
 
 EXPECTED_TOOLS = {
     # Code navigation
+    "search_all_tool",
     "search_code_tool",
+    "search_code_batch_tool",
+    "grep_code_tool",
     "find_modules_tool",
     "find_subroutines_tool",
     "get_module_tool",
@@ -12,10 +18,14 @@ EXPECTED_TOOLS = {
     "get_source_tool",
     "get_callers_tool",
     "get_callees_tool",
+    "get_call_tree_tool",
+    "get_caller_tree_tool",
+    "find_call_path_tool",
     "get_module_uses_tool",
     "namelist_to_code_tool",
     # Documentation search
     "search_docs_tool",
+    "search_docs_batch_tool",
     "get_doc_source_tool",
     "list_setups_tool",
     # Forcing catalogue
@@ -30,6 +40,8 @@ EXPECTED_TOOLS = {
     "get_namelist_structure_tool",
     # Workflow
     "get_workflow_tool",
+    # Server
+    "server_status_tool",
 }
 
 
@@ -85,3 +97,10 @@ def test_list_setups_names_only_with_filter():
     for r in records:
         assert "neverworld2" in r["name"].lower()
         assert "namelists" not in r
+
+
+def test_server_import_leaves_heavy_dependencies_unloaded():
+    """chromadb and pint load on the first tool call that needs them, not at startup."""
+    code = "import sys, src.fesom2.server; print(sorted({'chromadb', 'pint'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
@@ -0,0 +1,181 @@
+"""Tests for src/full_text.py — BM25 indexes, rank fusion and hybrid dispatch."""
+
+import threading
+import time
+
+import duckdb
+import pytest
+
+from src import full_text
+
+ROWS = [
+    (1, "CG3D", "      SUBROUTINE CG3D\n      IF ( cg3dMaxIters .GT. 0 ) THEN\n"),
+    (2, "INI_PARMS", "      NAMELIST /PARM02/ cg2dMaxIters, cg3dMaxIters\n"),
+    (3, "DIAGS_FILL", "      CALL DIAGNOSTICS_FILL( theta, 'THETA   ', 0, Nr )\n"),
+    (4, "CALC_THETA", "C     Update theta with the tendency\n"),
+]
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE subs (id INTEGER, name TEXT, source_text TEXT)")
+    con.executemany("INSERT INTO subs VALUES (?, ?, ?)", ROWS)
+    yield con
+    con.close()
+
+
+@pytest.fixture
+def indexed(con):
+    if not full_text.build_index(con, "subs", "id", ["name", "source_text"]):
+        pytest.skip("DuckDB fts extension unavailable")
+    return con
+
+
+def test_search_without_index_is_empty(con):
+    assert full_text.search(con, "subs", "id", "cg3dMaxIters", 10) == []
+
+
+def test_identifiers_are_whole_case_insensitive_terms(indexed):
+    assert {r[0] for r in full_text.search(indexed, "subs", "id", "CG3DMAXITERS", 10)} == {1, 2}
+    assert full_text.search(indexed, "subs", "id", "diagnostics_fill", 10, ["name"]) == [(3, "DIAGS_FILL")]
+    # no stemming or splitting: a prefix of an identifier is a different term
+    assert full_text.search(indexed, "subs", "id", "cg3d", 10) == [(1,)]
+
+
+def test_search_ranks_and_limits(indexed):
+    ids = [r[0] for r in full_text.search(indexed, "subs", "id", "theta THETA tendency", 10)]
+    assert ids[0] == 4
+    assert set(ids) == {3, 4}
+    assert len(full_text.search(indexed, "subs", "id", "theta", 1)) == 1
+
+
+def test_rebuild_sees_new_rows(indexed):
+    indexed.execute("INSERT INTO subs VALUES (5, 'NEW', 'pickupSuff')")
+    assert full_text.search(indexed, "subs", "id", "pickupSuff", 10) == []
+    full_text.build_index(indexed, "subs", "id", ["name", "source_text"])
+    assert full_text.search(indexed, "subs", "id", "pickupSuff", 10) == [(5,)]
+
+
+def test_rrf_prefers_items_ranked_by_both():
+    fused = full_text.rrf([{"a": 1, "b": 1, "c": 1}, {"c": 2, "d": 2, "a": 2}])
+    assert list(fused) == ["a", "c", "b", "d"]
+    assert fused == {"a": 1, "c": 1, "b": 1, "d": 2}
+
+
+def test_rrf_single_ranking_keeps_order():
+    assert list(full_text.rrf([dict.fromkeys("xyz")])) == ["x", "y", "z"]
+    assert full_text.rrf([{}, {}]) == {}
+
+
+def test_ranked_single_modes_run_one_path():
+    def fail():
+        raise AssertionError("must not run")
+
+    assert full_text.ranked("lexical", lambda: {"a": 1}, fail) == {"a": 1}
+    assert full_text.ranked("vector", fail, lambda: {"b": 2}) == {"b": 2}
+    with pytest.raises(ValueError, match="mode"):
+        full_text.ranked("bm25", fail, fail)
+
+
+def test_hybrid_runs_lexical_concurrently():
+    threads = {}
+
+    def lexical():
+        threads["lexical"] = threading.current_thread()
+        time.sleep(0.2)
+        return {"a": "lex", "b": "lex"}
+
+    def vector():
+        threads["vector"] = threading.current_thread()
+        time.sleep(0.2)
+        return {"b": "vec", "c": "vec"}
+
+    t0 = time.perf_counter()
+    fused = full_text.ranked("hybrid", lexical, vector)
+    elapsed = time.perf_counter() - t0
+    assert threads["lexical"] is not threads["vector"]
+    assert elapsed < 0.35
+    assert list(fused)[0] == "b"
+    assert fused["b"] == "vec"  # vector results carry the richer record
+
+
+def test_ranked_many_fuses_per_query():
+    def lexical():
+        return [{"a": "lex"}, {}]
+
+    def vector():
+        return [{"b": "vec", "a": "vec"}, {"c": "vec"}]
+
+    assert full_text.ranked_many("hybrid", lexical, vector) == [{"a": "vec", "b": "vec"}, {"c": "vec"}]
+    assert full_text.ranked_many("lexical", lexical, vector) == [{"a": "lex"}, {}]
+
+
+def _vector_down():
+    raise ConnectionError("embedding server unreachable")
+
+
+def test_hybrid_falls_back_to_lexical_when_vector_raises(caplog):
+    ranking = {"CG3D": "lex", "INI_PARMS": "lex"}
+    assert full_text.ranked("hybrid", lambda: ranking, _vector_down) == ranking
+    assert "embedding server unreachable" in caplog.text
+    many = full_text.ranked_many("hybrid", lambda: [{"a": "lex"}, {}], _vector_down)
+    assert many == [{"a": "lex"}, {}]
+
+
+def test_vector_error_raised_when_lexical_finds_nothing():
+    with pytest.raises(ConnectionError):
+        full_text.ranked("hybrid", lambda: {}, _vector_down)
+    with pytest.raises(ConnectionError):
+        full_text.ranked_many("hybrid", lambda: [{}, {}], _vector_down)
+    with pytest.raises(ConnectionError):
+        full_text.ranked("vector", lambda: {"a": "lex"}, _vector_down)
+
+
+class _FailingConnection:
+    """Stands in for a connection whose full-text query raises exc."""
+
+    def __init__(self, exc: Exception):
+        self.exc = exc
+
+    def execute(self, *args):
+        raise self.exc
+
+
+@pytest.fixture
+def available(monkeypatch):
+    monkeypatch.setattr(full_text, "_unavailable", False)
+
+
+def test_query_errors_propagate_and_keep_search_enabled(available):
+    con = _FailingConnection(duckdb.BinderException('Referenced column "nope" not found'))
+    with pytest.raises(duckdb.BinderException):
+        full_text.search(con, "subs", "id", "theta", 5, ["nope"])
+    assert full_text._unavailable is False
+
+
+@pytest.mark.parametrize("exc", [
+    duckdb.IOException('Extension "fts" not found. Install it first using "INSTALL fts".'),
+    duckdb.Error("An error occurred while trying to automatically install the required extension 'fts'"),
+])
+def test_extension_load_failure_disables_search(available, exc):
+    assert full_text.search(_FailingConnection(exc), "subs", "id", "theta", 5) == []
+    assert full_text._unavailable is True
+
+
+def test_hybrid_fuses_a_fake_lexical_ranking_on_the_worker_pool():
+    threads = {}
+
+    def lexical():  # in place of a BM25 query, so no fts extension is needed
+        threads["lexical"] = threading.current_thread().name
+        return {"CG3D": "lex", "INI_PARMS": "lex"}
+
+    def vector():
+        threads["vector"] = threading.current_thread().name
+        return {"CALC_THETA": "vec", "CG3D": "vec"}
+
+    fused = full_text.ranked("hybrid", lexical, vector)
+    assert list(fused) == ["CG3D", "CALC_THETA", "INI_PARMS"]
+    assert fused == {"CG3D": "vec", "CALC_THETA": "vec", "INI_PARMS": "lex"}
+    assert threads["lexical"].startswith("full-text")
+    assert threads["vector"] == threading.current_thread().name
@@ -0,0 +1,69 @@
+"""Tests for incremental mode of src/mitgcm/embedder/pipeline.run.
+
+Uses a temporary DuckDB index and ChromaDB store; embeddings come from a
+stub so no Ollama server is needed.
+"""
+
+import pytest
+
+from src import embed_scheduler
+from src.mitgcm.embedder import pipeline
+from src.mitgcm.embedder.store import get_pooled_collection, get_subroutine_collection
+from src.mitgcm.indexer.schema import connect
+
+
+@pytest.fixture
+def embedded(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0, 0.0] for t in texts]
+
+    monkeypatch.setattr(embed_scheduler, "embed_chunks", fake_embed)
+    db = tmp_path / "index.duckdb"
+    con = connect(db)
+    for i, name in enumerate(["ALPHA", "BETA", "GAMMA"], start=1):
+        con.execute(
+            "INSERT INTO subroutines (id, name, file, package, line_start, line_end, source_text) "
+            "VALUES (?, ?, 'pkg/p/x.F', 'p', 1, 3, ?)",
+            [i, name, f"      SUBROUTINE {name}\n      END\n"],
+        )
+    con.close()
+    pipeline.run(db_path=db, chroma_path=tmp_path / "chroma")
+    calls.clear()
+    return db, tmp_path / "chroma", calls
+
+
+def _db_ids(chroma_path, get_collection=get_subroutine_collection):
+    metas = get_collection(chroma_path).get(include=["metadatas"])["metadatas"]
+    return sorted({m["db_id"] for m in metas})
+
+
+def test_incremental_without_changes_embeds_nothing(embedded):
+    db, chroma, calls = embedded
+    pipeline.run(db_path=db, chroma_path=chroma, incremental=True)
+    assert calls == []
+    assert _db_ids(chroma) == [1, 2, 3]
+    assert _db_ids(chroma, get_pooled_collection) == [1, 2, 3]
+
+
+def test_incremental_follows_index_changes(embedded):
+    db, chroma, calls = embedded
+    con = connect(db)
+    # BETA re-extracted under a new id, GAMMA deleted, ALPHA edited in place.
+    con.execute("DELETE FROM subroutines WHERE id IN (2, 3)")
+    con.execute(
+        "INSERT INTO subroutines (id, name, file, package, line_start, line_end, source_text) "
+        "VALUES (4, 'BETA', 'pkg/p/x.F', 'p', 1, 4, '      SUBROUTINE BETA\n      x = 1\n      END\n')"
+    )
+    con.execute("UPDATE subroutines SET source_text = source_text || 'C edited\n' WHERE id = 1")
+    con.close()
+
+    pipeline.run(db_path=db, chroma_path=chroma, incremental=True)
+    embedded_docs = [d for batch in calls for d in batch]
+    assert len(embedded_docs) == 2
+    assert any("SUBROUTINE ALPHA" in d for d in embedded_docs)
+    assert any("SUBROUTINE BETA" in d for d in embedded_docs)
+    assert _db_ids(chroma) == [1, 4]
+    assert _db_ids(chroma, get_pooled_collection) == [1, 4]
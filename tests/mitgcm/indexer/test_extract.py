@@ -127,6 +127,11 @@ def test_calls_deduplicated():
     assert recs[0].calls.count("FOO") == 1
 
 
+def test_call_lines_record_first_call_site():
+    recs = extract_file(_write(FIXED_CALLS))
+    assert recs[0].call_lines == {"FOO": 3, "BAR": 4}
+
+
 # ---------------------------------------------------------------------------
 # NAMELIST extraction
 # ---------------------------------------------------------------------------
@@ -207,6 +212,40 @@ FIXED_NO_GUARD = """\
 def test_no_spurious_guards():
     recs = extract_file(_write(FIXED_NO_GUARD))
     assert recs[0].cpp_guards == []
+    assert recs[0].cpp_spans == []
+
+
+FIXED_GUARD_SPANS = """\
+      SUBROUTINE SPAN_SUB( )
+      IMPLICIT NONE
+#ifdef ALLOW_A
+      CALL A_INIT( )
+#ifndef ALLOW_B
+      CALL NO_B( )
+#else
+      CALL B_INIT( )
+#endif
+#endif
+#if defined(ALLOW_C) && defined(ALLOW_D)
+      CALL CD( )
+#endif
+      RETURN
+      END
+"""
+
+def test_cpp_spans_line_ranges():
+    recs = extract_file(_write(FIXED_GUARD_SPANS))
+    assert recs[0].cpp_spans == [
+        ("ALLOW_A", 4, 9, False),
+        ("ALLOW_B", 6, 6, True),
+        ("ALLOW_B", 8, 8, False),
+    ]
+    assert recs[0].cpp_guards == ["ALLOW_A", "ALLOW_B"]
+
+
+def test_cpp_spans_clipped_to_subroutine():
+    recs = extract_file(_write(FIXED_GUARDS))
+    assert recs[0].cpp_spans == [("ALLOW_NONHYDROSTATIC", 2, 5, False)]
 
 
 # ---------------------------------------------------------------------------
@@ -244,19 +244,17 @@ def test_ifdef_else_both_subroutines_detected():
     assert "BRANCH_B" in names
 
 
-def test_ifdef_else_branch_b_carries_guard():
+def test_ifdef_else_branch_b_carries_negated_guard():
     """
-    BRANCH_B is in the #else branch; the extractor (which has no else-awareness)
-    will still report HAVE_FEATURE as a guard because the #ifdef was still
-    pushed and not yet popped.  This is documented behaviour (imprecise but
-    not a crash).
+    BRANCH_B is in the #else branch, so it is compiled only when HAVE_FEATURE
+    is undefined: the span is negated and the flag is not a requirement.
     """
     recs = extract_file(_write(FIXED_IFDEF_ELSE))
+    branch_a = next(r for r in recs if r.name.upper() == "BRANCH_A")
     branch_b = next(r for r in recs if r.name.upper() == "BRANCH_B")
-    # The guard HAVE_FEATURE is on the stack during the #else body because
-    # #endif hasn't been seen yet.  We assert the guard is present (not that
-    # it is correct) — this documents the known limitation.
-    assert "HAVE_FEATURE" in branch_b.cpp_guards
+    assert branch_a.cpp_guards == ["HAVE_FEATURE"]
+    assert "HAVE_FEATURE" not in branch_b.cpp_guards
+    assert branch_b.cpp_spans == [("HAVE_FEATURE", 8, 11, True)]
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,220 @@
+"""Tests for src/mitgcm/indexer/pipeline.py.
+
+Builds a small synthetic MITgcm tree and checks that a parallel run writes
+exactly the same rows, with the same IDs, as a serial run.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from src.mitgcm.indexer import pipeline
+from src.mitgcm.indexer.schema import connect
+
+TABLES = {
+    "subroutines": "id",
+    "calls": "caller_id, callee_name",
+    "namelist_refs": "subroutine_id, param_name",
+    "diagnostics_fills": "subroutine_id, field_name",
+    "cpp_guards": "subroutine_id, cpp_flag",
+    "package_options": "package_name, cpp_flag",
+}
+
+SOURCE = """\
+#include "{pkg}_OPTIONS.h"
+      SUBROUTINE {pkg}_INIT_{n}( myThid )
+      NAMELIST /{pkg}_PARM/ {pkg}_alpha, {pkg}_beta
+#ifdef ALLOW_{pkg}
+      CALL {pkg}_CALC_{n}( myThid )
+      CALL DIAGNOSTICS_FILL( fld, 'FLD{n}  ', 0, 1, 0, 1, 1, myThid )
+#endif
+      RETURN
+      END
+
+      SUBROUTINE {pkg}_CALC_{n}( myThid )
+      CALL EXCH_XY_RL( fld, myThid )
+      RETURN
+      END
+"""
+
+OPTIONS = """\
+#ifndef {pkg}_OPTIONS_H
+#define {pkg}_OPTIONS_H
+C o Enable the fast path
+#define {pkg}_FAST
+#endif
+"""
+
+
+@pytest.fixture
+def mitgcm_tree(tmp_path, monkeypatch):
+    root = tmp_path / "MITgcm"
+    for pkg in ("aaa", "bbb", "ccc"):
+        d = root / "pkg" / pkg
+        d.mkdir(parents=True)
+        (d / f"{pkg.upper()}_OPTIONS.h").write_text(OPTIONS.format(pkg=pkg.upper()))
+        for n in range(5):
+            (d / f"{pkg}_file{n}.F").write_text(SOURCE.format(pkg=pkg.upper(), n=n))
+    (root / "model" / "src").mkdir(parents=True)
+    (root / "model" / "src" / "main.F").write_text(SOURCE.format(pkg="MODEL", n=0))
+    monkeypatch.setattr(pipeline, "MITGCM_ROOT", root)
+    monkeypatch.setattr(pipeline, "SOURCE_DIRS", [root / "model" / "src", root / "pkg"])
+    monkeypatch.setattr(pipeline, "mitgcm_sha", lambda: "0" * 40)
+    return root
+
+
+def _dump(db_path: Path) -> dict[str, list[tuple]]:
+    con = connect(db_path)
+    try:
+        return {t: con.execute(f"SELECT * FROM {t} ORDER BY {o}").fetchall()
+                for t, o in TABLES.items()}
+    finally:
+        con.close()
+
+
+def test_serial_run_writes_all_tables(mitgcm_tree, tmp_path):
+    db = tmp_path / "serial.duckdb"
+    pipeline.run(db, workers=1)
+    rows = _dump(db)
+    assert len(rows["subroutines"]) == 32
+    assert [r[0] for r in rows["subroutines"]] == list(range(1, 33))
+    assert ("aaa", "AAA_FAST", "Enable the fast path", "AAA") in rows["package_options"]
+    assert any(r[1] == "ALLOW_AAA" for r in rows["cpp_guards"])
+    assert any(r[0].strip() == "FLD0" for r in rows["diagnostics_fills"])
+
+
+def test_parallel_run_matches_serial(mitgcm_tree, tmp_path):
+    serial, parallel = tmp_path / "serial.duckdb", tmp_path / "parallel.duckdb"
+    pipeline.run(serial, workers=1)
+    pipeline.run(parallel, workers=3)
+    assert _dump(parallel) == _dump(serial)
+
+
+def test_calls_resolved_with_call_lines(mitgcm_tree, tmp_path):
+    shared = "      SUBROUTINE SHARED( myThid )\n      RETURN\n      END\n"
+    for pkg in ("aaa", "bbb"):
+        (mitgcm_tree / "pkg" / pkg / "shared.F").write_text(shared)
+        (mitgcm_tree / "pkg" / pkg / "use_shared.F").write_text(
+            f"      SUBROUTINE {pkg.upper()}_USE( myThid )\n      CALL SHARED( myThid )\n      END\n")
+    (mitgcm_tree / "model" / "src" / "use_shared.F").write_text(
+        "      SUBROUTINE MODEL_USE( myThid )\n\n      CALL SHARED( myThid )\n      END\n")
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db, workers=1)
+    con = connect(db)
+    rows = dict(((r[0], r[1]), r[2:]) for r in con.execute(
+        """
+        SELECT s.name, c.callee_name, c.line, t.name, t.package, c.callee_candidates
+        FROM calls c JOIN subroutines s ON s.id = c.caller_id
+        LEFT JOIN subroutines t ON t.id = c.callee_id
+        """).fetchall())
+    shared_ids = sorted(r[0] for r in con.execute("SELECT id FROM subroutines WHERE name = 'SHARED'").fetchall())
+    con.close()
+    assert rows[("AAA_INIT_0", "AAA_CALC_0")] == (5, "AAA_CALC_0", "aaa", None)
+    assert rows[("AAA_CALC_0", "EXCH_XY_RL")] == (12, None, None, None)
+    assert rows[("BBB_USE", "SHARED")] == (2, "SHARED", "bbb", None)  # same-package copy
+    assert rows[("MODEL_USE", "SHARED")] == (3, None, None, shared_ids)
+
+
+def test_extract_all_preserves_order(mitgcm_tree):
+    files = pipeline.source_files()
+    names = [[r.name for r in recs] for recs in pipeline.extract_all(files, workers=2)]
+    assert names == [[r.name for r in pipeline.extract_file(f)] for f in files]
+
+
+# ---------------------------------------------------------------------------
+# Re-indexing
+# ---------------------------------------------------------------------------
+
+def _content(db_path: Path) -> dict[str, list[tuple]]:
+    """Table contents with subroutine IDs replaced by (file, name, line_start)."""
+    con = connect(db_path)
+    try:
+        key = "(SELECT file || ':' || name || ':' || line_start FROM subroutines WHERE id = {})"
+        return {
+            "subroutines": con.execute(
+                "SELECT file, name, line_start, line_end, source_text, n_lines FROM subroutines ORDER BY ALL").fetchall(),
+            "source_lines": con.execute(
+                f"SELECT {key.format('subroutine_id')}, line_no, line FROM source_lines ORDER BY ALL").fetchall(),
+            "calls": con.execute(
+                f"SELECT {key.format('caller_id')}, callee_name, line, {key.format('callee_id')} "
+                "FROM calls ORDER BY ALL").fetchall(),
+            "namelist_refs": con.execute(
+                f"SELECT {key.format('subroutine_id')}, param_name FROM namelist_refs ORDER BY ALL").fetchall(),
+            "cpp_guards": con.execute(
+                f"SELECT {key.format('subroutine_id')}, cpp_flag FROM cpp_guards ORDER BY ALL").fetchall(),
+            "package_options": con.execute("SELECT * FROM package_options ORDER BY ALL").fetchall(),
+        }
+    finally:
+        con.close()
+
+
+def _ids_by_file(db_path: Path) -> dict[str, list[int]]:
+    con = connect(db_path)
+    try:
+        rows = con.execute("SELECT file, list(id ORDER BY id) FROM subroutines GROUP BY file").fetchall()
+    finally:
+        con.close()
+    return dict(rows)
+
+
+def test_full_rerun_does_not_duplicate(mitgcm_tree, tmp_path):
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db, workers=1)
+    first = _dump(db)
+    pipeline.run(db, workers=1)
+    assert _dump(db) == first
+
+
+def test_files_table_records_hashes(mitgcm_tree, tmp_path):
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db, workers=1)
+    con = connect(db)
+    rows = con.execute("SELECT path, sha256, commit_sha FROM files ORDER BY path").fetchall()
+    con.close()
+    assert [r[0] for r in rows] == [str(p) for p in pipeline.source_files()]
+    assert all(len(r[1]) == 64 and r[2] == "0" * 40 for r in rows)
+
+
+def test_incremental_without_changes_is_noop(mitgcm_tree, tmp_path):
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db, workers=1)
+    before = _dump(db)
+    pipeline.run(db, workers=1, incremental=True)
+    assert _dump(db) == before
+
+
+def test_incremental_replaces_only_changed_file(mitgcm_tree, tmp_path):
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db, workers=1)
+    ids_before = _ids_by_file(db)
+
+    changed = mitgcm_tree / "pkg" / "bbb" / "bbb_file2.F"
+    changed.write_text(changed.read_text().replace("EXCH_XY_RL", "EXCH_UV_XY_RL"))
+    pipeline.run(db, workers=1, incremental=True)
+
+    ids_after = _ids_by_file(db)
+    assert ids_after[str(changed)] != ids_before[str(changed)]
+    assert min(ids_after[str(changed)]) > max(max(v) for v in ids_before.values())
+    for path, ids in ids_before.items():
+        if path != str(changed):
+            assert ids_after[path] == ids
+
+    fresh = tmp_path / "fresh.duckdb"
+    pipeline.run(fresh, workers=1)
+    assert _content(db) == _content(fresh)
+
+
+def test_incremental_drops_deleted_and_adds_new_files(mitgcm_tree, tmp_path):
+    db = tmp_path / "index.duckdb"
+    pipeline.run(db, workers=1)
+    (mitgcm_tree / "pkg" / "aaa" / "aaa_file0.F").unlink()
+    (mitgcm_tree / "pkg" / "aaa" / "aaa_new.F").write_text(SOURCE.format(pkg="AAA", n=9))
+    pipeline.run(db, workers=1, incremental=True)
+
+    fresh = tmp_path / "fresh.duckdb"
+    pipeline.run(fresh, workers=1)
+    assert _content(db) == _content(fresh)
+    con = connect(db)
+    paths = {r[0] for r in con.execute("SELECT path FROM files").fetchall()}
+    con.close()
+    assert paths == {str(p) for p in pipeline.source_files()}
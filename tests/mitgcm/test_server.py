@@ -6,19 +6,29 @@ decorators or name typos.
 """
 
 import asyncio
+import subprocess
+import sys
 
 from src.mitgcm.server import mcp
 
 EXPECTED_TOOLS = {
+    "search_all_tool",
     "search_code_tool",
+    "search_code_batch_tool",
+    "grep_code_tool",
     "find_subroutines_tool",
     "get_subroutine_tool",
     "get_source_tool",
     "get_callers_tool",
     "get_callees_tool",
+    "get_call_tree_tool",
+    "get_caller_tree_tool",
+    "find_call_path_tool",
     "namelist_to_code_tool",
     "diagnostics_fill_to_source_tool",
     "get_cpp_requirements_tool",
+    "get_active_cpp_flags_tool",
+    "get_dead_lines_tool",
     "find_packages_tool",
     "get_package_tool",
     "get_package_flags_tool",
@@ -27,12 +37,16 @@ EXPECTED_TOOLS = {
     "lookup_gotcha_tool",
     "suggest_experiment_config_tool",
     "search_docs_tool",
+    "search_docs_batch_tool",
     "get_doc_source_tool",
     "get_workflow_tool",
     "list_verification_experiments_tool",
     "search_verification_tool",
+    "search_verification_batch_tool",
     "get_verification_source_tool",
+    "get_experiment_files_tool",
     "get_namelist_structure_tool",
+    "server_status_tool",
 }
 
 
@@ -73,3 +87,49 @@ def test_namelist_to_code_known_param_has_no_warning(monkeypatch):
     assert len(result) >= 1
     assert "warning" not in result[0]
     assert "name" in result[0]
+
+
+def test_server_status_before_warm_up():
+    """server_status_tool reports that nothing has been warmed when main() has not run."""
+    import src.mitgcm.server as srv
+
+    status = srv.server_status_tool()
+    assert status["state"] == "not started"
+    assert status["ready"] is False
+    assert status["steps"] == []
+
+
+def test_server_import_leaves_heavy_dependencies_unloaded():
+    """chromadb and pint load on the first tool call that needs them, not at startup."""
+    code = "import sys, src.mitgcm.server; print(sorted({'chromadb', 'pint'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_warm_up_starts_after_the_handshake():
+    """The warm-up thread starts on notifications/initialized, not while initialize is being answered."""
+    import json
+
+    def send(message):
+        proc.stdin.write(json.dumps({"jsonrpc": "2.0", **message}) + "\n")
+        proc.stdin.flush()
+
+    def status(request_id):
+        send({"id": request_id, "method": "tools/call", "params": {"name": "server_status_tool", "arguments": {}}})
+        reply = json.loads(proc.stdout.readline())
+        return json.loads(reply["result"]["content"][0]["text"])["state"]
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.mitgcm.server"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    try:
+        send({"id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "test", "version": "0"}}})
+        assert "result" in json.loads(proc.stdout.readline())
+        assert status(2) == "not started"
+        send({"method": "notifications/initialized"})
+        assert status(3) != "not started"
+    finally:
+        proc.kill()
+        proc.wait()
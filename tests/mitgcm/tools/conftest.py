@@ -1,7 +1,10 @@
 """Shared fixtures for tools tests."""
 
 import pytest
-from src.mitgcm.indexer.schema import connect
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.mitgcm.indexer.pipeline import resolve_calls
+from src.name_keys import refresh_keys
+from src.source_lines import sync_source_lines
 
 
 @pytest.fixture(scope="session")
@@ -54,6 +57,23 @@ def test_db(tmp_path_factory):
         ["model", "ALLOW_NONHYDROST", "Enable non-hydrostatic solver"],
     )
 
+    # cpp_guard_spans for CG3D (lines 1-100): ALLOW_NONHYDROST over 10-60,
+    # nested #ifndef/#else of ALLOW_DEBUG, and a second ALLOW_NONHYDROST block
+    # adjacent to the first
+    for span in [
+        (1, "ALLOW_NONHYDROST", 10, 60, False),
+        (1, "ALLOW_DEBUG", 20, 30, True),
+        (1, "ALLOW_DEBUG", 32, 40, False),
+        (1, "ALLOW_NONHYDROST", 61, 70, False),
+    ]:
+        con.execute(
+            "INSERT INTO cpp_guard_spans (subroutine_id, cpp_flag, line_from, line_to, negated) VALUES (?, ?, ?, ?, ?)",
+            list(span),
+        )
+
+    refresh_keys(con, KEYS)
+    resolve_calls(con)
+    sync_source_lines(con)
     con.close()
     return db_path
 
@@ -148,5 +168,7 @@ def adv_db(tmp_path_factory):
             [pkg, flag, desc],
         )
 
+    refresh_keys(con, KEYS)
+    resolve_calls(con)
     con.close()
     return db_path
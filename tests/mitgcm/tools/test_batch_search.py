@@ -0,0 +1,73 @@
+"""Tests for the batched search tools: one embedding call and one vector query per batch."""
+
+import pytest
+
+import src.mitgcm.tools as tools
+from src.embed_cache import QueryEmbeddingCache
+
+_VECTORS = {"conjugate gradient solver": [1.0], "pressure": [2.0], "wind": [3.0]}
+
+
+class _ById:
+    """Stands in for a ChromaDB collection; query vector [x] hits db_id x."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def query(self, query_embeddings, n_results, include):
+        self.calls.append(len(query_embeddings))
+        metas = [[{"db_id": int(e[0]), "file": f"f{int(e[0])}.rst", "section": "s", "experiment": "exp",
+                   "filename": f"data{int(e[0])}"}] for e in query_embeddings]
+        return {"metadatas": metas, "distances": [[0.1]] * len(metas),
+                "documents": [["[f] s\ntext"]] * len(metas)}
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Counts embedding calls and ChromaDB queries; returns (embed calls, query calls)."""
+    embed_calls, query_calls = [], []
+
+    def embed_texts(texts):
+        embed_calls.append(list(texts))
+        return [_VECTORS[t] for t in texts]
+
+    monkeypatch.setattr(tools, "embed_texts", embed_texts)
+    monkeypatch.setattr(tools, "_QUERY_CACHE", QueryEmbeddingCache(None, "test"))
+    monkeypatch.setattr(tools, "get_collection", lambda name, path: _ById(query_calls))
+    return embed_calls, query_calls
+
+
+def test_code_batch_matches_single_searches(test_db, backend):
+    queries = ["conjugate gradient solver", "CG3D", "pressure"]
+    batch = tools.search_code_batch(queries, _db_path=test_db)
+    embed_calls, query_calls = backend
+    assert embed_calls == [["conjugate gradient solver", "pressure"]]
+    assert query_calls == [2, 2]  # pooled collection, then the chunk merge
+    assert [[(r["name"], r["match"]) for r in results] for results in batch] == [
+        [("CG3D", "hybrid")], [("CG3D", "subroutine")], [("PRE_CG3D", "hybrid")]]
+    assert batch == [tools.search_code(q, _db_path=test_db) for q in queries]
+
+
+def test_code_batch_of_symbols_embeds_nothing(test_db, backend):
+    batch = tools.search_code_batch(["CG3D", "cg3dMaxIters"], _db_path=test_db)
+    assert [[r["match"] for r in results] for results in batch] == [["subroutine"], ["namelist_param"]]
+    assert backend == ([], [])
+
+
+def test_docs_and_verification_batches(test_db, backend):
+    queries = ["pressure", "wind", "pressure"]
+    docs = tools.search_docs_batch(queries, mode="vector", _db_path=test_db)
+    assert [[r["file"] for r in results] for results in docs] == [["f2.rst"], ["f3.rst"], ["f2.rst"]]
+    verification = tools.search_verification_batch(queries, mode="vector", _db_path=test_db)
+    assert [[r["filename"] for r in results] for results in verification] == [["data2"], ["data3"], ["data2"]]
+    embed_calls, query_calls = backend
+    assert embed_calls == [["pressure", "wind"]]  # the second batch is served from the query cache
+    assert query_calls == [3, 3]
+
+
+def test_empty_batch(test_db, backend):
+    assert tools.search_code_batch([], _db_path=test_db) == []
+    assert tools.search_docs_batch([], _db_path=test_db) == []
+    with pytest.raises(ValueError, match="mode"):
+        tools.search_verification_batch(["x"], mode="bm25", _db_path=test_db)
+    assert backend == ([], [])
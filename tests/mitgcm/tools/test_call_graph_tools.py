@@ -0,0 +1,62 @@
+"""Tests for the call-graph traversal tools (get_call_tree, get_caller_tree, find_call_path).
+
+Uses the adv_db fixture: SOLVE_FOR_P -> CG3D, CG2D, EXTERNAL_ROUTINE and
+INIT_CG3D -> CG3D.
+"""
+
+import pytest
+from src.mitgcm.tools import find_call_path, get_call_tree, get_caller_tree, load_call_graph
+
+
+def test_load_call_graph_is_cached(adv_db):
+    graph = load_call_graph(_db_path=adv_db)
+    assert load_call_graph(_db_path=adv_db) is graph
+    assert len(graph) == 6  # five subroutines + EXTERNAL_ROUTINE
+    assert graph.edge_count == 4  # duplicate SOLVE_FOR_P -> CG3D row collapsed
+
+
+def test_get_call_tree(adv_db):
+    tree = get_call_tree("solve_for_p", _db_path=adv_db)
+    assert (tree["id"], tree["name"], tree["package"]) == (10, "SOLVE_FOR_P", "nonhydrost")
+    assert [(c["id"], c["name"]) for c in tree["children"]] == [
+        (11, "CG3D"), (12, "CG2D"), (None, "EXTERNAL_ROUTINE")]
+    assert all("children" not in c for c in tree["children"])
+
+
+def test_get_call_tree_leaf_and_missing(adv_db):
+    assert get_call_tree("LEAF_SUB", _db_path=adv_db) == {"id": 14, "name": "LEAF_SUB", "package": "model"}
+    assert get_call_tree("NO_SUCH_SUB", _db_path=adv_db) is None
+
+
+def test_get_call_tree_package_filter(adv_db):
+    assert get_call_tree("CG3D", package="model", _db_path=adv_db) is None
+    assert get_call_tree("CG3D", package="NONHYDROST", _db_path=adv_db)["id"] == 11
+
+
+def test_get_caller_tree(adv_db):
+    tree = get_caller_tree("EXTERNAL_ROUTINE", depth=2, _db_path=adv_db)
+    assert tree["id"] is None
+    assert [c["name"] for c in tree["children"]] == ["SOLVE_FOR_P"]
+    assert [c["name"] for c in get_caller_tree("cg3d", _db_path=adv_db)["children"]] == [
+        "SOLVE_FOR_P", "INIT_CG3D"]
+
+
+def test_find_call_path(adv_db):
+    path = find_call_path("SOLVE_FOR_P", "external_routine", _db_path=adv_db)
+    assert [p["name"] for p in path] == ["SOLVE_FOR_P", "EXTERNAL_ROUTINE"]
+    assert find_call_path("CG3D", "SOLVE_FOR_P", _db_path=adv_db) == []
+    assert find_call_path("SOLVE_FOR_P", "CG3D", target_package="model", _db_path=adv_db) == []
+
+
+def test_get_call_tree_ambiguous_name(tmp_path):
+    from src.mitgcm.indexer.schema import KEYS, connect
+    from src.name_keys import refresh_keys
+
+    db = tmp_path / "dup.duckdb"
+    con = connect(db)
+    con.execute("INSERT INTO subroutines (id, name, package) VALUES (1, 'DUP', 'a'), (2, 'DUP', 'b')")
+    refresh_keys(con, KEYS)
+    con.close()
+    with pytest.raises(ValueError, match="pass package="):
+        get_call_tree("DUP", _db_path=db)
+    assert get_call_tree("DUP", package="b", _db_path=db)["id"] == 2
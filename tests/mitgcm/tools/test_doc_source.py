@@ -1,11 +1,18 @@
-"""Tests for get_doc_source using a synthetic ChromaDB fixture."""
+"""Tests for get_doc_source: doc_sections lookups, and the ChromaDB chunk fallback."""
+
+from pathlib import Path
 
 import pytest
 import chromadb
 
+from src.doc_sections import write_sections
+from src.mitgcm.indexer.schema import KEYS, connect
 from src.mitgcm.tools import get_doc_source
 from src.embed_utils import OVERLAP
 
+# The chunk-fallback tests run without a DuckDB index.
+NO_INDEX = Path("no-such-dir/index.duckdb")
+
 
 @pytest.fixture(scope="module")
 def docs_chroma(tmp_path_factory):
@@ -70,38 +77,38 @@ def docs_chroma(tmp_path_factory):
 
 
 def test_returns_none_for_unknown(docs_chroma):
-    result = get_doc_source("no/such/file.rst", "No Section", _chroma_path=docs_chroma)
+    result = get_doc_source("no/such/file.rst", "No Section", _db_path=NO_INDEX, _chroma_path=docs_chroma)
     assert result is None
 
 
 def test_single_chunk_has_required_keys(docs_chroma):
-    result = get_doc_source("pkg/diagnostics.rst", "Overview", _chroma_path=docs_chroma)
+    result = get_doc_source("pkg/diagnostics.rst", "Overview", _db_path=NO_INDEX, _chroma_path=docs_chroma)
     assert result is not None
     for key in ("file", "section", "total_lines", "offset", "lines"):
         assert key in result
 
 
 def test_single_chunk_file_and_section(docs_chroma):
-    result = get_doc_source("pkg/diagnostics.rst", "Overview", _chroma_path=docs_chroma)
+    result = get_doc_source("pkg/diagnostics.rst", "Overview", _db_path=NO_INDEX, _chroma_path=docs_chroma)
     assert result["file"] == "pkg/diagnostics.rst"
     assert result["section"] == "Overview"
 
 
 def test_single_chunk_header_stripped(docs_chroma):
-    result = get_doc_source("pkg/diagnostics.rst", "Overview", _chroma_path=docs_chroma)
+    result = get_doc_source("pkg/diagnostics.rst", "Overview", _db_path=NO_INDEX, _chroma_path=docs_chroma)
     joined = "\n".join(result["lines"])
     assert "[pkg/diagnostics.rst]" not in joined
     assert "Line one." in joined
 
 
 def test_single_chunk_lines(docs_chroma):
-    result = get_doc_source("pkg/diagnostics.rst", "Overview", _chroma_path=docs_chroma)
+    result = get_doc_source("pkg/diagnostics.rst", "Overview", _db_path=NO_INDEX, _chroma_path=docs_chroma)
     assert result["lines"] == ["Line one.", "Line two.", "Line three."]
 
 
 def test_size_h_returns_content(docs_chroma):
     result = get_doc_source(
-        "verification/rotating_tank/code/SIZE.h", "SIZE.h", _chroma_path=docs_chroma
+        "verification/rotating_tank/code/SIZE.h", "SIZE.h", _db_path=NO_INDEX, _chroma_path=docs_chroma
     )
     assert result is not None
     joined = "\n".join(result["lines"])
@@ -113,7 +120,7 @@ def test_size_h_returns_content(docs_chroma):
 def test_multi_chunk_overlap_stripped(docs_chroma):
     result = get_doc_source(
         "getting_started/getting_started.rst", "Compiling MITgcm",
-        _chroma_path=docs_chroma,
+        _db_path=NO_INDEX, _chroma_path=docs_chroma,
     )
     assert result is not None
     full = "".join(result["lines"])
@@ -122,13 +129,50 @@ def test_multi_chunk_overlap_stripped(docs_chroma):
 
 
 def test_pagination_offset(docs_chroma):
-    full = get_doc_source("pkg/diagnostics.rst", "Overview", _chroma_path=docs_chroma)
-    paged = get_doc_source("pkg/diagnostics.rst", "Overview", offset=1, limit=1, _chroma_path=docs_chroma)
+    full = get_doc_source("pkg/diagnostics.rst", "Overview", _db_path=NO_INDEX, _chroma_path=docs_chroma)
+    paged = get_doc_source("pkg/diagnostics.rst", "Overview", offset=1, limit=1, _db_path=NO_INDEX, _chroma_path=docs_chroma)
     assert paged["lines"] == [full["lines"][1]]
     assert paged["offset"] == 1
     assert paged["total_lines"] == full["total_lines"]
 
 
 def test_pagination_limit(docs_chroma):
-    result = get_doc_source("pkg/diagnostics.rst", "Overview", limit=1, _chroma_path=docs_chroma)
+    result = get_doc_source("pkg/diagnostics.rst", "Overview", limit=1, _db_path=NO_INDEX, _chroma_path=docs_chroma)
     assert len(result["lines"]) == 1
+
+
+# ---------------------------------------------------------------------------
+# doc_sections lookups
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def docs_db(tmp_path_factory):
+    path = tmp_path_factory.mktemp("docs_db") / "index.duckdb"
+    con = connect(path)
+    write_sections(con, [
+        ("pkg/diagnostics.rst", "Overview", "Line one.\nLine two.\nLine three.\n"),
+        ("verification/rotating_tank/code/SIZE.h", "SIZE.h", "      INTEGER sNx\n"),
+    ], KEYS["doc_sections"])
+    con.close()
+    return path
+
+
+def test_doc_sections_page(docs_db, docs_chroma):
+    result = get_doc_source("pkg/diagnostics.rst", "Overview", offset=1, limit=5,
+                            _db_path=docs_db, _chroma_path=docs_chroma)
+    assert result == {"file": "pkg/diagnostics.rst", "section": "Overview", "total_lines": 3,
+                      "offset": 1, "lines": ["Line two.", "Line three."]}
+
+
+def test_doc_sections_miss_does_not_fall_back(docs_db, docs_chroma):
+    """A populated doc_sections table is authoritative: no ChromaDB scan on a miss."""
+    assert get_doc_source("getting_started/getting_started.rst", "Compiling MITgcm",
+                          _db_path=docs_db, _chroma_path=docs_chroma) is None
+
+
+def test_empty_doc_sections_falls_back_to_chunks(tmp_path, docs_chroma):
+    db = tmp_path / "index.duckdb"
+    connect(db).close()
+    result = get_doc_source("pkg/diagnostics.rst", "Overview", _db_path=db, _chroma_path=docs_chroma)
+    assert result["lines"] == ["Line one.", "Line two.", "Line three."]
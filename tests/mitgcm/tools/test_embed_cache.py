@@ -0,0 +1,18 @@
+"""Tests that search-time query embedding goes through the query cache."""
+
+import src.mitgcm.tools as tools
+from src.embed_cache import QueryEmbeddingCache
+
+
+def test_repeated_query_embeds_once(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_embed(text):
+        calls.append(text)
+        return [0.1] * 4
+
+    monkeypatch.setattr(tools, "_QUERY_CACHE", QueryEmbeddingCache(tmp_path / "q.sqlite", "m"))
+    monkeypatch.setattr(tools, "_embed_uncached", fake_embed)
+    tools._embed("zonalWindFile")
+    tools._embed("zonalWindFile")
+    assert calls == ["zonal Wind File"]
@@ -0,0 +1,78 @@
+"""Tests for grep_code in src/mitgcm/tools.py."""
+
+import pytest
+
+import src.mitgcm.tools as tools
+from src.code_search import write_postings
+from src.doc_sections import TEXT, write_sections
+from src.duckdb_bulk import insert_rows
+from src.mitgcm.indexer.schema import KEYS, connect
+
+
+@pytest.fixture(scope="module")
+def grep_db(tmp_path_factory):
+    """Index with two subroutines and a package header, trigram-indexed."""
+    path = tmp_path_factory.mktemp("grep_db") / "index.duckdb"
+    con = connect(path)
+    insert_rows(
+        con, "subroutines", ["id", "name", "file", "package", "line_start", "line_end", "source_text"],
+        [
+            (1, "CG3D", "model/src/cg3d.F", "model", 20, 23,
+             "      SUBROUTINE CG3D( myThid )\n      DO it = 1, cg3dMaxIters\n      ENDDO\n      END\n"),
+            (2, "KPP_CALC", "pkg/kpp/kpp_calc.F", "kpp", 5, 8,
+             "      SUBROUTINE KPP_CALC( myThid )\n#ifdef ALLOW_KPP\n      CALL EXCH_XYZ_RL( KPPviscAz, myThid )\n"
+             "#endif\n"),
+        ],
+        KEYS["subroutines"],
+    )
+    write_sections(con, [
+        ("algorithm/algorithm.rst", "Solver", "cg3dMaxIters bounds the solver.\n"),
+        ("pkg/kpp/KPP_PARAMS.h", "KPP_PARAMS.h", "C     KPP parameters\n      INTEGER cg3dMaxIters\n"),
+        ("pkg/exf/EXF_PARAM.h", "EXF_PARAM.h", "C     EXF\x0c parameters\n      LOGICAL useExfCheckRange\n"),
+    ], KEYS["doc_sections"])
+    write_postings(con, "subroutines", con.execute("SELECT id, source_text FROM subroutines").fetchall())
+    write_postings(con, "headers", con.execute(
+        f"SELECT id, {TEXT} FROM doc_sections WHERE file LIKE '%.h'").fetchall())
+    con.close()
+    return path
+
+
+def test_hits_have_file_lines(grep_db):
+    assert tools.grep_code("cg3dMaxIters", _db_path=grep_db) == [
+        {"file": "model/src/cg3d.F", "line": 21, "text": "      DO it = 1, cg3dMaxIters",
+         "subroutine": "CG3D", "package": "model"},
+        {"file": "pkg/kpp/KPP_PARAMS.h", "line": 2, "text": "      INTEGER cg3dMaxIters",
+         "subroutine": None, "package": "kpp"},
+    ]
+
+
+def test_header_lines_count_newlines_only(grep_db):
+    """A form feed does not start a line: the hit is on line 2 of the file, as grep -n reports it."""
+    assert [(h["file"], h["line"]) for h in tools.grep_code("useExfCheckRange", _db_path=grep_db)] == [
+        ("pkg/exf/EXF_PARAM.h", 2)]
+
+
+def test_regex_and_case(grep_db):
+    assert [h["line"] for h in tools.grep_code(r"CALL EXCH_\w+_RL", _db_path=grep_db)] == [7]
+    assert tools.grep_code("allow_kpp", _db_path=grep_db) == []
+    assert [h["line"] for h in tools.grep_code("allow_kpp", ignore_case=True, _db_path=grep_db)] == [6]
+
+
+def test_package_filter(grep_db):
+    hits = tools.grep_code("myThid|cg3dMaxIters", package="KPP", _db_path=grep_db)
+    assert [(h["file"], h["line"]) for h in hits] == [
+        ("pkg/kpp/kpp_calc.F", 5), ("pkg/kpp/kpp_calc.F", 7), ("pkg/kpp/KPP_PARAMS.h", 2)]
+
+
+def test_max_results(grep_db):
+    assert [h["line"] for h in tools.grep_code("myThid", max_results=2, _db_path=grep_db)] == [20, 5]
+
+
+def test_invalid_pattern(grep_db):
+    with pytest.raises(ValueError, match="invalid regular expression"):
+        tools.grep_code("EXCH_(", _db_path=grep_db)
+
+
+def test_index_without_postings_is_scanned(test_db):
+    assert [(h["subroutine"], h["line"]) for h in tools.grep_code("^END", _db_path=test_db)] == [
+        ("CG3D", 2), ("PRE_CG3D", 2)]
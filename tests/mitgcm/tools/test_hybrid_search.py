@@ -0,0 +1,143 @@
+"""Tests for lexical and hybrid ranking in the MITgcm search tools."""
+
+import pytest
+
+import src.mitgcm.tools as tools
+from src import chroma_pool, full_text
+from src.doc_sections import write_sections
+from src.embed_cache import QueryEmbeddingCache
+from src.mitgcm.embedder.store import COLLECTION_NAME
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.mitgcm.verification_indexer.files import write_files
+
+
+@pytest.fixture(scope="module")
+def fts_db(tmp_path_factory):
+    """Index with subroutines, doc sections and verification files, BM25-indexed."""
+    path = tmp_path_factory.mktemp("fts_db") / "index.duckdb"
+    con = connect(path)
+    con.executemany(
+        "INSERT INTO subroutines (id, name, file, package, line_start, line_end, source_text) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (1, "CG3D", "model/src/cg3d.F", "model", 1, 90, "      SUBROUTINE CG3D\n      DO it = 1, cg3dMaxIters\n"),
+            (2, "INI_PARMS", "model/src/ini_parms.F", "model", 1, 900, "      NAMELIST /PARM02/ cg3dMaxIters\n"),
+            (3, "CALC_GW", "model/src/calc_gw.F", "model", 1, 200, "C     vertical momentum tendency\n"),
+        ],
+    )
+    write_sections(con, [
+        ("phys_pkgs/diagnostics.rst", "Usage", "Each field is filled by DIAGNOSTICS_FILL.\n"),
+        ("algorithm/algorithm.rst", "Time stepping", "The Adams-Bashforth scheme.\n"),
+    ], KEYS["doc_sections"])
+    write_files(con, [
+        ("verification/tutorial_global_oce_latlon/input/data", "tutorial_global_oce_latlon",
+         " &PARM03\n pickupSuff='ckptA',\n"),
+        ("verification/exp2/input/data", "exp2", " &PARM01\n viscAh=4.E2,\n"),
+    ], KEYS["verification_files"])
+    built = [
+        full_text.build_index(con, "subroutines", "id", ["name", "source_text"]),
+        full_text.build_index(con, "doc_sections", "section_key", ["file", "section", "lines"]),
+        full_text.build_index(con, "verification_files", "file_key", ["file", "lines"]),
+    ]
+    con.close()
+    if not all(built):
+        pytest.skip("DuckDB fts extension unavailable")
+    return path
+
+
+class _Collection:
+    """Stands in for a ChromaDB collection; returns fixed results."""
+
+    def __init__(self, metadatas, documents=None):
+        self.metadatas = metadatas
+        self.documents = documents or [""] * len(metadatas)
+
+    def query(self, query_embeddings, n_results, include):
+        n = len(self.metadatas)
+        return {"metadatas": [self.metadatas], "distances": [[i / n for i in range(n)]],
+                "documents": [self.documents]}
+
+
+@pytest.fixture
+def no_embedding(monkeypatch):
+    def fail(query):
+        raise AssertionError("lexical search must not embed the query")
+
+    monkeypatch.setattr(tools, "_embed", fail)
+
+
+def test_search_code_lexical_finds_identifier(fts_db, no_embedding):
+    results = tools.search_code("cg3dMaxIters", mode="lexical", _db_path=fts_db)
+    assert {r["name"] for r in results} == {"CG3D", "INI_PARMS"}
+    assert set(results[0]) == {"id", "name", "file", "package", "line_start", "line_end", "match"}
+    assert results[0]["match"] == "lexical"
+
+
+def test_search_docs_lexical(fts_db, no_embedding):
+    assert tools.search_docs("DIAGNOSTICS_FILL", mode="lexical", _db_path=fts_db) == [
+        {"file": "phys_pkgs/diagnostics.rst", "section": "Usage",
+         "snippet": "Each field is filled by DIAGNOSTICS_FILL."}]
+
+
+def test_search_verification_lexical(fts_db, no_embedding):
+    results = tools.search_verification("pickupSuff", mode="lexical", _db_path=fts_db)
+    assert [(r["experiment"], r["filename"]) for r in results] == [("tutorial_global_oce_latlon", "data")]
+    assert "pickupSuff" in results[0]["snippet"]
+
+
+def test_search_code_hybrid_fuses_both_rankings(fts_db, monkeypatch):
+    monkeypatch.setattr(tools, "_embed", lambda query: [0.0])
+    monkeypatch.setattr(tools, "get_collection", lambda name, path: _Collection(
+        [{"db_id": 3}, {"db_id": 2}]))
+    names = [r["name"] for r in tools.search_code("cg3dMaxIters", top_k=3, _db_path=fts_db)]
+    # INI_PARMS is ranked by both paths, CG3D only lexically, CALC_GW only by vector
+    assert names[0] == "INI_PARMS"
+    assert set(names) == {"INI_PARMS", "CG3D", "CALC_GW"}
+
+
+def test_hybrid_without_full_text_index_is_vector_ranking(test_db, monkeypatch):
+    monkeypatch.setattr(tools, "_embed", lambda query: [0.0])
+    monkeypatch.setattr(tools, "get_collection", lambda name, path: _Collection(
+        [{"db_id": 2}, {"db_id": 1}, {"db_id": 2}]))
+    hybrid = tools.search_code("conjugate gradient", _db_path=test_db)
+    assert [(r["name"], r["match"]) for r in hybrid] == [("PRE_CG3D", "hybrid"), ("CG3D", "hybrid")]
+    vector = tools.search_code("conjugate gradient", mode="vector", _db_path=test_db)
+    assert [r["name"] for r in vector] == ["PRE_CG3D", "CG3D"]
+
+
+def test_index_without_pooled_collection_falls_back_to_chunks(test_db, tmp_path, monkeypatch):
+    """An index embedded before the pooled collection existed is searched by chunk and left unchanged."""
+    chromadb = pytest.importorskip("chromadb")
+    chroma_path = tmp_path / "chroma"
+    client = chromadb.PersistentClient(path=str(chroma_path))
+    client.get_or_create_collection(COLLECTION_NAME, metadata={"hnsw:space": "cosine"}).add(
+        ids=["1_0", "1_1", "2_0"],
+        embeddings=[[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]],
+        metadatas=[{"db_id": 1}, {"db_id": 1}, {"db_id": 2}],
+    )
+    monkeypatch.setattr(tools, "embed_texts", lambda texts: [[0.1, 1.0] for _ in texts])
+    monkeypatch.setattr(tools, "_QUERY_CACHE", QueryEmbeddingCache(None, "test"))
+    try:
+        results = tools.search_code("pressure", top_k=2, mode="vector", _db_path=test_db, _chroma_path=chroma_path)
+        empty = tools.search_code("pressure", mode="vector", _db_path=test_db, _chroma_path=tmp_path / "none")
+    finally:
+        chroma_pool.close(chroma_path)
+        chroma_pool.close(tmp_path / "none")
+    assert [r["name"] for r in results] == ["PRE_CG3D", "CG3D"]
+    assert empty == []
+    assert [c.name for c in client.list_collections()] == [COLLECTION_NAME]
+
+
+def test_search_docs_vector_mode_without_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(tools, "_embed", lambda query: [0.0])
+    monkeypatch.setattr(tools, "get_collection", lambda name, path: _Collection(
+        [{"file": "a.rst", "section": "A"}, {"file": "a.rst", "section": "A"}, {"file": "b.rst", "section": "B"}],
+        ["[a.rst] A\nfirst", "[a.rst] A\nsecond", "[b.rst] B\nthird"]))
+    results = tools.search_docs("anything", _db_path=tmp_path / "missing.duckdb")
+    assert results == [{"file": "a.rst", "section": "A", "snippet": "first"},
+                       {"file": "b.rst", "section": "B", "snippet": "third"}]
+
+
+def test_unknown_mode_rejected(test_db):
+    with pytest.raises(ValueError, match="mode"):
+        tools.search_code("x", mode="bm25", _db_path=test_db)
@@ -0,0 +1,48 @@
+"""Tests for search_all: one embedding, every collection, one calibrated ranking."""
+
+import src.mitgcm.tools as tools
+from src.mitgcm.embedder.store import DOCS_COLLECTION_NAME, VERIFICATION_COLLECTION_NAME
+
+
+class _Fixed:
+    """Stands in for a ChromaDB collection; returns the same hits for any query."""
+
+    def __init__(self, metadatas, distances):
+        self.metadatas = metadatas
+        self.distances = distances
+
+    def query(self, query_embeddings, n_results, include):
+        return {"metadatas": [self.metadatas[:n_results]], "distances": [self.distances[:n_results]],
+                "documents": [["[f] s\nbody"] * len(self.metadatas[:n_results])]}
+
+
+_COLLECTIONS = {
+    DOCS_COLLECTION_NAME: _Fixed(
+        [{"file": "a.rst", "section": "A"}, {"file": "a.rst", "section": "A"}, {"file": "b.rst", "section": "B"}],
+        [0.30, 0.31, 0.32]),
+    VERIFICATION_COLLECTION_NAME: _Fixed(
+        [{"experiment": "exp", "filename": "data", "file": "verification/exp/input/data"}], [0.25]),
+}
+
+
+def test_search_all_merges_every_collection(test_db, monkeypatch):
+    embedded = []
+    monkeypatch.setattr(tools, "_embed", lambda q: embedded.append(q) or [0.0])
+    code = _Fixed([{"db_id": 1}, {"db_id": 2}], [0.50, 0.70])
+    monkeypatch.setattr(tools, "get_collection", lambda name, path: _COLLECTIONS.get(name, code))
+    results = tools.search_all("pressure solver", _db_path=test_db)
+    assert embedded == ["pressure solver"]
+    assert [(r["source"], r.get("name") or r.get("section") or r.get("filename")) for r in results] == [
+        ("code", "CG3D"), ("doc", "A"), ("verification", "data"), ("doc", "B"), ("code", "PRE_CG3D")]
+    assert results[0]["package"] == "model" and results[0]["score"] > results[1]["score"]
+
+
+def test_search_all_skips_broken_collection(test_db, monkeypatch):
+    def get_collection(name, path):
+        if name == VERIFICATION_COLLECTION_NAME:
+            raise RuntimeError("not built")
+        return _COLLECTIONS.get(name, _Fixed([], []))
+
+    monkeypatch.setattr(tools, "_embed", lambda q: [0.0])
+    monkeypatch.setattr(tools, "get_collection", get_collection)
+    assert [r["source"] for r in tools.search_all("x", top_k=5, _db_path=test_db)] == ["doc", "doc"]
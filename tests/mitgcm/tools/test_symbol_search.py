@@ -0,0 +1,57 @@
+"""Tests for the exact-symbol fast path in search_code."""
+
+import pytest
+
+import src.mitgcm.tools as tools
+
+
+@pytest.fixture
+def no_embedding(monkeypatch):
+    def fail(*args):
+        raise AssertionError("exact symbol queries must not reach semantic search")
+
+    monkeypatch.setattr(tools, "_embed", fail)
+    monkeypatch.setattr(tools, "get_collection", fail)
+
+
+def test_subroutine_name(test_db, no_embedding):
+    assert tools.search_code("cg3d", _db_path=test_db) == [
+        {"id": 1, "name": "CG3D", "file": "model/src/cg3d.F", "package": "model",
+         "line_start": 1, "line_end": 100, "match": "subroutine"}]
+
+
+def test_namelist_param(test_db, no_embedding):
+    results = tools.search_code(" CG3DMAXITERS ", mode="lexical", _db_path=test_db)
+    assert [(r["name"], r["match"], r["namelist_group"]) for r in results] == [
+        ("CG3D", "namelist_param", "PARM02")]
+
+
+def test_cpp_flag_lists_each_guarded_subroutine_once(test_db, no_embedding):
+    results = tools.search_code("ALLOW_NONHYDROST", _db_path=test_db)
+    assert [(r["name"], r["match"]) for r in results] == [("CG3D", "cpp_flag")]
+    assert "namelist_group" not in results[0]
+
+
+@pytest.mark.parametrize("query", ["NOT_A_SYMBOL", "conjugate gradient solver", "CG3D("])
+def test_other_queries_fall_through(test_db, monkeypatch, query):
+    monkeypatch.setattr(tools, "_embed", lambda q: [0.0])
+    monkeypatch.setattr(tools, "get_collection", lambda name, path: _OneHit())
+    assert [(r["name"], r["match"]) for r in tools.search_code(query, _db_path=test_db)] == [
+        ("PRE_CG3D", "hybrid")]
+
+
+def test_vector_mode_skips_fast_path(test_db, monkeypatch):
+    monkeypatch.setattr(tools, "_embed", lambda q: [0.0])
+    monkeypatch.setattr(tools, "get_collection", lambda name, path: _OneHit())
+    assert [(r["name"], r["match"]) for r in tools.search_code("CG3D", mode="vector", _db_path=test_db)] == [
+        ("PRE_CG3D", "vector")]
+
+
+def test_unknown_mode_rejected_before_lookup(test_db):
+    with pytest.raises(ValueError, match="mode"):
+        tools.search_code("CG3D", mode="exact", _db_path=test_db)
+
+
+class _OneHit:
+    def query(self, query_embeddings, n_results, include):
+        return {"metadatas": [[{"db_id": 2}]], "distances": [[0.1]]}
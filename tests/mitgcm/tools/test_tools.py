@@ -5,10 +5,13 @@ from src.mitgcm.tools import (
     _normalize_query,
     diagnostics_fill_to_source,
     find_subroutines,
+    get_active_cpp_flags,
     get_callees,
     get_callers,
     get_cpp_requirements,
+    get_dead_lines,
     get_package_flags,
+    get_source,
     get_subroutine,
     namelist_to_code,
 )
@@ -79,6 +82,32 @@ def test_get_subroutine_mixed_case(test_db):
     assert result["name"] == "CG3D"
 
 
+def test_get_subroutine_without_source(test_db):
+    result = get_subroutine("CG3D", include_source=False, _db_path=test_db)
+    assert result == {"id": 1, "name": "CG3D", "file": "model/src/cg3d.F", "package": "model",
+                      "line_start": 1, "line_end": 100}
+
+
+# ---------------------------------------------------------------------------
+# get_source
+# ---------------------------------------------------------------------------
+
+
+def test_get_source_page(test_db):
+    result = get_source("cg3d", offset=1, limit=5, _db_path=test_db)
+    assert result == {"name": "CG3D", "total_lines": 2, "offset": 1, "lines": ["END"]}
+
+
+def test_get_source_offset_past_end(test_db):
+    result = get_source("CG3D", offset=10, _db_path=test_db)
+    assert result["total_lines"] == 2
+    assert result["lines"] == []
+
+
+def test_get_source_not_found(test_db):
+    assert get_source("NONEXISTENT", _db_path=test_db) is None
+
+
 # ---------------------------------------------------------------------------
 # find_subroutines
 # ---------------------------------------------------------------------------
@@ -216,6 +245,45 @@ def test_get_cpp_requirements_case_insensitive(test_db):
     assert results == ["ALLOW_NONHYDROST"]
 
 
+# ---------------------------------------------------------------------------
+# get_active_cpp_flags / get_dead_lines
+# ---------------------------------------------------------------------------
+
+
+def test_get_active_cpp_flags_nested(test_db):
+    results = get_active_cpp_flags("cg3d", 25, _db_path=test_db)
+    assert [(r["cpp_flag"], r["negated"]) for r in results] == [
+        ("ALLOW_NONHYDROST", False), ("ALLOW_DEBUG", True)]
+    assert results[0]["line_from"] == 10 and results[0]["line_to"] == 60
+
+
+def test_get_active_cpp_flags_unguarded_line(test_db):
+    assert get_active_cpp_flags("CG3D", 5, _db_path=test_db) == []
+
+
+def test_get_active_cpp_flags_not_found(test_db):
+    assert get_active_cpp_flags("NONEXISTENT", 5, _db_path=test_db) == []
+
+
+def test_get_active_cpp_flags_line_out_of_range(test_db):
+    with pytest.raises(ValueError, match="outside"):
+        get_active_cpp_flags("CG3D", 500, _db_path=test_db)
+
+
+def test_get_dead_lines_merges_adjacent_spans(test_db):
+    results = get_dead_lines("allow_nonhydrost", _db_path=test_db)
+    assert [(r["name"], r["line_from"], r["line_to"]) for r in results] == [("CG3D", 10, 70)]
+
+
+def test_get_dead_lines_skips_negated_spans(test_db):
+    results = get_dead_lines("ALLOW_DEBUG", subroutine_name="CG3D", _db_path=test_db)
+    assert [(r["line_from"], r["line_to"]) for r in results] == [(32, 40)]
+
+
+def test_get_dead_lines_other_subroutine(test_db):
+    assert get_dead_lines("ALLOW_NONHYDROST", subroutine_name="PRE_CG3D", _db_path=test_db) == []
+
+
 # ---------------------------------------------------------------------------
 # get_package_flags
 # ---------------------------------------------------------------------------
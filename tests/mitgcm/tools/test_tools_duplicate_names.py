@@ -28,8 +28,10 @@ Desired behaviour (also xfail — fix not yet implemented)
 """
 
 import pytest
-from src.mitgcm.tools import find_subroutines, get_callees, get_callers, get_subroutine
-from src.mitgcm.indexer.schema import connect
+from src.mitgcm.tools import find_subroutines, get_callees, get_callers, get_source, get_subroutine
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.mitgcm.indexer.pipeline import resolve_calls
+from src.name_keys import refresh_keys
 
 
 # ---------------------------------------------------------------------------
@@ -65,6 +67,8 @@ def dup_db(tmp_path_factory):
     for caller_id, callee_name in calls:
         con.execute("INSERT INTO calls (caller_id, callee_name) VALUES (?, ?)", [caller_id, callee_name])
 
+    refresh_keys(con, KEYS)
+    resolve_calls(con)
     con.close()
     return db_path
 
@@ -235,3 +239,39 @@ class TestFindSubroutines:
         results = find_subroutines("SHARED_SUB", _db_path=dup_db)
         for r in results:
             assert "source_text" not in r
+
+
+# ---------------------------------------------------------------------------
+# Index-time call resolution — each call points at one copy
+# ---------------------------------------------------------------------------
+
+
+class TestResolvedCalls:
+    """resolve_calls prefers the copy in the caller's package."""
+
+    def test_callees_report_resolved_copy(self, dup_db):
+        assert get_callees("CALLER_A", _db_path=dup_db) == [
+            {"callee_name": "SHARED_SUB", "line": None, "callee_id": 20, "package": "pkg_a", "candidates": None}]
+        assert get_callees("CALLER_B", _db_path=dup_db)[0]["callee_id"] == 21
+
+    def test_callers_report_which_copy_they_reach(self, dup_db):
+        results = get_callers("SHARED_SUB", _db_path=dup_db)
+        assert {(r["name"], r["callee_id"]) for r in results} == {("CALLER_A", 20), ("CALLER_B", 21)}
+
+    def test_unindexed_callee_is_unresolved(self, dup_db):
+        results = get_callees("SHARED_SUB", package="pkg_b", _db_path=dup_db)
+        assert results == [
+            {"callee_name": "UNIQUE_CALLEE", "line": None, "callee_id": None, "package": None, "candidates": None}]
+
+
+class TestGetSource:
+    """get_source picks a copy like get_subroutine.  dup_db has no line
+    offsets, so these also cover the split-the-text fallback."""
+
+    def test_source_by_package(self, dup_db):
+        result = get_source("SHARED_SUB", package="pkg_b", offset=1, limit=1, _db_path=dup_db)
+        assert result == {"name": "SHARED_SUB", "total_lines": 3, "offset": 1, "lines": ["! pkg_b copy"]}
+
+    def test_ambiguous_source_raises(self, dup_db):
+        with pytest.raises(ValueError, match="pass package="):
+            get_source("SHARED_SUB", _db_path=dup_db)
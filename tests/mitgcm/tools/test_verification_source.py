@@ -1,11 +1,19 @@
-"""Tests for get_verification_source using a synthetic ChromaDB fixture."""
+"""Tests for get_verification_source and get_experiment_files: verification_files
+lookups, and the ChromaDB chunk fallback."""
+
+from pathlib import Path
 
 import pytest
 import chromadb
 
-from src.mitgcm.tools import get_verification_source
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.mitgcm.tools import get_experiment_files, get_verification_source
+from src.mitgcm.verification_indexer.files import write_files
 from src.embed_utils import OVERLAP
 
+# The chunk-fallback tests run without a DuckDB index.
+NO_INDEX = Path("no-such-dir/index.duckdb")
+
 
 @pytest.fixture(scope="module")
 def vrf_chroma(tmp_path_factory):
@@ -64,14 +72,14 @@ def vrf_chroma(tmp_path_factory):
 
 def test_returns_none_for_unknown(vrf_chroma):
     result = get_verification_source(
-        "verification/no_such_exp/input/data", _chroma_path=vrf_chroma
+        "verification/no_such_exp/input/data", _db_path=NO_INDEX, _chroma_path=vrf_chroma
     )
     assert result is None
 
 
 def test_single_chunk_required_keys(vrf_chroma):
     result = get_verification_source(
-        "verification/exp1/input/data", _chroma_path=vrf_chroma
+        "verification/exp1/input/data", _db_path=NO_INDEX, _chroma_path=vrf_chroma
     )
     assert result is not None
     for key in ("file", "total_lines", "offset", "lines"):
@@ -80,14 +88,14 @@ def test_single_chunk_required_keys(vrf_chroma):
 
 def test_single_chunk_file_echoed(vrf_chroma):
     result = get_verification_source(
-        "verification/exp1/input/data", _chroma_path=vrf_chroma
+        "verification/exp1/input/data", _db_path=NO_INDEX, _chroma_path=vrf_chroma
     )
     assert result["file"] == "verification/exp1/input/data"
 
 
 def test_single_chunk_header_stripped(vrf_chroma):
     result = get_verification_source(
-        "verification/exp1/input/data", _chroma_path=vrf_chroma
+        "verification/exp1/input/data", _db_path=NO_INDEX, _chroma_path=vrf_chroma
     )
     joined = "\n".join(result["lines"])
     assert "[verification/exp1" not in joined
@@ -96,7 +104,7 @@ def test_single_chunk_header_stripped(vrf_chroma):
 
 def test_size_h_content(vrf_chroma):
     result = get_verification_source(
-        "verification/exp1/code/SIZE.h", _chroma_path=vrf_chroma
+        "verification/exp1/code/SIZE.h", _db_path=NO_INDEX, _chroma_path=vrf_chroma
     )
     assert result is not None
     joined = "\n".join(result["lines"])
@@ -106,7 +114,7 @@ def test_size_h_content(vrf_chroma):
 
 def test_multi_chunk_overlap_stripped(vrf_chroma):
     result = get_verification_source(
-        "verification/exp2/input/data", _chroma_path=vrf_chroma
+        "verification/exp2/input/data", _db_path=NO_INDEX, _chroma_path=vrf_chroma
     )
     assert result is not None
     full = "".join(result["lines"])
@@ -115,10 +123,10 @@ def test_multi_chunk_overlap_stripped(vrf_chroma):
 
 def test_pagination_offset(vrf_chroma):
     full = get_verification_source(
-        "verification/exp1/input/data", _chroma_path=vrf_chroma
+        "verification/exp1/input/data", _db_path=NO_INDEX, _chroma_path=vrf_chroma
     )
     paged = get_verification_source(
-        "verification/exp1/input/data", offset=1, limit=1, _chroma_path=vrf_chroma
+        "verification/exp1/input/data", offset=1, limit=1, _db_path=NO_INDEX, _chroma_path=vrf_chroma
     )
     assert paged["lines"] == [full["lines"][1]]
     assert paged["offset"] == 1
@@ -127,6 +135,66 @@ def test_pagination_offset(vrf_chroma):
 
 def test_pagination_limit(vrf_chroma):
     result = get_verification_source(
-        "verification/exp1/input/data", limit=1, _chroma_path=vrf_chroma
+        "verification/exp1/input/data", limit=1, _db_path=NO_INDEX, _chroma_path=vrf_chroma
     )
     assert len(result["lines"]) == 1
+
+
+def test_experiment_files_from_chunks(vrf_chroma):
+    result = get_experiment_files("exp1", _db_path=NO_INDEX, _chroma_path=vrf_chroma)
+    assert result["experiment"] == "exp1"
+    assert [f["file"] for f in result["files"]] == [
+        "verification/exp1/code/SIZE.h", "verification/exp1/input/data",
+    ]
+    assert result["files"][1]["lines"] == [" &PARM01", " tRef=10*0.,", " /"]
+
+
+# ---------------------------------------------------------------------------
+# verification_files lookups
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def vrf_db(tmp_path_factory):
+    path = tmp_path_factory.mktemp("vrf_db") / "index.duckdb"
+    con = connect(path)
+    write_files(con, [
+        ("verification/exp1/input/data", "exp1", " &PARM01\n tRef=10*0.,\n /\n"),
+        ("verification/exp1/code/SIZE.h", "exp1", "      INTEGER sNx\n      PARAMETER ( sNx = 20 )\n"),
+        ("verification/Exp_2/input/data", "Exp_2", "A\nB\nC\n"),
+    ], KEYS["verification_files"])
+    con.close()
+    return path
+
+
+def test_file_page_from_duckdb(vrf_db, vrf_chroma):
+    result = get_verification_source("verification/exp1/input/data", offset=1, limit=1,
+                                     _db_path=vrf_db, _chroma_path=vrf_chroma)
+    assert result == {"file": "verification/exp1/input/data", "total_lines": 3,
+                      "offset": 1, "lines": [" tRef=10*0.,"]}
+
+
+def test_file_miss_does_not_fall_back(vrf_db, vrf_chroma):
+    """A populated verification_files table is authoritative."""
+    assert get_verification_source("verification/exp2/input/data",
+                                   _db_path=vrf_db, _chroma_path=vrf_chroma) is None
+
+
+def test_experiment_files_from_duckdb(vrf_db, vrf_chroma):
+    result = get_experiment_files("exp1", limit=2, _db_path=vrf_db, _chroma_path=vrf_chroma)
+    assert result == {"experiment": "exp1", "files": [
+        {"file": "verification/exp1/code/SIZE.h", "filename": "SIZE.h", "total_lines": 2,
+         "lines": ["      INTEGER sNx", "      PARAMETER ( sNx = 20 )"]},
+        {"file": "verification/exp1/input/data", "filename": "data", "total_lines": 3,
+         "lines": [" &PARM01", " tRef=10*0.,"]},
+    ]}
+
+
+def test_experiment_name_case_insensitive(vrf_db, vrf_chroma):
+    result = get_experiment_files("exp_2", _db_path=vrf_db, _chroma_path=vrf_chroma)
+    assert result["experiment"] == "Exp_2"
+    assert result["files"][0]["lines"] == ["A", "B", "C"]
+
+
+def test_unknown_experiment(vrf_db, vrf_chroma):
+    assert get_experiment_files("no_such_exp", _db_path=vrf_db, _chroma_path=vrf_chroma) is None
@@ -0,0 +1,61 @@
+"""Tests for the verification_files table (src/mitgcm/verification_indexer/files.py)."""
+
+import pytest
+
+from src.mitgcm.indexer.schema import KEYS, connect
+from src.mitgcm.verification_indexer.files import files_stored, read_experiment, read_file, write_files
+
+
+@pytest.fixture
+def con(tmp_path):
+    con = connect(tmp_path / "index.duckdb")
+    yield con
+    con.close()
+
+
+def test_empty_table(con):
+    assert not files_stored(con)
+    assert read_file(con, "verification/exp1/input/data", 0, 10) is None
+    assert read_experiment(con, "exp1", 10) is None
+
+
+def test_write_replaces_previous_files(con):
+    write_files(con, [("verification/exp1/input/data", "exp1", "a\n")], KEYS["verification_files"])
+    n = write_files(con, [("verification/exp2/input/data", "exp2", "b\n")], KEYS["verification_files"])
+    assert n == 1
+    assert files_stored(con)
+    assert read_file(con, "verification/exp1/input/data", 0, 10) is None
+    assert read_file(con, "verification/exp2/input/data", 0, 10)["lines"] == ["b"]
+
+
+def test_page_past_end(con):
+    write_files(con, [("verification/exp1/input/data", "exp1", "a\nb\n")], KEYS["verification_files"])
+    page = read_file(con, "verification/exp1/input/data", 5, 10)
+    assert page["total_lines"] == 2
+    assert page["lines"] == []
+
+
+def test_lookups_use_index(con):
+    write_files(con, [(f"verification/exp{i}/input/data", f"exp{i}", "line\n" * 20) for i in range(5000)],
+                KEYS["verification_files"])
+    for column, value in (("file_key", "verification/exp42/input/data"), ("experiment_key", "exp42")):
+        plan = con.execute(
+            f"EXPLAIN ANALYZE SELECT lines FROM verification_files WHERE {column} = ?", [value]
+        ).fetchall()[0][1]
+        assert "Index Scan" in plan
+
+
+def test_legacy_index_without_table(tmp_path):
+    import duckdb
+
+    con = duckdb.connect(str(tmp_path / "old.duckdb"))
+    assert read_file(con, "verification/exp1/input/data", 0, 10) is None
+    assert read_experiment(con, "exp1", 10) is None
+    assert not files_stored(con)
+
+
+def test_experiment_comes_from_its_column(con):
+    # A path that does not follow verification/<experiment>/... still reports its stored experiment.
+    write_files(con, [("tutorials/Rotating_Tank/input/data", "Rotating_Tank", "a\nb\n")], KEYS["verification_files"])
+    assert read_experiment(con, "rotating_tank", 1) == {"experiment": "Rotating_Tank", "files": [
+        {"file": "tutorials/Rotating_Tank/input/data", "filename": "data", "total_lines": 2, "lines": ["a"]}]}
@@ -0,0 +1,57 @@
+"""Tests for src/name_keys.py and the key columns of the code-graph schemas."""
+
+import duckdb
+import pytest
+
+from src.duckdb_bulk import insert_rows
+from src.mitgcm.indexer import schema
+from src.name_keys import key_ddl, refresh_keys
+
+KEYS = {"t": {"name_key": "upper(name)", "field_key": "upper(trim(field))"}}
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t (id INTEGER, name TEXT, field TEXT)")
+    yield con
+    con.close()
+
+
+def test_key_ddl_adds_columns_to_existing_table(con):
+    con.execute("INSERT INTO t VALUES (1, 'Cg3d', 'THETA  ')")
+    con.execute(key_ddl(KEYS))
+    con.execute(key_ddl(KEYS))  # idempotent
+    cols = [r[0] for r in con.execute("DESCRIBE t").fetchall()]
+    assert cols == ["id", "name", "field", "name_key", "field_key"]
+    assert {r[0] for r in con.execute("SELECT index_name FROM duckdb_indexes()").fetchall()} == {
+        "t_name_key", "t_field_key"}
+
+
+def test_refresh_keys_fills_missing_keys_only(con):
+    con.execute(key_ddl(KEYS))
+    con.execute("INSERT INTO t (id, name, field) VALUES (1, 'Cg3d', 'THETA  ')")
+    con.execute("INSERT INTO t VALUES (2, 'x', 'y', 'KEEP', 'KEEP')")
+    refresh_keys(con, KEYS)
+    assert con.execute("SELECT id, name_key, field_key FROM t ORDER BY id").fetchall() == [
+        (1, "CG3D", "THETA"), (2, "KEEP", "KEEP")]
+
+
+def test_insert_rows_computes_keys_in_key_order(con):
+    con.execute(key_ddl(KEYS))
+    insert_rows(con, "t", ["id", "name", "field"], [(1, "b", "f "), (2, "A", "g"), (3, "c", "h")], KEYS["t"])
+    assert con.execute("SELECT id, name_key, field_key FROM t").fetchall() == [
+        (2, "A", "G"), (1, "B", "F"), (3, "C", "H")]
+
+
+def test_name_lookup_uses_index(tmp_path):
+    con = schema.connect(tmp_path / "index.duckdb")
+    insert_rows(
+        con, "subroutines", ["id", "name", "package"],
+        [(i, f"Sub_{i}", "model") for i in range(5000)], schema.KEYS["subroutines"],
+    )
+    plan = con.execute(
+        "EXPLAIN ANALYZE SELECT id FROM subroutines WHERE name_key = upper(?)", ["sub_42"]
+    ).fetchall()[0][1]
+    con.close()
+    assert "Index Scan" in plan
@@ -0,0 +1,93 @@
+"""Tests for src/pooled_vectors.py against real ChromaDB collections."""
+
+import chromadb
+import numpy as np
+import pytest
+
+from src import pooled_vectors
+
+
+def _unit(*xs):
+    v = np.asarray(xs, dtype=float)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+@pytest.fixture
+def collections(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+    make = lambda name: client.get_or_create_collection(name, metadata={"hnsw:space": "cosine"})
+    return make("chunks"), make("pooled")
+
+
+def _add(chunks, db_id, vectors, source_hash="h"):
+    chunks.upsert(
+        ids=[f"{db_id}_{i}" for i in range(len(vectors))],
+        embeddings=vectors,
+        metadatas=[{"db_id": db_id, "name": f"SUB{db_id}", "chunk_index": i, "n_chunks": len(vectors),
+                    "source_hash": source_hash} for i in range(len(vectors))],
+    )
+
+
+def test_mean_vector_is_unit_length():
+    mean = pooled_vectors.mean_vector([[2.0, 0.0], [0.0, 0.5]])
+    assert mean == pytest.approx(_unit(1, 1))
+
+
+def test_sync_pools_new_changed_and_drops_removed(collections):
+    chunks, pooled = collections
+    _add(chunks, 1, [_unit(1, 0, 0), _unit(0, 1, 0)])
+    _add(chunks, 2, [_unit(0, 0, 1)])
+    assert pooled_vectors.sync(chunks, pooled, ["name"]) == 2
+    got = pooled.get(ids=["sub_1"], include=["embeddings", "metadatas"])
+    assert got["metadatas"][0] == {"db_id": 1, "n_chunks": 2, "source_hash": "h", "name": "SUB1"}
+    assert list(got["embeddings"][0]) == pytest.approx(_unit(1, 1, 0))
+
+    assert pooled_vectors.sync(chunks, pooled, ["name"]) == 0
+    chunks.delete(where={"db_id": {"$in": [1, 2]}})  # as the embedder does for changed sources
+    _add(chunks, 1, [_unit(1, 0, 0)], source_hash="h2")
+    assert pooled_vectors.sync(chunks, pooled, ["name"]) == 1
+    assert pooled.get(include=["metadatas"])["metadatas"] == [
+        {"db_id": 1, "n_chunks": 1, "source_hash": "h2", "name": "SUB1"}]
+
+
+def test_search_returns_n_distinct_subroutines(collections):
+    chunks, pooled = collections
+    # One long routine whose 30 chunks all sit closer to the query than any other routine
+    _add(chunks, 1, [_unit(1, 0.01 * i, 0) for i in range(30)])
+    for db_id in range(2, 6):
+        _add(chunks, db_id, [_unit(1, 1 + db_id, 0)])
+    pooled_vectors.sync(chunks, pooled, [])
+    query = _unit(1, 0, 0)
+    by_chunk = chunks.query(query_embeddings=[query], n_results=20, include=["metadatas"])["metadatas"][0]
+    assert {m["db_id"] for m in by_chunk} == {1}
+    assert list(pooled_vectors.search(pooled, chunks, query, 3)) == [1, 2, 3]
+
+
+def test_refine_reorders_by_best_chunk(collections):
+    chunks, pooled = collections
+    _add(chunks, 1, [_unit(1, 0, 0)] + [_unit(0, 0, 1)] * 3)  # one chunk on topic, the rest not
+    _add(chunks, 2, [_unit(1, 0.9, 0.2)])
+    pooled_vectors.sync(chunks, pooled, [])
+    query = _unit(1, 0, 0)
+    assert list(pooled_vectors.search(pooled, chunks, query, 2, refine=False)) == [2, 1]
+    refined = pooled_vectors.search(pooled, chunks, query, 2)
+    assert list(refined) == [1, 2]
+    assert refined[1] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_search_empty_pooled_collection(collections):
+    chunks, pooled = collections
+    _add(chunks, 1, [_unit(1, 0)])
+    assert pooled_vectors.search(pooled, chunks, _unit(1, 0), 5) == {}
+
+
+def test_search_many_matches_search(collections):
+    chunks, pooled = collections
+    _add(chunks, 1, [_unit(1, 0, 0), _unit(0, 0, 1)])
+    _add(chunks, 2, [_unit(0, 1, 0)])
+    _add(chunks, 3, [_unit(1, 1, 0)])
+    pooled_vectors.sync(chunks, pooled, [])
+    queries = [_unit(1, 0, 0), _unit(0, 1, 0.1), _unit(0, 0, 1)]
+    assert pooled_vectors.search_many(pooled, chunks, queries, 2) == [
+        pooled_vectors.search(pooled, chunks, q, 2) for q in queries]
+    assert pooled_vectors.search_many(pooled, chunks, [], 2) == []
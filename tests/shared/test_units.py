@@ -0,0 +1,13 @@
+"""Tests for the shared pint registry in src/shared/units.py."""
+
+from src.shared import check_scales, translate_lab_params, units
+
+
+def test_registry_is_built_once():
+    assert units.registry() is units.registry()
+
+
+def test_scales_and_translate_share_the_registry():
+    translate_lab_params(Lx=1.0, Ly=1.0, depth=0.3, Omega=0.5)
+    check_scales(Lx=1.0, Ly=1.0, depth=0.3, Omega=0.5)
+    assert units._registry is units.registry()
@@ -0,0 +1,64 @@
+"""Tests for src/source_lines.py — pages must match slicing splitlines()."""
+
+import duckdb
+import pytest
+
+from src.source_lines import SOURCE_IF_SHORT, page, sync_source_lines
+
+TEXTS = [
+    "",
+    "no newline",
+    "SUBROUTINE A\n  x = 1\nEND\n",
+    "C windows\r\nline two\r\n\r\nlast",
+    "form\x0cfeed\rcarriage\x85nel sep\n",
+    "      x = 'é'\n" * 30,
+]
+
+
+def _db() -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect()
+    con.execute("CREATE TABLE subroutines (id INTEGER PRIMARY KEY, source_text TEXT, n_lines INTEGER)")
+    con.execute("CREATE TABLE source_lines (subroutine_id INTEGER, line_no INTEGER, line TEXT)")
+    con.executemany("INSERT INTO subroutines (id, source_text) VALUES (?, ?)", list(enumerate(TEXTS)))
+    return con
+
+
+@pytest.mark.parametrize("offset, limit", [(0, 100), (0, 1), (1, 2), (2, 100), (29, 5), (40, 10), (0, 0), (-3, 2)])
+def test_pages_match_splitlines(offset, limit):
+    con = _db()
+    unsynced = [page(con, i, None, text, offset, limit) for i, text in enumerate(TEXTS)]
+    sync_source_lines(con)
+    n_lines = dict(con.execute("SELECT id, n_lines FROM subroutines").fetchall())
+    for i, text in enumerate(TEXTS):
+        lines = text.splitlines()
+        expected = (len(lines), lines[max(offset, 0): max(offset, 0) + limit])
+        assert page(con, i, n_lines[i], None, offset, limit) == expected
+        assert page(con, i, n_lines[i], text, offset, limit) == expected
+        assert unsynced[i] == expected
+
+
+def test_source_only_selected_below_short_lines():
+    con = _db()
+    sync_source_lines(con)
+    con.execute("UPDATE subroutines SET n_lines = 10000 WHERE id = 5")
+    rows = dict(con.execute(f"SELECT id, {SOURCE_IF_SHORT} FROM subroutines").fetchall())
+    assert rows[2] == TEXTS[2]
+    assert rows[5] is None
+
+
+def test_sync_fills_only_missing_rows():
+    con = _db()
+    assert sync_source_lines(con) == len(TEXTS)
+    assert sync_source_lines(con) == 0
+    assert con.execute("SELECT n_lines FROM subroutines WHERE id = 2").fetchone()[0] == 3
+    assert con.execute("SELECT count(*) FROM source_lines").fetchone()[0] == sum(len(t.splitlines()) for t in TEXTS)
+
+
+def test_sync_drops_stale_lines():
+    con = _db()
+    sync_source_lines(con)
+    con.execute("DELETE FROM subroutines WHERE id = 5")
+    con.execute("UPDATE subroutines SET source_text = 'one\ntwo', n_lines = NULL WHERE id = 2")
+    assert sync_source_lines(con) == 1
+    assert con.execute("SELECT count(*) FROM source_lines WHERE subroutine_id = 5").fetchone()[0] == 0
+    assert page(con, 2, 2, None, 0, 10) == (2, ["one", "two"])
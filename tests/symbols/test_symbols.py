@@ -0,0 +1,58 @@
+"""Tests for src/symbols.py."""
+
+from pathlib import Path
+
+from src import symbols
+
+
+def _table():
+    return symbols.SymbolTable({
+        "subroutine": symbols.group([("CG3D", 1, "CG3D"), ("CG3D", 7, "CG3D"), (None, 9, "ORPHAN")], ("id", "name")),
+        "namelist_param": symbols.group([("CG3DMAXITERS", 1, "CG3D")], ("id", "name")),
+        "cpp_flag": symbols.group([("CG3D", 3, "USES_FLAG")], ("id", "name")),
+    })
+
+
+def test_group_keeps_row_order_and_drops_null_keys():
+    assert symbols.group([("A", 1), ("B", 2), ("A", 3), (None, 4)], ("id",)) == {
+        "A": [{"id": 1}, {"id": 3}], "B": [{"id": 2}]}
+
+
+def test_lookup_is_case_insensitive_and_tags_kind():
+    assert _table().lookup(" cg3dMaxIters ", 5) == [{"id": 1, "name": "CG3D", "match": "namelist_param"}]
+
+
+def test_lookup_orders_kinds_by_priority_and_limits():
+    table = _table()
+    assert [(r["id"], r["match"]) for r in table.lookup("cg3d", 5)] == [
+        (1, "subroutine"), (7, "subroutine"), (3, "cpp_flag")]
+    assert len(table.lookup("CG3D", 2)) == 2
+
+
+def test_lookup_returns_copies():
+    table = _table()
+    table.lookup("CG3D", 5)[0]["id"] = 99
+    assert table.lookup("CG3D", 1)[0]["id"] == 1
+
+
+def test_non_identifiers_and_unknown_symbols_miss():
+    table = _table()
+    for query in ["", "CG3D solver", "CG3D()", "3DCG", "NOT_KNOWN", "ORPHAN"]:
+        assert table.lookup(query, 5) == []
+
+
+def test_get_table_loads_once_per_path(tmp_path):
+    loads = []
+
+    def load(path):
+        loads.append(path)
+        return _table()
+
+    symbols.clear()
+    first = symbols.get_table(tmp_path / "a.duckdb", load)
+    assert symbols.get_table(Path(str(tmp_path / "a.duckdb")), load) is first
+    symbols.get_table(tmp_path / "b.duckdb", load)
+    assert len(loads) == 2
+    symbols.clear()
+    symbols.get_table(tmp_path / "a.duckdb", load)
+    assert len(loads) == 3
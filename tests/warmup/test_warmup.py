@@ -0,0 +1,146 @@
+"""Tests for the background warm-up in src/warmup.py."""
+
+import threading
+
+import chromadb
+import pytest
+
+from src import chroma_pool, embed_backend, warmup
+
+
+class _FlakyBackend:
+    """Fails the first `failures` embed calls, as Ollama does while it starts."""
+
+    name = "flaky"
+    model_id = "flaky"
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("not up yet")
+        return [[1.0, 0.0] for _ in texts]
+
+
+@pytest.fixture()
+def backend(monkeypatch):
+    monkeypatch.setattr(warmup, "_RETRY_S", 0.01)
+    yield
+    embed_backend.set_backend(None)
+
+
+def test_steps_run_in_order_and_are_timed(backend):
+    embed_backend.set_backend(_FlakyBackend(0))
+    order = []
+    w = warmup.WarmUp()
+    w.start({"a": lambda: order.append("a"), "b": lambda: order.append("b")}).join()
+
+    status = w.status()
+    assert order == ["a", "b"]
+    assert status["state"] == "ready" and status["ready"] is True
+    assert [s["name"] for s in status["steps"]] == ["a", "b"]
+    assert all(s["state"] == "done" and s["ms"] >= 0 for s in status["steps"])
+    assert status["embed_backend"] == "flaky"
+
+
+def test_failed_step_degrades_but_the_rest_run(backend):
+    embed_backend.set_backend(_FlakyBackend(0))
+    ran = []
+
+    def broken():
+        raise FileNotFoundError("no index")
+
+    w = warmup.WarmUp()
+    w.start({"broken": broken, "after": lambda: ran.append(True)}).join()
+
+    status = w.status()
+    assert ran == [True]
+    assert status["state"] == "degraded" and status["ready"] is False
+    assert status["steps"][0]["state"] == "failed"
+    assert "no index" in status["steps"][0]["error"]
+
+
+def test_status_while_warming(backend):
+    embed_backend.set_backend(_FlakyBackend(0))
+    release = threading.Event()
+    w = warmup.WarmUp()
+    thread = w.start({"slow": release.wait})
+    try:
+        status = w.status()
+        assert status["state"] == "warming"
+        assert status["steps"][0]["state"] in ("pending", "running")
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_keep_alive_repeats_until_stopped(backend):
+    embed_backend.set_backend(_FlakyBackend(0))
+    pings = threading.Semaphore(0)
+    w = warmup.WarmUp()
+    thread = w.start({}, pings.release, interval_s=0.01)
+    assert pings.acquire(timeout=5) and pings.acquire(timeout=5)
+    w.stop()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert w.status()["keep_alive_error"] is None
+
+
+def test_embed_probe_waits_for_the_backend(backend):
+    flaky = _FlakyBackend(2)
+    embed_backend.set_backend(flaky)
+    warmup.embed_probe(timeout_s=5)
+    assert flaky.calls == 3
+
+
+def test_embed_probe_without_timeout_tries_once(backend):
+    flaky = _FlakyBackend(1)
+    embed_backend.set_backend(flaky)
+    with pytest.raises(ConnectionError):
+        warmup.embed_probe(timeout_s=0)
+    assert flaky.calls == 1
+
+
+def test_page_in_opens_existing_collections_only(tmp_path):
+    path = tmp_path / "chroma"
+    client = chromadb.PersistentClient(path=str(path))
+    client.get_or_create_collection("filled").add(ids=["a"], embeddings=[[1.0, 0.0]])
+    client.get_or_create_collection("empty")
+    try:
+        assert sorted(warmup.page_in(path)) == ["empty", "filled"]
+        assert sorted(c.name for c in client.list_collections()) == ["empty", "filled"]
+        assert chroma_pool.get_collection(path, "filled").count() == 1
+    finally:
+        chroma_pool.close(path)
+
+
+def test_page_in_missing_directory(tmp_path):
+    assert warmup.page_in(tmp_path / "absent") == []
+    assert not (tmp_path / "absent").exists()
+
+
+def test_start_runs_the_steps_once():
+    warm = warmup.WarmUp()
+    calls = []
+    first = warm.start({"step": lambda: calls.append(1)})
+    assert warm.start({"step": lambda: calls.append(2)}) is first
+    first.join(timeout=5)
+    assert calls == [1]
+
+
+def test_after_initialized_starts_on_the_initialized_notification():
+    import asyncio
+
+    from mcp import types
+    from mcp.server.fastmcp import FastMCP
+
+    server = FastMCP("test")
+    started = []
+    warmup.after_initialized(server, lambda: started.append(True))
+    assert started == []
+    handler = server._mcp_server.notification_handlers[types.InitializedNotification]
+    asyncio.run(handler(types.InitializedNotification(method="notifications/initialized")))
+    assert started == [True]